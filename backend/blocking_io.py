@@ -0,0 +1,43 @@
+"""
+블로킹 I/O 실행 모듈
+pymysql 쿼리처럼 이벤트 루프를 멈추는 작업을 제한된 스레드 풀에서 실행합니다.
+
+- DB/파일 작업: 기본 스레드 풀 (동기 `def` 라우트와 공유, BLOCKING_IO_THREADS개)
+- LLM/TTS 호출은 비동기 HTTP 클라이언트(llm_client)를 사용하므로 스레드를 점유하지 않습니다.
+"""
+
+import functools
+import os
+from typing import Any, Callable
+
+import anyio
+import anyio.to_thread
+
+BLOCKING_IO_THREADS = int(os.getenv('BLOCKING_IO_THREADS', '40'))
+
+
+def configure_threadpools():
+    """
+    스레드 풀 크기 설정 (startup 이벤트에서 호출)
+
+    FastAPI는 동기 `def` 라우트를 anyio 기본 스레드 풀에서 실행하므로
+    기본 풀의 크기가 곧 동시에 처리 가능한 DB 요청 수가 됩니다.
+    """
+    anyio.to_thread.current_default_thread_limiter().total_tokens = BLOCKING_IO_THREADS
+    print(f"[INFO] 블로킹 I/O 스레드 풀: {BLOCKING_IO_THREADS}개")
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """DB 쿼리 등 짧은 블로킹 작업을 기본 스레드 풀에서 실행"""
+    return await anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs))
+
+
+def thread_pool_stats() -> dict:
+    """스레드 풀 사용 현황"""
+    default_limiter = anyio.to_thread.current_default_thread_limiter()
+    return {
+        'blocking': {
+            'total': default_limiter.total_tokens,
+            'borrowed': default_limiter.borrowed_tokens,
+        },
+    }
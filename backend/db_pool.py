@@ -0,0 +1,420 @@
+"""
+MySQL 커넥션 풀 모듈
+요청마다 새로 연결(TCP + 인증 핸드셰이크)하던 방식을 대체하여
+일정 수의 연결을 재사용합니다.
+
+- 최대 연결 수 제한 (초과 시 대기, 타임아웃 후 예외)
+- 유휴 연결 재사용 전 헬스 체크 (ping)
+- 유휴 시간 초과 연결 정리 (idle eviction)
+- 최대 수명 초과 연결 교체 (max lifetime recycling)
+- 풀 통계 (checked_out, waiting, created, recycled 등)
+- 요청 단위 쿼리 수 집계 (count_queries)
+- 커밋된 쓰기 대상 테이블 통지 (add_commit_listener, 읽기 캐시 무효화용)
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import pymysql
+
+
+class PoolTimeoutError(Exception):
+    """풀에서 연결을 얻지 못하고 대기 시간이 초과된 경우"""
+
+
+class QueryCounter:
+    """요청 하나에서 실행된 쿼리 수"""
+
+    def __init__(self):
+        self.count = 0
+
+
+# 현재 요청의 QueryCounter (미들웨어에서 설정, 스레드 풀로도 전파됨)
+_current_query_counter: ContextVar[Optional[QueryCounter]] = ContextVar('db_query_counter', default=None)
+
+
+@contextmanager
+def count_queries():
+    """`with count_queries() as counter:` 블록 안에서 실행된 쿼리 수 집계"""
+    counter = QueryCounter()
+    token = _current_query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_query_counter.reset(token)
+
+
+# 쓰기 쿼리의 대상 테이블 추출 (INSERT/REPLACE/UPDATE/DELETE/TRUNCATE/ALTER/DROP)
+_WRITE_TABLE_PATTERN = re.compile(
+    r"^\s*(?:INSERT(?:\s+IGNORE)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+IGNORE)?|DELETE\s+FROM"
+    r"|TRUNCATE(?:\s+TABLE)?|ALTER\s+TABLE|DROP\s+TABLE(?:\s+IF\s+EXISTS)?)\s+`?(\w+)`?",
+    re.IGNORECASE
+)
+
+
+def written_table(query) -> Optional[str]:
+    """쓰기 쿼리면 대상 테이블 이름, 아니면 None"""
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'ignore')
+    match = _WRITE_TABLE_PATTERN.match(query or '')
+    return match.group(1).lower() if match else None
+
+
+class CountingCursor:
+    """execute/executemany 호출 수를 집계하고 쓰기 대상 테이블을 기록하는 커서 래퍼"""
+
+    def __init__(self, conn: "PooledConnection", cursor):
+        self._conn = conn
+        self._cursor = cursor
+
+    def _count(self, query):
+        self._conn._pool._queries += 1
+        counter = _current_query_counter.get()
+        if counter is not None:
+            counter.count += 1
+        table = written_table(query)
+        if table:
+            self._conn._written_tables.add(table)
+
+    def execute(self, query, args=None):
+        self._count(query)
+        return self._cursor.execute(query, args)
+
+    def executemany(self, query, args):
+        self._count(query)
+        return self._cursor.executemany(query, args)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+        return False
+
+
+class PooledConnection:
+    """
+    풀에서 대여한 pymysql 연결 래퍼
+
+    기존 코드의 `conn.close()` 호출을 그대로 유지할 수 있도록
+    close()는 실제 연결을 끊지 않고 풀에 반납합니다.
+    그 외 속성(cursor, commit, rollback ...)은 원본 연결로 위임합니다.
+    """
+
+    def __init__(self, pool: "ConnectionPool", raw, created_at: float):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._released = False
+        self._written_tables: Set[str] = set()  # 커밋 전 쓰기 대상 테이블
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise pymysql.err.InterfaceError(0, "반납된 연결입니다")
+        return getattr(raw, name)
+
+    def cursor(self, cursor=None):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise pymysql.err.InterfaceError(0, "반납된 연결입니다")
+        return CountingCursor(self, raw.cursor(cursor))
+
+    def commit(self):
+        """커밋 후 변경된 테이블을 리스너(읽기 캐시 등)에 통지"""
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise pymysql.err.InterfaceError(0, "반납된 연결입니다")
+        raw.commit()
+        if self._written_tables:
+            tables, self._written_tables = self._written_tables, set()
+            self._pool._notify_commit(tables)
+
+    def rollback(self):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise pymysql.err.InterfaceError(0, "반납된 연결입니다")
+        self._written_tables = set()
+        raw.rollback()
+
+    def close(self):
+        """연결을 풀에 반납 (여러 번 호출해도 안전)"""
+        if self._released:
+            return
+        self._released = True
+        raw, self._raw = self._raw, None
+        self._pool._release(raw, self._created_at)
+
+    def discard(self):
+        """연결을 재사용하지 않고 폐기 (오류가 난 연결 등)"""
+        if self._released:
+            return
+        self._released = True
+        raw, self._raw = self._raw, None
+        self._pool._discard(raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __del__(self):
+        # 반납하지 않고 버려진 연결은 폐기하여 슬롯 누수를 막음
+        try:
+            if not self._released:
+                self.discard()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """스레드 안전한 pymysql 커넥션 풀"""
+
+    def __init__(
+        self,
+        db_config: Dict[str, Any],
+        max_size: int = 10,
+        min_idle: int = 0,
+        acquire_timeout: float = 10.0,
+        idle_timeout: float = 300.0,
+        max_lifetime: float = 1800.0,
+        health_check_interval: float = 30.0,
+        connect_timeout: int = 5,
+    ):
+        """
+        Args:
+            db_config: pymysql.connect()에 전달할 설정
+            max_size: 동시에 열 수 있는 최대 연결 수
+            min_idle: 유휴 정리 시에도 남겨둘 최소 연결 수
+            acquire_timeout: 연결 대기 최대 시간 (초)
+            idle_timeout: 이 시간 이상 사용되지 않은 연결은 닫음 (초)
+            max_lifetime: 생성 후 이 시간이 지난 연결은 교체 (초)
+            health_check_interval: 이 시간 이상 유휴였던 연결은 대여 전 ping (초)
+            connect_timeout: 신규 연결 시 TCP 연결 타임아웃 (초)
+        """
+        self.db_config = dict(db_config)
+        self.db_config.setdefault('connect_timeout', connect_timeout)
+        self.max_size = max(1, max_size)
+        self.min_idle = max(0, min(min_idle, self.max_size))
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+
+        # (raw_conn, created_at, last_used_at)
+        self._idle = deque()
+        self._size = 0  # 유휴 + 대여 중인 연결 수
+        self._cond = threading.Condition(threading.RLock())
+
+        # 통계
+        self._checked_out = 0
+        self._waiting = 0
+        self._created = 0
+        self._recycled = 0
+        self._evicted = 0
+        self._health_check_failures = 0
+        self._acquire_timeouts = 0
+        self._queries = 0  # 근사치 (락 없이 증가)
+
+        self._commit_listeners: List[Callable[[Set[str]], None]] = []
+
+    # ==================== 대여 / 반납 ====================
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledConnection:
+        """
+        연결 대여
+
+        Raises:
+            PoolTimeoutError: timeout 내에 연결을 얻지 못한 경우
+            pymysql.err.OperationalError: 신규 연결 생성 실패
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            with self._cond:
+                while True:
+                    self._evict_idle_locked()
+
+                    # 1. 유휴 연결 재사용 (최근 반납된 것부터)
+                    candidate = None
+                    while self._idle:
+                        raw, created_at, last_used = self._idle.pop()
+                        if self._is_expired(created_at):
+                            self._close_locked(raw)
+                            self._recycled += 1
+                            continue
+                        self._checked_out += 1
+                        if time.monotonic() - last_used < self.health_check_interval:
+                            return PooledConnection(self, raw, created_at)
+                        candidate = (raw, created_at)
+                        break
+                    if candidate:
+                        break
+
+                    # 2. 여유가 있으면 새 연결 생성 (생성 자체는 락 밖에서)
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+
+                    # 3. 가득 찼으면 반납될 때까지 대기
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._acquire_timeouts += 1
+                        raise PoolTimeoutError(
+                            f"DB 커넥션 풀 대기 시간 초과 ({timeout}s, 최대 {self.max_size}개 사용 중)"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+            if not candidate:
+                break
+
+            # 오래 쉰 유휴 연결은 락 밖에서 ping (네트워크 왕복 동안 다른 스레드를 막지 않도록)
+            raw, created_at = candidate
+            if self._ping(raw):
+                return PooledConnection(self, raw, created_at)
+            with self._cond:
+                self._checked_out -= 1
+                self._close_locked(raw)
+                self._health_check_failures += 1
+
+        try:
+            raw = pymysql.connect(**self.db_config)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._created += 1
+            self._checked_out += 1
+        return PooledConnection(self, raw, time.monotonic())
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """`with pool.connection() as conn:` 형태로 사용하는 컨텍스트 매니저"""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            # 커밋되지 않은 트랜잭션은 반납 시 rollback 됨
+            conn.close()
+
+    def _release(self, raw, created_at: float):
+        """대여한 연결 반납 (열린 트랜잭션은 rollback)"""
+        reusable = raw is not None and getattr(raw, 'open', False)
+        if reusable:
+            try:
+                # 읽기만 한 연결도 REPEATABLE READ 스냅샷이 남지 않도록 정리
+                raw.rollback()
+            except Exception:
+                reusable = False
+
+        with self._cond:
+            self._checked_out -= 1
+            if reusable and not self._is_expired(created_at):
+                self._idle.append((raw, created_at, time.monotonic()))
+            else:
+                if reusable:
+                    self._recycled += 1
+                self._close_locked(raw)
+            self._cond.notify()
+
+    def _discard(self, raw):
+        with self._cond:
+            self._checked_out -= 1
+            self._close_locked(raw)
+            self._cond.notify()
+
+    def add_commit_listener(self, listener: Callable[[Set[str]], None]):
+        """쓰기 트랜잭션이 커밋될 때마다 변경된 테이블 이름 집합으로 호출됨"""
+        self._commit_listeners.append(listener)
+
+    def _notify_commit(self, tables: Set[str]):
+        for listener in self._commit_listeners:
+            try:
+                listener(tables)
+            except Exception as e:
+                print(f"[WARN] 커밋 리스너 오류: {e}")
+
+    # ==================== 내부 헬퍼 ====================
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.max_lifetime > 0 and time.monotonic() - created_at >= self.max_lifetime
+
+    @staticmethod
+    def _ping(raw) -> bool:
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _close_locked(self, raw):
+        """연결을 닫고 풀 크기에서 제외 (락을 잡은 상태에서 호출)"""
+        self._size -= 1
+        if raw is None:
+            return
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _evict_idle_locked(self):
+        """유휴 시간 초과 연결 정리 (오래된 것부터, min_idle 유지)"""
+        if self.idle_timeout <= 0:
+            return
+        now = time.monotonic()
+        while len(self._idle) > self.min_idle:
+            raw, created_at, last_used = self._idle[0]
+            if now - last_used < self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._close_locked(raw)
+            self._evicted += 1
+
+    # ==================== 관리 ====================
+
+    def close_all(self):
+        """유휴 연결 모두 닫기 (대여 중인 연결은 반납 시 정리됨)"""
+        with self._cond:
+            while self._idle:
+                raw, _, _ = self._idle.popleft()
+                self._close_locked(raw)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """풀 통계"""
+        with self._cond:
+            self._evict_idle_locked()
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'checked_out': self._checked_out,
+                'waiting': self._waiting,
+                'created': self._created,
+                'recycled': self._recycled,
+                'evicted': self._evicted,
+                'health_check_failures': self._health_check_failures,
+                'acquire_timeouts': self._acquire_timeouts,
+                'queries': self._queries,
+            }
@@ -0,0 +1,226 @@
+"""
+임베딩 모델 ONNX 변환 + 정합성(parity) 검사
+
+ko-sroberta-multitask(sentence-transformers, PyTorch)를 ONNX로 변환하고 int8 동적 양자화본을 만든 뒤,
+같은 문장에 대해 PyTorch 출력과의 코사인 유사도를 비교합니다. 백엔드별 시작 시간/메모리/쿼리 인코딩 시간도 측정합니다.
+변환 결과는 RAG_EMBED_BACKEND=onnx 또는 onnx-int8로 사용합니다 (backend/rag/embedding_backend.py).
+
+변환에는 torch, sentence-transformers, onnx, onnxruntime이 필요하고
+서버(onnx 백엔드)에는 onnxruntime, tokenizers만 있으면 됩니다.
+
+사용법:
+    python export_embedding_onnx.py                      # 변환 + 정합성 검사 + 측정
+    python export_embedding_onnx.py --verify-only        # 이미 변환된 모델 검사만
+    python export_embedding_onnx.py --samples queries.txt --min-cosine-int8 0.98
+
+정합성 기준(문장별 최소 코사인)에 못 미치면 종료 코드 1
+"""
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+from rag.embedding_backend import (CONFIG_FILE, ONNX_FILES, TOKENIZER_FILE,  # noqa: E402
+                                   backend_of, load_embedding_model, onnx_directory)
+
+DEFAULT_MODEL = 'jhgan/ko-sroberta-multitask'
+DEFAULT_CACHE = str(Path(__file__).parent / 'model_cache')
+
+# 정합성 검사 기본 문장 (짧은 질문 ~ 긴 청크, 약품명/유전자 기호/조항 번호 포함)
+SAMPLE_SENTENCES = [
+    "아세트아미노펜의 하루 최대 복용량은?",
+    "BRCA1 유전자 변이와 유방암 위험",
+    "의약품 제조 및 품질관리에 관한 규정 제3조",
+    "GMP 밸리데이션 절차를 설명해 주세요",
+    "세포 배양 공정에서 오염을 방지하는 방법",
+    "HPLC 분석법 밸리데이션 항목에는 특이성, 직선성, 정확성, 정밀성, 검출한계, 정량한계가 있다.",
+    "임상시험 1상은 안전성, 2상은 유효성과 용량, 3상은 대규모 환자를 대상으로 확증한다.",
+    "항체 의약품 정제 공정은 프로테인 A 크로마토그래피로 시작하여 바이러스 불활화 단계를 거친다.",
+    "오늘 수업 시간표 알려줘",
+    "COVID-19 mRNA 백신의 지질나노입자(LNP) 전달 원리",
+    "식약처 가이드라인에 따르면 안정성 시험은 장기, 가속, 가혹 조건으로 나누어 수행한다. " * 6,
+    "바이오헬스",
+]
+
+
+def token_embedding_module(transformer):
+    """transformer 출력 중 토큰 임베딩(last_hidden_state)만 내보내는 모듈 (풀링은 embedding_backend에서 numpy로)"""
+    import torch
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, input_ids, attention_mask):
+            return self.transformer(input_ids=input_ids, attention_mask=attention_mask, return_dict=False)[0]
+
+    return TokenEmbeddings().eval()
+
+
+def export(model_name: str, cache_folder: str, opset: int, int8: bool) -> Path:
+    """ONNX(fp32) + int8 양자화본 + 토크나이저/설정 저장"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    directory = onnx_directory(model_name)
+    directory.mkdir(parents=True, exist_ok=True)
+    model = SentenceTransformer(model_name, cache_folder=cache_folder)
+    modules = list(model)
+    pooling = next((m for m in modules if isinstance(m, Pooling)), None)
+    tokenizer = model.tokenizer
+
+    config = {
+        'model_name': model_name,
+        'max_seq_length': model.max_seq_length,
+        'pooling': pooling.get_pooling_mode_str() if pooling else 'mean',
+        'normalize': any(isinstance(m, Normalize) for m in modules),
+        'dimension': model.get_sentence_embedding_dimension(),
+        'pad_token': tokenizer.pad_token,
+        'pad_token_id': tokenizer.pad_token_id,
+    }
+    if config['pooling'] not in ('mean', 'cls', 'max'):
+        raise SystemExit(f"[ERROR] 지원하지 않는 풀링 방식: {config['pooling']}")
+
+    print(f"[INFO] ONNX 변환 중: {model_name} (opset {opset})")
+    dummy = tokenizer(["바이오헬스 교육 과정"], return_tensors='pt')
+    fp32_path = directory / ONNX_FILES['onnx']
+    with torch.no_grad():
+        torch.onnx.export(
+            token_embedding_module(modules[0].auto_model),
+            (dummy['input_ids'], dummy['attention_mask']),
+            str(fp32_path),
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['token_embeddings'],
+            dynamic_axes={'input_ids': {0: 'batch', 1: 'sequence'},
+                          'attention_mask': {0: 'batch', 1: 'sequence'},
+                          'token_embeddings': {0: 'batch', 1: 'sequence'}},
+            opset_version=opset,
+        )
+    tokenizer.backend_tokenizer.save(str(directory / TOKENIZER_FILE))
+    (directory / CONFIG_FILE).write_text(json.dumps(config, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"[OK] {fp32_path} ({fp32_path.stat().st_size / 1e6:.0f} MB)")
+
+    if int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        int8_path = directory / ONNX_FILES['onnx-int8']
+        print("[INFO] int8 동적 양자화 중...")
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        print(f"[OK] {int8_path} ({int8_path.stat().st_size / 1e6:.0f} MB)")
+    return directory
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    """문장별 코사인 유사도"""
+    ref = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    cand = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    return (ref * cand).sum(axis=1)
+
+
+def measure(backend: str, model_name: str, cache_folder: str, sentences: list) -> dict:
+    """현재 프로세스에서 백엔드 1개 측정 - 시작 시간, 최대 RSS, 쿼리 1개 인코딩 시간"""
+    start = time.perf_counter()
+    model = load_embedding_model(model_name, cache_folder, backend=backend)
+    startup = time.perf_counter() - start
+    model.encode(sentences[:2])  # 워밍업
+    latencies = []
+    for sentence in sentences * 3:
+        start = time.perf_counter()
+        model.encode([sentence])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {'backend': backend_of(model), 'startup_s': round(startup, 2),
+            'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+            'query_p50_ms': round(statistics.median(latencies), 2)}
+
+
+def measure_in_subprocess(backend: str, args) -> dict:
+    """메모리를 따로 재기 위해 백엔드마다 새 프로세스에서 측정"""
+    command = [sys.executable, __file__, '--measure', backend, '--model', args.model,
+               '--cache-folder', args.cache_folder]
+    if args.samples:
+        command += ['--samples', args.samples]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def load_sentences(path):
+    if not path:
+        return SAMPLE_SENTENCES
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 모델 ONNX 변환 + 정합성 검사")
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--cache-folder', default=DEFAULT_CACHE)
+    parser.add_argument('--opset', type=int, default=14)
+    parser.add_argument('--no-int8', action='store_true', help='int8 양자화본을 만들지 않음')
+    parser.add_argument('--verify-only', action='store_true', help='변환 없이 정합성 검사/측정만')
+    parser.add_argument('--samples', help='정합성 검사 문장 파일 (한 줄에 1개)')
+    parser.add_argument('--min-cosine', type=float, default=0.999, help='onnx(fp32) 문장별 최소 코사인')
+    parser.add_argument('--min-cosine-int8', type=float, default=0.98, help='onnx-int8 문장별 최소 코사인')
+    parser.add_argument('--measure', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sentences = load_sentences(args.samples)
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.model, args.cache_folder, sentences)))
+        return
+
+    print("=" * 60)
+    print("  임베딩 모델 ONNX 변환 / 정합성 검사")
+    print("=" * 60)
+    if not args.verify_only:
+        export(args.model, args.cache_folder, args.opset, not args.no_int8)
+
+    directory = onnx_directory(args.model)
+    backends = [b for b in ('onnx', 'onnx-int8') if (directory / ONNX_FILES[b]).exists()]
+    if not backends:
+        print(f"[ERROR] 변환된 모델이 없습니다: {directory}")
+        sys.exit(1)
+
+    # 정합성: PyTorch 출력 대비 문장별 코사인
+    reference = load_embedding_model(args.model, args.cache_folder, backend='torch').encode(
+        sentences, batch_size=8, convert_to_numpy=True)
+    thresholds = {'onnx': args.min_cosine, 'onnx-int8': args.min_cosine_int8}
+    failed = False
+    print(f"\n[정합성] 문장 {len(sentences)}개, PyTorch 출력 대비 코사인")
+    for backend in backends:
+        model = load_embedding_model(args.model, args.cache_folder, backend=backend)
+        if backend_of(model) != backend:
+            print(f"[FAIL] {backend}: 모델을 로드하지 못했습니다")
+            failed = True
+            continue
+        cosines = cosine_agreement(reference, model.encode(sentences, batch_size=8))
+        ok = cosines.min() >= thresholds[backend]
+        failed |= not ok
+        print(f"   {'[OK]' if ok else '[FAIL]'} {backend:<10} 최소 {cosines.min():.5f} / 평균 {cosines.mean():.5f} "
+              f"(기준 {thresholds[backend]})")
+
+    # 시작 시간 / 메모리 / 쿼리 인코딩 시간 (백엔드별 새 프로세스)
+    print(f"\n{'backend':<10} {'시작(초)':>9} {'최대 RSS(MB)':>13} {'쿼리 p50(ms)':>13}")
+    for backend in ['torch'] + backends:
+        try:
+            result = measure_in_subprocess(backend, args)
+        except (subprocess.CalledProcessError, ValueError) as e:
+            print(f"{backend:<10} 측정 실패: {e}")
+            continue
+        print(f"{result['backend']:<10} {result['startup_s']:>9} {result['max_rss_mb']:>13} {result['query_p50_ms']:>13}")
+
+    if not failed:
+        print(f"\n[OK] 서버에서 사용: RAG_EMBED_BACKEND={backends[-1]} (backend/.env)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
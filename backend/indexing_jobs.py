@@ -0,0 +1,551 @@
+"""
+RAG 인덱싱 작업 큐
+문서 인덱싱을 요청 처리 스레드(BackgroundTasks)가 아니라 SQLite에 저장된 작업 큐와 전용 작업 스레드에서 실행합니다.
+
+- 작업 상태: queued → running → completed | failed | cancelled
+  (실패 시 max_attempts까지 지수 대기 후 자동 재시도, PermanentJobError는 바로 failed)
+- 동시 실행 제한: 프로세스당 작업 스레드 INDEXING_WORKERS개, 모든 서버 프로세스 합계 INDEXING_MAX_RUNNING개
+  (같은 DB 파일을 쓰는 여러 uvicorn 워커가 작업을 나눠 가져감 - BEGIN IMMEDIATE로 1개씩 할당,
+   벡터 스토어 쓰기는 segment_store의 프로세스 간 잠금으로 직렬화되고 다른 워커의 검색에도 바로 반영)
+- 취소: 대기 중이면 바로 cancelled, 실행 중이면 다음 진행률 갱신 시점에 JobCancelled로 중단
+- 진행률: 파일별 진행률(file_progress 테이블, 이전 indexing_progress.json 대체)과 작업 진행률을
+  INDEXING_PROGRESS_INTERVAL초에 한 번만 기록 (단계가 바뀌거나 끝날 때는 바로 기록)
+  파일 진행률 status는 이전과 같은 값 (started / parsing / embedding / completed / error, 취소도 error)
+- 복구: 서버가 실행 중 종료되면 해당 작업은 다시 queued (같은 호스트의 죽은 프로세스 또는 같은 pid로
+  재시작된 현재 프로세스의 작업은 시작 시 바로, 그 밖에는 INDEXING_JOB_STALE초 동안 heartbeat가 없으면)
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+INDEXING_JOB_DB = os.getenv('INDEXING_JOB_DB', str(Path(__file__).parent / 'indexing_jobs.sqlite3'))
+INDEXING_WORKERS = int(os.getenv('INDEXING_WORKERS', '2'))
+INDEXING_MAX_RUNNING = int(os.getenv('INDEXING_MAX_RUNNING', '2'))
+INDEXING_MAX_ATTEMPTS = int(os.getenv('INDEXING_MAX_ATTEMPTS', '3'))
+INDEXING_RETRY_DELAY = float(os.getenv('INDEXING_RETRY_DELAY', '10'))  # 재시도 대기 (초, 시도마다 2배)
+INDEXING_PROGRESS_INTERVAL = float(os.getenv('INDEXING_PROGRESS_INTERVAL', '1.0'))
+INDEXING_JOB_STALE = float(os.getenv('INDEXING_JOB_STALE', '600'))
+INDEXING_JOB_RETENTION = float(os.getenv('INDEXING_JOB_RETENTION', str(7 * 24 * 3600)))
+
+QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED = 'queued', 'running', 'completed', 'failed', 'cancelled'
+ACTIVE_STATES = (QUEUED, RUNNING)
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+HEARTBEAT_SECONDS = 15
+POLL_SECONDS = 1.0  # 다른 프로세스가 넣은 작업/재시도 대기 확인 주기
+
+# 파일별 진행률 항목의 기본 키 (나머지 키는 detail JSON에 저장)
+PROGRESS_KEYS = ('status', 'progress', 'message')
+
+
+class JobCancelled(Exception):
+    """작업 취소 요청으로 중단"""
+
+
+class PermanentJobError(Exception):
+    """재시도해도 소용없는 오류 (파일 없음, 지원하지 않는 형식 등) - 바로 failed"""
+
+
+class JobReporter:
+    """실행 중인 작업의 진행률 기록 (주기 제한) + 취소 확인"""
+
+    def __init__(self, queue: 'IndexingJobQueue', job: Dict[str, Any]):
+        self.queue = queue
+        self.job_id = job['id']
+        self.filename = job['filename']
+        self._job_update: Optional[Dict[str, Any]] = None
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._last_flush = 0.0
+        self._last_stage = None
+
+    def update(self, stage: str, progress: int, message: str, **detail):
+        """
+        작업 진행률 (단일 파일 작업이면 파일 진행률도 같이)
+
+        stage는 이전 indexing_progress의 status 값 (parsing / embedding / saving ...)
+        """
+        self.check_cancelled()
+        self._job_update = {'stage': stage, 'progress': progress, 'message': message}
+        if self.filename:
+            self._files[self.filename] = {'status': stage, 'progress': progress, 'message': message, **detail}
+        force = stage != self._last_stage
+        self._last_stage = stage
+        self.flush(force)
+
+    def file(self, filename: str, entry: Dict[str, Any]):
+        """여러 파일 작업의 파일별 진행률 ({'status', 'progress', 'message', ...})"""
+        self.check_cancelled()
+        self._files[filename] = entry
+        self.flush()
+
+    def flush(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.queue.progress_interval:
+            return
+        if self._job_update is None and not self._files:
+            return
+        self.queue._write_progress(self.job_id, self._job_update, self._files)
+        self._job_update = None
+        self._files = {}
+        self._last_flush = now
+
+    def check_cancelled(self):
+        if self.queue._cancel_requested(self.job_id):
+            raise JobCancelled("취소 요청으로 중단되었습니다")
+
+
+# 작업 처리 함수: (작업 dict, JobReporter) → 결과 dict (작업의 result로 저장)
+JobHandler = Callable[[Dict[str, Any], JobReporter], Optional[Dict[str, Any]]]
+
+
+class IndexingJobQueue:
+    """SQLite 작업 큐 + 작업 스레드 풀 (스레드별 연결, WAL)"""
+
+    def __init__(self, path: str = INDEXING_JOB_DB, workers: int = INDEXING_WORKERS,
+                 max_running: int = INDEXING_MAX_RUNNING, max_attempts: int = INDEXING_MAX_ATTEMPTS,
+                 retry_delay: float = INDEXING_RETRY_DELAY, progress_interval: float = INDEXING_PROGRESS_INTERVAL,
+                 stale_seconds: float = INDEXING_JOB_STALE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.workers = max(1, workers)
+        self.max_running = max(1, max_running)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.progress_interval = progress_interval
+        self.stale_seconds = stale_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._handlers: Dict[str, JobHandler] = {}
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._running_ids = set()  # 이 프로세스에서 실행 중인 작업
+        self._cancelled_ids = set()  # 취소 요청된 실행 중 작업 (heartbeat/cancel()에서 갱신)
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    # ==================== 저장소 ====================
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _create_tables(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS indexing_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                filename TEXT,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL,
+                stage TEXT,
+                progress INTEGER NOT NULL DEFAULT 0,
+                message TEXT,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                owner TEXT,
+                run_after REAL NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_indexing_jobs_state ON indexing_jobs (state, run_after)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_indexing_jobs_filename ON indexing_jobs (kind, filename)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS file_progress (
+                filename TEXT PRIMARY KEY,
+                job_id INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                progress INTEGER NOT NULL,
+                message TEXT,
+                detail TEXT,
+                started_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+
+    @staticmethod
+    def _job_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
+
+    def _write_progress(self, job_id: int, job_update: Optional[Dict[str, Any]], files: Dict[str, Dict[str, Any]]):
+        """작업/파일 진행률 기록 (트랜잭션 1개)"""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            if job_update:
+                conn.execute("UPDATE indexing_jobs SET stage = ?, progress = ?, message = ?, updated_at = ? WHERE id = ?",
+                             (job_update['stage'], job_update['progress'], job_update['message'], now, job_id))
+            for filename, entry in files.items():
+                detail = {key: value for key, value in entry.items() if key not in PROGRESS_KEYS}
+                conn.execute("""
+                    INSERT INTO file_progress (filename, job_id, status, progress, message, detail, started_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(filename) DO UPDATE SET
+                        started_at = CASE WHEN file_progress.job_id = excluded.job_id
+                                          THEN file_progress.started_at ELSE excluded.started_at END,
+                        job_id = excluded.job_id, status = excluded.status, progress = excluded.progress,
+                        message = excluded.message, detail = excluded.detail, updated_at = excluded.updated_at
+                """, (filename, job_id, entry.get('status', ''), int(entry.get('progress', 0)), entry.get('message', ''),
+                      json.dumps(detail, ensure_ascii=False) if detail else None, now, now))
+
+    # ==================== 작업 등록/조회 ====================
+
+    def register(self, kind: str, handler: JobHandler):
+        """작업 종류별 처리 함수 등록"""
+        self._handlers[kind] = handler
+
+    def submit(self, kind: str, filename: Optional[str], payload: Dict[str, Any],
+               files: Optional[List[str]] = None, max_attempts: Optional[int] = None) -> Dict[str, Any]:
+        """
+        작업 등록 - 같은 종류 + 같은 파일의 작업이 이미 대기/실행 중이면 그 작업을 반환 (job['existing'] = True)
+
+        filename이 None인 작업(폴더 일괄 인덱싱 등)은 종류별로 1개만 대기/실행
+        files: 파일 진행률을 '대기 중'으로 표시할 파일명 (filename 외, 일괄 인덱싱 대상)
+        """
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM indexing_jobs WHERE kind = ? AND filename IS ? AND state IN (?, ?) ORDER BY id LIMIT 1",
+                (kind, filename, *ACTIVE_STATES)
+            ).fetchone()
+            if row is None:
+                job_id = conn.execute("""
+                    INSERT INTO indexing_jobs (kind, filename, payload, state, progress, message, max_attempts,
+                                               run_after, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?, ?)
+                """, (kind, filename, json.dumps(payload, ensure_ascii=False), QUEUED, "⏳ 인덱싱 대기 중...",
+                      max_attempts or self.max_attempts, now, now, now)).lastrowid
+                conn.executemany("""
+                    INSERT OR REPLACE INTO file_progress (filename, job_id, status, progress, message, detail,
+                                                         started_at, updated_at)
+                    VALUES (?, ?, 'started', 0, '⏳ 인덱싱 대기 중...', NULL, ?, ?)
+                """, [(name, job_id, now, now) for name in ([filename] if filename else []) + list(files or [])])
+                existing = False
+            else:
+                job_id = row['id']
+                existing = True
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        self._wakeup.set()
+        job = self.get(job_id)
+        job['existing'] = existing
+        return job
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT * FROM indexing_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job_dict(row) if row else None
+
+    def latest(self, kind: str, filename: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """종류(+ 파일)의 가장 최근 작업"""
+        row = self._connect().execute(
+            "SELECT * FROM indexing_jobs WHERE kind = ? AND filename IS ? ORDER BY id DESC LIMIT 1", (kind, filename)
+        ).fetchone()
+        return self._job_dict(row) if row else None
+
+    def list(self, state: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        if state:
+            rows = conn.execute("SELECT * FROM indexing_jobs WHERE state = ? ORDER BY id DESC LIMIT ?", (state, limit))
+        else:
+            rows = conn.execute("SELECT * FROM indexing_jobs ORDER BY id DESC LIMIT ?", (limit,))
+        return [self._job_dict(row) for row in rows.fetchall()]
+
+    def file_progress(self, filename: str) -> Optional[Dict[str, Any]]:
+        """파일별 진행률 (이전 indexing_progress[filename] 형식 + job_id)"""
+        row = self._connect().execute("SELECT * FROM file_progress WHERE filename = ?", (filename,)).fetchone()
+        if row is None:
+            return None
+        entry = {'status': row['status'], 'progress': row['progress'], 'message': row['message']}
+        if row['detail']:
+            entry.update(json.loads(row['detail']))
+        entry.update({'job_id': row['job_id'], 'started_at': row['started_at'], 'updated_at': row['updated_at']})
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        rows = self._connect().execute("SELECT state, COUNT(*) FROM indexing_jobs GROUP BY state").fetchall()
+        counts = {state: 0 for state in ACTIVE_STATES + FINISHED_STATES}
+        counts.update({row[0]: row[1] for row in rows})
+        return {'jobs': counts, 'workers': self.workers, 'max_running': self.max_running,
+                'running_here': len(self._running_ids), 'started': bool(self._threads), 'db': str(self.path)}
+
+    # ==================== 취소/재시도 ====================
+
+    def cancel(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """대기 중이면 바로 cancelled, 실행 중이면 취소 요청 (다음 진행률 갱신 때 중단) - 없으면 None"""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            cancelled = conn.execute("""
+                UPDATE indexing_jobs SET state = ?, message = '취소됨', finished_at = ?, updated_at = ?
+                WHERE id = ? AND state = ?
+            """, (CANCELLED, now, now, job_id, QUEUED)).rowcount
+            conn.execute("UPDATE indexing_jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND state = ?",
+                         (now, job_id, RUNNING))
+            if cancelled:
+                self._close_file_progress(conn, job_id, 'error', '취소됨')
+        job = self.get(job_id)
+        if job is not None and job['state'] == RUNNING:
+            with self._lock:
+                self._cancelled_ids.add(job_id)
+        return job
+
+    def retry(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """실패/취소된 작업을 다시 대기열에 (시도 횟수 초기화) - 없거나 진행 중이면 그대로 반환"""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                UPDATE indexing_jobs SET state = ?, attempts = 0, cancel_requested = 0, error = NULL, progress = 0,
+                                         message = '⏳ 재시도 대기 중...', run_after = ?, finished_at = NULL, updated_at = ?
+                WHERE id = ? AND state IN (?, ?)
+            """, (QUEUED, now, now, job_id, FAILED, CANCELLED))
+        self._wakeup.set()
+        return self.get(job_id)
+
+    def _cancel_requested(self, job_id: int) -> bool:
+        with self._lock:
+            return job_id in self._cancelled_ids
+
+    # ==================== 작업 스레드 ====================
+
+    def start(self):
+        """작업 스레드 + heartbeat 시작 (이전 실행에서 중단된 작업 복구)"""
+        if self._threads:
+            return
+        self._stopping.clear()
+        recovered = self._recover(dead_only=True)
+        if recovered:
+            print(f"[INFO] 인덱싱 작업 {recovered}개 복구 (서버 종료로 중단된 작업 → 대기열)")
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"indexing-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="indexing-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        print(f"[OK] 인덱싱 작업 큐 시작 (작업 스레드 {self.workers}개, 전체 동시 실행 {self.max_running}개)")
+
+    def stop(self, timeout: float = 5):
+        """작업 스레드 종료 (실행 중인 작업은 다음 시작 때 복구되어 다시 실행)"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wait(self, job_id: int, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """작업이 끝날 때까지 대기 (벤치마크/스크립트용)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job['state'] in FINISHED_STATES:
+                return job
+            if deadline is not None and time.monotonic() > deadline:
+                return job
+            time.sleep(0.1)
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            job = self._claim()
+            if job is None:
+                self._wakeup.wait(POLL_SECONDS)
+                self._wakeup.clear()
+                continue
+            self._execute(job)
+            self._wakeup.set()  # 다른 작업 스레드도 다음 작업 확인
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        """대기 중인 작업 1개를 실행 상태로 (전체 동시 실행 제한)"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            running = conn.execute("SELECT COUNT(*) FROM indexing_jobs WHERE state = ?", (RUNNING,)).fetchone()[0]
+            row = None
+            if running < self.max_running:
+                row = conn.execute(
+                    "SELECT id FROM indexing_jobs WHERE state = ? AND run_after <= ? ORDER BY run_after, id LIMIT 1",
+                    (QUEUED, now)
+                ).fetchone()
+            if row is not None:
+                conn.execute("""
+                    UPDATE indexing_jobs SET state = ?, attempts = attempts + 1, owner = ?, started_at = ?,
+                                             updated_at = ?, error = NULL
+                    WHERE id = ?
+                """, (RUNNING, self.owner, now, now, row['id']))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        if row is None:
+            return None
+        with self._lock:
+            self._running_ids.add(row['id'])
+        return self.get(row['id'])
+
+    def _execute(self, job: Dict[str, Any]):
+        reporter = JobReporter(self, job)
+        state, error, result = COMPLETED, None, None
+        try:
+            handler = self._handlers.get(job['kind'])
+            if handler is None:
+                raise PermanentJobError(f"알 수 없는 작업 종류: {job['kind']}")
+            result = handler(job, reporter)
+        except JobCancelled as e:
+            state, error = CANCELLED, str(e)
+        except PermanentJobError as e:
+            state, error = FAILED, str(e)
+        except Exception as e:
+            state, error = FAILED, str(e)
+            print(f"[ERROR] 인덱싱 작업 {job['id']} 실패 ({job['attempts']}/{job['max_attempts']}회): {e}")
+            if job['attempts'] < job['max_attempts']:
+                state = QUEUED
+        finally:
+            with self._lock:
+                self._running_ids.discard(job['id'])
+                self._cancelled_ids.discard(job['id'])
+        self._finish(job, reporter, state, error, result)
+
+    def _finish(self, job: Dict[str, Any], reporter: JobReporter, state: str, error: Optional[str],
+                result: Optional[Dict[str, Any]]):
+        now = time.time()
+        if state == QUEUED:
+            delay = self.retry_delay * (2 ** (job['attempts'] - 1))
+            message = f"⏳ 재시도 대기 ({job['attempts']}/{job['max_attempts']}회 실패, {delay:.0f}초 후): {error}"
+        elif state == COMPLETED:
+            delay, message = 0, (result or {}).get('message', '✅ 완료')
+        else:
+            delay, message = 0, '취소됨' if state == CANCELLED else f"오류: {error}"
+
+        # 처리 함수가 남긴 진행률을 먼저 기록한 뒤, 작업과 끝나지 않은 파일은 최종 상태로 덮어씀
+        reporter.flush(force=True)
+
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                UPDATE indexing_jobs SET state = ?, error = ?, message = ?, result = ?, run_after = ?,
+                                         progress = CASE WHEN ? = 'completed' THEN 100 ELSE progress END,
+                                         cancel_requested = 0, finished_at = ?, updated_at = ?
+                WHERE id = ?
+            """, (state, error, message, json.dumps(result, ensure_ascii=False) if result is not None else None,
+                  now + delay, state, None if state == QUEUED else now, now, job['id']))
+            if state != COMPLETED:
+                self._close_file_progress(conn, job['id'], 'started' if state == QUEUED else 'error', message)
+
+    @staticmethod
+    def _close_file_progress(conn: sqlite3.Connection, job_id: int, status: str, message: str):
+        """작업의 끝나지 않은 파일 진행률을 한꺼번에 (재시도 대기 → started, 실패/취소 → error)"""
+        conn.execute("""
+            UPDATE file_progress SET status = ?, progress = 0, message = ?, detail = NULL, updated_at = ?
+            WHERE job_id = ? AND status NOT IN ('completed', 'error')
+        """, (status, message, time.time(), job_id))
+
+    def _heartbeat_loop(self):
+        """실행 중인 작업의 updated_at 갱신 + 다른 프로세스의 취소 요청 반영 + 멈춘 작업 복구 + 오래된 기록 정리"""
+        last_cleanup = 0.0
+        while not self._stopping.wait(HEARTBEAT_SECONDS):
+            try:
+                with self._lock:
+                    running = list(self._running_ids)
+                conn = self._connect()
+                if running:
+                    marks = ','.join('?' * len(running))
+                    with conn:
+                        conn.execute(f"UPDATE indexing_jobs SET updated_at = ? WHERE id IN ({marks})",
+                                     (time.time(), *running))
+                    cancelled = conn.execute(
+                        f"SELECT id FROM indexing_jobs WHERE cancel_requested = 1 AND id IN ({marks})", running
+                    ).fetchall()
+                    with self._lock:
+                        self._cancelled_ids.update(row['id'] for row in cancelled)
+                self._recover(dead_only=False)
+                if time.monotonic() - last_cleanup > 3600:
+                    self.cleanup()
+                    last_cleanup = time.monotonic()
+            except Exception as e:
+                print(f"[WARN] 인덱싱 작업 heartbeat 실패: {e}")
+
+    def _recover(self, dead_only: bool) -> int:
+        """
+        중단된 실행 중 작업을 대기열로
+
+        dead_only: 같은 호스트에서 이미 종료된 프로세스의 작업만 (시작 시)
+        아니면 heartbeat가 stale_seconds 동안 없는 작업
+        """
+        conn = self._connect()
+        rows = conn.execute("SELECT id, owner, updated_at FROM indexing_jobs WHERE state = ?", (RUNNING,)).fetchall()
+        host = socket.gethostname()
+        now = time.time()
+        recovered = []
+        for row in rows:
+            if row['id'] in self._running_ids:
+                continue
+            owner_host, _, pid = (row['owner'] or '').rpartition(':')
+            if dead_only:
+                # 이 프로세스 소유인데 여기서 실행 중이 아니면 같은 호스트명/pid로 재시작된 경우 (컨테이너 등)
+                if owner_host == host and pid.isdigit() and (int(pid) == os.getpid() or not _process_alive(int(pid))):
+                    recovered.append(row['id'])
+            elif now - row['updated_at'] > self.stale_seconds:
+                recovered.append(row['id'])
+        if recovered:
+            marks = ','.join('?' * len(recovered))
+            with conn:
+                conn.execute(f"""
+                    UPDATE indexing_jobs SET state = ?, run_after = ?, updated_at = ?,
+                                             message = '⏳ 중단된 작업 - 다시 대기 중...'
+                    WHERE state = ? AND id IN ({marks})
+                """, (QUEUED, now, now, RUNNING, *recovered))
+            self._wakeup.set()
+        return len(recovered)
+
+    def cleanup(self, retention: float = INDEXING_JOB_RETENTION) -> int:
+        """보관 기간이 지난 끝난 작업과 파일 진행률 삭제"""
+        cutoff = time.time() - retention
+        conn = self._connect()
+        marks = ','.join('?' * len(FINISHED_STATES))
+        with conn:
+            removed = conn.execute(f"DELETE FROM indexing_jobs WHERE state IN ({marks}) AND finished_at < ?",
+                                   (*FINISHED_STATES, cutoff)).rowcount
+            conn.execute("DELETE FROM file_progress WHERE updated_at < ? AND job_id NOT IN "
+                         "(SELECT id FROM indexing_jobs)", (cutoff,))
+        return removed
+
+
+def _process_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+문서 폴더 일괄 인덱싱 명령
+
+폴더의 PDF/DOCX/TXT를 워커 프로세스에서 동시에 파싱하고, 내용이 같은 파일은 한 번만 인덱싱하며,
+모든 파일의 청크를 하나의 임베딩 큐로 모아 저장합니다 (rag/bulk_ingest.py).
+이미 인덱싱된 파일은 바뀐 청크만 임베딩하고 사라진 청크는 삭제합니다.
+
+서버가 컬렉션을 메모리에 들고 있으므로 서버를 멈춘 상태에서 실행하거나,
+서버 실행 중에는 POST /api/rag/bulk-ingest 를 사용하세요.
+
+Usage:
+    python backend/ingest_documents.py [documents] [--workers 4] [--collection biohealth_docs]
+    python backend/ingest_documents.py backend/documents --sequential   # 비교용: 파일 1개씩 순서대로
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from rag.bulk_ingest import BulkIngestor, collect_files  # noqa: E402
+from rag.document_loader import DocumentLoader  # noqa: E402
+from rag.vector_store import VectorStoreManager  # noqa: E402
+
+
+def ingest_sequential(manager, loader, files):
+    """이전 방식: 파일 1개씩 파싱 → 임베딩 (비교용)"""
+    chunks = 0
+    for file_path, source, metadata in files:
+        for documents, _ in loader.iter_batches(file_path, {**metadata, 'filename': source}):
+            manager.add_documents([doc.page_content for doc in documents], [doc.metadata for doc in documents])
+            chunks += len(documents)
+    return chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="문서 폴더 일괄 인덱싱")
+    parser.add_argument("folder", nargs="?", default=str(Path(__file__).parent / "documents"))
+    parser.add_argument("--workers", type=int, help="파싱 워커 프로세스 수 (기본 RAG_INGEST_WORKERS)")
+    parser.add_argument("--persist-dir", default=str(Path(__file__).parent / "vector_db"))
+    parser.add_argument("--collection", default="biohealth_docs")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--sequential", action="store_true", help="파일 1개씩 순서대로 (이전 방식)")
+    args = parser.parse_args()
+
+    if not Path(args.folder).is_dir():
+        print(f"[ERROR] 폴더를 찾을 수 없습니다: {args.folder}")
+        sys.exit(1)
+    files = collect_files(args.folder)
+    if not files:
+        print(f"[INFO] 인덱싱할 문서가 없습니다: {args.folder}")
+        return
+
+    loader = DocumentLoader(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+    manager = VectorStoreManager(persist_directory=args.persist_dir, collection_name=args.collection)
+    print(f"[DOC] {args.folder}: 파일 {len(files)}개")
+    try:
+        if args.sequential:
+            start = time.perf_counter()
+            chunks = ingest_sequential(manager, loader, files)
+            print(f"[OK] 순서대로 인덱싱 완료: 청크 {chunks}개 ({time.perf_counter() - start:.2f}초)")
+            return
+
+        def report(source, entry):
+            if entry['status'] in ('completed', 'error'):
+                print(f"   [{entry['status']}] {source}: {entry['message']}")
+
+        summary = BulkIngestor(manager, loader, workers=args.workers).ingest(files, report)
+        if summary['failed']:
+            sys.exit(1)
+    finally:
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+LLM 응답 캐시 모듈
+같은 프롬프트(같은 질문 + 같은 검색 문서, 같은 학생의 상담 기록 등)로 LLM을 다시 호출하지 않도록
+응답을 디스크에 저장하여 서버 재시작/여러 워커 간에도 재사용합니다.
+
+- 키: (provider, model, temperature, 프롬프트 해시) - 프롬프트는 요청 본문(메시지 + 생성 파라미터) 전체
+- 저장소 (LLM_CACHE_BACKEND)
+    sqlite : 단일 SQLite 파일 (기본값, WAL 모드 - 여러 워커가 공유)
+    disk   : 키별 JSON 파일 (디렉토리 공유만 가능하면 사용 가능)
+    off    : 캐시 사용 안 함
+- TTL 만료 + 최대 항목 수 초과 시 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+- 요청별 우회: 본문 "no_cache": true 또는 Cache-Control: no-cache 헤더
+  (우회해도 새 응답은 저장하여 다음 요청부터 반영)
+- 캐시 오류는 요청을 실패시키지 않고 캐시 미스로 처리
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+LLM_CACHE_BACKEND = os.getenv('LLM_CACHE_BACKEND', 'sqlite').lower()
+LLM_CACHE_DIR = os.getenv('LLM_CACHE_DIR', str(Path(__file__).parent / 'llm_cache'))
+LLM_CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000'))
+
+# 이 횟수만큼 저장할 때마다 만료/초과 항목 정리
+EVICT_EVERY = 50
+
+
+def make_key(provider: str, model: str, temperature: float, prompt: Any) -> str:
+    """캐시 키: provider/model/temperature + 프롬프트(문자열 또는 요청 본문) SHA-256"""
+    if not isinstance(prompt, str):
+        prompt = json.dumps(prompt, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    return f"{provider}:{model}:{float(temperature):g}:{prompt_hash}"
+
+
+def bypass_requested(data: Optional[Mapping[str, Any]] = None,
+                     headers: Optional[Mapping[str, str]] = None) -> bool:
+    """요청이 캐시 우회를 원하는지 (본문 no_cache / Cache-Control: no-cache)"""
+    if data and data.get('no_cache'):
+        return True
+    if headers is not None:
+        cache_control = headers.get('cache-control', '').lower()
+        return 'no-cache' in cache_control or 'no-store' in cache_control
+    return False
+
+
+# ==================== 저장소 ====================
+
+class SQLiteResponseStore:
+    """SQLite 파일 저장소 (스레드별 연결, WAL)"""
+
+    name = 'sqlite'
+
+    def __init__(self, directory: str):
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        self.path = Path(directory) / 'llm_responses.sqlite3'
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                cache_key TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_accessed ON llm_responses (accessed_at)")
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, min_created_at: float) -> Optional[str]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT response, created_at FROM llm_responses WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] < min_created_at:
+            conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (key,))
+            conn.commit()
+            return None
+        conn.execute(
+            "UPDATE llm_responses SET accessed_at = ?, hits = hits + 1 WHERE cache_key = ?",
+            (time.time(), key)
+        )
+        conn.commit()
+        return row[0]
+
+    def set(self, key: str, provider: str, model: str, response: str):
+        now = time.time()
+        conn = self._connect()
+        conn.execute("""
+            INSERT OR REPLACE INTO llm_responses (cache_key, provider, model, response, created_at, accessed_at, hits)
+            VALUES (?, ?, ?, ?, ?, ?, 0)
+        """, (key, provider, model, response, now, now))
+        conn.commit()
+
+    def evict(self, min_created_at: float, max_entries: int) -> int:
+        """만료 항목 삭제 후 max_entries를 넘는 만큼 오래 사용하지 않은 항목 삭제"""
+        conn = self._connect()
+        removed = conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (min_created_at,)).rowcount
+        removed += conn.execute("""
+            DELETE FROM llm_responses WHERE cache_key IN (
+                SELECT cache_key FROM llm_responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (max_entries,)).rowcount
+        conn.commit()
+        return removed
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM llm_responses")
+        conn.commit()
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+
+class DiskResponseStore:
+    """키별 JSON 파일 저장소 (마지막 사용 시각 = 파일 mtime)"""
+
+    name = 'disk'
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory) / 'responses'
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return self.directory / digest[:2] / f"{digest}.json"
+
+    def get(self, key: str, min_created_at: float) -> Optional[str]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if entry.get('key') != key:
+            return None
+        if entry.get('created_at', 0) < min_created_at:
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)
+        return entry['response']
+
+    def set(self, key: str, provider: str, model: str, response: str):
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        entry = {'key': key, 'provider': provider, 'model': model,
+                 'response': response, 'created_at': time.time()}
+        # 다른 워커가 읽는 중에 반쯤 쓰인 파일을 보지 않도록 임시 파일 후 교체
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(entry, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp_path, path)
+
+    def _entries(self):
+        for path in self.directory.glob('*/*.json'):
+            try:
+                yield path, path.stat().st_mtime
+            except OSError:
+                continue
+
+    def evict(self, min_created_at: float, max_entries: int) -> int:
+        removed = 0
+        # mtime은 마지막 사용 시각이므로 생성 시각 기준 만료는 get()에서 처리하고
+        # 여기서는 TTL 동안 한 번도 사용되지 않은 파일과 초과 항목만 정리
+        entries = sorted(self._entries(), key=lambda item: item[1], reverse=True)
+        for index, (path, mtime) in enumerate(entries):
+            if index >= max_entries or mtime < min_created_at:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def clear(self):
+        for path, _ in list(self._entries()):
+            path.unlink(missing_ok=True)
+
+    def count(self) -> int:
+        return sum(1 for _ in self._entries())
+
+
+def create_store(name: str = LLM_CACHE_BACKEND, directory: str = LLM_CACHE_DIR):
+    """LLM_CACHE_BACKEND 설정에 맞는 저장소 생성 (off 또는 실패 시 None = 캐시 사용 안 함)"""
+    if name == 'off':
+        return None
+    try:
+        if name == 'disk':
+            return DiskResponseStore(directory)
+        return SQLiteResponseStore(directory)
+    except (OSError, sqlite3.Error) as e:
+        print(f"[WARN] LLM 응답 캐시 저장소 '{name}' 사용 불가, 캐시 없이 동작: {e}")
+        return None
+
+
+# ==================== 캐시 ====================
+
+class LLMResponseCache:
+    """영구 LLM 응답 캐시 (TTL + LRU, 스레드 안전)"""
+
+    def __init__(self, store=None, ttl: float = LLM_CACHE_TTL, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.store = store
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+
+        # 통계 (현재 프로세스 기준)
+        self._hits = 0
+        self._misses = 0
+        self._bypasses = 0
+        self._writes = 0
+        self._evictions = 0
+        self._errors = 0
+        self.last_error: Optional[str] = None
+
+    # make_key를 인스턴스에서도 사용할 수 있도록 노출 (rag 패키지는 backend 모듈을 import하지 않음)
+    make_key = staticmethod(make_key)
+
+    @property
+    def enabled(self) -> bool:
+        return self.store is not None
+
+    def _error(self, action: str, e: Exception):
+        self._errors += 1
+        self.last_error = f"{action}: {e}"
+        print(f"[WARN] LLM 응답 캐시 {action} 실패 (캐시 없이 계속): {e}")
+
+    def get(self, key: str, bypass: bool = False) -> Optional[str]:
+        """저장된 응답 (없거나 만료/우회면 None)"""
+        if not self.enabled:
+            return None
+        if bypass:
+            self._bypasses += 1
+            return None
+        try:
+            with self._lock:
+                response = self.store.get(key, time.time() - self.ttl)
+        except Exception as e:
+            self._error('조회', e)
+            return None
+        if response is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return response
+
+    def set(self, key: str, response: str, provider: str = '', model: str = ''):
+        """응답 저장 (빈 응답은 저장하지 않음)"""
+        if not self.enabled or not response:
+            return
+        try:
+            with self._lock:
+                self.store.set(key, provider, model, response)
+                self._writes += 1
+                self._writes_since_evict += 1
+                if self._writes_since_evict >= EVICT_EVERY:
+                    self._writes_since_evict = 0
+                    self._evictions += self.store.evict(time.time() - self.ttl, self.max_entries)
+        except Exception as e:
+            self._error('저장', e)
+
+    async def aget(self, key: str, bypass: bool = False) -> Optional[str]:
+        """이벤트 루프를 막지 않도록 스레드에서 조회"""
+        if not self.enabled or bypass:
+            return self.get(key, bypass)
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, response: str, provider: str = '', model: str = ''):
+        if self.enabled and response:
+            await asyncio.to_thread(self.set, key, response, provider, model)
+
+    def evict(self) -> int:
+        """만료/초과 항목 즉시 정리"""
+        if not self.enabled:
+            return 0
+        try:
+            with self._lock:
+                removed = self.store.evict(time.time() - self.ttl, self.max_entries)
+                self._evictions += removed
+                self._writes_since_evict = 0
+                return removed
+        except Exception as e:
+            self._error('정리', e)
+            return 0
+
+    def clear(self):
+        if self.enabled:
+            with self._lock:
+                self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        entries = None
+        if self.enabled:
+            try:
+                with self._lock:
+                    entries = self.store.count()
+            except Exception as e:
+                self._error('통계 조회', e)
+        return {
+            'backend': self.store.name if self.enabled else 'off',
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+            'bypasses': self._bypasses,
+            'writes': self._writes,
+            'evictions': self._evictions,
+            'errors': self._errors,
+            'last_error': self.last_error,
+        }
+
+
+llm_cache = LLMResponseCache(create_store())
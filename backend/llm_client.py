@@ -0,0 +1,335 @@
+"""
+외부 AI API 공용 HTTP 클라이언트 모듈
+GROQ / Gemini / Google Cloud TTS 호출마다 새 연결(TLS 핸드셰이크)을 만들지 않도록
+제공자(provider)별로 수명이 관리되는 httpx.AsyncClient를 하나씩 공유합니다.
+
+- keep-alive 연결 풀 + HTTP/2 (h2 패키지가 설치된 경우)
+- 제공자별 동시 요청 수 제한 (한 제공자가 느려져도 다른 제공자 호출은 영향 없음)
+- 429 / 5xx / 연결 오류 시 지터(jitter)를 적용한 지수 백오프 재시도 (Retry-After 헤더 우선)
+- 요청별 타임아웃
+- 토큰 스트리밍 (GROQ/Gemini SSE 응답을 텍스트 조각 단위로 전달)
+
+로컬 모의 LLM 서버(mock_llm_server.py)로 테스트하려면 기본 URL을 환경 변수로 바꿉니다.
+    GROQ_API_BASE=http://127.0.0.1:9100 GEMINI_API_BASE=http://127.0.0.1:9100 ...
+"""
+
+import asyncio
+import contextlib
+import functools
+import json as jsonlib
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+import anyio.from_thread
+import httpx
+
+# 재시도할 HTTP 상태 코드
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '3'))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', '0.5'))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', '8'))
+LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', '5'))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv('LLM_KEEPALIVE_EXPIRY', '60'))
+# auto: h2 패키지가 있으면 HTTP/2 사용, 0/false: HTTP/1.1 고정
+LLM_HTTP2 = os.getenv('LLM_HTTP2', 'auto').lower()
+
+# provider → (기본 URL 환경 변수, 기본 URL, 기본 동시 요청 수, 기본 타임아웃(초))
+PROVIDERS = {
+    'groq': ('GROQ_API_BASE', 'https://api.groq.com', 8, 30.0),
+    'gemini': ('GEMINI_API_BASE', 'https://generativelanguage.googleapis.com', 8, 30.0),
+    'google_tts': ('GOOGLE_TTS_API_BASE', 'https://texttospeech.googleapis.com', 4, 10.0),
+}
+
+
+def _http2_enabled() -> bool:
+    if LLM_HTTP2 in ('0', 'false', 'no', 'off'):
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class ProviderClient:
+    """제공자 하나에 대한 공유 AsyncClient + 동시성 제한 + 재시도"""
+
+    def __init__(self, name: str, base_url: str, *, max_concurrency: int = 8,
+                 timeout: float = 30.0, max_retries: int = LLM_MAX_RETRIES,
+                 backoff_base: float = LLM_BACKOFF_BASE, backoff_max: float = LLM_BACKOFF_MAX,
+                 http2: Optional[bool] = None):
+        """
+        Args:
+            name: 제공자 이름 (통계/로그용)
+            base_url: API 기본 URL (요청 시 path만 전달)
+            max_concurrency: 동시에 진행할 수 있는 최대 요청 수 (= 최대 연결 수)
+            timeout: 기본 요청 타임아웃 (초)
+            max_retries: 재시도 횟수 (최초 요청 제외)
+            backoff_base: 첫 재시도 대기 상한 (초), 이후 2배씩 증가
+            backoff_max: 재시도 대기 최대값 (초)
+            http2: HTTP/2 사용 여부 (None이면 h2 설치 여부로 결정)
+        """
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.http2 = _http2_enabled() if http2 is None else http2
+
+        # AsyncClient / Semaphore는 이벤트 루프 안에서 만들어야 하므로 지연 생성
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # 통계
+        self._requests = 0
+        self._retries = 0
+        self._failures = 0
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._total_time = 0.0
+        self.last_error: Optional[str] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=LLM_CONNECT_TIMEOUT),
+            )
+        return self._client
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """재시도 대기 시간: Retry-After(초) 우선, 없으면 full jitter 지수 백오프"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            try:
+                return min(max(float(retry_after), 0.0), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def post(self, path: str, *, json: Any = None, headers: Optional[Dict[str, str]] = None,
+                   params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> httpx.Response:
+        """
+        POST 요청 (429/5xx/연결 오류 시 재시도)
+
+        재시도 후에도 실패 응답이면 마지막 응답을 그대로 반환하므로
+        호출하는 쪽에서 기존처럼 status_code를 확인합니다.
+        연결 오류/타임아웃이 끝까지 계속되면 httpx 예외가 발생합니다.
+        """
+        client = self._get_client()
+        request_timeout = httpx.Timeout(timeout, connect=LLM_CONNECT_TIMEOUT) if timeout else None
+        extra = {'timeout': request_timeout} if request_timeout else {}
+
+        async with self._get_semaphore():
+            self._requests += 1
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+            start = time.perf_counter()
+            try:
+                attempt = 0
+                while True:
+                    try:
+                        response = await client.post(path, json=json, headers=headers, params=params, **extra)
+                    except httpx.TransportError as e:
+                        # 연결 실패 / 타임아웃 / 끊긴 keep-alive 연결
+                        if attempt >= self.max_retries:
+                            self._failures += 1
+                            self.last_error = f"{type(e).__name__}: {e}"
+                            raise
+                        delay = self._backoff(attempt)
+                        print(f"[WARN] {self.name} API 연결 오류, {delay:.1f}초 후 재시도 ({attempt + 1}/{self.max_retries}): {type(e).__name__}")
+                    else:
+                        if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                            if response.status_code >= 400:
+                                self._failures += 1
+                                self.last_error = f"HTTP {response.status_code}"
+                            return response
+                        delay = self._backoff(attempt, response)
+                        print(f"[WARN] {self.name} API HTTP {response.status_code}, {delay:.1f}초 후 재시도 ({attempt + 1}/{self.max_retries})")
+                        await response.aclose()
+                    self._retries += 1
+                    attempt += 1
+                    await asyncio.sleep(delay)
+            finally:
+                self._in_flight -= 1
+                self._total_time += time.perf_counter() - start
+
+    async def stream_lines(self, path: str, *, json: Any = None, headers: Optional[Dict[str, str]] = None,
+                           params: Optional[Dict[str, Any]] = None,
+                           timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        스트리밍 POST - 응답 본문을 줄 단위로 전달
+
+        첫 바이트를 받기 전(429/5xx/연결 오류)까지만 재시도합니다.
+        이미 일부를 전달한 뒤의 오류는 중복 출력을 막기 위해 재시도하지 않고 그대로 발생시킵니다.
+        최종 응답이 4xx/5xx이면 httpx.HTTPStatusError가 발생합니다.
+        """
+        client = self._get_client()
+        request_timeout = httpx.Timeout(timeout, connect=LLM_CONNECT_TIMEOUT) if timeout else None
+        extra = {'timeout': request_timeout} if request_timeout else {}
+
+        async with self._get_semaphore():
+            self._requests += 1
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+            start = time.perf_counter()
+            streamed = False
+            try:
+                attempt = 0
+                while True:
+                    try:
+                        async with client.stream('POST', path, json=json, headers=headers,
+                                                 params=params, **extra) as response:
+                            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                                delay = self._backoff(attempt, response)
+                                print(f"[WARN] {self.name} API HTTP {response.status_code}, {delay:.1f}초 후 재시도 ({attempt + 1}/{self.max_retries})")
+                            else:
+                                if response.status_code >= 400:
+                                    await response.aread()
+                                    self._failures += 1
+                                    self.last_error = f"HTTP {response.status_code}"
+                                    response.raise_for_status()
+                                async for line in response.aiter_lines():
+                                    streamed = True
+                                    yield line
+                                return
+                    except httpx.TransportError as e:
+                        if streamed or attempt >= self.max_retries:
+                            self._failures += 1
+                            self.last_error = f"{type(e).__name__}: {e}"
+                            raise
+                        delay = self._backoff(attempt)
+                        print(f"[WARN] {self.name} API 연결 오류, {delay:.1f}초 후 재시도 ({attempt + 1}/{self.max_retries}): {type(e).__name__}")
+                    self._retries += 1
+                    attempt += 1
+                    await asyncio.sleep(delay)
+            finally:
+                self._in_flight -= 1
+                self._total_time += time.perf_counter() - start
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {
+            'base_url': self.base_url,
+            'http2': self.http2,
+            'max_concurrency': self.max_concurrency,
+            'timeout': self.timeout,
+            'max_retries': self.max_retries,
+            'requests': self._requests,
+            'retries': self._retries,
+            'failures': self._failures,
+            'in_flight': self._in_flight,
+            'max_in_flight': self._max_in_flight,
+            'avg_time_ms': round(self._total_time / self._requests * 1000, 1) if self._requests else 0.0,
+            'connected': self._client is not None and not self._client.is_closed,
+            'last_error': self.last_error,
+        }
+
+
+async def _iter_sse_data(lines: AsyncIterator[str]) -> AsyncIterator[dict]:
+    """SSE 응답에서 `data:` JSON만 추출 ([DONE] 이후 종료)"""
+    async for line in lines:
+        if not line.startswith('data:'):
+            continue
+        data = line[5:].strip()
+        if data == '[DONE]':
+            break
+        if data:
+            yield jsonlib.loads(data)
+
+
+def _groq_token(chunk: dict) -> str:
+    """OpenAI 호환 chat.completion.chunk → 텍스트 조각"""
+    choices = chunk.get('choices') or [{}]
+    return (choices[0].get('delta') or {}).get('content') or ''
+
+
+def _gemini_token(chunk: dict) -> str:
+    """Gemini streamGenerateContent(alt=sse) 응답 조각 → 텍스트 조각"""
+    candidates = chunk.get('candidates') or [{}]
+    parts = (candidates[0].get('content') or {}).get('parts') or []
+    return ''.join(part.get('text', '') for part in parts)
+
+
+# provider → 스트리밍 응답 조각에서 텍스트를 꺼내는 함수
+TOKEN_PARSERS = {
+    'groq': _groq_token,
+    'gemini': _gemini_token,
+}
+
+
+class LLMClientRegistry:
+    """제공자별 ProviderClient 보관 (환경 변수 설정 반영)"""
+
+    def __init__(self):
+        self._clients: Dict[str, ProviderClient] = {}
+
+    def get(self, name: str) -> ProviderClient:
+        client = self._clients.get(name)
+        if client is None:
+            env_name, default_url, concurrency, timeout = PROVIDERS[name]
+            prefix = f"LLM_{name.upper()}"
+            client = ProviderClient(
+                name,
+                os.getenv(env_name, default_url),
+                max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", str(concurrency))),
+                timeout=float(os.getenv(f"{prefix}_TIMEOUT", str(timeout))),
+            )
+            self._clients[name] = client
+        return client
+
+    async def stream_tokens(self, name: str, path: str, **kwargs) -> AsyncIterator[str]:
+        """
+        LLM 스트리밍 API 호출 - 생성되는 텍스트 조각을 도착하는 대로 전달
+
+        호출하는 쪽에서 스트리밍용 요청을 구성해야 합니다.
+            groq: payload에 "stream": true
+            gemini: path를 :streamGenerateContent로, params에 "alt": "sse"
+        """
+        parse = TOKEN_PARSERS[name]
+        # [DONE]에서 멈추거나 소비자가 중간에 끊어도 연결/동시성 슬롯을 즉시 반환하도록 명시적으로 닫음
+        async with contextlib.aclosing(self.get(name).stream_lines(path, **kwargs)) as lines:
+            async for chunk in _iter_sse_data(lines):
+                token = parse(chunk)
+                if token:
+                    yield token
+
+    async def aclose_all(self):
+        """서버 종료 시 keep-alive 연결 정리"""
+        for client in list(self._clients.values()):
+            await client.aclose()
+
+    def stats(self) -> dict:
+        return {name: client.stats() for name, client in self._clients.items()}
+
+
+llm_clients = LLMClientRegistry()
+
+
+def post_from_thread(provider: str, path: str, **kwargs) -> httpx.Response:
+    """
+    동기 `def` 라우트(워커 스레드)에서 공유 클라이언트로 POST
+
+    요청은 메인 이벤트 루프에서 실행되므로 async 라우트와 같은 연결 풀과 동시성 제한을 사용합니다.
+    """
+    return anyio.from_thread.run(functools.partial(llm_clients.get(provider).post, path, **kwargs))
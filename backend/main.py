@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Form, Request, BackgroundTasks
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
@@ -8,17 +8,16 @@ import pymysql
 import pandas as pd
 import io
 import os
-import json
 import logging
 from datetime import datetime, timedelta, date
 from openai import OpenAI
 from dotenv import load_dotenv
-import requests
 from ftplib import FTP
 import uuid
 import base64
 from PIL import Image
 from pathlib import Path
+from contextlib import contextmanager
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import mm
@@ -27,6 +26,16 @@ from reportlab.lib import colors
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from db_pool import ConnectionPool, PoolTimeoutError, count_queries
+from schema_migrations import MigrationRunner
+from pagination import Paginator
+from read_cache import read_cache, cached_fetchall
+from settings_service import SystemSettingsService
+from blocking_io import run_blocking, configure_threadpools, thread_pool_stats
+from warmup import BackgroundWarmup
+from llm_client import llm_clients, post_from_thread
+from streaming import stream_format, event_stream_response, iter_events
+from llm_cache import llm_cache, bypass_requested as bypass_llm_cache
 
 # .env 파일을 상위 디렉토리에서 로드
 env_path = Path(__file__).parent.parent / '.env'
@@ -90,13 +99,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 요청별 DB 쿼리 수 집계 (X-DB-Query-Count 응답 헤더)
+@app.middleware("http")
+async def db_query_count_middleware(request: Request, call_next):
+    with count_queries() as counter:
+        response = await call_next(request)
+    response.headers["X-DB-Query-Count"] = str(counter.count)
+    return response
+
 # 3D 모델 파일 (GLB) 서빙
 from fastapi.responses import FileResponse
 from fastapi import HTTPException
 
 # 방법 1: 루트 경로에서 서빙 (프록시 서버와 충돌 가능)
 @app.get("/{filename}.glb")
-async def serve_glb_file_root(filename: str):
+def serve_glb_file_root(filename: str):
     """루트 경로에서 GLB 파일 서빙 (3D 모델용)"""
     print(f"[DEBUG] GLB 파일 요청 (루트): {filename}.glb")
     glb_path = os.path.join(frontend_dir, f"{filename}.glb")
@@ -112,7 +129,7 @@ async def serve_glb_file_root(filename: str):
 
 # 방법 2: /api/models/ 경로에서 서빙 (권장)
 @app.get("/api/models/{filename}.glb")
-async def serve_glb_file_api(filename: str):
+def serve_glb_file_api(filename: str):
     """API 경로에서 GLB 파일 서빙 (3D 모델용)"""
     print(f"[DEBUG] GLB 파일 요청 (API): {filename}.glb")
     glb_path = os.path.join(frontend_dir, f"{filename}.glb")
@@ -129,7 +146,7 @@ async def serve_glb_file_api(filename: str):
 
 # ==================== 버전 API ====================
 @app.get("/api/version")
-async def get_version():
+def get_version():
     """README.md에서 버전 정보 추출"""
     import re
     readme_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "README.md")
@@ -155,10 +172,35 @@ DB_CONFIG = {
     'port': int(os.getenv('DB_PORT', '3306'))
 }
 
+# 커넥션 풀 (요청마다 TCP/인증 핸드셰이크를 반복하지 않도록 연결 재사용)
+db_pool = ConnectionPool(
+    DB_CONFIG,
+    max_size=int(os.getenv('DB_POOL_SIZE', '10')),
+    min_idle=int(os.getenv('DB_POOL_MIN_IDLE', '1')),
+    acquire_timeout=float(os.getenv('DB_POOL_TIMEOUT', '10')),
+    idle_timeout=float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300')),
+    max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+)
+
+# 참조 테이블 읽기 캐시: 커밋된 쓰기의 대상 테이블로 자동 무효화
+db_pool.add_commit_listener(read_cache.invalidate)
+
+# 스키마 마이그레이션 (서버 시작 시 1회 적용, 실패 시 DB 연결 때 재시도)
+migration_runner = MigrationRunner()
+
 def get_db_connection():
-    """데이터베이스 연결 (재시도 및 예외 처리)"""
+    """데이터베이스 연결 (커넥션 풀에서 대여, 예외 처리)
+    
+    반환된 연결의 close()는 풀에 반납합니다.
+    """
     try:
-        return pymysql.connect(**DB_CONFIG)
+        conn = db_pool.acquire()
+    except PoolTimeoutError as e:
+        print(f"[ERROR] DB 커넥션 풀 대기 초과: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="데이터베이스 사용량 초과|현재 요청이 많아 데이터베이스 연결을 할당할 수 없습니다.\n\n잠시 후 다시 시도해주세요."
+        )
     except pymysql.err.OperationalError as e:
         error_code = e.args[0] if e.args else 0
         error_msg = str(e)
@@ -192,69 +234,27 @@ def get_db_connection():
             status_code=503,
             detail="시스템 오류|데이터베이스 연결 중 오류가 발생했습니다.\n\n잠시 후 다시 시도해주세요."
         )
+    
+    # 서버 시작 시 DB가 내려가 있어 마이그레이션이 밀린 경우에만 재시도
+    migration_runner.run_if_due(conn)
+    return conn
 
-def ensure_photo_urls_column(cursor, table_name: str):
-    """photo_urls 컬럼이 없으면 추가"""
-    try:
-        cursor.execute(f"SHOW COLUMNS FROM {table_name} LIKE 'photo_urls'")
-        if not cursor.fetchone():
-            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN photo_urls TEXT")
-    except:
-        pass  # 이미 존재하거나 권한 문제
-
-def ensure_career_path_column(cursor):
-    """students 테이블에 career_path 컬럼이 없으면 추가하고 기본값 설정"""
-    try:
-        cursor.execute("SHOW COLUMNS FROM students LIKE 'career_path'")
-        if not cursor.fetchone():
-            # 컬럼 추가
-            cursor.execute("ALTER TABLE students ADD COLUMN career_path VARCHAR(50) DEFAULT '4. 미정'")
-            # 기존 데이터의 NULL 값을 '4. 미정'으로 업데이트
-            cursor.execute("UPDATE students SET career_path = '4. 미정' WHERE career_path IS NULL")
-            print("[OK] students 테이블에 career_path 컬럼 추가 완료")
-    except Exception as e:
-        print(f"[WARN] career_path 컬럼 추가 실패: {e}")
-        pass  # 이미 존재하거나 권한 문제
-
-def ensure_career_decision_column(cursor):
-    """consultations 테이블에 career_decision 컬럼이 없으면 추가"""
-    try:
-        cursor.execute("SHOW COLUMNS FROM consultations LIKE 'career_decision'")
-        if not cursor.fetchone():
-            cursor.execute("ALTER TABLE consultations ADD COLUMN career_decision VARCHAR(50) DEFAULT NULL")
-            print("[OK] consultations 테이블에 career_decision 컬럼 추가 완료")
-    except Exception as e:
-        print(f"[WARN] career_decision 컬럼 추가 실패: {e}")
-        pass
-
-def ensure_profile_photo_columns(cursor, table_name: str):
-    """profile_photo와 attachments 컬럼이 없으면 추가"""
+def apply_schema_migrations():
+    """미적용 스키마 마이그레이션 실행 (startup 이벤트에서 호출)"""
     try:
-        # profile_photo 컬럼 확인 및 추가 (단일 프로필 사진)
-        cursor.execute(f"SHOW COLUMNS FROM {table_name} LIKE 'profile_photo'")
-        if not cursor.fetchone():
-            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN profile_photo VARCHAR(500) DEFAULT NULL")
-            print(f"[OK] {table_name} 테이블에 profile_photo 컬럼 추가 완료")
-        
-        # attachments 컬럼 확인 및 추가 (첨부 파일 배열, 최대 20개)
-        cursor.execute(f"SHOW COLUMNS FROM {table_name} LIKE 'attachments'")
-        if not cursor.fetchone():
-            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN attachments TEXT DEFAULT NULL")
-            print(f"[OK] {table_name} 테이블에 attachments 컬럼 추가 완료")
+        with db_pool.connection() as conn:
+            migration_runner.run(conn)
     except Exception as e:
-        print(f"[WARN] {table_name} 컬럼 추가 실패: {e}")
-        pass  # 이미 존재하거나 권한 문제
+        print(f"[WARN] 스키마 마이그레이션 실행 실패 (DB 연결 시 재시도): {e}")
 
-def ensure_menu_permissions_column(cursor):
-    """instructor_codes 테이블에 menu_permissions 컬럼이 없으면 추가"""
+@contextmanager
+def db_connection():
+    """`with db_connection() as conn:` 형태의 DB 연결 (블록 종료 시 풀에 반납)"""
+    conn = get_db_connection()
     try:
-        cursor.execute("SHOW COLUMNS FROM instructor_codes LIKE 'menu_permissions'")
-        if not cursor.fetchone():
-            cursor.execute("ALTER TABLE instructor_codes ADD COLUMN menu_permissions TEXT DEFAULT NULL")
-            print("[OK] instructor_codes 테이블에 menu_permissions 컬럼 추가 완료")
-    except Exception as e:
-        print(f"[WARN] menu_permissions 컬럼 추가 실패: {e}")
-        pass
+        yield conn
+    finally:
+        conn.close()
 
 # FTP 설정 (환경 변수에서 로드)
 FTP_CONFIG = {
@@ -383,7 +383,7 @@ def upload_to_ftp(file_data: bytes, filename: str, category: str) -> str:
         raise HTTPException(status_code=500, detail=f"FTP 업로드 실패: {str(e)}")
 
 
-async def upload_stream_to_ftp(file: UploadFile, filename: str, category: str) -> str:
+def upload_stream_to_ftp(file: UploadFile, filename: str, category: str) -> str:
     """
     FTP 서버에 파일 스트리밍 업로드 (메모리 절약형 - 대용량 파일용)
     
@@ -425,7 +425,7 @@ async def upload_stream_to_ftp(file: UploadFile, filename: str, category: str) -
         
         # 파일 스트리밍 업로드 (1MB 청크 단위로 읽어서 전송)
         # 메모리에 전체 파일을 올리지 않음
-        await file.seek(0)  # 파일 포인터를 처음으로
+        file.file.seek(0)  # 파일 포인터를 처음으로
         ftp.storbinary(f'STOR {filename}', file.file, blocksize=1024*1024)
         
         # URL 생성 (FTP URL)
@@ -438,8 +438,8 @@ async def upload_stream_to_ftp(file: UploadFile, filename: str, category: str) -
         if filename.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')):
             try:
                 # 썸네일용으로 파일 일부만 읽기 (처음 10MB만)
-                await file.seek(0)
-                thumbnail_data = await file.read(10 * 1024 * 1024)
+                file.file.seek(0)
+                thumbnail_data = file.file.read(10 * 1024 * 1024)
                 if thumbnail_data:
                     create_thumbnail(thumbnail_data, filename)
             except Exception as e:
@@ -452,57 +452,13 @@ async def upload_stream_to_ftp(file: UploadFile, filename: str, category: str) -
 
 # ==================== 신규가입 (학생 등록 신청) API ====================
 
-def ensure_student_registrations_table(cursor):
-    """student_registrations 테이블이 없으면 생성"""
-    try:
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS student_registrations (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(100) NOT NULL,
-                birth_date VARCHAR(20),
-                gender VARCHAR(10),
-                phone VARCHAR(50),
-                email VARCHAR(100),
-                address TEXT,
-                interests TEXT,
-                education TEXT,
-                introduction TEXT,
-                course_code VARCHAR(50),
-                profile_photo VARCHAR(500),
-                status ENUM('pending', 'approved', 'rejected') DEFAULT 'pending',
-                processed_at DATETIME,
-                processed_by VARCHAR(50),
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                INDEX idx_status (status),
-                INDEX idx_created_at (created_at)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-        """)
-        print("[OK] student_registrations 테이블 확인/생성 완료")
-        
-        # 기존 profile_photo 컬럼이 TEXT인 경우 VARCHAR(500)으로 변경
-        cursor.execute("SHOW COLUMNS FROM student_registrations LIKE 'profile_photo'")
-        col = cursor.fetchone()
-        if col and 'text' in col['Type'].lower():
-            try:
-                cursor.execute("ALTER TABLE student_registrations MODIFY COLUMN profile_photo VARCHAR(500)")
-                print("[OK] student_registrations.profile_photo 컬럼 타입 변경: TEXT → VARCHAR(500)")
-            except Exception as modify_err:
-                print(f"[WARN] profile_photo 컬럼 타입 변경 실패: {modify_err}")
-                
-    except Exception as e:
-        print(f"[WARN] student_registrations 테이블 생성 실패: {e}")
-
 @app.get("/api/student-registrations")
-async def get_student_registrations(status: Optional[str] = None):
+def get_student_registrations(status: Optional[str] = None):
     """신규가입 신청 목록 조회"""
     conn = get_db_connection()
     cursor = conn.cursor(pymysql.cursors.DictCursor)
 
     try:
-        ensure_student_registrations_table(cursor)
-        conn.commit()
-
         query = "SELECT * FROM student_registrations WHERE 1=1"
         params = []
 
@@ -529,15 +485,12 @@ async def get_student_registrations(status: Optional[str] = None):
         conn.close()
 
 @app.post("/api/student-registrations")
-async def create_student_registration(data: dict):
+def create_student_registration(data: dict):
     """신규가입 신청 등록"""
     conn = get_db_connection()
     cursor = conn.cursor()
 
     try:
-        ensure_student_registrations_table(cursor)
-        conn.commit()
-
         name = data.get('name')
         if not name:
             raise HTTPException(status_code=400, detail="이름은 필수입니다")
@@ -584,53 +537,12 @@ async def create_student_registration(data: dict):
         conn.close()
 
 @app.put("/api/student-registrations/{registration_id}/approve")
-async def approve_student_registration(registration_id: int, data: dict):
+def approve_student_registration(registration_id: int, data: dict):
     """신규가입 승인 - 학생 DB로 이동"""
     conn = get_db_connection()
     cursor = conn.cursor(pymysql.cursors.DictCursor)
 
     try:
-        ensure_student_registrations_table(cursor)
-        conn.commit()
-
-        # students 테이블에 필요한 컬럼 확인 및 추가
-        cursor.execute("SHOW COLUMNS FROM students")
-        existing_columns = {col['Field'] for col in cursor.fetchall()}
-        
-        required_columns = {
-            'code': "VARCHAR(50) UNIQUE",
-            'name': "VARCHAR(100)",
-            'birth_date': "VARCHAR(20)",
-            'gender': "VARCHAR(10)",
-            'phone': "VARCHAR(50)",
-            'email': "VARCHAR(100)",
-            'address': "TEXT",
-            'interests': "TEXT",
-            'education': "VARCHAR(255)",
-            'introduction': "TEXT",
-            'course_code': "VARCHAR(50)",
-            'profile_photo': "VARCHAR(500)",
-            'password': "VARCHAR(100) DEFAULT 'kdt2025'"
-        }
-        
-        columns_added = []
-        for col_name, col_def in required_columns.items():
-            if col_name not in existing_columns:
-                try:
-                    # UNIQUE 제약이 있으면 제거
-                    col_def_no_unique = col_def.replace(' UNIQUE', '')
-                    cursor.execute(f"ALTER TABLE students ADD COLUMN {col_name} {col_def_no_unique}")
-                    columns_added.append(col_name)
-                    print(f"[OK] students 테이블에 {col_name} 컬럼 추가")
-                except Exception as col_err:
-                    print(f"[WARN] {col_name} 컬럼 추가 실패: {col_err}")
-        
-        if columns_added:
-            conn.commit()
-            print(f"[OK] students 테이블 컬럼 {len(columns_added)}개 추가 완료: {', '.join(columns_added)}")
-        
-        conn.commit()
-
         # 신청 정보 조회
         cursor.execute("SELECT * FROM student_registrations WHERE id = %s", (registration_id,))
         registration = cursor.fetchone()
@@ -764,15 +676,12 @@ async def approve_student_registration(registration_id: int, data: dict):
         conn.close()
 
 @app.put("/api/student-registrations/{registration_id}/reject")
-async def reject_student_registration(registration_id: int, data: dict):
+def reject_student_registration(registration_id: int, data: dict):
     """신규가입 거절"""
     conn = get_db_connection()
     cursor = conn.cursor()
 
     try:
-        ensure_student_registrations_table(cursor)
-        conn.commit()
-
         # 신청 상태 확인
         cursor.execute("SELECT status FROM student_registrations WHERE id = %s", (registration_id,))
         result = cursor.fetchone()
@@ -806,7 +715,7 @@ async def reject_student_registration(registration_id: int, data: dict):
         conn.close()
 
 @app.delete("/api/student-registrations/{registration_id}")
-async def delete_student_registration(registration_id: int):
+def delete_student_registration(registration_id: int):
     """신규가입 신청 삭제"""
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -825,22 +734,20 @@ async def delete_student_registration(registration_id: int):
 # ==================== 학생 관리 API ====================
 
 @app.get("/api/students")
-async def get_students(
+def get_students(
     course_code: Optional[str] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    limit: Optional[int] = None,
+    page_cursor: Optional[str] = Query(None, alias="cursor"),
+    fields: Optional[str] = None
 ):
-    """학생 목록 조회"""
+    """학생 목록 조회 (limit/cursor 페이지네이션, fields 프로젝션 지원)"""
+    page = Paginator([('code', 'code'), ('id', 'id')], limit=limit, cursor=page_cursor, fields=fields)
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
-        # career_path 컬럼 확인 및 추가
-        ensure_career_path_column(cursor)
-        
-        # profile_photo, attachments 컬럼 확인 및 추가
-        ensure_profile_photo_columns(cursor, 'students')
-        
-        query = "SELECT * FROM students WHERE 1=1"
+        query = f"SELECT {page.select('*')} FROM students WHERE 1=1"
         params = []
         
         if course_code:
@@ -852,10 +759,8 @@ async def get_students(
             search_pattern = f"%{search}%"
             params.extend([search_pattern, search_pattern, search_pattern])
         
-        query += " ORDER BY code"
-        
-        cursor.execute(query, params)
-        students = cursor.fetchall()
+        query, params = page.apply(query, params)
+        students, next_cursor = page.fetch(cursor, query, params)
         
         # datetime 객체를 문자열로 변환
         for student in students:
@@ -865,20 +770,17 @@ async def get_students(
                 elif isinstance(value, bytes):
                     student[key] = None  # thumbnail은 제외
         
-        return students
+        return page.response(students, next_cursor)
     finally:
         conn.close()
 
 @app.get("/api/students/{student_id}")
-async def get_student(student_id: int):
+def get_student(student_id: int):
     """특정 학생 조회 (과정 정보 포함)"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
-        # profile_photo, attachments 컬럼 확인 및 추가
-        ensure_profile_photo_columns(cursor, 'students')
-        
         # 학생 정보와 과정 정보를 JOIN하여 가져오기
         query = """
             SELECT s.*, c.name as course_name
@@ -904,15 +806,12 @@ async def get_student(student_id: int):
         conn.close()
 
 @app.post("/api/students")
-async def create_student(data: dict):
+def create_student(data: dict):
     """학생 생성 (프로필/첨부 파일 분리)"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
         
-        # profile_photo와 attachments 컬럼이 없으면 자동 생성
-        ensure_profile_photo_columns(cursor, 'students')
-        
         # 자동으로 학생 코드 생성
         cursor.execute("SELECT MAX(CAST(SUBSTRING(code, 2) AS UNSIGNED)) as max_code FROM students WHERE code LIKE 'S%'")
         result = cursor.fetchone()
@@ -970,15 +869,12 @@ async def create_student(data: dict):
         conn.close()
 
 @app.put("/api/students/{student_id}")
-async def update_student(student_id: int, data: dict):
+def update_student(student_id: int, data: dict):
     """학생 수정 (JSON 데이터 지원 - 프로필/첨부 파일 분리)"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
         
-        # 새로운 컬럼 자동 생성 (profile_photo, attachments)
-        ensure_profile_photo_columns(cursor, 'students')
-        
         # 데이터 추출
         name = data.get('name')
         if not name:
@@ -1059,7 +955,7 @@ async def update_student(student_id: int, data: dict):
         conn.close()
 
 @app.delete("/api/students/{student_id}")
-async def delete_student(student_id: int):
+def delete_student(student_id: int):
     """학생 삭제"""
     conn = get_db_connection()
     try:
@@ -1071,14 +967,14 @@ async def delete_student(student_id: int):
         conn.close()
 
 @app.post("/api/students/upload-excel")
-async def upload_excel(file: UploadFile = File(...)):
+def upload_excel(file: UploadFile = File(...)):
     """Excel 파일로 학생 일괄 등록"""
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="Excel 파일만 업로드 가능합니다")
     
     try:
         # Excel 파일 읽기
-        contents = await file.read()
+        contents = file.file.read()
         df = pd.read_excel(io.BytesIO(contents))
         
         conn = get_db_connection()
@@ -1139,7 +1035,7 @@ async def upload_excel(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"파일 처리 중 오류: {str(e)}")
 
 @app.get("/api/template/students")
-async def download_template():
+def download_template():
     """학생 등록 템플릿 다운로드"""
     template_path = "/home/user/webapp/student_template.xlsx"
     if os.path.exists(template_path):
@@ -1153,18 +1049,17 @@ async def download_template():
 # ==================== 과목 관리 API ====================
 
 @app.get("/api/subjects")
-async def get_subjects():
+def get_subjects():
     """과목 목록 조회"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
-        cursor.execute("""
+        subjects = cached_fetchall(cursor, """
             SELECT s.*, i.name as instructor_name
             FROM subjects s
             LEFT JOIN instructors i ON s.main_instructor = i.code
             ORDER BY s.code
-        """)
-        subjects = cursor.fetchall()
+        """, tables=('subjects', 'instructors'))
         
         for subject in subjects:
             for key, value in subject.items():
@@ -1176,7 +1071,7 @@ async def get_subjects():
         conn.close()
 
 @app.get("/api/subjects/{subject_code}")
-async def get_subject(subject_code: str):
+def get_subject(subject_code: str):
     """특정 과목 조회"""
     conn = get_db_connection()
     try:
@@ -1201,7 +1096,7 @@ async def get_subject(subject_code: str):
         conn.close()
 
 @app.post("/api/subjects")
-async def create_subject(data: dict):
+def create_subject(data: dict):
     """과목 생성"""
     conn = get_db_connection()
     try:
@@ -1244,7 +1139,7 @@ async def create_subject(data: dict):
         conn.close()
 
 @app.put("/api/subjects/{subject_code}")
-async def update_subject(subject_code: str, data: dict):
+def update_subject(subject_code: str, data: dict):
     """과목 수정"""
     conn = get_db_connection()
     try:
@@ -1321,7 +1216,7 @@ async def update_subject(subject_code: str, data: dict):
         conn.close()
 
 @app.delete("/api/subjects/{subject_code}")
-async def delete_subject(subject_code: str):
+def delete_subject(subject_code: str):
     """과목 삭제"""
     conn = get_db_connection()
     try:
@@ -1333,7 +1228,7 @@ async def delete_subject(subject_code: str):
         conn.close()
 
 @app.post("/api/courses/{course_code}/subjects")
-async def save_course_subjects(course_code: str, data: dict):
+def save_course_subjects(course_code: str, data: dict):
     """과정-교과목 관계 저장"""
     subject_codes = data.get('subject_codes', [])
     
@@ -1392,35 +1287,23 @@ def convert_datetime(obj):
 # ==================== 강사코드 관리 API ====================
 
 @app.get("/api/instructor-codes")
-async def get_instructor_codes():
+def get_instructor_codes():
     """강사코드 목록 조회"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
-        # menu_permissions 컬럼 확인 및 추가
-        ensure_menu_permissions_column(cursor)
-        conn.commit()
-        
-        # permissions 컬럼 존재 여부 확인 및 추가
-        cursor.execute("SHOW COLUMNS FROM instructor_codes LIKE 'permissions'")
-        if not cursor.fetchone():
-            cursor.execute("ALTER TABLE instructor_codes ADD COLUMN permissions TEXT DEFAULT NULL")
-            conn.commit()
-            print("[OK] instructor_codes 테이블에 permissions 컬럼 추가")
+        codes = cached_fetchall(cursor, "SELECT * FROM instructor_codes ORDER BY code", tables=('instructor_codes',))
         
-        # "0. 관리자" 타입이 없으면 추가
-        cursor.execute("SELECT * FROM instructor_codes WHERE code = '0'")
-        if not cursor.fetchone():
+        # "0. 관리자" 타입이 없으면 추가 (커밋 시 캐시가 무효화되므로 다시 조회)
+        if not any(code['code'] == '0' for code in codes):
             cursor.execute("""
                 INSERT INTO instructor_codes (code, name, type, permissions)
                 VALUES ('0', '관리자', '0', NULL)
             """)
             conn.commit()
             print("[OK] '0. 관리자' 타입 추가 완료")
-        
-        cursor.execute("SELECT * FROM instructor_codes ORDER BY code")
-        codes = cursor.fetchall()
+            codes = cached_fetchall(cursor, "SELECT * FROM instructor_codes ORDER BY code", tables=('instructor_codes',))
         
         # permissions와 menu_permissions를 JSON으로 파싱
         import json
@@ -1441,23 +1324,12 @@ async def get_instructor_codes():
         conn.close()
 
 @app.post("/api/instructor-codes")
-async def create_instructor_code(data: dict):
+def create_instructor_code(data: dict):
     """강사코드 생성"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
         
-        # menu_permissions 컬럼 확인 및 추가
-        ensure_menu_permissions_column(cursor)
-        conn.commit()
-        
-        # default_screen 컬럼이 없으면 추가
-        cursor.execute("SHOW COLUMNS FROM instructor_codes LIKE 'default_screen'")
-        if not cursor.fetchone():
-            cursor.execute("ALTER TABLE instructor_codes ADD COLUMN default_screen VARCHAR(50) DEFAULT NULL")
-            conn.commit()
-            print("[OK] instructor_codes 테이블에 default_screen 컬럼 추가")
-        
         import json
         permissions_json = json.dumps(data.get('permissions', {})) if data.get('permissions') else None
         menu_permissions_json = json.dumps(data.get('menu_permissions', [])) if data.get('menu_permissions') else None
@@ -1474,23 +1346,12 @@ async def create_instructor_code(data: dict):
         conn.close()
 
 @app.put("/api/instructor-codes/{code}")
-async def update_instructor_code(code: str, data: dict):
+def update_instructor_code(code: str, data: dict):
     """강사코드 수정 (권한 설정 포함)"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
         
-        # menu_permissions 컬럼 확인 및 추가
-        ensure_menu_permissions_column(cursor)
-        conn.commit()
-        
-        # default_screen 컬럼이 없으면 추가
-        cursor.execute("SHOW COLUMNS FROM instructor_codes LIKE 'default_screen'")
-        if not cursor.fetchone():
-            cursor.execute("ALTER TABLE instructor_codes ADD COLUMN default_screen VARCHAR(50) DEFAULT NULL")
-            conn.commit()
-            print("[OK] instructor_codes 테이블에 default_screen 컬럼 추가")
-        
         import json
         permissions_json = json.dumps(data.get('permissions', {})) if data.get('permissions') else None
         menu_permissions_json = json.dumps(data.get('menu_permissions', [])) if data.get('menu_permissions') else None
@@ -1508,7 +1369,7 @@ async def update_instructor_code(code: str, data: dict):
         conn.close()
 
 @app.delete("/api/instructor-codes/{code}")
-async def delete_instructor_code(code: str):
+def delete_instructor_code(code: str):
     """강사코드 삭제"""
     conn = get_db_connection()
     try:
@@ -1535,7 +1396,7 @@ async def delete_instructor_code(code: str):
         conn.close()
 
 @app.post("/api/admin/migrate-admin-code")
-async def migrate_admin_code():
+def migrate_admin_code():
     """관리자 코드를 0에서 IC-999로 마이그레이션"""
     conn = get_db_connection()
     try:
@@ -1630,37 +1491,20 @@ async def migrate_admin_code():
 # ==================== 강사 관리 API ====================
 
 @app.get("/api/instructors")
-async def get_instructors(search: Optional[str] = None):
+def get_instructors(search: Optional[str] = None):
     """강사 목록 조회 (검색 기능 포함)"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
-        # password 컬럼 존재 여부 확인
-        cursor.execute("SHOW COLUMNS FROM instructors LIKE 'password'")
-        has_password = cursor.fetchone() is not None
-        
-        # profile_photo와 attachments 컬럼 자동 생성
-        ensure_profile_photo_columns(cursor, 'instructors')
-        
-        if has_password:
-            query = """
-                SELECT i.code, TRIM(i.name) as name, i.phone, i.major, i.instructor_type, 
-                       i.email, i.created_at, i.updated_at, i.profile_photo, i.attachments, i.password,
-                       ic.name as instructor_type_name, ic.type as instructor_type_type
-                FROM instructors i
-                LEFT JOIN instructor_codes ic ON i.instructor_type = ic.code
-                WHERE 1=1
-            """
-        else:
-            query = """
-                SELECT i.code, TRIM(i.name) as name, i.phone, i.major, i.instructor_type, 
-                       i.email, i.created_at, i.updated_at, i.profile_photo, i.attachments,
-                       ic.name as instructor_type_name, ic.type as instructor_type_type
-                FROM instructors i
-                LEFT JOIN instructor_codes ic ON i.instructor_type = ic.code
-                WHERE 1=1
-            """
+        query = """
+            SELECT i.code, TRIM(i.name) as name, i.phone, i.major, i.instructor_type, 
+                   i.email, i.created_at, i.updated_at, i.profile_photo, i.attachments, i.password,
+                   ic.name as instructor_type_name, ic.type as instructor_type_type
+            FROM instructors i
+            LEFT JOIN instructor_codes ic ON i.instructor_type = ic.code
+            WHERE 1=1
+        """
         params = []
         
         if search:
@@ -1670,14 +1514,13 @@ async def get_instructors(search: Optional[str] = None):
         
         query += " ORDER BY i.code"
         
-        cursor.execute(query, params)
-        instructors = cursor.fetchall()
+        instructors = cached_fetchall(cursor, query, params, tables=('instructors', 'instructor_codes'))
         return [convert_datetime(inst) for inst in instructors]
     finally:
         conn.close()
 
 @app.get("/api/instructors/{code}")
-async def get_instructor(code: str):
+def get_instructor(code: str):
     """특정 강사 조회"""
     conn = get_db_connection()
     try:
@@ -1696,15 +1539,12 @@ async def get_instructor(code: str):
         conn.close()
 
 @app.post("/api/instructors")
-async def create_instructor(data: dict):
+def create_instructor(data: dict):
     """강사 생성 (프로필/첨부 파일 분리)"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
         
-        # profile_photo와 attachments 컬럼이 없으면 자동 생성
-        ensure_profile_photo_columns(cursor, 'instructors')
-        
         query = """
             INSERT INTO instructors (code, name, phone, major, instructor_type, email, profile_photo, attachments)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
@@ -1720,15 +1560,12 @@ async def create_instructor(data: dict):
         conn.close()
 
 @app.put("/api/instructors/{code}")
-async def update_instructor(code: str, data: dict):
+def update_instructor(code: str, data: dict):
     """강사 수정 (JSON 데이터 지원 - 프로필/첨부 파일 분리)"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
         
-        # 새로운 컬럼 자동 생성 (profile_photo, attachments)
-        ensure_profile_photo_columns(cursor, 'instructors')
-        
         # 데이터 추출
         name = data.get('name')
         if not name:
@@ -1769,7 +1606,7 @@ async def update_instructor(code: str, data: dict):
         conn.close()
 
 @app.delete("/api/instructors/{code}")
-async def delete_instructor(code: str):
+def delete_instructor(code: str):
     """강사 삭제"""
     conn = get_db_connection()
     try:
@@ -1783,28 +1620,27 @@ async def delete_instructor(code: str):
 # ==================== 공휴일 관리 API ====================
 
 @app.get("/api/holidays")
-async def get_holidays(year: Optional[int] = None):
+def get_holidays(year: Optional[int] = None):
     """공휴일 목록 조회 (연도별 필터)"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
         if year:
-            cursor.execute("""
+            holidays = cached_fetchall(cursor, """
                 SELECT * FROM holidays
                 WHERE YEAR(holiday_date) = %s
                 ORDER BY holiday_date
-            """, (year,))
+            """, (year,), tables=('holidays',))
         else:
-            cursor.execute("SELECT * FROM holidays ORDER BY holiday_date")
+            holidays = cached_fetchall(cursor, "SELECT * FROM holidays ORDER BY holiday_date", tables=('holidays',))
         
-        holidays = cursor.fetchall()
         return [convert_datetime(h) for h in holidays]
     finally:
         conn.close()
 
 @app.post("/api/holidays")
-async def create_holiday(data: dict):
+def create_holiday(data: dict):
     """공휴일 생성 (중복 시 조용히 무시)"""
     conn = get_db_connection()
     try:
@@ -1834,7 +1670,7 @@ async def create_holiday(data: dict):
         conn.close()
 
 @app.put("/api/holidays/{holiday_id}")
-async def update_holiday(holiday_id: int, data: dict):
+def update_holiday(holiday_id: int, data: dict):
     """공휴일 수정"""
     conn = get_db_connection()
     try:
@@ -1851,7 +1687,7 @@ async def update_holiday(holiday_id: int, data: dict):
         conn.close()
 
 @app.delete("/api/holidays/{holiday_id}")
-async def delete_holiday(holiday_id: int):
+def delete_holiday(holiday_id: int):
     """공휴일 삭제"""
     conn = get_db_connection()
     try:
@@ -1863,7 +1699,7 @@ async def delete_holiday(holiday_id: int):
         conn.close()
 
 @app.post("/api/holidays/auto-add/{year}")
-async def auto_add_holidays(year: int):
+def auto_add_holidays(year: int):
     """법정공휴일 자동 추가"""
     from datetime import datetime, timedelta
     import korean_lunar_calendar
@@ -1972,40 +1808,45 @@ async def auto_add_holidays(year: int):
 # ==================== 과정(학급) 관리 API ====================
 
 @app.get("/api/courses")
-async def get_courses():
+def get_courses():
     """과정 목록 조회 (학생수, 과목수, 교과목 목록 포함)"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
-        cursor.execute("""
+        # 학생수는 과정별로 미리 집계 후 조인 (students x course_subjects 곱집합 방지)
+        courses = cached_fetchall(cursor, """
             SELECT c.*, 
-                   COUNT(DISTINCT s.id) as student_count,
-                   COUNT(DISTINCT cs.subject_code) as subject_count
+                   COALESCE(sc.student_count, 0) as student_count
             FROM courses c
-            LEFT JOIN students s ON c.code = s.course_code
-            LEFT JOIN course_subjects cs ON c.code = cs.course_code
-            GROUP BY c.code
+            LEFT JOIN (
+                SELECT course_code, COUNT(*) as student_count
+                FROM students
+                GROUP BY course_code
+            ) sc ON c.code = sc.course_code
             ORDER BY c.code
-        """)
-        courses = cursor.fetchall()
+        """, tables=('courses', 'students'))
+        
+        # 전체 과정의 교과목 목록을 한 번에 조회 후 과정별로 분배 (과정 수와 무관하게 쿼리 2회)
+        course_subjects = cached_fetchall(cursor, """
+            SELECT course_code, subject_code
+            FROM course_subjects
+            ORDER BY course_code, subject_code
+        """, tables=('course_subjects',))
+        subjects_by_course = {}
+        for row in course_subjects:
+            subjects_by_course.setdefault(row['course_code'], []).append(row['subject_code'])
         
-        # 각 과정의 교과목 목록 조회
         for course in courses:
-            cursor.execute("""
-                SELECT subject_code
-                FROM course_subjects
-                WHERE course_code = %s
-                ORDER BY subject_code
-            """, (course['code'],))
-            subjects = cursor.fetchall()
-            course['subjects'] = [s['subject_code'] for s in subjects]
+            subjects = subjects_by_course.get(course['code'], [])
+            course['subjects'] = subjects
+            course['subject_count'] = len(set(subjects))
         
         return [convert_datetime(course) for course in courses]
     finally:
         conn.close()
 
 @app.get("/api/courses/{code}")
-async def get_course(code: str):
+def get_course(code: str):
     """특정 과정 조회 (교과목 포함)"""
     conn = get_db_connection()
     try:
@@ -2037,7 +1878,7 @@ async def get_course(code: str):
         conn.close()
 
 @app.post("/api/courses")
-async def create_course(data: dict):
+def create_course(data: dict):
     """과정 생성"""
     conn = get_db_connection()
     try:
@@ -2053,23 +1894,6 @@ async def create_course(data: dict):
             except:
                 return text
         
-        # morning_hours, afternoon_hours 컬럼이 없으면 추가
-        try:
-            cursor.execute("""
-                ALTER TABLE courses 
-                ADD COLUMN morning_hours INT DEFAULT 4
-            """)
-        except:
-            pass  # 이미 존재하면 무시
-        
-        try:
-            cursor.execute("""
-                ALTER TABLE courses 
-                ADD COLUMN afternoon_hours INT DEFAULT 4
-            """)
-        except:
-            pass  # 이미 존재하면 무시
-        
         # notes 필드 이모지 제거
         notes_cleaned = remove_emoji(data.get('notes'))
         
@@ -2100,7 +1924,7 @@ async def create_course(data: dict):
         conn.close()
 
 @app.put("/api/courses/{code}")
-async def update_course(code: str, data: dict):
+def update_course(code: str, data: dict):
     """과정 수정"""
     conn = get_db_connection()
     try:
@@ -2165,7 +1989,7 @@ async def update_course(code: str, data: dict):
         conn.close()
 
 @app.delete("/api/courses/{code}")
-async def delete_course(code: str):
+def delete_course(code: str):
     """과정 삭제 (관련 데이터 cascade) - [WARN] 위험: 시간표, 훈련일지 모두 삭제됨!"""
     conn = get_db_connection()
     try:
@@ -2240,40 +2064,12 @@ async def delete_course(code: str):
 # ==================== 프로젝트 관리 API ====================
 
 @app.get("/api/projects")
-async def get_projects(course_code: Optional[str] = None):
+def get_projects(course_code: Optional[str] = None):
     """팀 목록 조회 (과정별 필터)"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
-        # Check if new columns exist, if not, add them
-        try:
-            cursor.execute("SHOW COLUMNS FROM projects LIKE 'group_type'")
-            if not cursor.fetchone():
-                # Add new columns
-                cursor.execute("ALTER TABLE projects ADD COLUMN group_type VARCHAR(50)")
-                cursor.execute("ALTER TABLE projects ADD COLUMN instructor_code VARCHAR(50)")
-                cursor.execute("ALTER TABLE projects ADD COLUMN mentor_code VARCHAR(50)")
-                conn.commit()
-        except:
-            pass  # Columns might already exist
-        
-        # Check if account columns exist, if not, add them
-        try:
-            cursor.execute("SHOW COLUMNS FROM projects LIKE 'account1_name'")
-            if not cursor.fetchone():
-                # Add shared account columns (5 sets of 3 fields = 15 columns)
-                for i in range(1, 6):
-                    cursor.execute(f"ALTER TABLE projects ADD COLUMN account{i}_name VARCHAR(100)")
-                    cursor.execute(f"ALTER TABLE projects ADD COLUMN account{i}_id VARCHAR(100)")
-                    cursor.execute(f"ALTER TABLE projects ADD COLUMN account{i}_pw VARCHAR(100)")
-                conn.commit()
-        except:
-            pass  # Columns might already exist
-        
-        # Check if photo_urls column exists, if not, add it
-        ensure_photo_urls_column(cursor, 'projects')
-        
         query = """
             SELECT p.*, 
                    c.name as course_name,
@@ -2300,7 +2096,7 @@ async def get_projects(course_code: Optional[str] = None):
         conn.close()
 
 @app.get("/api/projects/{code}")
-async def get_project(code: str):
+def get_project(code: str):
     """특정 팀 조회"""
     conn = get_db_connection()
     try:
@@ -2324,56 +2120,12 @@ async def get_project(code: str):
         conn.close()
 
 @app.post("/api/projects")
-async def create_project(data: dict):
+def create_project(data: dict):
     """팀 생성 (5명의 팀원 정보)"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
         
-        # Check if new columns exist, if not, add them
-        try:
-            cursor.execute("SHOW COLUMNS FROM projects LIKE 'member1_code'")
-            if not cursor.fetchone():
-                # Add new columns
-                for i in range(1, 6):
-                    cursor.execute(f"ALTER TABLE projects ADD COLUMN member{i}_code VARCHAR(50)")
-                cursor.execute("ALTER TABLE projects ADD COLUMN group_type VARCHAR(50)")
-                cursor.execute("ALTER TABLE projects ADD COLUMN instructor_code VARCHAR(50)")
-                cursor.execute("ALTER TABLE projects ADD COLUMN mentor_code VARCHAR(50)")
-                conn.commit()
-        except:
-            pass  # Columns might already exist
-        
-        # Check if account columns exist, if not, add them
-        try:
-            cursor.execute("SHOW COLUMNS FROM projects LIKE 'account1_name'")
-            if not cursor.fetchone():
-                # Add shared account columns (5 sets of 3 fields = 15 columns)
-                for i in range(1, 6):
-                    cursor.execute(f"ALTER TABLE projects ADD COLUMN account{i}_name VARCHAR(100)")
-                    cursor.execute(f"ALTER TABLE projects ADD COLUMN account{i}_id VARCHAR(100)")
-                    cursor.execute(f"ALTER TABLE projects ADD COLUMN account{i}_pw VARCHAR(100)")
-                conn.commit()
-        except:
-            pass  # Columns might already exist
-        
-        # Ensure photo_urls column exists
-        ensure_photo_urls_column(cursor, 'projects')
-        
-        # Ensure description column exists (TEXT type for markdown support)
-        try:
-            cursor.execute("SHOW COLUMNS FROM projects LIKE 'description'")
-            result = cursor.fetchone()
-            if not result:
-                print("[INFO] Adding description column to projects table...")
-                cursor.execute("ALTER TABLE projects ADD COLUMN description TEXT")
-                conn.commit()
-                print("[OK] Description column added successfully")
-        except Exception as e:
-            print(f"[WARN] Description column check failed: {e}")
-            # Column might already exist, continue anyway
-            pass
-        
         query = """
             INSERT INTO projects (code, name, description, group_type, course_code, instructor_code, mentor_code,
                                  member1_name, member1_phone, member1_code,
@@ -2413,27 +2165,11 @@ async def create_project(data: dict):
         conn.close()
 
 @app.put("/api/projects/{code}")
-async def update_project(code: str, data: dict):
+def update_project(code: str, data: dict):
     """팀 수정"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
-        # Ensure photo_urls column exists
-        ensure_photo_urls_column(cursor, 'projects')
-        
-        # Ensure description column exists (TEXT type for markdown support)
-        try:
-            cursor.execute("SHOW COLUMNS FROM projects LIKE 'description'")
-            result = cursor.fetchone()
-            if not result:
-                print("[INFO] Adding description column to projects table...")
-                cursor.execute("ALTER TABLE projects ADD COLUMN description TEXT")
-                conn.commit()
-                print("[OK] Description column added successfully")
-        except Exception as e:
-            print(f"[WARN] Description column check failed: {e}")
-            # Column might already exist, continue anyway
-            pass
         
         query = """
             UPDATE projects
@@ -2476,7 +2212,7 @@ async def update_project(code: str, data: dict):
         conn.close()
 
 @app.delete("/api/projects/{code}")
-async def delete_project(code: str):
+def delete_project(code: str):
     """팀 삭제"""
     conn = get_db_connection()
     try:
@@ -2492,24 +2228,45 @@ async def delete_project(code: str):
 # ==================== 수업관리(시간표) API ====================
 
 @app.get("/api/timetables")
-async def get_timetables(
+def get_timetables(
     course_code: Optional[str] = None,
     start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+    end_date: Optional[str] = None,
+    limit: Optional[int] = None,
+    page_cursor: Optional[str] = Query(None, alias="cursor"),
+    fields: Optional[str] = None
 ):
-    """시간표 목록 조회 (과정/기간별 필터)"""
+    """시간표 목록 조회 (과정/기간별 필터, limit/cursor 페이지네이션, fields 프로젝션 지원)"""
+    page = Paginator(
+        [('t.class_date', 'class_date'), ('t.start_time', 'start_time'), ('t.id', 'id')],
+        limit=limit, cursor=page_cursor, fields=fields, table_alias='t',
+        computed={
+            'course_name': 'c.name',
+            'course_start_date': 'c.start_date',
+            'subject_name': 's.name',
+            'instructor_name': 'i.name',
+            'training_log_id': 'tl.id',
+            'training_content': 'tl.content',
+            'training_log_photo_urls': 'tl.photo_urls',
+        },
+        virtual={
+            'week_number': ['course_start_date', 'class_date'],
+            'day_number': ['course_start_date', 'class_date'],
+        }
+    )
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
-        query = """
-            SELECT t.*, 
+        select_sql = page.select("""t.*, 
                    c.name as course_name, c.start_date as course_start_date,
                    s.name as subject_name,
                    i.name as instructor_name,
                    tl.id as training_log_id,
                    tl.content as training_content,
-                   tl.photo_urls as training_log_photo_urls
+                   tl.photo_urls as training_log_photo_urls""")
+        query = f"""
+            SELECT {select_sql}
             FROM timetables t
             LEFT JOIN courses c ON t.course_code = c.code
             LEFT JOIN subjects s ON t.subject_code = s.code
@@ -2531,10 +2288,8 @@ async def get_timetables(
             query += " AND t.class_date <= %s"
             params.append(end_date)
         
-        query += " ORDER BY t.class_date, t.start_time"
-        
-        cursor.execute(query, params)
-        timetables = cursor.fetchall()
+        query, params = page.apply(query, params)
+        timetables, next_cursor = page.fetch(cursor, query, params)
         
         # 주차/일차 계산
         for tt in timetables:
@@ -2545,12 +2300,12 @@ async def get_timetables(
             else:
                 tt['week_number'] = None
                 tt['day_number'] = None
-        return [convert_datetime(tt) for tt in timetables]
+        return page.response([convert_datetime(tt) for tt in timetables], next_cursor)
     finally:
         conn.close()
 
 @app.get("/api/timetables/{timetable_id}")
-async def get_timetable(timetable_id: int):
+def get_timetable(timetable_id: int):
     """특정 시간표 조회"""
     conn = get_db_connection()
     try:
@@ -2574,7 +2329,7 @@ async def get_timetable(timetable_id: int):
         conn.close()
 
 @app.post("/api/timetables")
-async def create_timetable(data: dict):
+def create_timetable(data: dict):
     """시간표 생성"""
     # 디버깅: 받은 데이터 로깅
     print(f"[DEBUG] 시간표 추가 데이터: {data}")
@@ -2602,7 +2357,7 @@ async def create_timetable(data: dict):
         conn.close()
 
 @app.put("/api/timetables/{timetable_id}")
-async def update_timetable(timetable_id: int, data: dict):
+def update_timetable(timetable_id: int, data: dict):
     """시간표 수정"""
     conn = get_db_connection()
     try:
@@ -2630,7 +2385,7 @@ async def update_timetable(timetable_id: int, data: dict):
         conn.close()
 
 @app.delete("/api/timetables/{timetable_id}")
-async def delete_timetable(timetable_id: int):
+def delete_timetable(timetable_id: int):
     """시간표 삭제"""
     conn = get_db_connection()
     try:
@@ -2644,23 +2399,34 @@ async def delete_timetable(timetable_id: int):
 # ==================== 상담 관리 API ====================
 
 @app.get("/api/counselings")
-async def get_counselings(
+def get_counselings(
     student_id: Optional[int] = None,
     month: Optional[str] = None,
-    course_code: Optional[str] = None
+    course_code: Optional[str] = None,
+    limit: Optional[int] = None,
+    page_cursor: Optional[str] = Query(None, alias="cursor"),
+    fields: Optional[str] = None
 ):
-    """상담 목록 조회 (학생별/월별/학급별 필터)"""
+    """상담 목록 조회 (학생별/월별/학급별 필터, limit/cursor 페이지네이션, fields 프로젝션 지원)"""
+    page = Paginator(
+        [('c.consultation_date', 'consultation_date'), ('c.id', 'id')],
+        descending=True, limit=limit, cursor=page_cursor, fields=fields, table_alias='c',
+        nullable=['consultation_date'],
+        computed={
+            'student_name': 's.name',
+            'student_code': 's.code',
+            'course_code': 's.course_code',
+            'instructor_name': 'i.name',
+        }
+    )
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
-        # photo_urls, career_decision 컬럼 확인 및 추가
-        ensure_photo_urls_column(cursor, 'consultations')
-        ensure_career_decision_column(cursor)
-        
-        query = """
-            SELECT c.*, s.name as student_name, s.code as student_code, s.course_code,
-                   i.name as instructor_name
+        select_sql = page.select("""c.*, s.name as student_name, s.code as student_code, s.course_code,
+                   i.name as instructor_name""")
+        query = f"""
+            SELECT {select_sql}
             FROM consultations c
             LEFT JOIN students s ON c.student_id = s.id
             LEFT JOIN instructors i ON c.instructor_code = i.code
@@ -2680,22 +2446,20 @@ async def get_counselings(
             query += " AND s.course_code = %s"
             params.append(course_code)
         
-        query += " ORDER BY c.consultation_date DESC"
-        
-        cursor.execute(query, params)
-        counselings = cursor.fetchall()
+        query, params = page.apply(query, params)
+        counselings, next_cursor = page.fetch(cursor, query, params)
         
         for counseling in counselings:
             for key, value in counseling.items():
                 if isinstance(value, (datetime, date)):
                     counseling[key] = value.isoformat()
         
-        return counselings
+        return page.response(counselings, next_cursor)
     finally:
         conn.close()
 
 @app.get("/api/counselings/{counseling_id}")
-async def get_counseling(counseling_id: int):
+def get_counseling(counseling_id: int):
     """특정 상담 조회"""
     conn = get_db_connection()
     try:
@@ -2722,16 +2486,12 @@ async def get_counseling(counseling_id: int):
         conn.close()
 
 @app.post("/api/counselings")
-async def create_counseling(data: dict):
+def create_counseling(data: dict):
     """상담 생성"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
         
-        # photo_urls, career_decision 컬럼 확인 및 추가
-        ensure_photo_urls_column(cursor, 'consultations')
-        ensure_career_decision_column(cursor)
-        
         # consultations 테이블 구조에 맞게 조정
         query = """
             INSERT INTO consultations 
@@ -2766,16 +2526,12 @@ async def create_counseling(data: dict):
         conn.close()
 
 @app.put("/api/counselings/{counseling_id}")
-async def update_counseling(counseling_id: int, data: dict):
+def update_counseling(counseling_id: int, data: dict):
     """상담 수정"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
         
-        # photo_urls, career_decision 컬럼 확인 및 추가
-        ensure_photo_urls_column(cursor, 'consultations')
-        ensure_career_decision_column(cursor)
-        
         query = """
             UPDATE consultations 
             SET student_id = %s, instructor_code = %s, consultation_date = %s, consultation_type = %s,
@@ -2807,7 +2563,7 @@ async def update_counseling(counseling_id: int, data: dict):
         conn.close()
 
 @app.delete("/api/counselings/{counseling_id}")
-async def delete_counseling(counseling_id: int):
+def delete_counseling(counseling_id: int):
     """상담 삭제"""
     conn = get_db_connection()
     try:
@@ -2821,42 +2577,42 @@ async def delete_counseling(counseling_id: int):
 # ==================== 훈련일지 관리 API ====================
 
 @app.get("/api/training-logs")
-async def get_training_logs(
+def get_training_logs(
     course_code: Optional[str] = None,
     instructor_code: Optional[str] = None,
     year: Optional[int] = None,
     month: Optional[int] = None,
-    timetable_id: Optional[int] = None
+    timetable_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    page_cursor: Optional[str] = Query(None, alias="cursor"),
+    fields: Optional[str] = None
 ):
-    """훈련일지 목록 조회"""
+    """훈련일지 목록 조회 (limit/cursor 페이지네이션, fields 프로젝션 지원)"""
+    page = Paginator(
+        [('t.class_date', 'class_date'), ('t.start_time', 'start_time'), ('tl.id', 'id')],
+        limit=limit, cursor=page_cursor, fields=fields, table_alias='tl',
+        nullable=['class_date', 'start_time'],
+        computed={
+            'class_date': 't.class_date',
+            'start_time': 't.start_time',
+            'end_time': 't.end_time',
+            'type': 't.type',
+            'subject_name': 's.name',
+            'instructor_name': 'i.name',
+            'course_name': 'c.name',
+        }
+    )
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
-        # training_logs 테이블이 없으면 생성
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS training_logs (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                timetable_id INT NOT NULL,
-                course_code VARCHAR(50),
-                instructor_code VARCHAR(50),
-                class_date DATE,
-                content TEXT,
-                homework TEXT,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (timetable_id) REFERENCES timetables(id) ON DELETE CASCADE
-            )
-        """)
-        conn.commit()
-        
-        query = """
-            SELECT tl.*, 
+        select_sql = page.select("""tl.*, 
                    t.class_date, t.start_time, t.end_time, t.type,
                    s.name as subject_name,
                    i.name as instructor_name,
-                   c.name as course_name
+                   c.name as course_name""")
+        query = f"""
+            SELECT {select_sql}
             FROM training_logs tl
             LEFT JOIN timetables t ON tl.timetable_id = t.id
             LEFT JOIN subjects s ON t.subject_code = s.code
@@ -2886,22 +2642,20 @@ async def get_training_logs(
             query += " AND YEAR(t.class_date) = %s"
             params.append(year)
         
-        query += " ORDER BY t.class_date, t.start_time"
-        
-        cursor.execute(query, params)
-        logs = cursor.fetchall()
+        query, params = page.apply(query, params)
+        logs, next_cursor = page.fetch(cursor, query, params)
         
         for log in logs:
             for key, value in log.items():
                 if isinstance(value, (datetime, date)):
                     log[key] = value.isoformat()
         
-        return logs
+        return page.response(logs, next_cursor)
     finally:
         conn.close()
 
 @app.get("/api/training-logs/{log_id}")
-async def get_training_log(log_id: int):
+def get_training_log(log_id: int):
     """특정 훈련일지 조회"""
     conn = get_db_connection()
     try:
@@ -2933,15 +2687,12 @@ async def get_training_log(log_id: int):
         conn.close()
 
 @app.post("/api/training-logs")
-async def create_training_log(data: dict):
+def create_training_log(data: dict):
     """훈련일지 생성"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
         
-        # photo_urls 컬럼이 없으면 자동 생성
-        ensure_photo_urls_column(cursor, 'training_logs')
-        
         query = """
             INSERT INTO training_logs 
             (timetable_id, course_code, instructor_code, class_date, content, homework, notes, photo_urls)
@@ -2967,15 +2718,12 @@ async def create_training_log(data: dict):
         conn.close()
 
 @app.put("/api/training-logs/{log_id}")
-async def update_training_log(log_id: int, data: dict):
+def update_training_log(log_id: int, data: dict):
     """훈련일지 수정"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
         
-        # photo_urls 컬럼이 없으면 자동 생성
-        ensure_photo_urls_column(cursor, 'training_logs')
-        
         query = """
             UPDATE training_logs 
             SET content = %s, homework = %s, notes = %s, photo_urls = %s
@@ -2996,7 +2744,7 @@ async def update_training_log(log_id: int, data: dict):
         conn.close()
 
 @app.delete("/api/training-logs/{log_id}")
-async def delete_training_log(log_id: int):
+def delete_training_log(log_id: int):
     """훈련일지 삭제"""
     conn = get_db_connection()
     try:
@@ -3008,7 +2756,7 @@ async def delete_training_log(log_id: int):
         conn.close()
 
 @app.post("/api/training-logs/generate-content")
-async def generate_training_content(data: dict):
+def generate_training_content(data: dict, request: Request):
     """AI를 이용한 훈련일지 수업 내용 자동 생성 (사용자 입력 기반 확장)"""
     subject_name = data.get('subject_name', '')
     sub_subjects = data.get('sub_subjects', [])  # 세부 교과목 리스트
@@ -3243,17 +2991,23 @@ async def generate_training_content(data: dict):
                 "max_tokens": 1000
             }
             
-            response = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Groq API 오류: {response.text}")
-            
-            content = response.json()['choices'][0]['message']['content']
+            # 같은 프롬프트면 저장된 응답 재사용 (no_cache로 우회)
+            cache_key = llm_cache.make_key('groq', payload['model'], payload['temperature'], payload)
+            content = llm_cache.get(cache_key, bypass=bypass_llm_cache(data, request.headers))
+            if content is None:
+                response = post_from_thread(
+                    'groq',
+                    "/openai/v1/chat/completions",
+                    headers=headers,
+                    json=payload,
+                    timeout=30
+                )
+                
+                if response.status_code != 200:
+                    raise Exception(f"Groq API 오류: {response.text}")
+                
+                content = response.json()['choices'][0]['message']['content']
+                llm_cache.set(cache_key, content, provider='groq', model=payload['model'])
         else:
             # API 키가 없으면 템플릿 기반 생성 (타입별 템플릿)
             if timetable_type == 'project':
@@ -3986,7 +3740,7 @@ def generate_report_template(student, counselings, counseling_text, style='forma
     return report
 
 @app.post("/api/ai/generate-report")
-async def generate_ai_report(data: dict):
+def generate_ai_report(data: dict, request: Request):
     """AI를 이용한 생기부 작성"""
     student_id = data.get('student_id')
     style = data.get('style', 'formal')  # formal, friendly, detailed
@@ -4066,17 +3820,23 @@ async def generate_ai_report(data: dict):
                 "max_tokens": 2000
             }
             
-            response = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Groq API 오류: {response.text}")
-            
-            ai_report = response.json()['choices'][0]['message']['content']
+            # 같은 프롬프트면 저장된 응답 재사용 (no_cache로 우회)
+            cache_key = llm_cache.make_key('groq', payload['model'], payload['temperature'], payload)
+            ai_report = llm_cache.get(cache_key, bypass=bypass_llm_cache(data, request.headers))
+            if ai_report is None:
+                response = post_from_thread(
+                    'groq',
+                    "/openai/v1/chat/completions",
+                    headers=headers,
+                    json=payload,
+                    timeout=30
+                )
+                
+                if response.status_code != 200:
+                    raise Exception(f"Groq API 오류: {response.text}")
+                
+                ai_report = response.json()['choices'][0]['message']['content']
+                llm_cache.set(cache_key, ai_report, provider='groq', model=payload['model'])
         else:
             # API 키가 없으면 스타일별 생기부 템플릿 생성
             ai_report = generate_report_template(student, counselings, counseling_text, style)
@@ -4099,7 +3859,7 @@ async def generate_ai_report(data: dict):
 # ==================== 헬스 체크 ====================
 
 @app.get("/api/status")
-async def api_status():
+def api_status():
     """API 상태 확인"""
     return {
         "message": "학급 관리 시스템 API",
@@ -4490,7 +4250,7 @@ def generate_detailed_calculation(start_date, lecture_hours, project_hours, work
     return details
 
 @app.post("/api/courses/calculate-dates")
-async def calculate_course_dates(data: dict):
+def calculate_course_dates(data: dict):
     """
     과정 날짜 자동 계산 (공휴일 제외)
     - start_date: 시작일
@@ -4521,19 +4281,21 @@ async def calculate_course_dates(data: dict):
         
         # 공휴일 가져오기
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
         
-        # 시작일로부터 1년간의 공휴일 조회
+        # 시작일로부터 1년간의 공휴일 조회 (이름까지 한 번에 조회)
         end_year = start_date.year + 1
-        cursor.execute("""
-            SELECT holiday_date 
+        holidays_result = cached_fetchall(cursor, """
+            SELECT holiday_date, name
             FROM holidays 
             WHERE holiday_date >= %s 
             AND YEAR(holiday_date) BETWEEN %s AND %s
-        """, (start_date_str, start_date.year, end_year))
+        """, (start_date_str, start_date.year, end_year), tables=('holidays',))
         
-        holidays_result = cursor.fetchall()
-        holidays = set(row[0] for row in holidays_result)
+        holiday_names = {}
+        for row in holidays_result:
+            holiday_names.setdefault(row['holiday_date'], row['name'])
+        holidays = set(holiday_names)
         
         cursor.close()
         conn.close()
@@ -4564,19 +4326,9 @@ async def calculate_course_dates(data: dict):
         holidays_detail = []  # 상세 정보 저장
         current = start_date
         
-        # 공휴일 이름 조회를 위한 DB 연결
-        conn_holiday = get_db_connection()
-        cursor_holiday = conn_holiday.cursor(pymysql.cursors.DictCursor)
-        
         while current <= workship_end_date:
             if current in holidays:
-                # 공휴일 이름 조회
-                cursor_holiday.execute(
-                    "SELECT name FROM holidays WHERE holiday_date = %s",
-                    (current,)
-                )
-                holiday_info = cursor_holiday.fetchone()
-                holiday_name = holiday_info['name'] if holiday_info else '공휴일'
+                holiday_name = holiday_names.get(current) or '공휴일'
                 
                 holidays_in_period.append(current)
                 holidays_detail.append({
@@ -4586,9 +4338,6 @@ async def calculate_course_dates(data: dict):
                 })
             current += timedelta(days=1)
         
-        cursor_holiday.close()
-        conn_holiday.close()
-        
         # 공휴일을 그룹화 (연속된 날짜는 범위로 표시)
         holiday_strings = []
         if holidays_in_period:
@@ -4729,7 +4478,7 @@ async def calculate_course_dates(data: dict):
                     }
                     # 시간표 생성 로직 호출 (동일 함수 재사용)
                     from fastapi.responses import Response
-                    timetable_result = await auto_generate_timetables(timetable_data)
+                    timetable_result = auto_generate_timetables(timetable_data)
                     result['timetable_generated'] = True
                     result['timetable_count'] = timetable_result.get('generated_count', 0)
                 except Exception as e:
@@ -4754,7 +4503,7 @@ async def calculate_course_dates(data: dict):
         raise HTTPException(status_code=500, detail=f"날짜 계산 실패: {str(e)}")
 
 @app.post("/api/ai/generate-training-logs")
-async def generate_ai_training_logs(data: dict):
+def generate_ai_training_logs(data: dict):
     """AI 훈련일지 자동 생성"""
     timetable_ids = data.get('timetable_ids', [])
     prompt_guide = data.get('prompt', '')
@@ -4952,7 +4701,7 @@ async def generate_ai_training_logs(data: dict):
         conn.close()
 
 @app.post("/api/counselings/ai-generate")
-async def generate_ai_counseling(data: dict):
+def generate_ai_counseling(data: dict):
     """AI 상담일지 자동 생성"""
     student_code = data.get('student_code')
     course_code = data.get('course_code')
@@ -5041,7 +4790,7 @@ async def generate_ai_counseling(data: dict):
         conn.close()
 
 @app.post("/api/ai/replace-timetable")
-async def replace_timetable(data: dict):
+def replace_timetable(data: dict):
     """AI 시간표 대체: 시간표 날짜 변경 및 원래 날짜를 공휴일로 등록"""
     course_code = data.get('course_code')
     original_date = data.get('original_date')
@@ -5132,7 +4881,7 @@ async def replace_timetable(data: dict):
             conn.close()
 
 @app.post("/api/upload-image")
-async def upload_image(
+def upload_image(
     file: UploadFile = File(...),
     category: str = Query(..., description="guidance, train, student, teacher, team")
 ):
@@ -5166,9 +4915,9 @@ async def upload_image(
             )
         
         # 파일 크기 체크 (100MB 제한 - 메모리에 올리지 않고 크기만 확인)
-        await file.seek(0, 2)  # 파일 끝으로 이동
-        file_size = await file.tell()  # 현재 위치 = 파일 크기
-        await file.seek(0)  # 파일 처음으로 되돌림
+        file.file.seek(0, 2)  # 파일 끝으로 이동
+        file_size = file.file.tell()  # 현재 위치 = 파일 크기
+        file.file.seek(0)  # 파일 처음으로 되돌림
         
         if file_size > 100 * 1024 * 1024:
             raise HTTPException(status_code=413, detail=f"파일 크기는 100MB를 초과할 수 없습니다 (현재: {file_size / 1024 / 1024:.2f}MB)")
@@ -5205,7 +4954,7 @@ async def upload_image(
         new_filename = f"{timestamp}_{unique_id}_{safe_name}{file_ext}"
         
         # 스트리밍 FTP 업로드 (메모리 절약)
-        file_url = await upload_stream_to_ftp(file, new_filename, category)
+        file_url = upload_stream_to_ftp(file, new_filename, category)
         
         return {
             "success": True,
@@ -5225,7 +4974,7 @@ async def upload_image(
         raise HTTPException(status_code=500, detail=f"이미지 업로드 실패: {str(e)}")
 
 @app.post("/api/upload")
-async def upload_file(
+def upload_file(
     file: UploadFile = File(...),
     directory: str = Form("uploads")
 ):
@@ -5254,9 +5003,9 @@ async def upload_file(
             )
         
         # 파일 크기 체크 (10MB 제한)
-        await file.seek(0, 2)
-        file_size = await file.tell()
-        await file.seek(0)
+        file.file.seek(0, 2)
+        file_size = file.file.tell()
+        file.file.seek(0)
         
         if file_size > 10 * 1024 * 1024:
             raise HTTPException(status_code=413, detail=f"파일 크기는 10MB를 초과할 수 없습니다")
@@ -5268,7 +5017,7 @@ async def upload_file(
         safe_filename = f"{timestamp}_{unique_id}{file_ext}"
         
         # 파일 데이터 읽기
-        file_data = await file.read()
+        file_data = file.file.read()
         
         # FTP 업로드
         ftp = ftplib.FTP()
@@ -5305,7 +5054,7 @@ async def upload_file(
         raise HTTPException(status_code=500, detail=f"파일 업로드 실패: {str(e)}")
 
 @app.post("/api/upload-image-base64")
-async def upload_image_base64(data: dict):
+def upload_image_base64(data: dict):
     """
     Base64 인코딩된 이미지를 FTP 서버에 업로드 (모바일 카메라 촬영용)
     
@@ -5370,7 +5119,7 @@ async def upload_image_base64(data: dict):
         raise HTTPException(status_code=500, detail=f"이미지 업로드 실패: {str(e)}")
 
 @app.get("/api/download-image")
-async def download_image(url: str = Query(..., description="FTP URL to download")):
+def download_image(url: str = Query(..., description="FTP URL to download")):
     """
     FTP 서버의 이미지를 다운로드하는 프록시 API
     
@@ -5465,7 +5214,7 @@ async def download_image(url: str = Query(..., description="FTP URL to download"
 
 @app.get("/api/thumbnail")
 @app.head("/api/thumbnail")
-async def get_thumbnail(url: str = Query(..., description="FTP URL")):
+def get_thumbnail(url: str = Query(..., description="FTP URL")):
     """
     이미지 썸네일 제공 API
     
@@ -5543,19 +5292,85 @@ async def get_thumbnail(url: str = Query(..., description="FTP URL")):
         raise HTTPException(status_code=500, detail=f"썸네일 조회 실패: {str(e)}")
 
 @app.get("/health")
-async def health_check():
+def health_check():
     """헬스 체크"""
     try:
-        conn = get_db_connection()
-        conn.close()
-        return {"status": "healthy", "database": "connected"}
+        with db_connection() as conn:
+            conn.ping(reconnect=False)
+        return {"status": "healthy", "database": "connected", "db_pool": db_pool.stats()}
     except Exception as e:
-        return {"status": "unhealthy", "error": str(e)}
+        return {"status": "unhealthy", "error": str(e), "db_pool": db_pool.stats()}
+
+@app.get("/api/admin/db-pool")
+def get_db_pool_stats():
+    """DB 커넥션 풀 통계 (대여 중/대기 중/생성/교체 수)"""
+    return db_pool.stats()
+
+@app.get("/api/admin/schema-migrations")
+def get_schema_migrations():
+    """스키마 마이그레이션 적용 현황"""
+    with db_connection() as conn:
+        return migration_runner.status(conn)
+
+@app.post("/api/admin/schema-migrations")
+def apply_pending_schema_migrations():
+    """미적용 스키마 마이그레이션 즉시 실행"""
+    with db_connection() as conn:
+        migration_runner.run(conn)
+        return migration_runner.status(conn)
+
+@app.get("/api/admin/read-cache")
+def get_read_cache_stats():
+    """참조 테이블 읽기 캐시 통계 (적중/미스/무효화 수)"""
+    return read_cache.stats()
+
+@app.post("/api/admin/read-cache/clear")
+def clear_read_cache():
+    """읽기 캐시 전체 비우기"""
+    read_cache.clear()
+    return read_cache.stats()
+
+@app.get("/api/admin/system-settings-cache")
+def get_system_settings_cache_stats():
+    """시스템 설정 캐시 상태 (로드 횟수/만료까지 남은 시간)"""
+    return settings_service.stats()
+
+@app.get("/api/admin/thread-pools")
+async def get_thread_pool_stats():
+    """블로킹 I/O 스레드 풀 사용 현황"""
+    return thread_pool_stats()
+
+@app.get("/api/admin/llm-cache")
+def get_llm_cache_stats():
+    """LLM 응답 캐시 통계 (적중률/항목 수)"""
+    return llm_cache.stats()
+
+@app.post("/api/admin/llm-cache/clear")
+def clear_llm_cache():
+    """LLM 응답 캐시 전체 삭제"""
+    llm_cache.clear()
+    return llm_cache.stats()
+
+@app.get("/api/admin/llm-clients")
+async def get_llm_client_stats():
+    """외부 AI API 공유 클라이언트 현황 (제공자별 요청/재시도/동시 요청 수)"""
+    return llm_clients.stats()
+
+@app.on_event("shutdown")
+def close_db_pool():
+    """서버 종료 시 유휴 DB 연결 정리"""
+    db_pool.close_all()
+    read_cache.close()
+
+@app.on_event("shutdown")
+async def close_llm_clients():
+    """서버 종료 시 외부 AI API keep-alive 연결 정리"""
+    await llm_clients.aclose_all()
 
 # ==================== 인증 API ====================
 
 @app.post("/api/auth/login")
-async def login(credentials: dict):
+def login(credentials: dict):
     """
     통합 로그인 API
     - 이름으로 강사 또는 학생 자동 구분 로그인
@@ -5617,31 +5432,15 @@ async def login(credentials: dict):
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
         # 1️⃣ 먼저 강사 테이블에서 검색
-        cursor.execute("SHOW COLUMNS FROM instructors LIKE 'password'")
-        has_instructor_password = cursor.fetchone() is not None
-        
-        ensure_profile_photo_columns(cursor, 'instructors')
-        
-        if has_instructor_password:
-            cursor.execute("""
-                SELECT i.code, TRIM(i.name) as name, i.phone, i.major, i.instructor_type, 
-                       i.email, i.created_at, i.updated_at, i.profile_photo, i.attachments, i.password,
-                       ic.name as instructor_type_name, ic.type as instructor_type_type, 
-                       ic.permissions, ic.default_screen
-                FROM instructors i
-                LEFT JOIN instructor_codes ic ON i.instructor_type = ic.code
-                WHERE TRIM(i.name) = %s
-            """, (user_name.strip(),))
-        else:
-            cursor.execute("""
-                SELECT i.code, TRIM(i.name) as name, i.phone, i.major, i.instructor_type, 
-                       i.email, i.created_at, i.updated_at, i.profile_photo, i.attachments,
-                       ic.name as instructor_type_name, ic.type as instructor_type_type, 
-                       ic.permissions, ic.default_screen
-                FROM instructors i
-                LEFT JOIN instructor_codes ic ON i.instructor_type = ic.code
-                WHERE TRIM(i.name) = %s
-            """, (user_name.strip(),))
+        cursor.execute("""
+            SELECT i.code, TRIM(i.name) as name, i.phone, i.major, i.instructor_type, 
+                   i.email, i.created_at, i.updated_at, i.profile_photo, i.attachments, i.password,
+                   ic.name as instructor_type_name, ic.type as instructor_type_type, 
+                   ic.permissions, ic.default_screen
+            FROM instructors i
+            LEFT JOIN instructor_codes ic ON i.instructor_type = ic.code
+            WHERE TRIM(i.name) = %s
+        """, (user_name.strip(),))
         
         instructor = cursor.fetchone()
         
@@ -5704,13 +5503,6 @@ async def login(credentials: dict):
             }
         
         # 3️⃣ 강사가 아니면 학생 테이블에서 검색
-        ensure_profile_photo_columns(cursor, 'students')
-        
-        cursor.execute("SHOW COLUMNS FROM students LIKE 'password'")
-        if not cursor.fetchone():
-            cursor.execute("ALTER TABLE students ADD COLUMN password VARCHAR(100) DEFAULT 'kdt2025'")
-            conn.commit()
-        
         cursor.execute("""
             SELECT s.*, 
                    c.name as course_name,
@@ -5760,7 +5552,7 @@ async def login(credentials: dict):
         conn.close()
 
 @app.post("/api/auth/student-login")
-async def student_login(credentials: dict):
+def student_login(credentials: dict):
     """
     학생 로그인 API
     - 학생 이름과 비밀번호로 로그인
@@ -5781,16 +5573,6 @@ async def student_login(credentials: dict):
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
-        # profile_photo와 attachments 컬럼이 없으면 자동 생성
-        ensure_profile_photo_columns(cursor, 'students')
-        
-        # password 컬럼이 없으면 추가
-        cursor.execute("SHOW COLUMNS FROM students LIKE 'password'")
-        if not cursor.fetchone():
-            cursor.execute("ALTER TABLE students ADD COLUMN password VARCHAR(100) DEFAULT 'kdt2025'")
-            conn.commit()
-            print("[OK] students 테이블에 password 컬럼 추가")
-        
         # 학생 조회 (이름으로)
         cursor.execute("""
             SELECT s.*, 
@@ -5873,7 +5655,7 @@ async def student_login(credentials: dict):
         conn.close()
 
 @app.post("/api/auth/change-password")
-async def change_password(data: dict):
+def change_password(data: dict):
     """
     비밀번호 변경 API
     - old_password가 있으면: 본인이 비밀번호 변경 (기존 비밀번호 확인 필요)
@@ -5890,12 +5672,6 @@ async def change_password(data: dict):
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
-        # password 컬럼이 없으면 추가
-        cursor.execute("SHOW COLUMNS FROM instructors LIKE 'password'")
-        if not cursor.fetchone():
-            cursor.execute("ALTER TABLE instructors ADD COLUMN password VARCHAR(100) DEFAULT 'kdt2025'")
-            conn.commit()
-        
         # 기존 비밀번호 확인 (old_password가 제공된 경우에만)
         if old_password:
             cursor.execute("SELECT password FROM instructors WHERE code = %s", (instructor_code,))
@@ -5939,7 +5715,7 @@ async def change_password(data: dict):
         conn.close()
 
 @app.get("/", response_class=HTMLResponse)
-async def serve_index():
+def serve_index():
     """프론트엔드 index.html 서빙"""
     try:
         index_path = os.path.join(frontend_dir, "index.html")
@@ -5951,7 +5727,7 @@ async def serve_index():
 # ==================== 팀 활동일지 API ====================
 
 @app.get("/api/team-activity-logs")
-async def get_team_activity_logs(project_id: Optional[int] = None):
+def get_team_activity_logs(project_id: Optional[int] = None):
     """팀 활동일지 조회"""
     conn = get_db_connection()
     try:
@@ -5980,7 +5756,7 @@ async def get_team_activity_logs(project_id: Optional[int] = None):
         conn.close()
 
 @app.post("/api/team-activity-logs")
-async def create_team_activity_log(log: dict):
+def create_team_activity_log(log: dict):
     """팀 활동일지 생성"""
     conn = get_db_connection()
     try:
@@ -6013,7 +5789,7 @@ async def create_team_activity_log(log: dict):
         conn.close()
 
 @app.put("/api/team-activity-logs/{log_id}")
-async def update_team_activity_log(log_id: int, log: dict):
+def update_team_activity_log(log_id: int, log: dict):
     """팀 활동일지 수정"""
     conn = get_db_connection()
     try:
@@ -6051,7 +5827,7 @@ async def update_team_activity_log(log_id: int, log: dict):
         conn.close()
 
 @app.delete("/api/team-activity-logs/{log_id}")
-async def delete_team_activity_log(log_id: int):
+def delete_team_activity_log(log_id: int):
     """팀 활동일지 삭제"""
     conn = get_db_connection()
     try:
@@ -6073,7 +5849,7 @@ async def delete_team_activity_log(log_id: int):
         conn.close()
 
 @app.get("/login", response_class=HTMLResponse)
-async def serve_login():
+def serve_login():
     """로그인 페이지 서빙"""
     try:
         login_path = os.path.join(frontend_dir, "login.html")
@@ -6083,7 +5859,7 @@ async def serve_login():
         raise HTTPException(status_code=404, detail="Login page not found")
 
 @app.get("/manifest.json")
-async def serve_manifest():
+def serve_manifest():
     """manifest.json 서빙"""
     from fastapi.responses import FileResponse
     manifest_path = os.path.join(frontend_dir, "manifest.json")
@@ -6092,7 +5868,7 @@ async def serve_manifest():
     raise HTTPException(status_code=404, detail="manifest.json not found")
 
 @app.get("/{filename}.html", response_class=HTMLResponse)
-async def serve_html(filename: str):
+def serve_html(filename: str):
     """프론트엔드 HTML 파일 서빙"""
     try:
         html_path = os.path.join(frontend_dir, f"{filename}.html")
@@ -6104,7 +5880,7 @@ async def serve_html(filename: str):
         raise HTTPException(status_code=404, detail=f"{filename}.html not found")
 
 @app.get("/{filename:path}.js")
-async def serve_js(filename: str):
+def serve_js(filename: str):
     """프론트엔드 JS 파일 서빙"""
     from fastapi.responses import FileResponse
     js_path = os.path.join(frontend_dir, f"{filename}.js")
@@ -6113,7 +5889,7 @@ async def serve_js(filename: str):
     raise HTTPException(status_code=404, detail=f"{filename}.js not found")
 
 @app.get("/{filename:path}.css")
-async def serve_css(filename: str):
+def serve_css(filename: str):
     """프론트엔드 CSS 파일 서빙"""
     from fastapi.responses import FileResponse
     css_path = os.path.join(frontend_dir, f"{filename}.css")
@@ -6122,7 +5898,7 @@ async def serve_css(filename: str):
     raise HTTPException(status_code=404, detail=f"{filename}.css not found")
 
 @app.get("/favicon.ico")
-async def serve_favicon():
+def serve_favicon():
     """favicon.ico 서빙"""
     from fastapi.responses import FileResponse
     favicon_path = os.path.join(frontend_dir, "favicon.ico")
@@ -6131,7 +5907,7 @@ async def serve_favicon():
     raise HTTPException(status_code=404, detail="favicon.ico not found")
 
 @app.get("/{filename}.png")
-async def serve_png(filename: str):
+def serve_png(filename: str):
     """PNG 이미지 파일 서빙"""
     from fastapi.responses import FileResponse
     png_path = os.path.join(frontend_dir, f"{filename}.png")
@@ -6144,7 +5920,7 @@ from fastapi.responses import StreamingResponse
 from urllib.parse import urlparse, unquote
 
 @app.get("/api/proxy-image")
-async def proxy_ftp_image(url: str):
+def proxy_ftp_image(url: str):
     """FTP 이미지를 HTTP로 프록시"""
     try:
         # URL 파싱
@@ -6190,38 +5966,37 @@ async def proxy_ftp_image(url: str):
 
 # ==================== 시스템 설정 API ====================
 
-def ensure_system_settings_table(cursor):
-    """system_settings 테이블이 없으면 생성"""
+def load_system_settings() -> dict:
+    """system_settings 전체 조회 (설정 서비스의 로더, 블로킹)"""
+    conn = get_db_connection()
+    cursor = conn.cursor(pymysql.cursors.DictCursor)
     try:
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS system_settings (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                setting_key VARCHAR(50) UNIQUE NOT NULL,
-                setting_value TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-            )
-        """)
-        print("[OK] system_settings 테이블 확인/생성 완료")
-    except Exception as e:
-        print(f"[WARN] system_settings 테이블 생성 실패: {e}")
+        cursor.execute("SELECT setting_key, setting_value FROM system_settings")
+        return {row['setting_key']: row['setting_value'] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+        conn.close()
+
+# 시스템 설정 캐시: TTL 만료 또는 system_settings 쓰기 커밋(다른 워커 포함) 시 다시 읽음
+settings_service = SystemSettingsService(load_system_settings)
+read_cache.add_invalidation_listener(settings_service.on_tables_invalidated)
+
+async def resolve_ai_api_keys(request: Request) -> dict:
+    """AI API 키 조회 (요청 헤더 > DB > 환경변수), 설정 캐시가 유효하면 DB 연결 없음"""
+    if settings_service.needs_refresh():
+        await run_blocking(settings_service.refresh)
+    return {
+        'groq': settings_service.resolve_api_key('groq', request.headers.get('X-GROQ-API-Key', '')),
+        'gemini': settings_service.resolve_api_key('gemini', request.headers.get('X-Gemini-API-Key', '')),
+    }
 
 @app.get("/api/system-settings")
-async def get_system_settings():
+def get_system_settings():
     """시스템 설정 조회"""
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
-    
     try:
-        ensure_system_settings_table(cursor)
-        conn.commit()
-        
-        cursor.execute("SELECT * FROM system_settings")
-        settings = cursor.fetchall()
-        
-        # 설정을 키-값 형태로 변환
-        settings_dict = {}
-        for setting in settings:
-            settings_dict[setting['setting_key']] = setting['setting_value']
+        settings_dict = settings_service.get_all()
+        if not settings_service.loaded:
+            raise HTTPException(status_code=503, detail=f"시스템 설정을 불러올 수 없습니다: {settings_service.last_error}")
         
         # 기본값 설정
         if 'system_title' not in settings_dict:
@@ -6236,15 +6011,13 @@ async def get_system_settings():
             settings_dict['favicon_url'] = '/favicon.ico'
         
         return settings_dict
+    except HTTPException:
+        raise
     except Exception as e:
-        conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        cursor.close()
-        conn.close()
 
 @app.post("/api/system-settings")
-async def update_system_settings(
+def update_system_settings(
     system_title: Optional[str] = Form(None),
     system_subtitle1: Optional[str] = Form(None),
     system_subtitle2: Optional[str] = Form(None),
@@ -6279,9 +6052,6 @@ async def update_system_settings(
     cursor = conn.cursor()
     
     try:
-        ensure_system_settings_table(cursor)
-        conn.commit()
-        
         updates = {
             'system_title': system_title,
             'system_subtitle1': system_subtitle1,
@@ -6312,12 +6082,11 @@ async def update_system_settings(
         conn.commit()
         print(f"[OK] {update_count}개 설정 업데이트 완료")
         
-        # 저장된 데이터 확인
-        cursor.execute("SELECT setting_key, setting_value FROM system_settings")
-        saved_data = cursor.fetchall()
+        # 설정 캐시 즉시 갱신 (저장된 데이터 확인 겸용)
+        saved_data = settings_service.refresh(force=True)
         print(f"[STAT] 현재 DB 상태:")
-        for row in saved_data:
-            print(f"  - {row[0]}: {row[1]}")
+        for key, value in saved_data.items():
+            print(f"  - {key}: {value}")
         
         return {"message": "시스템 설정이 업데이트되었습니다", "updated_count": update_count}
     except Exception as e:
@@ -6330,79 +6099,24 @@ async def update_system_settings(
 
 # ==================== 학생 수업일지 API ====================
 
-def ensure_class_notes_table(cursor):
-    """class_notes 테이블이 없으면 생성하고 필요한 컬럼 추가"""
+@app.get("/api/class-notes")
+def get_all_class_notes(
+    student_id: Optional[int] = None,
+    instructor_code: Optional[str] = None,
+    limit: Optional[int] = None,
+    page_cursor: Optional[str] = Query(None, alias="cursor"),
+    fields: Optional[str] = None
+):
+    """모든 수업일지 조회 (필터링 옵션, limit/cursor 페이지네이션, fields 프로젝션 지원)"""
+    page = Paginator(
+        [('note_date', 'note_date'), ('id', 'id')],
+        descending=True, limit=limit, cursor=page_cursor, fields=fields
+    )
+    conn = get_db_connection()
     try:
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS class_notes (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                student_id INT,
-                instructor_code VARCHAR(50),
-                note_date DATE NOT NULL,
-                content TEXT,
-                photo_urls TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                INDEX idx_student_date (student_id, note_date),
-                INDEX idx_instructor_code (instructor_code, note_date)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-        """)
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
         
-        # 기존 테이블에 instructor_code 컬럼이 없으면 추가
-        try:
-            cursor.execute("""
-                ALTER TABLE class_notes 
-                ADD COLUMN instructor_code VARCHAR(50) AFTER student_id
-            """)
-            print("[OK] instructor_code 컬럼 추가됨")
-        except Exception:
-            pass  # 이미 존재하면 무시
-        
-        # 기존 테이블에 photo_urls 컬럼이 없으면 추가
-        try:
-            cursor.execute("""
-                ALTER TABLE class_notes 
-                ADD COLUMN photo_urls TEXT AFTER content
-            """)
-            print("[OK] photo_urls 컬럼 추가됨")
-        except Exception:
-            pass  # 이미 존재하면 무시
-        
-        # student_id를 NULL 허용으로 변경
-        try:
-            cursor.execute("""
-                ALTER TABLE class_notes 
-                MODIFY COLUMN student_id INT NULL
-            """)
-            print("[OK] student_id NULL 허용으로 변경됨")
-        except Exception:
-            pass
-        
-        # note_date를 DATE에서 DATETIME으로 변경 (시간 정보 저장)
-        try:
-            cursor.execute("""
-                ALTER TABLE class_notes 
-                MODIFY COLUMN note_date DATETIME NOT NULL
-            """)
-            print("[OK] note_date를 DATETIME으로 변경됨")
-        except Exception as e:
-            # 이미 DATETIME이거나 변경 불가능하면 무시
-            pass
-        
-        print("[OK] class_notes 테이블 확인/생성 완료")
-    except Exception as e:
-        print(f"[WARN] class_notes 테이블 생성 실패: {e}")
-
-@app.get("/api/class-notes")
-async def get_all_class_notes(student_id: Optional[int] = None, instructor_code: Optional[str] = None):
-    """모든 수업일지 조회 (필터링 옵션)"""
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor(pymysql.cursors.DictCursor)
-        ensure_class_notes_table(cursor)
-        conn.commit()
-        
-        query = "SELECT * FROM class_notes WHERE 1=1"
+        query = f"SELECT {page.select('*')} FROM class_notes WHERE 1=1"
         params = []
         
         if student_id is not None:
@@ -6415,10 +6129,8 @@ async def get_all_class_notes(student_id: Optional[int] = None, instructor_code:
             query += " AND instructor_code = %s AND student_id IS NULL"
             params.append(instructor_code)
         
-        query += " ORDER BY note_date DESC"
-        
-        cursor.execute(query, params)
-        notes = cursor.fetchall()
+        query, params = page.apply(query, params)
+        notes, next_cursor = page.fetch(cursor, query, params)
         
         # datetime 변환
         for note in notes:
@@ -6426,18 +6138,16 @@ async def get_all_class_notes(student_id: Optional[int] = None, instructor_code:
                 if isinstance(value, (datetime, date)):
                     note[key] = value.isoformat()
         
-        return notes
+        return page.response(notes, next_cursor)
     finally:
         conn.close()
 
 @app.get("/api/class-notes/{note_id}")
-async def get_class_note_by_id(note_id: int):
+def get_class_note_by_id(note_id: int):
     """ID로 특정 수업일지 조회"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
-        ensure_class_notes_table(cursor)
-        conn.commit()
         
         cursor.execute("SELECT * FROM class_notes WHERE id = %s", (note_id,))
         note = cursor.fetchone()
@@ -6455,12 +6165,11 @@ async def get_class_note_by_id(note_id: int):
         conn.close()
 
 @app.post("/api/class-notes")
-async def create_class_note(data: dict):
+def create_class_note(data: dict):
     """수업일지 생성 또는 수정"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
-        ensure_class_notes_table(cursor)
         
         note_id = data.get('id')  # ID가 있으면 수정
         student_id = data.get('student_id')
@@ -6520,12 +6229,11 @@ async def create_class_note(data: dict):
         conn.close()
 
 @app.put("/api/class-notes/{note_id}")
-async def update_class_note(note_id: int, data: dict):
+def update_class_note(note_id: int, data: dict):
     """수업일지 수정"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
-        ensure_class_notes_table(cursor)
         
         note_date = data.get('note_date')
         content = data.get('content', '')
@@ -6564,7 +6272,7 @@ async def update_class_note(note_id: int, data: dict):
         conn.close()
 
 @app.delete("/api/class-notes/{note_id}")
-async def delete_class_note(note_id: int):
+def delete_class_note(note_id: int):
     """수업일지 삭제"""
     conn = get_db_connection()
     try:
@@ -6580,7 +6288,7 @@ async def delete_class_note(note_id: int):
         conn.close()
 
 @app.post("/api/upload-note-file")
-async def upload_note_file(
+def upload_note_file(
     file: UploadFile = File(...),
     note_id: int = Form(...)
 ):
@@ -6646,7 +6354,7 @@ async def upload_note_file(
         new_filename = f"{timestamp}_{unique_id}_{safe_name}{file_ext}"
         
         # FTP 업로드 (student 카테고리)
-        file_url = await upload_stream_to_ftp(file, new_filename, "student")
+        file_url = upload_stream_to_ftp(file, new_filename, "student")
         
         # DB에 파일 URL 추가
         cursor = conn.cursor()
@@ -6690,33 +6398,12 @@ async def upload_note_file(
         conn.close()
 
 # ==================== 강사 SSIRN 메모 관리 ====================
-def ensure_instructor_notes_table(cursor):
-    """instructor_notes 테이블이 없으면 생성"""
-    try:
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS instructor_notes (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                instructor_id INT NOT NULL,
-                note_date DATE NOT NULL,
-                content TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (instructor_id) REFERENCES instructors(id) ON DELETE CASCADE,
-                INDEX idx_instructor_date (instructor_id, note_date)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-        """)
-        print("[OK] instructor_notes 테이블 확인/생성 완료")
-    except Exception as e:
-        print(f"[WARN] instructor_notes 테이블 생성 실패: {e}")
-
 @app.get("/api/instructors/{instructor_id}/notes")
-async def get_instructor_notes(instructor_id: int, note_date: Optional[str] = None):
+def get_instructor_notes(instructor_id: int, note_date: Optional[str] = None):
     """강사의 SSIRN 메모 조회"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
-        ensure_instructor_notes_table(cursor)
-        conn.commit()
         
         if note_date:
             # 특정 날짜의 메모 조회
@@ -6752,12 +6439,11 @@ async def get_instructor_notes(instructor_id: int, note_date: Optional[str] = No
         conn.close()
 
 @app.post("/api/instructors/{instructor_id}/notes")
-async def create_or_update_instructor_note(instructor_id: int, data: dict):
+def create_or_update_instructor_note(instructor_id: int, data: dict):
     """강사 SSIRN 메모 생성 또는 업데이트"""
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
-        ensure_instructor_notes_table(cursor)
         
         note_date = data.get('note_date')
         content = data.get('content', '')
@@ -6803,7 +6489,7 @@ async def create_or_update_instructor_note(instructor_id: int, data: dict):
         conn.close()
 
 @app.delete("/api/instructors/{instructor_id}/notes/{note_id}")
-async def delete_instructor_note(instructor_id: int, note_id: int):
+def delete_instructor_note(instructor_id: int, note_id: int):
     """강사 SSIRN 메모 삭제"""
     conn = get_db_connection()
     try:
@@ -6819,68 +6505,35 @@ async def delete_instructor_note(instructor_id: int, note_id: int):
         conn.close()
 
 # ==================== 공지사항 관리 ====================
-def ensure_notices_table(cursor):
-    """notices 테이블이 없으면 생성"""
-    try:
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS notices (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                title VARCHAR(500) NOT NULL,
-                content TEXT NOT NULL,
-                start_date DATE NOT NULL,
-                end_date DATE NOT NULL,
-                target_type VARCHAR(20) DEFAULT 'all' COMMENT '대상: all(전체), courses(특정반)',
-                target_courses TEXT COMMENT '대상 반 목록 (JSON)',
-                created_by VARCHAR(50),
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                INDEX idx_dates (start_date, end_date)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-        """)
-        
-        # 기존 테이블에 컬럼 추가 (없는 경우만)
-        try:
-            cursor.execute("SHOW COLUMNS FROM notices LIKE 'target_type'")
-            if not cursor.fetchone():
-                cursor.execute("ALTER TABLE notices ADD COLUMN target_type VARCHAR(20) DEFAULT 'all' COMMENT '대상: all(전체), courses(특정반)'")
-                print("[OK] notices 테이블에 target_type 컬럼 추가")
-        except:
-            pass
-        
-        try:
-            cursor.execute("SHOW COLUMNS FROM notices LIKE 'target_courses'")
-            if not cursor.fetchone():
-                cursor.execute("ALTER TABLE notices ADD COLUMN target_courses TEXT COMMENT '대상 반 목록 (JSON)'")
-                print("[OK] notices 테이블에 target_courses 컬럼 추가")
-        except:
-            pass
-        
-        print("[OK] notices 테이블 확인/생성 완료")
-    except Exception as e:
-        print(f"[WARN] notices 테이블 생성 실패: {e}")
-
 @app.get("/api/notices")
-async def get_notices(active_only: bool = False, course_id: str = None):
-    """공지사항 목록 조회 (반별 필터링 지원)"""
+def get_notices(
+    active_only: bool = False,
+    course_id: str = None,
+    limit: Optional[int] = None,
+    page_cursor: Optional[str] = Query(None, alias="cursor"),
+    fields: Optional[str] = None
+):
+    """공지사항 목록 조회 (반별 필터링, limit/cursor 페이지네이션, fields 프로젝션 지원)
+    
+    반별 필터링은 조회 후 적용되므로 페이지의 항목 수가 limit보다 적을 수 있습니다.
+    """
     import json
+    page = Paginator(
+        [('created_at', 'created_at'), ('id', 'id')],
+        descending=True, limit=limit, cursor=page_cursor, fields=fields,
+        required=['target_type', 'target_courses'] if course_id else None
+    )
     conn = get_db_connection()
     try:
         cursor = conn.cursor(pymysql.cursors.DictCursor)
-        ensure_notices_table(cursor)
-        conn.commit()
         
+        query = f"SELECT {page.select('*')} FROM notices WHERE 1=1"
         if active_only:
             # 현재 활성화된 공지만 조회 (오늘 날짜가 start_date와 end_date 사이)
-            cursor.execute("""
-                SELECT * FROM notices 
-                WHERE CURDATE() BETWEEN start_date AND end_date
-                ORDER BY created_at DESC
-            """)
-        else:
-            # 모든 공지 조회
-            cursor.execute("SELECT * FROM notices ORDER BY created_at DESC")
+            query += " AND CURDATE() BETWEEN start_date AND end_date"
         
-        notices = cursor.fetchall()
+        query, params = page.apply(query, [])
+        notices, next_cursor = page.fetch(cursor, query, params)
         
         # 반별 필터링
         if course_id:
@@ -6913,12 +6566,12 @@ async def get_notices(active_only: bool = False, course_id: str = None):
                 if isinstance(value, (datetime, date)):
                     notice[key] = value.isoformat()
         
-        return notices
+        return page.response(notices, next_cursor)
     finally:
         conn.close()
 
 @app.get("/api/notices/{notice_id}")
-async def get_notice(notice_id: int):
+def get_notice(notice_id: int):
     """특정 공지사항 조회"""
     conn = get_db_connection()
     try:
@@ -6939,14 +6592,12 @@ async def get_notice(notice_id: int):
         conn.close()
 
 @app.post("/api/notices")
-async def create_notice(data: dict):
+def create_notice(data: dict):
     """공지사항 생성"""
     import json
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
-        ensure_notices_table(cursor)
-        conn.commit()
         
         # target_courses를 JSON 문자열로 변환
         target_courses = data.get('target_courses', [])
@@ -6972,7 +6623,7 @@ async def create_notice(data: dict):
         conn.close()
 
 @app.put("/api/notices/{notice_id}")
-async def update_notice(notice_id: int, data: dict):
+def update_notice(notice_id: int, data: dict):
     """공지사항 수정"""
     import json
     conn = get_db_connection()
@@ -7008,7 +6659,7 @@ async def update_notice(notice_id: int, data: dict):
         conn.close()
 
 @app.delete("/api/notices/{notice_id}")
-async def delete_notice(notice_id: int):
+def delete_notice(notice_id: int):
     """공지사항 삭제"""
     conn = get_db_connection()
     try:
@@ -7024,33 +6675,107 @@ async def delete_notice(notice_id: int):
         conn.close()
 
 # ==================== 예진이 챗봇 API ====================
+AESONG_ERROR_MESSAGE = "죄송합니다. 지금은 답변하기 어려워요. 잠시 후 다시 말씀해주세요."
+
+def aesong_llm_request(model: str, system_prompt: str, message: str, groq_api_key: str,
+                       gemini_api_key: str, stream: bool = False) -> dict:
+    """예진이 챗봇 모델별 LLM 요청 구성 → {'provider', 'model', 'label', 'request'}"""
+    # Gemini 모델 사용
+    if model == 'gemini':
+        if not gemini_api_key:
+            raise Exception("Gemini API 키가 설정되지 않았습니다. 시스템 등록에서 API 키를 입력해주세요.")
+        
+        params = {"key": gemini_api_key}
+        if stream:
+            params["alt"] = "sse"
+        action = "streamGenerateContent" if stream else "generateContent"
+        payload = {
+            "contents": [{
+                "parts": [
+                    {"text": f"{system_prompt}\n\n사용자: {message}\n\n당신:"}
+                ]
+            }],
+            "generationConfig": {
+                "temperature": 0.8,
+                "maxOutputTokens": 200,
+                "topP": 0.9
+            }
+        }
+        return {
+            "provider": "gemini",
+            "model": "gemini-2.0-flash-exp",
+            "label": "Gemini",
+            "request": {
+                "path": f"/v1beta/models/gemini-2.0-flash-exp:{action}",
+                "params": params,
+                "json": payload,
+                "timeout": 15
+            }
+        }
+    
+    # Gemma-3-4B 모델 (GROQ 무료 모델) 또는 GROQ 기본값 - Llama 3.3 70B
+    if not groq_api_key:
+        # API 키가 없으면 안내 메시지
+        raise Exception("GROQ API 키가 설정되지 않았습니다. 시스템 등록에서 API 키를 입력해주세요.")
+    
+    model_name = "gemma2-9b-it" if model == 'gemma' else "llama-3.3-70b-versatile"  # GROQ의 Gemma 2 9B 모델 (무료)
+    payload = {
+        "model": model_name,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": message}
+        ],
+        "temperature": 0.8,
+        "max_tokens": 200,
+        "top_p": 0.9
+    }
+    if stream:
+        payload["stream"] = True
+    return {
+        "provider": "groq",
+        "model": model_name,
+        "label": "GROQ",
+        "request": {
+            "path": "/openai/v1/chat/completions",
+            "headers": {
+                "Authorization": f"Bearer {groq_api_key}",
+                "Content-Type": "application/json"
+            },
+            "json": payload,
+            "timeout": 15
+        }
+    }
+
+async def aesong_chat_events(llm: dict):
+    """예진이 챗봇 스트리밍 이벤트: token ... → done (기존 JSON 응답 형태)"""
+    parts = []
+    try:
+        async for token in llm_clients.stream_tokens(llm['provider'], **llm['request']):
+            parts.append(token)
+            yield 'token', {"text": token}
+    except Exception as e:
+        print(f"예진이 챗봇 스트리밍 오류: {str(e)}")
+        yield 'error', {"detail": str(e)}
+        yield 'done', {"response": AESONG_ERROR_MESSAGE, "model": "error", "error": str(e)}
+        return
+    yield 'done', {"response": ''.join(parts), "model": llm['model']}
+
 @app.post("/api/aesong-chat")
 async def aesong_chat(data: dict, request: Request):
-    """예진이 AI 챗봇 - GROQ, Gemini, 또는 Gemma 모델 사용"""
+    """
+    예진이 AI 챗봇 - GROQ, Gemini, 또는 Gemma 모델 사용
+    
+    "stream": true 또는 Accept: text/event-stream이면 토큰을 SSE/NDJSON으로 스트리밍 (streaming.py 참고)
+    """
     message = data.get('message', '')
     character = data.get('character', '예진이')  # 캐릭터 이름 받기
     model = data.get('model', 'groq')  # 사용할 모델 (groq, gemini, gemma)
-    
-    # 헤더에서 API 키 가져오기 (프론트엔드에서 전달)
-    groq_api_key_header = request.headers.get('X-GROQ-API-Key', '')
-    gemini_api_key_header = request.headers.get('X-Gemini-API-Key', '')
-    
-    # DB에서 API 키 가져오기 (헤더가 없을 경우)
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
-    
-    try:
-        cursor.execute("SELECT setting_key, setting_value FROM system_settings WHERE setting_key IN ('groq_api_key', 'gemini_api_key')")
-        db_settings = {row['setting_key']: row['setting_value'] for row in cursor.fetchall()}
-    except:
-        db_settings = {}
-    finally:
-        cursor.close()
-        conn.close()
+    stream_fmt = stream_format(data, request)
     
     # API 키 우선순위: 헤더 > DB > 환경변수
-    groq_api_key = groq_api_key_header or db_settings.get('groq_api_key', '') or os.getenv('GROQ_API_KEY', '')
-    gemini_api_key = gemini_api_key_header or db_settings.get('gemini_api_key', '') or os.getenv('GOOGLE_CLOUD_TTS_API_KEY', '')
+    api_keys = await resolve_ai_api_keys(request)
+    groq_api_key = api_keys['groq']
+    gemini_api_key = api_keys['gemini']
     
     if not message:
         raise HTTPException(status_code=400, detail="메시지가 필요합니다")
@@ -7113,125 +6838,40 @@ async def aesong_chat(data: dict, request: Request):
 - 학생 관리, 상담, 훈련일지 등에 대해 안내
 - 친근한 대화 상대"""
 
-        # Gemini 모델 사용
-        if model == 'gemini':
-            if not gemini_api_key:
-                raise Exception("Gemini API 키가 설정되지 않았습니다. 시스템 등록에서 API 키를 입력해주세요.")
-            
-            # Gemini API 호출
-            gemini_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-exp:generateContent?key={gemini_api_key}"
-            
-            payload = {
-                "contents": [{
-                    "parts": [
-                        {"text": f"{system_prompt}\n\n사용자: {message}\n\n당신:"}
-                    ]
-                }],
-                "generationConfig": {
-                    "temperature": 0.8,
-                    "maxOutputTokens": 200,
-                    "topP": 0.9
-                }
-            }
-            
-            response = requests.post(gemini_url, json=payload, timeout=15)
-            
-            if response.status_code != 200:
-                raise Exception(f"Gemini API 오류: {response.text}")
-            
-            result = response.json()
-            ai_response = result['candidates'][0]['content']['parts'][0]['text']
-            
-            return {
-                "response": ai_response,
-                "model": "gemini-2.0-flash-exp"
-            }
+        llm = aesong_llm_request(model, system_prompt, message, groq_api_key, gemini_api_key,
+                                 stream=bool(stream_fmt))
+        if stream_fmt:
+            return event_stream_response(aesong_chat_events(llm), stream_fmt)
         
-        # Gemma-3-4B 모델 사용 (GROQ 무료 모델)
-        elif model == 'gemma':
-            if not groq_api_key:
-                raise Exception("GROQ API 키가 설정되지 않았습니다. 시스템 등록에서 API 키를 입력해주세요.")
-            
-            headers = {
-                "Authorization": f"Bearer {groq_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": "gemma2-9b-it",  # GROQ의 Gemma 2 9B 모델 (무료)
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": message}
-                ],
-                "temperature": 0.8,
-                "max_tokens": 200,
-                "top_p": 0.9
-            }
-            
-            response = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=15
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"GROQ API 오류: {response.text}")
-            
-            ai_response = response.json()['choices'][0]['message']['content']
-            
-            return {
-                "response": ai_response,
-                "model": "gemma2-9b-it"
-            }
+        response = await llm_clients.get(llm['provider']).post(**llm['request'])
         
-        # GROQ 모델 사용 (기본값 - Llama 3.3 70B)
+        if response.status_code != 200:
+            raise Exception(f"{llm['label']} API 오류: {response.text}")
+        
+        result = response.json()
+        if llm['provider'] == 'gemini':
+            ai_response = result['candidates'][0]['content']['parts'][0]['text']
         else:
-            if not groq_api_key:
-                # API 키가 없으면 안내 메시지
-                raise Exception("GROQ API 키가 설정되지 않았습니다. 시스템 등록에서 API 키를 입력해주세요.")
-            
-            headers = {
-                "Authorization": f"Bearer {groq_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": "llama-3.3-70b-versatile",
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": message}
-                ],
-                "temperature": 0.8,
-                "max_tokens": 200,
-                "top_p": 0.9
-            }
-            
-            response = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=15
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"GROQ API 오류: {response.text}")
-            
-            ai_response = response.json()['choices'][0]['message']['content']
-            
-            return {
-                "response": ai_response,
-                "model": "llama-3.3-70b-versatile"
-            }
+            ai_response = result['choices'][0]['message']['content']
+        
+        return {
+            "response": ai_response,
+            "model": llm['model']
+        }
         
     except Exception as e:
         print(f"예진이 챗봇 오류: {str(e)}")
         # 오류 시 기본 응답
-        return {
-            "response": "죄송합니다. 지금은 답변하기 어려워요. 잠시 후 다시 말씀해주세요.",
+        error_response = {
+            "response": AESONG_ERROR_MESSAGE,
             "model": "error",
             "error": str(e)
         }
+        if stream_fmt:
+            return event_stream_response(iter_events(
+                ('error', {"detail": str(e)}), ('done', error_response)
+            ), stream_fmt)
+        return error_response
 
 # ==================== Google Cloud TTS API ====================
 @app.post("/api/tts")
@@ -7243,28 +6883,8 @@ async def text_to_speech(data: dict, request: Request):
     if not text:
         raise HTTPException(status_code=400, detail="텍스트가 필요합니다")
     
-    # Google Cloud TTS API 키 확인
-    # 1. 헤더에서 가져오기
-    api_key_header = request.headers.get('X-Gemini-API-Key', '')
-    
-    # 2. DB에서 가져오기 (헤더가 없을 경우)
-    api_key_db = ''
-    if not api_key_header:
-        conn = get_db_connection()
-        cursor = conn.cursor(pymysql.cursors.DictCursor)
-        try:
-            cursor.execute("SELECT setting_value FROM system_settings WHERE setting_key = 'gemini_api_key'")
-            result = cursor.fetchone()
-            if result:
-                api_key_db = result['setting_value']
-        except:
-            pass
-        finally:
-            cursor.close()
-            conn.close()
-    
-    # 3. 환경변수에서 가져오기 (최후 수단)
-    api_key = api_key_header or api_key_db or os.getenv('GOOGLE_CLOUD_TTS_API_KEY', '')
+    # Google Cloud TTS API 키 확인 (헤더 > DB > 환경변수)
+    api_key = (await resolve_ai_api_keys(request))['gemini']
     
     if not api_key:
         raise HTTPException(status_code=500, detail="Google Cloud TTS API 키가 설정되지 않았습니다. 시스템 등록에서 Gemini API 키를 입력해주세요.")
@@ -7285,8 +6905,6 @@ async def text_to_speech(data: dict, request: Request):
             speaking_rate = 1.0  # 보통 속도
         
         # Google Cloud TTS API 요청
-        url = f"https://texttospeech.googleapis.com/v1/text:synthesize?key={api_key}"
-        
         payload = {
             "input": {
                 "text": text
@@ -7304,7 +6922,12 @@ async def text_to_speech(data: dict, request: Request):
             }
         }
         
-        response = requests.post(url, json=payload, timeout=10)
+        response = await llm_clients.get('google_tts').post(
+            "/v1/text:synthesize",
+            params={"key": api_key},
+            json=payload,
+            timeout=10
+        )
         
         if response.status_code != 200:
             raise Exception(f"Google TTS API 오류: {response.text}")
@@ -7326,7 +6949,7 @@ async def text_to_speech(data: dict, request: Request):
         raise HTTPException(status_code=500, detail=f"TTS 생성 실패: {str(e)}")
 
 @app.post("/api/timetables/auto-generate")
-async def auto_generate_timetables(data: dict):
+def auto_generate_timetables(data: dict):
     """스마트 시간표 자동 생성 (과정별 요일 배정 기반)
     
     Args:
@@ -7358,8 +6981,10 @@ async def auto_generate_timetables(data: dict):
         cursor.execute("DELETE FROM timetables WHERE course_code = %s", (course_code,))
         
         # 공휴일 목록 가져오기
-        cursor.execute("SELECT holiday_date FROM holidays ORDER BY holiday_date")
-        holidays = [row['holiday_date'] for row in cursor.fetchall()]
+        holidays = [
+            row['holiday_date']
+            for row in cached_fetchall(cursor, "SELECT holiday_date FROM holidays ORDER BY holiday_date", tables=('holidays',))
+        ]
         
         # 과정별 요일 배정 정보 가져오기 (subjects 테이블의 day_of_week 사용)
         cursor.execute("""
@@ -7750,7 +7375,7 @@ async def auto_generate_timetables(data: dict):
 # ==================== DB 백업 API ====================
 
 @app.post("/api/backup/create")
-async def create_backup():
+def create_backup():
     """수동 DB 백업 생성"""
     import json
     from datetime import datetime, date, timedelta
@@ -7828,7 +7453,7 @@ async def create_backup():
 
 
 @app.get("/api/backup/list")
-async def list_backups():
+def list_backups():
     """백업 파일 목록 조회"""
     import os
     import json
@@ -7859,7 +7484,7 @@ async def list_backups():
 
 
 @app.delete("/api/backup/delete/{filename}")
-async def delete_backup(filename: str):
+def delete_backup(filename: str):
     """백업 파일 삭제"""
     import os
     
@@ -7882,7 +7507,7 @@ async def delete_backup(filename: str):
 
 
 @app.post("/api/backup/auto-cleanup")
-async def auto_cleanup_backups(keep_days: int = 7):
+def auto_cleanup_backups(keep_days: int = 7):
     """오래된 백업 자동 삭제 (keep_days일 이전 백업)"""
     import os
     from datetime import datetime, timedelta
@@ -7917,7 +7542,7 @@ async def auto_cleanup_backups(keep_days: int = 7):
         raise HTTPException(status_code=500, detail=f"자동 정리 실패: {str(e)}")
 
 @app.get("/api/backup/download/{filename}")
-async def download_backup(filename: str):
+def download_backup(filename: str):
     """백업 파일 다운로드"""
     import os
     from fastapi.responses import FileResponse
@@ -7938,7 +7563,7 @@ async def download_backup(filename: str):
     )
 
 @app.post("/api/backup/restore/{filename}")
-async def restore_backup(filename: str):
+def restore_backup(filename: str):
     """백업 파일로 데이터베이스 복원"""
     import os
     import json
@@ -8006,7 +7631,7 @@ async def restore_backup(filename: str):
         conn.close()
 
 @app.get("/api/backup/export")
-async def export_database():
+def export_database():
     """전체 데이터베이스 JSON으로 내보내기"""
     import json
     from datetime import datetime
@@ -8065,7 +7690,7 @@ async def export_database():
         conn.close()
 
 @app.post("/api/backup/import")
-async def import_database(file: UploadFile = File(...)):
+def import_database(file: UploadFile = File(...)):
     """JSON 파일로 데이터베이스 불러오기"""
     import json
     from datetime import datetime
@@ -8081,7 +7706,7 @@ async def import_database(file: UploadFile = File(...)):
     
     try:
         # 업로드된 파일 읽기
-        content = await file.read()
+        content = file.file.read()
         import_data = json.loads(content.decode('utf-8'))
         
         imported_records = 0
@@ -8131,7 +7756,7 @@ async def import_database(file: UploadFile = File(...)):
         conn.close()
 
 @app.post("/api/backup/reset")
-async def reset_database(request: Request, data: dict):
+def reset_database(request: Request, data: dict):
     """DB 초기화 (자동 백업 후 진행, 비밀번호 확인 + 로그 기록)"""
     import os
     from datetime import datetime
@@ -8157,9 +7782,6 @@ async def reset_database(request: Request, data: dict):
     cursor = conn.cursor(pymysql.cursors.DictCursor)
     
     try:
-        # db_management_logs 테이블 확인/생성
-        ensure_db_management_logs_table()
-        
         # 0단계: 강사 인증 확인
         cursor.execute("SELECT code, name, password FROM instructor_codes WHERE name = %s", (operator_name,))
         instructor = cursor.fetchone()
@@ -8181,7 +7803,7 @@ async def reset_database(request: Request, data: dict):
         
         # 1단계: 자동 백업 생성
         print("📦 DB 초기화 전 자동 백업 생성 중...")
-        backup_response = await create_backup()
+        backup_response = create_backup()
         
         if not backup_response.get('success'):
             raise HTTPException(status_code=500, detail="백업 생성 실패로 초기화를 중단합니다")
@@ -8329,7 +7951,7 @@ async def reset_database(request: Request, data: dict):
         conn.close()
 
 @app.get("/api/backup/tables-info")
-async def get_tables_info():
+def get_tables_info():
     """현재 DB 테이블 정보 조회"""
     conn = get_db_connection()
     if not conn:
@@ -8380,7 +8002,7 @@ async def get_tables_info():
         conn.close()
 
 @app.get("/api/backup/logs")
-async def get_management_logs(limit: int = 50):
+def get_management_logs(limit: int = 50):
     """DB 관리 로그 조회"""
     conn = get_db_connection()
     if not conn:
@@ -8410,39 +8032,6 @@ async def get_management_logs(limit: int = 50):
         cursor.close()
         conn.close()
 
-# ==================== DB 관리 로그 테이블 ====================
-def ensure_db_management_logs_table():
-    """DB 관리 로그 테이블 생성 (없으면)"""
-    conn = get_db_connection()
-    if not conn:
-        return
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS db_management_logs (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                action_type VARCHAR(50) NOT NULL COMMENT '작업 유형 (reset/restore/backup)',
-                operator_name VARCHAR(100) NOT NULL COMMENT '작업자 이름',
-                action_result VARCHAR(20) NOT NULL COMMENT '결과 (success/fail)',
-                backup_file VARCHAR(255) COMMENT '백업 파일명',
-                details TEXT COMMENT '상세 내용',
-                ip_address VARCHAR(45) COMMENT 'IP 주소',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '작업 시간',
-                INDEX idx_action_type (action_type),
-                INDEX idx_created_at (created_at)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='DB 관리 로그'
-        """)
-        conn.commit()
-        print("[OK] db_management_logs 테이블 확인/생성 완료")
-    except Exception as e:
-        print(f"[WARN] db_management_logs 테이블 생성 오류: {e}")
-    finally:
-        conn.close()
-
-# 서버 시작 시 테이블 확인
-ensure_db_management_logs_table()
-
 if __name__ == "__main__":
     import uvicorn
     # 파일 업로드 크기 제한 100MB로 증가
@@ -8459,56 +8048,38 @@ if __name__ == "__main__":
 # RAG (Retrieval-Augmented Generation) API
 # ============================================
 
-from rag.document_loader import DocumentLoader
+from rag.bulk_ingest import BulkIngestor, collect_files
+from indexing_jobs import IndexingJobQueue, JobReporter, PermanentJobError
+from rag.document_loader import RAG_STREAM_BATCH, DocumentLoader, file_sha256
 from rag.vector_store import VectorStoreManager
 from rag.rag_chain import RAGChain
 import shutil
 from typing import Optional
 
-# RAG 전역 인스턴스 (지연 로딩)
+# RAG 전역 인스턴스 (백그라운드 워밍업에서 생성)
 vector_store_manager = None
 document_loader = None
 rag_initialized = False  # RAG 초기화 상태
 
-# RAG 인덱싱 진행률 추적 (디스크에 영구 저장)
-PROGRESS_FILE = Path("./backend/indexing_progress.json")
+# RAG 워밍업 방식 (RAG_WARMUP)
+#   background : 서버 시작 직후 백그라운드 스레드에서 초기화 (기본값, 다른 라우트는 바로 응답)
+#   lazy       : 첫 RAG 요청에서 백그라운드 초기화 시작 (RAG를 쓰지 않는 워커는 모델을 로드하지 않음)
+#   blocking   : 초기화가 끝난 뒤 요청을 받기 시작 (이전 동작)
+RAG_WARMUP = os.getenv('RAG_WARMUP', 'background').lower()
+RAG_WARMUP_RETRY_AFTER = float(os.getenv('RAG_WARMUP_RETRY_AFTER', '60'))  # 실패 후 재시도 간격(초)
 
-def load_indexing_progress():
-    """디스크에서 진행률 복원"""
-    if PROGRESS_FILE.exists():
-        try:
-            with open(PROGRESS_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                print(f"[INFO] 복원된 진행률 정보: {len(data)}개 항목")
-                # 오래된 완료 항목은 자동 정리 (1시간 이상)
-                cleaned = {}
-                for k, v in data.items():
-                    if v.get('status') == 'completed':
-                        started = v.get('started_at', '')
-                        if started:
-                            from datetime import datetime, timedelta
-                            started_time = datetime.fromisoformat(started)
-                            if datetime.now() - started_time < timedelta(hours=1):
-                                cleaned[k] = v
-                    else:
-                        cleaned[k] = v
-                return cleaned
-        except Exception as e:
-            print(f"[WARN] 진행률 로드 실패: {e}")
-            return {}
-    return {}
+# RAG 채팅 최소 유사도: cosine 컬렉션은 코사인 유사도 기준, 이전 l2 컬렉션은 1/(1+거리) 점수 기준
+RAG_MIN_SIMILARITY = float(os.getenv('RAG_MIN_SIMILARITY', '0.25'))
+RAG_LEGACY_L2_MIN_SIMILARITY = 0.008
 
-def save_indexing_progress(progress_dict):
-    """디스크에 진행률 저장"""
-    try:
-        PROGRESS_FILE.parent.mkdir(exist_ok=True)
-        with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(progress_dict, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print(f"[WARN] 진행률 저장 실패: {e}")
+def rag_min_similarity() -> float:
+    """현재 컬렉션 거리 척도에 맞는 RAG 채팅 유사도 임계값"""
+    if vector_store_manager is not None and vector_store_manager.metric == 'cosine':
+        return RAG_MIN_SIMILARITY
+    return RAG_LEGACY_L2_MIN_SIMILARITY
 
-# 서버 시작 시 진행률 복원
-indexing_progress = load_indexing_progress()
+# RAG 인덱싱 작업 큐 (SQLite, 전용 작업 스레드 - 파일별 진행률도 여기에 저장)
+indexing_jobs = IndexingJobQueue()
 
 def init_rag():
     """RAG 시스템 초기화 (지연 로딩)"""
@@ -8550,8 +8121,23 @@ def init_rag():
         return False
 
 
+def default_document_metadata(doc_path: Path) -> dict:
+    """documents 폴더 문서의 기본 메타데이터 (파일명 '번호_과목_강사'에서 과목, 강사 추출 시도)"""
+    parts = doc_path.stem.split('_')
+    metadata = {
+        'original_filename': doc_path.name,
+        'upload_date': datetime.now().strftime('%Y-%m-%d'),
+        'file_size': doc_path.stat().st_size,
+        'auto_loaded': True
+    }
+    if len(parts) >= 2:
+        metadata['subject'] = parts[1]
+        metadata['instructor'] = parts[2] if len(parts) > 2 else ''
+    return metadata
+
+
 def load_default_documents():
-    """documents 폴더의 기본 문서들을 RAG에 자동 로드 (중복 체크)"""
+    """documents 폴더의 기본 문서들을 RAG에 자동 로드 (일괄 인덱싱 작업으로 등록 - 중복 체크, 동시 파싱)"""
     global vector_store_manager, document_loader
     
     if not vector_store_manager or not document_loader:
@@ -8572,76 +8158,36 @@ def load_default_documents():
         print("[INFO] documents 폴더가 생성되었습니다")
         return
     
-    # 지원하는 파일 형식
-    supported_extensions = ['.pdf', '.docx', '.doc', '.txt']
-    
-    # documents 폴더의 모든 파일 검색
-    doc_files = []
-    for ext in supported_extensions:
-        doc_files.extend(documents_dir.glob(f'*{ext}'))
-    
+    doc_files = collect_files(str(documents_dir))
     if not doc_files:
         print("[INFO] documents 폴더에 문서가 없습니다")
         print("[TIP] 교재 및 교육자료를 documents 폴더에 넣어주세요")
         return
     
-    print(f"\n[DOC] 기본 문서 자동 로드 시작 ({len(doc_files)}개 파일)")
-    print("=" * 60)
-    
-    loaded_count = 0
-    skipped_count = 0
-    
-    for doc_path in doc_files:
-        try:
-            # 파일명에서 메타데이터 추출
-            filename = doc_path.stem
-            parts = filename.split('_')
-            
-            metadata = {
-                'original_filename': doc_path.name,
-                'upload_date': datetime.now().strftime('%Y-%m-%d'),
-                'file_size': doc_path.stat().st_size,
-                'auto_loaded': True
-            }
-            
-            # 파일명에서 과목, 강사명 등 추출 시도
-            if len(parts) >= 2:
-                metadata['subject'] = parts[1] if len(parts) > 1 else ''
-                metadata['instructor'] = parts[2] if len(parts) > 2 else ''
-            
-            # 문서 로드
-            documents = document_loader.load_document(str(doc_path), metadata)
-            
-            if not documents:
-                print(f"[WARN] {doc_path.name}: 텍스트를 추출할 수 없습니다")
-                skipped_count += 1
-                continue
-            
-            # 텍스트와 메타데이터 분리
-            texts = [doc.page_content for doc in documents]
-            metadatas = [doc.metadata for doc in documents]
-            
-            # 벡터 스토어에 추가
-            doc_ids = vector_store_manager.add_documents(texts, metadatas)
-            
-            print(f"[OK] {doc_path.name}: {len(documents)}개 청크 로드 완료")
-            loaded_count += 1
-            
-        except Exception as e:
-            print(f"[ERROR] {doc_path.name}: 로드 실패 - {str(e)}")
-            skipped_count += 1
-    
-    print("=" * 60)
-    print(f"[STAT] 기본 문서 로드 완료: {loaded_count}개 성공, {skipped_count}개 실패")
-    print(f"[DOC] 현재 총 문서 수: {vector_store_manager.count_documents()}")
-    print()
+    job = indexing_jobs.submit('bulk', None, {"folder": "documents", "default_metadata": True})
+    print(f"[DOC] 기본 문서 자동 로드 작업 등록 ({len(doc_files)}개 파일, 작업 #{job['id']})")
 
 
-# 앱 시작 시 RAG 초기화
-try:
-    init_rag()
-except:
-    print("[WARN] RAG 초기화 실패 - RAG 기능 비활성화됨")
+# RAG 초기화는 import 시점이 아니라 startup 이벤트(또는 첫 RAG 요청)에서 백그라운드로 실행
+rag_warmup = BackgroundWarmup('RAG', init_rag, retry_after=RAG_WARMUP_RETRY_AFTER)
+
+
+def require_rag():
+    """
+    RAG 라우트 진입 확인 - 준비 전이면 503 (detail.status = 'warming' | 'failed')
+    
+    lazy 모드이거나 이전 시도가 실패했으면 여기서 워밍업을 시작합니다.
+    """
+    if rag_warmup.ready and vector_store_manager is not None and document_loader is not None:
+        return
+    state = rag_warmup.start()
+    status = rag_warmup.status()
+    if state == 'failed':
+        message = "RAG 시스템 초기화에 실패했습니다. 서버 로그를 확인하세요."
+    else:
+        message = "한국어 임베딩 모델 로딩 중입니다. 잠시 후 다시 시도해주세요."
+    raise HTTPException(status_code=503, detail={**status, "status": state, "message": message},
+                        headers={"Retry-After": "5"})
 
 
 # ==================== Startup 이벤트 ====================
@@ -8652,6 +8198,33 @@ async def startup_event():
     print("🚀 BH2025 WOWU 백엔드 서버 시작")
     print("="*60)
     
+    # 블로킹 I/O 스레드 풀 크기 설정
+    configure_threadpools()
+    
+    # 읽기 캐시 무효화 전파 리스너 시작 (file/socket 백엔드)
+    read_cache.start()
+    
+    # 스키마 마이그레이션 (요청마다 하던 SHOW COLUMNS / ALTER 대체)
+    await run_blocking(apply_schema_migrations)
+    
+    # 시스템 설정 미리 로드 (AI 엔드포인트의 첫 호출에서 DB 조회 방지, 새 DB는 마이그레이션으로 테이블 생성 후)
+    await run_blocking(settings_service.refresh)
+    
+    # LLM 응답 캐시의 만료/초과 항목 정리
+    removed = await run_blocking(llm_cache.evict)
+    print(f"[INFO] LLM 응답 캐시: {llm_cache.stats()['backend']} (정리 {removed}개)")
+    
+    # RAG 워밍업 (임베딩 모델 + 벡터 인덱스 로드) - background면 기다리지 않고 바로 요청 처리
+    if RAG_WARMUP in ('background', 'blocking'):
+        rag_warmup.start()
+        if RAG_WARMUP == 'blocking':
+            await run_blocking(rag_warmup.wait)
+    else:
+        print("[INFO] RAG 워밍업: 첫 RAG 요청 시 시작 (RAG_WARMUP=lazy)")
+    
+    # 인덱싱 작업 큐 (이전 실행에서 남은 대기/중단 작업도 이어서 처리)
+    indexing_jobs.start()
+    
     # 등록된 라우트 확인
     print("\n📋 등록된 API 엔드포인트:")
     doc_routes = []
@@ -8684,7 +8257,7 @@ async def startup_event():
 
 
 @app.post("/api/rag/upload")
-async def upload_rag_document(
+def upload_rag_document(
     file: UploadFile = File(...),
     subject: Optional[str] = Form(None),
     instructor: Optional[str] = Form(None),
@@ -8697,8 +8270,7 @@ async def upload_rag_document(
     - PDF, DOCX, TXT 파일 지원
     - 자동으로 벡터 DB에 저장
     """
-    if not vector_store_manager or not document_loader:
-        raise HTTPException(status_code=503, detail="RAG 시스템이 초기화되지 않았습니다")
+    require_rag()
     
     # 파일 확장자 확인
     file_ext = Path(file.filename).suffix.lower()
@@ -8710,7 +8282,7 @@ async def upload_rag_document(
     
     # 파일 크기 확인 (50MB 제한)
     file_size = 0
-    content = await file.read()
+    content = file.file.read()
     file_size = len(content)
     
     if file_size > 50 * 1024 * 1024:  # 50MB
@@ -8742,28 +8314,24 @@ async def upload_rag_document(
             "description": description or ""
         }
         
-        # 문서 로드 및 청킹
-        print(f"📝 문서 처리 중: {file.filename}")
-        documents = document_loader.load_document(str(file_path), metadata)
+        # 문서 로드/청킹 + 벡터 DB에 저장 (페이지 단위 추출, 청크 배치마다 임베딩)
+        print(f"📝 문서 처리 및 벡터 DB 저장 중: {file.filename}")
+        doc_ids = []
+        chunks_count = 0
+        for documents, _ in document_loader.iter_batches(str(file_path), metadata):
+            doc_ids.extend(vector_store_manager.add_documents([doc.page_content for doc in documents],
+                                                              [doc.metadata for doc in documents]))
+            chunks_count += len(documents)
         
-        if not documents:
+        if not chunks_count:
             raise HTTPException(status_code=400, detail="문서에서 텍스트를 추출할 수 없습니다")
         
-        # 벡터 DB에 저장
-        print(f"💾 벡터 DB에 저장 중...")
-        
-        # Document 객체를 텍스트와 메타데이터로 분리
-        texts = [doc.page_content for doc in documents]
-        metadatas = [doc.metadata for doc in documents]
-        
-        doc_ids = vector_store_manager.add_documents(texts, metadatas)
-        
         return {
             "success": True,
             "message": "문서가 성공적으로 업로드되었습니다",
             "filename": file.filename,
             "file_path": str(file_path),
-            "chunks_count": len(documents),
+            "chunks_count": chunks_count,
             "document_ids": doc_ids,
             "metadata": metadata
         }
@@ -8774,41 +8342,212 @@ async def upload_rag_document(
 
 
 @app.get("/api/rag/documents")
-async def list_rag_documents(limit: int = 100):
+def list_rag_documents(limit: int = 100):
     """RAG 문서 목록 조회"""
-    if not vector_store_manager:
-        raise HTTPException(status_code=503, detail="RAG 시스템이 초기화되지 않았습니다")
+    require_rag()
     
     try:
-        documents = vector_store_manager.get_all_documents()
+        # 파일(출처)별 집계는 벡터 스토어(SQLite)에서 수행 - 청크 전체를 읽지 않음
+        sources = vector_store_manager.list_sources()
         count = vector_store_manager.count_documents()
         
-        # 중복 제거 (원본 파일명 기준)
-        unique_docs = {}
-        for doc in documents:
-            metadata = doc.get('metadata', {})
-            filename = metadata.get('filename', metadata.get('source', '알 수 없음'))
-            if filename not in unique_docs:
-                unique_docs[filename] = {
-                    'filename': filename,
-                    'document_id': metadata.get('document_id', ''),
-                    'uploaded_at': metadata.get('uploaded_at', ''),
-                    'chunks_count': 1
-                }
-            else:
-                unique_docs[filename]['chunks_count'] += 1
+        unique_docs = [
+            {
+                'filename': source['source'] or '알 수 없음',
+                'document_id': source['metadata'].get('document_id', ''),
+                'uploaded_at': source['metadata'].get('uploaded_at', ''),
+                'chunks_count': source['chunks']
+            }
+            for source in sources
+        ]
         
         return {
             "success": True,
             "total_chunks": count,
             "unique_documents": len(unique_docs),
-            "documents": list(unique_docs.values())
+            "documents": unique_docs[:limit] if limit and limit > 0 else unique_docs
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"문서 목록 조회 실패: {str(e)}")
 
 
+def answer_statistics_question(message: str):
+    """
+    통계/숫자 질문(강사 수, 학생 수)을 DB에서 직접 조회하여 답변
+    (동기 함수, 스레드 풀에서 호출) - 해당하지 않거나 실패하면 None
+    """
+    message_lower = message.lower()
+    
+    # 강사 수 질문 감지
+    if any(keyword in message_lower for keyword in ['강사', '강사수', '강사 수', '강사는', '강사 수는', '몇 명', '몇명', '인원']):
+        if any(keyword in message_lower for keyword in ['수', '명', '얼마', '몇', '많', '인원']):
+            try:
+                conn = get_db_connection()
+                cursor = conn.cursor(pymysql.cursors.DictCursor)
+                
+                # 강사 수 조회
+                cursor.execute("SELECT COUNT(*) as count FROM instructors")
+                result = cursor.fetchone()
+                instructor_count = result['count'] if result else 0
+                
+                # 강사 이름 목록 (상위 10명)
+                cursor.execute("""
+                    SELECT name, email 
+                    FROM instructors 
+                    ORDER BY id 
+                    LIMIT 10
+                """)
+                instructor_list = cursor.fetchall()
+                
+                conn.close()
+                
+                # 답변 생성
+                answer = f"현재 시스템에 등록된 강사 수는 **총 {instructor_count}명**입니다.\n\n"
+                
+                if instructor_list and len(instructor_list) > 0:
+                    answer += "📋 **등록된 강사 (상위 10명):**\n"
+                    for idx, instructor in enumerate(instructor_list, 1):
+                        name = instructor.get('name', '이름없음')
+                        email = instructor.get('email', '')
+                        if email:
+                            answer += f"{idx}. {name} ({email})\n"
+                        else:
+                            answer += f"{idx}. {name}\n"
+                
+                answer += "\n💡 *이 정보는 데이터베이스에서 실시간으로 조회되었습니다.*"
+                
+                return {
+                    "success": True,
+                    "model": "database",
+                    "answer": answer,
+                    "sources": [{
+                        'source': 'instructors 테이블 (DB 직접 조회)',
+                        'similarity': 1.0,
+                        'content': f"총 강사 수: {instructor_count}명"
+                    }],
+                    "message": message,
+                    "query_type": "statistics"
+                }
+            except Exception as e:
+                print(f"[ERROR] 강사 수 조회 실패: {e}")
+                # 실패 시 RAG로 폴백
+    
+    # 학생 수 질문 감지
+    if any(keyword in message_lower for keyword in ['학생', '학생수', '학생 수', '수강생', '훈련생']):
+        if any(keyword in message_lower for keyword in ['수', '명', '얼마', '몇', '많', '인원']):
+            try:
+                conn = get_db_connection()
+                cursor = conn.cursor(pymysql.cursors.DictCursor)
+                
+                cursor.execute("SELECT COUNT(*) as count FROM students")
+                result = cursor.fetchone()
+                student_count = result['count'] if result else 0
+                
+                # 과정별 통계
+                cursor.execute("""
+                    SELECT course_code, COUNT(*) as count 
+                    FROM students 
+                    GROUP BY course_code 
+                    ORDER BY count DESC 
+                    LIMIT 5
+                """)
+                course_stats = cursor.fetchall()
+                
+                conn.close()
+                
+                answer = f"현재 시스템에 등록된 학생 수는 **총 {student_count}명**입니다.\n\n"
+                
+                if course_stats:
+                    answer += "📊 **과정별 학생 수 (상위 5개):**\n"
+                    for stat in course_stats:
+                        answer += f"- {stat['course_code']}: {stat['count']}명\n"
+                
+                answer += "\n💡 *이 정보는 데이터베이스에서 실시간으로 조회되었습니다.*"
+                
+                return {
+                    "success": True,
+                    "model": "database",
+                    "answer": answer,
+                    "sources": [{
+                        'source': 'students 테이블 (DB 직접 조회)',
+                        'similarity': 1.0,
+                        'content': f"총 학생 수: {student_count}명"
+                    }],
+                    "message": message,
+                    "query_type": "statistics"
+                }
+            except Exception as e:
+                print(f"[ERROR] 학생 수 조회 실패: {e}")
+    
+    return None
+
+
+RAG_FILTER_FIELDS = ('filename', 'subject', 'instructor', 'uploaded_from', 'uploaded_to')
+
+
+def parse_rag_filters(filters) -> Optional[dict]:
+    """요청의 메타데이터 필터 검증 (filename/subject/instructor/uploaded_from/uploaded_to)"""
+    if not filters:
+        return None
+    if not isinstance(filters, dict):
+        raise HTTPException(status_code=400, detail="filters는 객체여야 합니다")
+    unknown = set(filters) - set(RAG_FILTER_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 필터: {', '.join(sorted(unknown))}")
+    return {key: value for key, value in filters.items() if value} or None
+
+
+RAG_SEARCH_MODES = ('dense', 'sparse', 'hybrid')
+
+
+def parse_rag_search_mode(mode) -> Optional[str]:
+    """검색 방식 검증 (dense/sparse/hybrid, 없으면 RAG_SEARCH_MODE 기본값)"""
+    if not mode:
+        return None
+    mode = str(mode).lower()
+    if mode not in RAG_SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 검색 방식: {mode} (dense, sparse, hybrid)")
+    return mode
+
+async def rag_chat_events(rag_chain, question: str, k: int, model: str, message: str,
+                          document_context: Optional[list], filters: Optional[dict]):
+    """RAG 채팅 스트리밍 이벤트: sources → token ... → done (기존 JSON 응답 형태, 오류 시 error → done)"""
+    sources = []
+    try:
+        async for event, data in rag_chain.query_stream(question, k=k, min_similarity=rag_min_similarity(),
+                                                        document_context=document_context, filters=filters,
+                                                        fallback_to_all=True):
+            if event == 'sources':
+                sources = data
+                yield 'sources', sources
+            elif event == 'token':
+                yield 'token', {"text": data}
+            elif event == 'done':
+                yield 'done', {
+                    "success": True,
+                    "model": model,
+                    "answer": data['answer'],
+                    "sources": sources,
+                    "message": message,
+                    "document_context": document_context,
+                    "filters": filters,
+                    "query_type": "rag"
+                }
+    except Exception as e:
+        print(f"[ERROR] RAG 스트리밍 실패: {e}")
+        detail = f"RAG 채팅 중 오류가 발생했습니다: {str(e)}"
+        yield 'error', {"detail": detail}
+        yield 'done', {
+            "success": False,
+            "model": model,
+            "answer": "",
+            "sources": sources,
+            "message": message,
+            "error": detail,
+            "query_type": "rag"
+        }
+
 @app.post("/api/rag/chat")
 async def rag_chat(request: Request):
     """
@@ -8819,17 +8558,16 @@ async def rag_chat(request: Request):
         - k: 검색할 문서 수 (기본 5)
         - model: AI 모델 (groq, gemini, gemma)
         - document_context: 특정 문서로 제한 (선택, 파일명)
+        - filters: 메타데이터 필터 (선택) {subject, instructor, uploaded_from, uploaded_to, filename}
+          → 조건에 맞는 청크 안에서 k개 검색 (맞는 청크가 없으면 전체 검색)
+        - stream: true면 SSE/NDJSON 스트리밍 (출처 → 토큰 → 완료, streaming.py 참고)
     
     특수 기능:
         - 통계/숫자 질문 감지 시 DB 직접 조회
         - 유사도 임계값 체크
         - 문서 특정 컨텍스트 지원
     """
-    if not vector_store_manager:
-        # RAG 시스템 지연 초기화
-        print("[INFO] 첫 RAG 요청 - 시스템 초기화 중...")
-        if not init_rag():
-            raise HTTPException(status_code=503, detail="RAG 시스템 초기화에 실패했습니다. 서버 로그를 확인하세요.")
+    require_rag()
     
     try:
         data = await request.json()
@@ -8837,6 +8575,9 @@ async def rag_chat(request: Request):
         k = data.get('k', 5)  # 기본값 3에서 5로 증가
         model = data.get('model', 'groq').lower()
         document_context = data.get('document_context', None)  # 특정 문서로 제한 (문자열 또는 배열)
+        filters = parse_rag_filters(data.get('filters'))
+        search_mode = parse_rag_search_mode(data.get('search_mode'))  # dense / sparse(BM25) / hybrid
+        stream_fmt = stream_format(data, request)
         
         if not message:
             raise HTTPException(status_code=400, detail="메시지를 입력해주세요")
@@ -8858,121 +8599,21 @@ async def rag_chat(request: Request):
             document_context = None
         
         # ==================== 통계/숫자 질문 감지 ====================
-        message_lower = message.lower()
-        
-        # 강사 수 질문 감지
-        if any(keyword in message_lower for keyword in ['강사', '강사수', '강사 수', '강사는', '강사 수는', '몇 명', '몇명', '인원']):
-            if any(keyword in message_lower for keyword in ['수', '명', '얼마', '몇', '많', '인원']):
-                try:
-                    conn = get_db_connection()
-                    cursor = conn.cursor(pymysql.cursors.DictCursor)
-                    
-                    # 강사 수 조회
-                    cursor.execute("SELECT COUNT(*) as count FROM instructors")
-                    result = cursor.fetchone()
-                    instructor_count = result['count'] if result else 0
-                    
-                    # 강사 이름 목록 (상위 10명)
-                    cursor.execute("""
-                        SELECT name, email 
-                        FROM instructors 
-                        ORDER BY id 
-                        LIMIT 10
-                    """)
-                    instructor_list = cursor.fetchall()
-                    
-                    conn.close()
-                    
-                    # 답변 생성
-                    answer = f"현재 시스템에 등록된 강사 수는 **총 {instructor_count}명**입니다.\n\n"
-                    
-                    if instructor_list and len(instructor_list) > 0:
-                        answer += "📋 **등록된 강사 (상위 10명):**\n"
-                        for idx, instructor in enumerate(instructor_list, 1):
-                            name = instructor.get('name', '이름없음')
-                            email = instructor.get('email', '')
-                            if email:
-                                answer += f"{idx}. {name} ({email})\n"
-                            else:
-                                answer += f"{idx}. {name}\n"
-                    
-                    answer += "\n💡 *이 정보는 데이터베이스에서 실시간으로 조회되었습니다.*"
-                    
-                    return {
-                        "success": True,
-                        "model": "database",
-                        "answer": answer,
-                        "sources": [{
-                            'source': 'instructors 테이블 (DB 직접 조회)',
-                            'similarity': 1.0,
-                            'content': f"총 강사 수: {instructor_count}명"
-                        }],
-                        "message": message,
-                        "query_type": "statistics"
-                    }
-                except Exception as e:
-                    print(f"[ERROR] 강사 수 조회 실패: {e}")
-                    # 실패 시 RAG로 폴백
-        
-        # 학생 수 질문 감지
-        if any(keyword in message_lower for keyword in ['학생', '학생수', '학생 수', '수강생', '훈련생']):
-            if any(keyword in message_lower for keyword in ['수', '명', '얼마', '몇', '많', '인원']):
-                try:
-                    conn = get_db_connection()
-                    cursor = conn.cursor(pymysql.cursors.DictCursor)
-                    
-                    cursor.execute("SELECT COUNT(*) as count FROM students")
-                    result = cursor.fetchone()
-                    student_count = result['count'] if result else 0
-                    
-                    # 과정별 통계
-                    cursor.execute("""
-                        SELECT course_code, COUNT(*) as count 
-                        FROM students 
-                        GROUP BY course_code 
-                        ORDER BY count DESC 
-                        LIMIT 5
-                    """)
-                    course_stats = cursor.fetchall()
-                    
-                    conn.close()
-                    
-                    answer = f"현재 시스템에 등록된 학생 수는 **총 {student_count}명**입니다.\n\n"
-                    
-                    if course_stats:
-                        answer += "📊 **과정별 학생 수 (상위 5개):**\n"
-                        for stat in course_stats:
-                            answer += f"- {stat['course_code']}: {stat['count']}명\n"
-                    
-                    answer += "\n💡 *이 정보는 데이터베이스에서 실시간으로 조회되었습니다.*"
-                    
-                    return {
-                        "success": True,
-                        "model": "database",
-                        "answer": answer,
-                        "sources": [{
-                            'source': 'students 테이블 (DB 직접 조회)',
-                            'similarity': 1.0,
-                            'content': f"총 학생 수: {student_count}명"
-                        }],
-                        "message": message,
-                        "query_type": "statistics"
-                    }
-                except Exception as e:
-                    print(f"[ERROR] 학생 수 조회 실패: {e}")
+        statistics_answer = await run_blocking(answer_statistics_question, message)
+        if statistics_answer:
+            if stream_fmt:
+                return event_stream_response(iter_events(
+                    ('sources', statistics_answer['sources']),
+                    ('token', {"text": statistics_answer['answer']}),
+                    ('done', statistics_answer)
+                ), stream_fmt)
+            return statistics_answer
         
         # ==================== RAG 처리 ====================
-        # API 키 가져오기 (DB → 헤더 → 환경변수 순서)
-        conn = get_db_connection()
-        cursor = conn.cursor(pymysql.cursors.DictCursor)
-        cursor.execute("SELECT setting_key, setting_value FROM system_settings WHERE setting_key IN ('groq_api_key', 'gemini_api_key')")
-        db_settings_list = cursor.fetchall()
-        conn.close()
-        
-        db_settings = {item['setting_key']: item['setting_value'] for item in db_settings_list}
-        
-        groq_api_key = request.headers.get('X-GROQ-API-Key') or db_settings.get('groq_api_key', '') or os.getenv('GROQ_API_KEY', '')
-        gemini_api_key = request.headers.get('X-Gemini-API-Key') or db_settings.get('gemini_api_key', '') or os.getenv('GOOGLE_CLOUD_TTS_API_KEY', '')
+        # API 키 가져오기 (헤더 > DB > 환경변수)
+        api_keys = await resolve_ai_api_keys(request)
+        groq_api_key = api_keys['groq']
+        gemini_api_key = api_keys['gemini']
         
         # 모델에 따라 API 키 선택
         if model in ['groq', 'gemma']:
@@ -8993,33 +8634,21 @@ async def rag_chat(request: Request):
             )
         
         # RAG 체인 생성
-        rag_chain = RAGChain(vector_store_manager, api_key, api_type)
-        
-        # RAG 질문 처리 (유사도 임계값 0.008 = 0.8%)
-        print(f"💬 RAG 질문: {message_with_context if document_context else message}")
-        result = await rag_chain.query(message_with_context if document_context else message, k=k, min_similarity=0.008)
-        
-        # 문서 컨텍스트가 지정된 경우 결과 필터링 (복수 문서 지원)
-        if document_context and len(document_context) > 0:
-            filtered_sources = []
-            for source in result.get('sources', []):
-                metadata = source.get('metadata', {})
-                source_filename = metadata.get('filename', '') or metadata.get('original_filename', '')
-                
-                # 지정된 문서 목록에 포함되는 경우만 포함
-                for doc_name in document_context:
-                    if doc_name in source_filename or source_filename in doc_name:
-                        filtered_sources.append(source)
-                        break
-            
-            # 필터링된 소스가 있으면 사용, 없으면 모든 소스 사용
-            if filtered_sources:
-                result['sources'] = filtered_sources
-                doc_names = ', '.join(document_context)
-                print(f"📄 문서 필터링 ({len(document_context)}개): {len(filtered_sources)}/{len(result.get('sources', []))} 소스 사용")
-            else:
-                doc_names = ', '.join(document_context)
-                print(f"⚠️ 문서 '{doc_names}'에서 관련 내용을 찾을 수 없어 전체 검색 결과를 사용합니다")
+        rag_chain = RAGChain(vector_store_manager, api_key, api_type, http_clients=llm_clients,
+                             response_cache=llm_cache,
+                             use_cache=not bypass_llm_cache(data, request.headers),
+                             search_mode=search_mode)
+        
+        # RAG 질문 처리 (유사도 임계값: cosine 컬렉션 RAG_MIN_SIMILARITY, 이전 l2 컬렉션 0.008)
+        question = message_with_context if document_context else message
+        print(f"💬 RAG 질문: {question}")
+        # 문서 컨텍스트/필터는 벡터 검색 단계에서 적용 (복수 문서 지원)
+        if stream_fmt:
+            return event_stream_response(
+                rag_chat_events(rag_chain, question, k, model, message, document_context, filters), stream_fmt
+            )
+        result = await rag_chain.query(question, k=k, min_similarity=rag_min_similarity(),
+                                       document_context=document_context, filters=filters, fallback_to_all=True)
         
         return {
             "success": True,
@@ -9028,6 +8657,8 @@ async def rag_chat(request: Request):
             "sources": result['sources'],
             "message": message,
             "document_context": document_context,
+            "filters": filters,
+            "search_mode": search_mode,
             "query_type": "rag"
         }
         
@@ -9042,52 +8673,65 @@ async def rag_chat(request: Request):
 
 
 @app.post("/api/rag/search")
-async def rag_search(
+def rag_search(
     query: str = Form(...),
     k: int = Form(5),
-    subject: Optional[str] = Form(None)
+    subject: Optional[str] = Form(None),
+    instructor: Optional[str] = Form(None),
+    filename: Optional[str] = Form(None),
+    uploaded_from: Optional[str] = Form(None),
+    uploaded_to: Optional[str] = Form(None),
+    mode: Optional[str] = Form(None)
 ):
     """
     RAG 문서 검색
     
     - 질문과 유사한 문서 검색
-    - 메타데이터 필터링 지원
+    - 메타데이터 필터링 지원 (과목/강사/파일명/업로드 날짜 - 조건에 맞는 청크 안에서 k개 검색)
+    - mode: dense(임베딩) / sparse(BM25 어휘) / hybrid(RRF 결합), 기본값 RAG_SEARCH_MODE
     """
-    if not vector_store_manager:
-        # RAG 시스템 지연 초기화
-        print("[INFO] 첫 RAG 요청 - 시스템 초기화 중...")
-        if not init_rag():
-            raise HTTPException(status_code=503, detail="RAG 시스템 초기화에 실패했습니다. 서버 로그를 확인하세요.")
+    require_rag()
     
     try:
-        # 검색 (필터 없이)
-        results = vector_store_manager.search_with_score(query, k=k)
+        filters = parse_rag_filters({
+            'subject': subject, 'instructor': instructor, 'filename': filename,
+            'uploaded_from': uploaded_from, 'uploaded_to': uploaded_to
+        })
+        mode = parse_rag_search_mode(mode)
+        results = vector_store_manager.search_with_score(query, k=k, filters=filters, mode=mode)
         
-        # 결과 포맷팅
+        # 결과 포맷팅 (sparse: similarity = BM25 점수, hybrid: fusion_score = RRF 점수)
         search_results = []
         for result in results:
-            search_results.append({
+            item = {
                 'content': result.get('content', ''),
                 'similarity': float(result.get('score', 0)),
                 'metadata': result.get('metadata', {})
-            })
+            }
+            for key in ('fusion_score', 'dense_rank', 'sparse_rank'):
+                if key in result:
+                    item[key] = result[key]
+            search_results.append(item)
         
         return {
             "success": True,
             "query": query,
+            "filters": filters,
+            "mode": mode,
             "results_count": len(search_results),
             "results": search_results
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"문서 검색 실패: {str(e)}")
 
 
 @app.delete("/api/rag/clear")
-async def clear_rag_database():
+def clear_rag_database():
     """RAG 데이터베이스 초기화 (모든 문서 삭제)"""
-    if not vector_store_manager:
-        raise HTTPException(status_code=503, detail="RAG 시스템이 초기화되지 않았습니다")
+    require_rag()
     
     try:
         old_count = vector_store_manager.count_documents()
@@ -9104,22 +8748,23 @@ async def clear_rag_database():
 
 
 @app.get("/api/rag/status")
-async def rag_status():
-    """RAG 시스템 상태 확인"""
-    global rag_initialized
-    
-    if not rag_initialized:
-        return {
-            "initialized": False,
-            "loading": False,
-            "message": "RAG 시스템이 아직 초기화되지 않았습니다. 첫 RAG 기능 사용 시 자동으로 초기화됩니다."
-        }
-    
-    if not vector_store_manager:
+def rag_status():
+    """RAG 시스템 상태 확인 (warmup.state: idle / warming / ready / failed)"""
+    warmup = rag_warmup.status()
+    
+    if not rag_warmup.ready or not vector_store_manager:
+        if warmup['state'] == 'warming':
+            message = "한국어 임베딩 모델 로딩 중... (최초 1회만, 약 10-20초 소요)"
+        elif warmup['state'] == 'failed':
+            message = "RAG 시스템 초기화에 실패했습니다. 서버 로그를 확인하세요."
+        else:
+            message = "RAG 시스템이 아직 초기화되지 않았습니다. 첫 RAG 기능 사용 시 자동으로 초기화됩니다."
         return {
             "initialized": False,
-            "loading": True,
-            "message": "한국어 임베딩 모델 로딩 중... (최초 1회만, 약 10-20초 소요)"
+            "loading": warmup['state'] == 'warming',
+            "status": warmup['state'],
+            "warmup": warmup,
+            "message": message
         }
     
     try:
@@ -9132,6 +8777,9 @@ async def rag_status():
             "embedding_model": "jhgan/ko-sroberta-multitask",
             "collection_name": vector_store_manager.collection_name,
             "vector_db": "FAISS",
+            "index": vector_store_manager.index_info(),
+            "query_cache": vector_store_manager.query_cache_stats(),
+            "warmup": warmup,
             "status": "정상"
         }
         
@@ -9143,6 +8791,47 @@ async def rag_status():
         }
 
 
+@app.post("/api/rag/rebuild-index")
+def rebuild_rag_index(index_type: Optional[str] = None):
+    """
+    FAISS 인덱스 재구성
+    
+    Query:
+        - index_type: flat, hnsw, ivfpq, auto (생략 시 RAG_INDEX_TYPE 설정)
+    """
+    if index_type and index_type not in ('flat', 'hnsw', 'ivfpq', 'auto'):
+        raise HTTPException(status_code=400, detail="index_type은 flat, hnsw, ivfpq, auto 중 하나여야 합니다")
+    require_rag()
+    
+    try:
+        return {"success": True, "index": vector_store_manager.rebuild_index(index_type)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"인덱스 재구성 실패: {str(e)}")
+
+
+
+@app.get("/api/admin/rag-query-cache")
+def get_rag_query_cache_stats():
+    """RAG 쿼리 임베딩 캐시 통계 (적중률/항목 수)"""
+    require_rag()
+    return vector_store_manager.query_cache_stats()
+
+
+@app.post("/api/admin/rag-query-cache/clear")
+def clear_rag_query_cache():
+    """RAG 쿼리 임베딩 캐시 비우기 (저장된 파일 포함)"""
+    require_rag()
+    vector_store_manager.query_cache.clear()
+    return vector_store_manager.query_cache_stats()
+
+
+@app.on_event("shutdown")
+def close_vector_store():
+    """서버 종료 시 인덱싱 작업 스레드 종료 + 쿼리 임베딩 캐시 저장 (RAG_QUERY_CACHE_PERSIST=1) + 임베딩 워커 프로세스 종료"""
+    indexing_jobs.stop()
+    if vector_store_manager:
+        vector_store_manager.close()
+
 # ====================문제은행 API====================
 
 @app.post("/api/exam-bank/generate")
@@ -9164,19 +8853,12 @@ async def generate_exam_questions(request: Request):
         
         print(f"[DEBUG] vector_store_manager: {vector_store_manager is not None}")
         
-        # RAG 시스템 확인 (vector_store_manager만 체크)
-        if not vector_store_manager:
-            print("[ERROR] vector_store_manager가 None입니다")
-            raise HTTPException(status_code=503, detail="RAG 시스템(Vector Store)이 초기화되지 않았습니다. 먼저 문서를 업로드하고 RAG 인덱싱을 완료해주세요.")
+        # RAG 시스템 확인 (준비 전이면 503 warming)
+        require_rag()
         
         # GROQ API 키 가져오기
         print("[INFO] GROQ API 키 조회 중...")
-        conn = get_db_connection()
-        cursor = conn.cursor(pymysql.cursors.DictCursor)
-        cursor.execute("SELECT setting_value FROM system_settings WHERE setting_key = 'groq_api_key'")
-        result = cursor.fetchone()
-        groq_api_key = result['setting_value'] if result else os.getenv('GROQ_API_KEY', '')
-        conn.close()
+        groq_api_key = (await resolve_ai_api_keys(request))['groq']
         
         print(f"[DEBUG] GROQ API 키 존재: {bool(groq_api_key)}")
         
@@ -9235,7 +8917,9 @@ D) [선택지 4]
         from rag.rag_chain import RAGChain
         
         try:
-            exam_rag_chain = RAGChain(vector_store_manager, groq_api_key, api_type='groq')
+            exam_rag_chain = RAGChain(vector_store_manager, groq_api_key, api_type='groq', http_clients=llm_clients,
+                                      response_cache=llm_cache,
+                                      use_cache=not bypass_llm_cache(data, request.headers))
             print("[OK] RAGChain 초기화 완료")
         except Exception as chain_error:
             print(f"[ERROR] RAGChain 초기화 실패: {chain_error}")
@@ -9287,10 +8971,9 @@ D) [선택지 4]
 
 
 @app.post("/api/exam-bank/save")
-async def save_exam(request: Request):
+def save_exam(data: dict):
     """생성된 문제를 데이터베이스에 저장"""
     try:
-        data = await request.json()
         exam_name = data.get('exam_name')
         subject = data.get('subject')
         exam_date = data.get('exam_date')
@@ -9303,53 +8986,6 @@ async def save_exam(request: Request):
         conn = get_db_connection()
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
-        # exam_bank 테이블 생성 (없으면)
-        try:
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS exam_bank (
-                    exam_id INT AUTO_INCREMENT PRIMARY KEY,
-                    exam_name VARCHAR(255) NOT NULL,
-                    subject VARCHAR(255),
-                    exam_date DATE,
-                    total_questions INT DEFAULT 0,
-                    question_type VARCHAR(50) DEFAULT 'multiple_choice',
-                    difficulty VARCHAR(50) DEFAULT 'medium',
-                    instructor_code VARCHAR(50),
-                    description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    INDEX idx_exam_date (exam_date),
-                    INDEX idx_instructor (instructor_code)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """)
-            
-            # exam_questions 테이블 생성 (없으면)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS exam_questions (
-                    question_id INT AUTO_INCREMENT PRIMARY KEY,
-                    exam_id INT NOT NULL,
-                    question_number INT NOT NULL,
-                    question_text TEXT NOT NULL,
-                    question_type VARCHAR(50) DEFAULT 'multiple_choice',
-                    options JSON,
-                    correct_answer TEXT,
-                    explanation TEXT,
-                    reference_page VARCHAR(100),
-                    reference_document VARCHAR(255),
-                    difficulty VARCHAR(50) DEFAULT 'medium',
-                    points INT DEFAULT 1,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (exam_id) REFERENCES exam_bank(exam_id) ON DELETE CASCADE,
-                    INDEX idx_exam (exam_id),
-                    INDEX idx_question_number (question_number)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """)
-            
-            conn.commit()
-            print("[INFO] exam_bank 테이블 생성/확인 완료")
-        except Exception as table_error:
-            print(f"[WARN] 테이블 생성 중 오류 (무시): {table_error}")
-        
         # 시험 정보 저장
         cursor.execute("""
             INSERT INTO exam_bank (exam_name, subject, exam_date, total_questions, 
@@ -9393,59 +9029,12 @@ async def save_exam(request: Request):
 
 
 @app.get("/api/exam-bank/list")
-async def get_exam_list():
+def get_exam_list():
     """저장된 시험 목록 조회"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
-        # exam_bank 테이블 생성 (없으면)
-        try:
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS exam_bank (
-                    exam_id INT AUTO_INCREMENT PRIMARY KEY,
-                    exam_name VARCHAR(255) NOT NULL,
-                    subject VARCHAR(255),
-                    exam_date DATE,
-                    total_questions INT DEFAULT 0,
-                    question_type VARCHAR(50) DEFAULT 'multiple_choice',
-                    difficulty VARCHAR(50) DEFAULT 'medium',
-                    instructor_code VARCHAR(50),
-                    description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    INDEX idx_exam_date (exam_date),
-                    INDEX idx_instructor (instructor_code)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """)
-            
-            # exam_questions 테이블 생성 (없으면)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS exam_questions (
-                    question_id INT AUTO_INCREMENT PRIMARY KEY,
-                    exam_id INT NOT NULL,
-                    question_number INT NOT NULL,
-                    question_text TEXT NOT NULL,
-                    question_type VARCHAR(50) DEFAULT 'multiple_choice',
-                    options JSON,
-                    correct_answer TEXT,
-                    explanation TEXT,
-                    reference_page VARCHAR(100),
-                    reference_document VARCHAR(255),
-                    difficulty VARCHAR(50) DEFAULT 'medium',
-                    points INT DEFAULT 1,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (exam_id) REFERENCES exam_bank(exam_id) ON DELETE CASCADE,
-                    INDEX idx_exam (exam_id),
-                    INDEX idx_question_number (question_number)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """)
-            
-            conn.commit()
-            print("[INFO] exam_bank 테이블 생성/확인 완료")
-        except Exception as table_error:
-            print(f"[WARN] 테이블 생성 중 오류 (무시): {table_error}")
-        
         cursor.execute("""
             SELECT exam_id, exam_name, subject, exam_date, total_questions, 
                    question_type, difficulty, instructor_code, description,
@@ -9468,7 +9057,7 @@ async def get_exam_list():
 
 
 @app.get("/api/exam-bank/{exam_id}")
-async def get_exam_detail(exam_id: int):
+def get_exam_detail(exam_id: int):
     """시험 상세 정보 및 문제 조회"""
     try:
         conn = get_db_connection()
@@ -9526,7 +9115,7 @@ async def get_exam_detail(exam_id: int):
 
 
 @app.delete("/api/exam-bank/{exam_id}")
-async def delete_exam(exam_id: int):
+def delete_exam(exam_id: int):
     """시험 삭제"""
     try:
         conn = get_db_connection()
@@ -9557,7 +9146,7 @@ async def delete_exam(exam_id: int):
 
 
 @app.delete("/api/exam-bank/{exam_id}/question/{question_id}")
-async def delete_question(exam_id: int, question_id: int):
+def delete_question(exam_id: int, question_id: int):
     """개별 문제 삭제"""
     try:
         conn = get_db_connection()
@@ -9600,11 +9189,9 @@ async def delete_question(exam_id: int, question_id: int):
 
 
 @app.put("/api/exam-bank/{exam_id}")
-async def update_exam(exam_id: int, request: Request):
+def update_exam(exam_id: int, data: dict):
     """시험 정보 수정"""
     try:
-        data = await request.json()
-        
         conn = get_db_connection()
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
@@ -9683,7 +9270,7 @@ async def update_exam(exam_id: int, request: Request):
 # ====================문서 관리 API====================
 
 @app.post("/api/documents/upload")
-async def upload_document(
+def upload_document(
     file: UploadFile = File(...),
     category: Optional[str] = Form("general")
 ):
@@ -9703,7 +9290,7 @@ async def upload_document(
             )
         
         # 파일 읽기
-        content = await file.read()
+        content = file.file.read()
         file_size = len(content)
         
         # 파일 크기 확인 (100MB 제한)
@@ -9750,7 +9337,7 @@ async def upload_document(
 
 
 @app.get("/api/documents/list")
-async def list_documents():
+def list_documents():
     """documents 및 rag_documents 폴더의 파일 목록 조회"""
     try:
         documents = []
@@ -9787,7 +9374,7 @@ async def list_documents():
 
 
 @app.delete("/api/documents/{filename}")
-async def delete_document(filename: str):
+def delete_document(filename: str):
     """문서 삭제 (documents 및 rag_documents 폴더에서 검색)"""
     try:
         # 파일명 검증 (경로 탐색 공격 방지)
@@ -9811,11 +9398,15 @@ async def delete_document(filename: str):
         # 파일 삭제
         file_path.unlink()
         
-        print(f"[OK] 문서 삭제 완료: {filename}")
+        # RAG 인덱스에서 해당 파일의 벡터 삭제
+        removed_chunks = vector_store_manager.delete_source(filename) if vector_store_manager else 0
+        
+        print(f"[OK] 문서 삭제 완료: {filename} (RAG 청크 {removed_chunks}개 삭제)")
         
         return {
             "success": True,
-            "message": f"문서 '{filename}'이(가) 삭제되었습니다"
+            "message": f"문서 '{filename}'이(가) 삭제되었습니다",
+            "removed_chunks": removed_chunks
         }
         
     except HTTPException:
@@ -9826,7 +9417,7 @@ async def delete_document(filename: str):
 
 
 @app.get("/api/documents/download/{filename}")
-async def download_document(filename: str):
+def download_document(filename: str):
     """문서 다운로드 (documents 및 rag_documents 폴더에서 검색)"""
     try:
         # 파일명 검증
@@ -9860,53 +9451,36 @@ async def download_document(filename: str):
 
 
 @app.post("/api/rag/index-document")
-async def index_document_to_rag(request: Request, background_tasks: BackgroundTasks):
+def index_document_to_rag(body: dict):
     """
-    문서를 RAG 시스템에 인덱싱 (백그라운드 처리)
+    문서를 RAG 시스템에 인덱싱 (인덱싱 작업 큐에 등록, 작업 스레드에서 처리)
     - filename: rag_documents 또는 documents 폴더에 있는 파일명
     - original_filename: 원본 파일명 (선택)
+    
+    같은 파일의 작업이 이미 대기/실행 중이면 새로 등록하지 않고 그 작업을 반환합니다.
     """
-    if not vector_store_manager or not document_loader:
-        raise HTTPException(status_code=503, detail="RAG 시스템이 초기화되지 않았습니다")
+    require_rag()
     
     try:
-        body = await request.json()
         filename = body.get('filename')
         original_filename = body.get('original_filename', filename)
         
         if not filename:
             raise HTTPException(status_code=400, detail="filename이 필요합니다")
         
-        # 진행률 초기화
-        indexing_progress[filename] = {
-            "status": "started",
-            "progress": 0,
-            "message": "인덱싱 시작 중...",
-            "started_at": datetime.now().isoformat()
-        }
-        save_indexing_progress(indexing_progress)
-        
-        # 백그라운드에서 실행할 함수 정의
-        def do_indexing():
-            try:
-                _index_document_sync(filename, original_filename)
-            except Exception as e:
-                print(f"[ERROR] 백그라운드 인덱싱 실패: {str(e)}")
-                indexing_progress[filename] = {
-                    "status": "error",
-                    "progress": 0,
-                    "message": f"오류: {str(e)}"
-                }
-                save_indexing_progress(indexing_progress)
-        
-        # 백그라운드 태스크로 추가
-        background_tasks.add_task(do_indexing)
+        job = indexing_jobs.submit('document', filename,
+                                   {"filename": filename, "original_filename": original_filename})
+        if job['existing']:
+            message = "이 파일의 인덱싱 작업이 이미 진행 중입니다. 진행률을 조회하세요."
+        else:
+            message = "인덱싱 작업이 등록되었습니다. 진행률을 조회하세요."
         
-        # 즉시 응답 반환 (백그라운드에서 계속 실행)
         return {
             "success": True,
-            "message": "인덱싱이 백그라운드에서 시작되었습니다. 진행률을 조회하세요.",
+            "message": message,
             "filename": filename,
+            "job_id": job['id'],
+            "state": job['state'],
             "status": "processing"
         }
         
@@ -9917,179 +9491,310 @@ async def index_document_to_rag(request: Request, background_tasks: BackgroundTa
         raise HTTPException(status_code=500, detail=f"인덱싱 요청 실패: {str(e)}")
 
 
-def _index_document_sync(filename: str, original_filename: str):
+def wait_for_rag_job():
+    """인덱싱 작업 실행 전 RAG 준비 대기 (초기화 실패면 예외 → 작업 재시도)"""
+    rag_warmup.start()
+    if not rag_warmup.wait() or vector_store_manager is None or document_loader is None:
+        raise RuntimeError("RAG 시스템이 초기화되지 않았습니다")
+
+
+def _index_document_job(job: dict, reporter: JobReporter) -> dict:
     """
-    실제 인덱싱 로직 (동기 함수, 백그라운드에서 실행됨)
+    문서 1개 인덱싱 작업 (인덱싱 작업 스레드에서 실행)
+    진행률은 reporter로 기록 - 취소 요청이 있으면 다음 진행률 기록 때 중단됩니다.
     """
-    try:
-        
-        # rag_documents 폴더와 documents 폴더에서 파일 찾기
-        file_path = None
-        for folder in ["rag_documents", "documents"]:
-            test_path = Path(f"./{folder}") / filename
-            if test_path.exists():
-                file_path = test_path
-                break
-        
-        if not file_path:
-            indexing_progress[filename] = {"status": "error", "progress": 0, "message": "파일을 찾을 수 없습니다"}
-            save_indexing_progress(indexing_progress)
-            raise Exception(f"파일을 찾을 수 없습니다: {filename}")
-        
-        # 파일 확장자 확인
-        file_ext = file_path.suffix.lower()
-        if file_ext not in ['.pdf', '.docx', '.doc', '.txt']:
-            indexing_progress[filename] = {"status": "error", "progress": 0, "message": "지원하지 않는 파일 형식"}
-            save_indexing_progress(indexing_progress)
-            raise Exception("RAG 인덱싱은 PDF, DOCX, TXT 파일만 지원합니다")
-        
-        print(f"📚 RAG 인덱싱 시작: {filename}")
-        indexing_progress[filename] = {"status": "parsing", "progress": 10, "message": "문서 파싱 중..."}
-        save_indexing_progress(indexing_progress)
-        
-        # 메타데이터 구성
-        metadata = {
-            "filename": filename,
-            "original_filename": original_filename,
-            "indexed_at": datetime.now().isoformat(),
-            "file_size": file_path.stat().st_size,
+    filename = job['payload']['filename']
+    original_filename = job['payload'].get('original_filename') or filename
+    wait_for_rag_job()
+    
+    # rag_documents 폴더와 documents 폴더에서 파일 찾기
+    file_path = None
+    for folder in ["rag_documents", "documents"]:
+        test_path = Path(f"./{folder}") / filename
+        if test_path.exists():
+            file_path = test_path
+            break
+    
+    if not file_path:
+        raise PermanentJobError(f"파일을 찾을 수 없습니다: {filename}")
+    
+    # 파일 확장자 확인
+    file_ext = file_path.suffix.lower()
+    if file_ext not in ['.pdf', '.docx', '.doc', '.txt']:
+        raise PermanentJobError("RAG 인덱싱은 PDF, DOCX, TXT 파일만 지원합니다")
+    
+    print(f"📚 RAG 인덱싱 시작: {filename} (작업 #{job['id']})")
+    reporter.update("parsing", 10, "문서 파싱 중...")
+    
+    # 메타데이터 구성
+    metadata = {
+        "filename": filename,
+        "original_filename": original_filename,
+        "indexed_at": datetime.now().isoformat(),
+        "file_size": file_path.stat().st_size,
+        "source": "documents_folder"
+    }
+    
+    # 같은 내용이 이미 인덱싱되어 있으면 (파일명 타임스탬프만 다른 재업로드 등) 파싱/임베딩 없이 저장된 임베딩 재사용
+    content_hash = file_sha256(str(file_path))
+    metadata["content_hash"] = content_hash
+    chunk_params = document_loader.chunk_params()
+    linked = vector_store_manager.link_duplicate(filename, content_hash, chunk_params,
+                                                 document_loader.file_metadata(str(file_path), dict(metadata)))
+    if linked:
+        chunks = len(linked['document_ids'])
+        if linked['linked_from']:
+            message = f"✅ 같은 내용의 문서가 이미 인덱싱됨 ({linked['linked_from']}, 임베딩 재사용 {chunks}개 청크)"
+        else:
+            message = f"✅ 변경 없음 (이미 인덱싱됨, {chunks}개 청크)"
+        print(f"[INFO] {filename}: {message}")
+        reporter.update("completed", 100, message)
+        return {"chunks": chunks, "added": linked['added'], "removed": linked['removed'],
+                "unchanged": linked['unchanged'], "linked_from": linked['linked_from'], "message": message}
+    
+    # 진행률 콜백 함수 (임베딩 배치가 끝날 때마다 호출, 진행률은 처리한 페이지 비율 기준 10%~90%)
+    last_logged_progress = [0]  # 마지막 로그 출력 진행률
+    
+    def update_progress(done_chunks, total_chunks, progress):
+        reporter.update("embedding", progress, f"🧠 페이지 추출/임베딩 중... (청크 {done_chunks}/{total_chunks})")
+        if progress - last_logged_progress[0] >= 5:
+            print(f"[INFO] 진행률: {progress}% (청크 {done_chunks}/{total_chunks})")
+            last_logged_progress[0] = progress
+    
+    # 페이지 추출 → 청킹 → 임베딩/저장을 배치 단위로 (문서 전체를 메모리에 올리지 않음)
+    # 파일 단위 upsert: 바뀐 청크만 임베딩하고 사라진 청크는 마지막에 삭제
+    print(f"📝 문서 파싱 및 임베딩 중 (배치 {RAG_STREAM_BATCH}개 청크)...")
+    batches = (
+        ([doc.page_content for doc in documents], [doc.metadata for doc in documents], fraction)
+        for documents, fraction in document_loader.iter_batches(str(file_path), metadata)
+    )
+    upsert_result = vector_store_manager.upsert_document_stream(filename, batches,
+                                                                progress_callback=update_progress)
+    doc_ids = upsert_result['document_ids']
+    
+    if not doc_ids:
+        raise PermanentJobError("문서에서 텍스트를 추출할 수 없습니다")
+    vector_store_manager.record_manifest(filename, content_hash, chunk_params, doc_ids)
+    
+    if not upsert_result['added'] and not upsert_result['removed']:
+        print(f"[INFO] 변경 없음: {filename} (이미 인덱싱됨, {len(doc_ids)}개 청크)")
+        message = f"✅ 변경 없음 (이미 인덱싱됨, {len(doc_ids)}개 청크)"
+    else:
+        print(f"✅ RAG 인덱싱 완료: {len(doc_ids)}개 벡터 저장됨 "
+              f"(추가 {upsert_result['added']}, 삭제 {upsert_result['removed']}, 유지 {upsert_result['unchanged']})")
+        message = f"✅ 인덱싱 완료! ({len(doc_ids)}개 벡터)"
+    reporter.update("completed", 100, message)
+    
+    return {"chunks": len(doc_ids), "added": upsert_result['added'], "removed": upsert_result['removed'],
+            "unchanged": upsert_result['unchanged'], "message": message}
+
+
+indexing_jobs.register('document', _index_document_job)
+
+
+# 일괄 인덱싱 (인덱싱 작업 큐의 'bulk' 작업 - 한 번에 1개만 대기/실행, 파일별 진행률은 indexing-progress)
+RAG_DOCUMENT_FOLDERS = ("documents", "rag_documents")
+
+
+def _bulk_ingest_files(payload: dict) -> list:
+    """일괄 인덱싱 대상 (파일 경로, 파일명, 메타데이터) 목록"""
+    directory = Path(f"./{payload['folder']}")
+    if payload.get('default_metadata'):
+        metadata_for = lambda path: default_document_metadata(Path(path))
+    else:
+        indexed_at = datetime.now().isoformat()
+        metadata_for = lambda path: {
+            "original_filename": os.path.basename(path),
+            "indexed_at": indexed_at,
+            "file_size": os.path.getsize(path),
             "source": "documents_folder"
         }
-        
-        # 문서 로드 및 청킹
-        print(f"📝 문서 파싱 중...")
-        documents = document_loader.load_document(str(file_path), metadata)
-        
-        if not documents:
-            indexing_progress[filename] = {"status": "error", "progress": 0, "message": "텍스트 추출 실패"}
-            save_indexing_progress(indexing_progress)
-            raise Exception("문서에서 텍스트를 추출할 수 없습니다")
-        
-        print(f"🧩 청킹 완료: {len(documents)}개 조각")
-        indexing_progress[filename] = {"status": "chunking", "progress": 30, "message": f"청킹 완료: {len(documents)}개 조각"}
-        save_indexing_progress(indexing_progress)
-        
-        # 벡터 DB에 저장
-        print(f"🔢 임베딩 및 인덱싱 중...")
-        total_docs = len(documents)
-        indexing_progress[filename] = {"status": "embedding", "progress": 50, "message": f"📝 {total_docs}개 문서 임베딩 생성 중..."}
-        save_indexing_progress(indexing_progress)
-        
-        texts = [doc.page_content for doc in documents]
-        metadatas = [doc.metadata for doc in documents]
-        
-        # 배치 단위로 진행률 업데이트
-        batch_size = 8  # sentence-transformers 기본 배치 크기
-        total_batches = (total_docs + batch_size - 1) // batch_size
-        
-        # 임베딩 시작 전 상태 업데이트
-        indexing_progress[filename] = {
-            "status": "embedding", 
-            "progress": 50, 
-            "message": f"🔢 임베딩 생성 중... (배치 0/{total_batches})"
-        }
-        save_indexing_progress(indexing_progress)
-        
-        # 진행률 콜백 함수
-        last_logged_progress = [0]  # 마지막 로그 출력 진행률
-        
-        def update_progress(batch_num, total_batches, progress):
-            old_progress = indexing_progress.get(filename, {}).get('progress', 0)
-            
-            indexing_progress[filename] = {
-                "status": "embedding",
-                "progress": progress,
-                "message": f"🧠 임베딩 생성 중... (배치 {batch_num}/{total_batches})"
-            }
-            save_indexing_progress(indexing_progress)
-            
-            # 진행률이 변경되었을 때만 로그 출력
-            if progress != old_progress and progress - last_logged_progress[0] >= 5:
-                print(f"[INFO] 진행률: {progress}% (배치 {batch_num}/{total_batches})")
-                last_logged_progress[0] = progress
-        
-        # 실제 임베딩 생성 (콜백 전달)
-        doc_ids = vector_store_manager.add_documents(texts, metadatas, progress_callback=update_progress)
-        
-        # 완료 직전 상태
-        indexing_progress[filename] = {
-            "status": "saving", 
-            "progress": 90, 
-            "message": f"💾 벡터 데이터베이스 저장 중... ({len(doc_ids)}개)"
-        }
-        save_indexing_progress(indexing_progress)
-        
-        print(f"✅ RAG 인덱싱 완료: {len(doc_ids)}개 벡터 저장됨")
-        indexing_progress[filename] = {"status": "completed", "progress": 100, "message": f"✅ 인덱싱 완료! ({len(doc_ids)}개 벡터)"}
-        save_indexing_progress(indexing_progress)
-        
-        # 완료된 항목은 30초 후 자동 정리 (메모리 관리)
-        import threading
-        def cleanup():
-            time.sleep(30)
-            if filename in indexing_progress and indexing_progress[filename].get('status') == 'completed':
-                del indexing_progress[filename]
-                save_indexing_progress(indexing_progress)
-                print(f"[INFO] 완료된 진행률 정보 정리: {filename}")
-        threading.Thread(target=cleanup, daemon=True).start()
-        
-        print(f"[OK] 인덱싱 완료: {filename}, {len(documents)}개 청크, {len(doc_ids)}개 벡터")
-        
-    except Exception as e:
-        print(f"[ERROR] RAG 인덱싱 실패: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        indexing_progress[filename] = {"status": "error", "progress": 0, "message": f"오류: {str(e)}"}
-        save_indexing_progress(indexing_progress)
+    files = collect_files(str(directory), metadata_for)
+    requested = payload.get('files')
+    if requested:
+        names = set(requested)
+        files = [entry for entry in files if entry[1] in names]
+    return files
+
+
+def _bulk_ingest_job(job: dict, reporter: JobReporter) -> dict:
+    """폴더 일괄 인덱싱 작업 (인덱싱 작업 스레드에서 실행, 파싱은 워커 프로세스)"""
+    payload = job['payload']
+    wait_for_rag_job()
+    if not Path(f"./{payload['folder']}").exists():
+        raise PermanentJobError(f"폴더를 찾을 수 없습니다: {payload['folder']}")
+    files = _bulk_ingest_files(payload)
+    if not files:
+        raise PermanentJobError("인덱싱할 문서가 없습니다 (PDF, DOCX, TXT)")
+    
+    finished = [0]
+    
+    def report(source, entry):
+        reporter.file(source, entry)
+        if entry['status'] in ('completed', 'error'):
+            finished[0] += 1
+            reporter.update("running", int(finished[0] / len(files) * 100),
+                            f"📚 일괄 인덱싱 중... ({finished[0]}/{len(files)}개 파일)")
+    
+    reporter.update("running", 0, f"📚 일괄 인덱싱 시작 ({len(files)}개 파일)")
+    summary = BulkIngestor(vector_store_manager, document_loader, workers=payload.get('workers')).ingest(files, report)
+    result = {key: value for key, value in summary.items() if key != 'results'}
+    result["message"] = (f"✅ 일괄 인덱싱 완료: {summary['indexed']}개 인덱싱 (재사용 {summary['reused']}개), "
+                         f"중복 {summary['duplicates']}개, 실패 {summary['failed']}개")
+    return result
+
+
+indexing_jobs.register('bulk', _bulk_ingest_job)
+
+
+def format_job(job: dict) -> dict:
+    """인덱싱 작업 API 응답 (시각은 ISO 형식)"""
+    formatted = dict(job)
+    for key in ('created_at', 'started_at', 'finished_at', 'updated_at', 'run_after'):
+        if formatted.get(key):
+            formatted[key] = datetime.fromtimestamp(formatted[key]).isoformat()
+    return formatted
+
+
+@app.post("/api/rag/bulk-ingest")
+def bulk_ingest_documents(body: dict):
+    """
+    폴더의 문서를 일괄 인덱싱 (인덱싱 작업 큐에 등록)
+    - folder: documents 또는 rag_documents (기본 documents)
+    - files: 인덱싱할 파일명 목록 (선택, 없으면 폴더 전체)
+    - workers: 파싱 워커 프로세스 수 (선택, 기본 RAG_INGEST_WORKERS)
+    
+    같은 내용의 파일은 한 번만 인덱싱하고, 파싱은 워커 프로세스에서 동시에 합니다.
+    파일별 진행률은 /api/rag/indexing-progress/{filename}, 전체 상태는 GET /api/rag/bulk-ingest
+    """
+    require_rag()
+    
+    folder = body.get('folder') or 'documents'
+    if folder not in RAG_DOCUMENT_FOLDERS:
+        raise HTTPException(status_code=400, detail=f"folder는 {', '.join(RAG_DOCUMENT_FOLDERS)} 중 하나여야 합니다")
+    if not Path(f"./{folder}").exists():
+        raise HTTPException(status_code=404, detail=f"폴더를 찾을 수 없습니다: {folder}")
+    try:
+        workers = int(body['workers']) if body.get('workers') else None
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="workers는 숫자여야 합니다")
+    
+    payload = {"folder": folder, "files": body.get('files') or None, "workers": workers}
+    files = [name for _, name, _ in _bulk_ingest_files(payload)]
+    if payload['files']:
+        missing = sorted(set(payload['files']) - set(files))
+        if missing:
+            raise HTTPException(status_code=404, detail=f"파일을 찾을 수 없습니다: {', '.join(missing)}")
+    if not files:
+        raise HTTPException(status_code=400, detail="인덱싱할 문서가 없습니다 (PDF, DOCX, TXT)")
+    
+    job = indexing_jobs.submit('bulk', None, payload, files=files)
+    if job['existing']:
+        raise HTTPException(status_code=409, detail=f"일괄 인덱싱이 이미 진행 중입니다 (작업 #{job['id']})")
+    
+    return {
+        "success": True,
+        "message": f"{len(files)}개 파일 일괄 인덱싱 작업이 등록되었습니다. 진행률을 조회하세요.",
+        "folder": folder,
+        "files": files,
+        "job_id": job['id'],
+        "status": "processing"
+    }
+
+
+@app.get("/api/rag/bulk-ingest")
+def get_bulk_ingest_status():
+    """최근 일괄 인덱싱 작업 상태 (running, state, progress, files, indexed, duplicates, failed, chunks, elapsed_seconds)"""
+    job = indexing_jobs.latest('bulk')
+    if job is None:
+        return {"running": False}
+    job = format_job(job)
+    return {
+        "running": job['state'] in ('queued', 'running'),
+        "job_id": job['id'],
+        "state": job['state'],
+        "folder": job['payload']['folder'],
+        "progress": job['progress'],
+        "message": job['message'],
+        "error": job['error'],
+        "started_at": job['started_at'],
+        "finished_at": job['finished_at'],
+        **(job['result'] or {})
+    }
 
 
 @app.get("/api/rag/indexing-progress/{filename}")
-async def get_indexing_progress(filename: str):
+def get_indexing_progress(filename: str):
     """RAG 인덱싱 진행률 조회"""
-    if filename not in indexing_progress:
+    entry = indexing_jobs.file_progress(filename)
+    if entry is None:
         return {"status": "not_found", "progress": 0, "message": "진행 정보 없음"}
-    return indexing_progress[filename]
+    return format_job(entry)
+
+
+@app.get("/api/rag/jobs")
+def list_indexing_jobs(state: Optional[str] = None, limit: int = Query(50, ge=1, le=500)):
+    """인덱싱 작업 목록 (state: queued / running / completed / failed / cancelled) + 큐 현황 (상태별 개수, 작업 스레드 수)"""
+    return {"jobs": [format_job(job) for job in indexing_jobs.list(state, limit)], "stats": indexing_jobs.stats()}
+
+
+@app.get("/api/rag/jobs/{job_id}")
+def get_indexing_job(job_id: int):
+    """인덱싱 작업 조회"""
+    job = indexing_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    return format_job(job)
+
+
+@app.post("/api/rag/jobs/{job_id}/cancel")
+def cancel_indexing_job(job_id: int):
+    """인덱싱 작업 취소 (실행 중이면 다음 진행률 갱신 때 중단 - 그때까지 저장된 청크는 남음, 다시 인덱싱하면 정리)"""
+    job = indexing_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    if job['state'] in ('completed', 'failed'):
+        raise HTTPException(status_code=409, detail=f"이미 끝난 작업입니다 ({job['state']})")
+    return format_job(job)
+
+
+@app.post("/api/rag/jobs/{job_id}/retry")
+def retry_indexing_job(job_id: int):
+    """실패/취소된 인덱싱 작업 다시 실행"""
+    job = indexing_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    if job['state'] not in ('failed', 'cancelled'):
+        raise HTTPException(status_code=409, detail=f"실패/취소된 작업만 재시도할 수 있습니다 ({job['state']})")
+    return format_job(indexing_jobs.retry(job_id))
 
 
 @app.get("/api/rag/document-status/{filename}")
-async def get_document_rag_status(filename: str):
+def get_document_rag_status(filename: str):
     """
     문서의 RAG 인덱싱 상태 확인
     - indexed: 인덱싱 완료 여부
     - indexing: 현재 인덱싱 진행 중인지 여부
     - progress: 진행률 정보
     """
-    if not vector_store_manager:
-        # RAG 시스템 지연 초기화
-        print("[INFO] 첫 RAG 요청 - 시스템 초기화 중...")
-        if not init_rag():
-            raise HTTPException(status_code=503, detail="RAG 시스템 초기화에 실패했습니다. 서버 로그를 확인하세요.")
+    require_rag()
     
     try:
         # 1. 진행 중인 인덱싱 확인
-        is_indexing = filename in indexing_progress
-        progress_info = indexing_progress.get(filename, {})
-        
-        # 2. 파일명으로 벡터 DB 검색
-        documents = vector_store_manager.get_all_documents()
-        
-        # 해당 파일명을 가진 문서가 있는지 확인
-        indexed_docs = [
-            doc for doc in documents 
-            if doc.get('metadata', {}).get('filename') == filename or
-               doc.get('metadata', {}).get('original_filename') == filename
-        ]
+        progress_info = indexing_jobs.file_progress(filename)
         
-        is_indexed = len(indexed_docs) > 0
+        # 2. 파일명(저장 파일명 또는 원본 파일명)의 청크 수 조회
+        chunk_count = vector_store_manager.count_source(filename)
+        is_indexed = chunk_count > 0
         
         return {
             "success": True,
             "filename": filename,
             "indexed": is_indexed,
-            "indexing": is_indexing and progress_info.get('status') not in ['completed', 'error'],
-            "progress": progress_info if is_indexing else None,
-            "chunk_count": len(indexed_docs),
-            "total_docs_in_rag": len(documents)
+            "indexing": progress_info is not None and progress_info['status'] not in ['completed', 'error'],
+            "progress": format_job(progress_info) if progress_info else None,
+            "chunk_count": chunk_count,
+            "total_docs_in_rag": vector_store_manager.count_documents()
         }
         
     except Exception as e:
@@ -10100,7 +9805,7 @@ async def get_document_rag_status(filename: str):
 # ==================== 시스템 연결 테스트 API ====================
 
 @app.get("/api/test/database")
-async def test_database_connection():
+def test_database_connection():
     """데이터베이스 연결 테스트"""
     import time
     start_time = time.time()
@@ -10136,7 +9841,7 @@ async def test_database_connection():
         )
 
 @app.get("/api/test/ftp")
-async def test_ftp_connection():
+def test_ftp_connection():
     """FTP 서버 연결 테스트"""
     import time
     from ftplib import FTP
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+벡터 컬렉션 거리 척도 변환 (l2 → cosine)
+
+이전 버전에서 만든 l2 컬렉션(biohealth_docs 등)의 임베딩을 L2 정규화하여
+내적(inner product) 인덱스로 다시 만듭니다. 변환 후 검색 점수는 실제 코사인 유사도(-1~1)가 되어
+RAG_MIN_SIMILARITY 같은 임계값을 의미 있게 사용할 수 있습니다.
+
+- 세그먼트 저장소({collection}.sqlite + {collection}.segments/)는 세그먼트의 원본 임베딩을 정규화하여
+  세그먼트 하나 + cosine 인덱스 체크포인트로 다시 기록
+- 이전 버전 파일({collection}.index/.pkl)은 원본 임베딩을 {collection}.vectors.npy → flat/hnsw 인덱스 복원 →
+  문서 재임베딩 순으로 확보
+- 인덱스 종류(flat/hnsw/ivfpq)는 유지
+- 기존 파일은 {collection}.l2-backup-YYYYmmdd_HHMMSS.* 로 백업
+- 서버가 컬렉션을 메모리에 들고 있으므로 변환 후 서버를 재시작해야 합니다
+
+Usage:
+    python backend/migrate_vector_cosine.py [--collection biohealth_docs] [--persist-dir backend/vector_db] [--dry-run]
+"""
+
+import argparse
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+# rag 패키지(__init__)는 임베딩 모델을 import하므로 인덱스 유틸만 직접 로드
+sys.path.insert(0, str(Path(__file__).parent / 'rag'))
+import index_factory  # noqa: E402
+from segment_store import SegmentStore  # noqa: E402
+
+
+def default_persist_dir() -> Path:
+    """SimpleVectorStore와 같은 저장 경로 (Windows는 한글 경로 문제로 임시 폴더 사용)"""
+    if sys.platform == "win32":
+        return Path(tempfile.gettempdir()) / "bh2025_vector_db"
+    return Path(__file__).parent / "vector_db"
+
+
+def collection_paths(persist_dir: Path, collection: str) -> dict:
+    return {
+        'index': persist_dir / f"{collection}.index",
+        'metadata': persist_dir / f"{collection}.pkl",
+        'vectors': persist_dir / f"{collection}.vectors.npy",
+    }
+
+
+def load_raw_vectors(index, data: dict, vectors_path: Path) -> np.ndarray:
+    """인덱스에 들어 있는 원본 임베딩 확보 (문서 행 순서)"""
+    if vectors_path.exists():
+        vectors = np.load(vectors_path)
+        if len(vectors) == index.ntotal:
+            print(f"[INFO] 원본 임베딩 사용: {vectors_path.name}")
+            return vectors.astype('float32')
+    if index_factory.can_reconstruct(index):
+        print("[INFO] 인덱스에서 원본 임베딩 복원")
+        return index_factory.reconstruct_all(index, data.get('ids'))
+
+    # ivfpq(손실 압축)이고 vectors.npy도 없으면 문서 텍스트를 다시 임베딩
+    from sentence_transformers import SentenceTransformer
+
+    model_name = data.get('embedding_model', 'jhgan/ko-sroberta-multitask')
+    print(f"[INFO] 원본 임베딩이 없어 문서 {len(data['documents'])}개 재임베딩: {model_name}")
+    model = SentenceTransformer(model_name, cache_folder=str(Path(__file__).parent / "model_cache"))
+    return model.encode(data['documents'], batch_size=32, show_progress_bar=True,
+                        convert_to_numpy=True).astype('float32')
+
+
+def backup(paths: dict) -> list:
+    """기존 컬렉션 파일 백업"""
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    backups = []
+    for path in paths.values():
+        if path.exists():
+            suffix = path.name.split('.', 1)[1]
+            target = path.with_name(f"{path.name.split('.', 1)[0]}.l2-backup-{stamp}.{suffix}")
+            shutil.copy2(path, target)
+            backups.append(target)
+    return backups
+
+
+def write_atomic(path: Path, writer):
+    """임시 파일에 쓴 뒤 교체 (중간에 실패해도 기존 파일 유지)"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    writer(str(tmp_path))
+    os.replace(tmp_path, path)
+
+
+def verify(index, vectors: np.ndarray, ids=None, samples: int = 20) -> float:
+    """저장된 벡터로 자기 자신을 검색하여 top-1 일치율 확인"""
+    if not len(vectors):
+        return 1.0
+    picks = np.random.default_rng(0).choice(len(vectors), size=min(samples, len(vectors)), replace=False)
+    if ids:
+        rows = {faiss_id: row for row, faiss_id in enumerate(ids)}
+        fetch = lambda found: vectors[[rows[int(i)] for i in found]]  # noqa: E731
+    else:
+        fetch = lambda found: vectors[found]  # noqa: E731
+    _, found = index_factory.search(index, np.ascontiguousarray(vectors[picks]), 1, fetch)
+    expected = np.array(ids, dtype='int64')[picks] if ids else picks
+    return float(np.mean(found[:, 0] == expected))
+
+
+def migrate_segments(persist_dir: Path, collection: str, dry_run: bool = False) -> bool:
+    """세그먼트 저장소 변환 - 살아 있는 청크를 정규화하여 압축(체크포인트)으로 기록"""
+    store = SegmentStore(str(persist_dir), collection)
+    try:
+        # 실행 중인 서버 워커의 추가/삭제/압축과 겹치지 않도록 쓰기 잠금 안에서 변환
+        with store.write_lock():
+            state = store.get_state()
+            chunks = store.locations()
+            metric = state.get('metric', 'l2')
+            print(f"[INFO] 컬렉션 {collection}: 문서 {len(chunks)}개, 인덱스 {state.get('index_type', 'flat')}, 거리 {metric}")
+            if metric == 'cosine':
+                print("[OK] 이미 cosine 컬렉션입니다 (변환 불필요)")
+                return True
+
+            ids = [chunk[0] for chunk in chunks]
+            new_index = None
+            vectors = None
+            if chunks:
+                vectors = index_factory.normalize(store.fetch_vectors([(segment, row) for _, segment, row in chunks]))
+                index_type = index_factory.choose_index_type(len(ids), state.get('index_type') or 'auto')
+                new_index = index_factory.build_index(index_type, vectors.shape[1], vectors, 'cosine',
+                                                      ids=np.array(ids, dtype='int64'))
+                print(f"[INFO] 변환된 인덱스: {index_factory.describe(new_index)}")
+                print(f"[INFO] 자기 검색 top-1 일치율: {verify(new_index, vectors, ids):.0%}")
+
+            if dry_run:
+                print("[INFO] --dry-run: 파일을 변경하지 않았습니다")
+                return True
+
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            db_backup = persist_dir / f"{collection}.l2-backup-{stamp}.sqlite"
+            segment_backup = persist_dir / f"{collection}.l2-backup-{stamp}.segments"
+            store.backup(str(db_backup), str(segment_backup))
+            print(f"[INFO] 백업: {db_backup.name}, {segment_backup.name}/")
+
+            if new_index is None:
+                store.set_state(metric='cosine')
+            else:
+                index_type = index_factory.index_type_of(new_index)
+                max_segment = max(segment for _, segment, _ in chunks)
+                store.compact(faiss.serialize_index(new_index), vectors, ids, store.last_seq(), max_segment,
+                              metric='cosine', index_type=index_type,
+                              trained_size=len(ids) if index_type == 'ivfpq' else 0)
+                store.cleanup()
+    finally:
+        store.close()
+
+    print(f"[OK] {collection} → cosine 변환 완료 (서버를 재시작하세요)")
+    return True
+
+
+def migrate(persist_dir: Path, collection: str, dry_run: bool = False) -> bool:
+    if (persist_dir / f"{collection}.sqlite").exists():
+        return migrate_segments(persist_dir, collection, dry_run)
+
+    paths = collection_paths(persist_dir, collection)
+    if not paths['index'].exists() or not paths['metadata'].exists():
+        print(f"[ERROR] 컬렉션을 찾을 수 없습니다: {paths['index']}")
+        return False
+
+    index = faiss.read_index(str(paths['index']))
+    with open(paths['metadata'], 'rb') as f:
+        data = pickle.load(f)
+
+    index_type = index_factory.index_type_of(index)
+    metric = index_factory.metric_of(index)
+    print(f"[INFO] 컬렉션 {collection}: 문서 {len(data['documents'])}개, 인덱스 {index_type}, 거리 {metric}")
+    if metric == 'cosine':
+        print("[OK] 이미 cosine 컬렉션입니다 (변환 불필요)")
+        return True
+    if index.ntotal != len(data['documents']):
+        print(f"[ERROR] 인덱스 벡터 수({index.ntotal})와 문서 수({len(data['documents'])})가 다릅니다")
+        return False
+
+    # 청크 ID가 있는 컬렉션은 같은 ID로 다시 만듦
+    ids = data.get('ids') or None
+    vectors = index_factory.normalize(load_raw_vectors(index, data, paths['vectors']))
+    new_index = index_factory.build_index(index_type, index.d, vectors, 'cosine',
+                                          ids=np.array(ids, dtype='int64') if ids else None)
+    match_rate = verify(new_index, vectors, ids)
+    print(f"[INFO] 변환된 인덱스: {index_factory.describe(new_index)}")
+    print(f"[INFO] 자기 검색 top-1 일치율: {match_rate:.0%}")
+
+    if dry_run:
+        print("[INFO] --dry-run: 파일을 변경하지 않았습니다")
+        return True
+
+    for path in backup(paths):
+        print(f"[INFO] 백업: {path.name}")
+
+    data.update({
+        'metric': 'cosine',
+        'index_type': index_type,
+        'index_params': index_factory.describe(new_index),
+        'trained_size': len(vectors) if index_type == 'ivfpq' else 0,
+    })
+
+    def write_vectors(p):
+        with open(p, 'wb') as f:  # 경로로 넘기면 np.save가 .npy 확장자를 덧붙임
+            np.save(f, vectors)
+
+    def write_metadata(p):
+        with open(p, 'wb') as f:
+            pickle.dump(data, f)
+
+    write_atomic(paths['vectors'], write_vectors)
+    write_atomic(paths['index'], lambda p: faiss.write_index(new_index, p))
+    write_atomic(paths['metadata'], write_metadata)
+
+    print(f"[OK] {collection} → cosine 변환 완료 (서버를 재시작하세요)")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벡터 컬렉션 l2 → cosine 변환")
+    parser.add_argument("--collection", default="biohealth_docs")
+    parser.add_argument("--persist-dir", type=Path, default=default_persist_dir())
+    parser.add_argument("--dry-run", action="store_true", help="변환 결과만 확인하고 저장하지 않음")
+    args = parser.parse_args()
+
+    sys.exit(0 if migrate(args.persist_dir, args.collection, args.dry_run) else 1)
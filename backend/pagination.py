@@ -0,0 +1,240 @@
+"""
+목록 API 공통 페이지네이션 모듈
+전체 테이블을 `SELECT *`로 내려주던 목록 API에 다음 기능을 추가합니다.
+
+- limit / cursor: 정렬 키 기반 키셋(keyset) 페이지네이션 (OFFSET 미사용)
+- fields: 필요한 컬럼만 조회하는 필드 프로젝션 (예: fields=id,name,code)
+
+limit을 지정하지 않으면 기존과 동일하게 리스트 전체를 반환하고,
+지정하면 {"items", "next_cursor", "has_more", "limit"} 형태로 반환합니다.
+"""
+
+import base64
+import json
+import os
+import re
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pymysql
+from fastapi import HTTPException
+
+DEFAULT_MAX_LIMIT = int(os.getenv('PAGE_MAX_LIMIT', '500'))
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+_CURSOR_PREFIX = '_cursor_'
+
+
+def _encode_value(value: Any) -> Any:
+    """커서에 넣을 값을 JSON 직렬화 가능한 형태로 변환 (MySQL 비교 가능한 문자열)"""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        # pymysql은 TIME 컬럼을 timedelta로 반환
+        total = int(value.total_seconds())
+        return f"{total // 3600:02d}:{total % 3600 // 60:02d}:{total % 60:02d}"
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except Exception:
+        raise HTTPException(status_code=400, detail="잘못된 cursor 값입니다")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="잘못된 cursor 값입니다")
+    return values
+
+
+class Paginator:
+    """
+    목록 쿼리 하나에 대한 페이지네이션/프로젝션 설정
+
+    사용 예:
+        page = Paginator([('s.code', 'code'), ('s.id', 'id')], limit=limit, cursor=cursor,
+                         fields=fields, table_alias='s')
+        query = f"SELECT {page.select('s.*')} FROM students s WHERE 1=1"
+        ...필터 조건 추가...
+        query, params = page.apply(query, params)
+        rows, next_cursor = page.fetch(cursor, query, params)
+        ...후처리...
+        return page.response(rows, next_cursor)
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[Tuple[str, str]],
+        *,
+        descending: bool = False,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[str] = None,
+        table_alias: Optional[str] = None,
+        computed: Optional[Dict[str, str]] = None,
+        virtual: Optional[Dict[str, Sequence[str]]] = None,
+        required: Optional[Sequence[str]] = None,
+        nullable: Optional[Sequence[str]] = None,
+        max_limit: int = DEFAULT_MAX_LIMIT,
+    ):
+        """
+        Args:
+            keys: 정렬/커서 키 [(SQL 식, 이름), ...] - 마지막 키는 유일해야 함 (보통 id)
+            descending: 모든 키를 내림차순으로 정렬
+            limit: 페이지 크기 (None이면 페이지네이션 없이 전체 반환)
+            cursor: 이전 응답의 next_cursor
+            fields: 쉼표로 구분한 반환 필드 목록
+            table_alias: fields의 일반 컬럼을 조회할 기준 테이블 별칭
+            computed: 조인/계산 필드 이름 → SQL 식 (예: {'course_name': 'c.name'})
+            virtual: 파이썬에서 계산하는 필드 이름 → 계산에 필요한 필드 목록
+            required: fields와 관계없이 후처리(필터링 등)에 항상 필요한 필드 목록
+            nullable: NULL이 될 수 있는 정렬 키 이름 목록 (LEFT JOIN 컬럼 등)
+        """
+        self.keys = list(keys)
+        self.descending = descending
+        self.table_alias = table_alias
+        self.computed = computed or {}
+        self.virtual = virtual or {}
+        self.required = list(required or [])
+        self.nullable = set(nullable or [])
+
+        if limit is not None and not 1 <= limit <= max_limit:
+            raise HTTPException(status_code=400, detail=f"limit은 1~{max_limit} 사이여야 합니다")
+        if cursor and limit is None:
+            raise HTTPException(status_code=400, detail="cursor는 limit과 함께 사용해야 합니다")
+        self.limit = limit
+        self.cursor_values = decode_cursor(cursor, len(self.keys)) if cursor else None
+        self.fields = self._parse_fields(fields)
+
+    @property
+    def paginated(self) -> bool:
+        return self.limit is not None
+
+    def _parse_fields(self, fields: Optional[str]) -> Optional[List[str]]:
+        if not fields:
+            return None
+        names = []
+        for name in (f.strip() for f in fields.split(',')):
+            if not name:
+                continue
+            if not _IDENTIFIER.match(name):
+                raise HTTPException(status_code=400, detail=f"잘못된 필드 이름입니다: {name}")
+            if name not in names:
+                names.append(name)
+        return names or None
+
+    def _column_sql(self, name: str) -> str:
+        if name in self.computed:
+            return f"{self.computed[name]} AS {name}"
+        return f"{self.table_alias}.{name}" if self.table_alias else name
+
+    def select(self, default: str) -> str:
+        """SELECT 절 컬럼 목록 (fields가 없으면 default 그대로)"""
+        if self.fields:
+            columns = []
+            for name in self.required + self.fields:
+                for column in self.virtual.get(name, [name]):
+                    if column not in columns:
+                        columns.append(column)
+            select_sql = ", ".join(self._column_sql(c) for c in columns)
+        else:
+            select_sql = default
+        if self.paginated:
+            # 프로젝션과 무관하게 커서 값을 읽을 수 있도록 정렬 키를 별도 별칭으로 조회
+            select_sql += ", " + ", ".join(
+                f"{expr} AS {_CURSOR_PREFIX}{i}" for i, (expr, _) in enumerate(self.keys)
+            )
+        return select_sql
+
+    def _equal(self, expr: str, value: Any, params: List[Any]) -> str:
+        if value is None:
+            return f"{expr} IS NULL"
+        params.append(value)
+        return f"{expr} = %s"
+
+    def _after(self, expr: str, name: str, value: Any, params: List[Any]) -> Optional[str]:
+        """정렬 순서상 value 다음에 오는 행의 조건 (해당 행이 없으면 None)
+
+        MySQL은 NULL을 가장 작은 값으로 정렬합니다 (ASC: 맨 앞, DESC: 맨 뒤).
+        """
+        if value is None:
+            return None if self.descending else f"{expr} IS NOT NULL"
+        params.append(value)
+        if self.descending:
+            if name in self.nullable:
+                return f"({expr} < %s OR {expr} IS NULL)"
+            return f"{expr} < %s"
+        return f"{expr} > %s"
+
+    def apply(self, query: str, params: List[Any]) -> Tuple[str, List[Any]]:
+        """키셋 조건 + ORDER BY + LIMIT 추가 (query는 WHERE 절로 끝나야 함)"""
+        params = list(params)
+        if self.cursor_values is not None:
+            # (k1, k2, k3) > (v1, v2, v3) 를 인덱스를 탈 수 있는 OR 조건으로 전개
+            # NULL 키는 `= NULL` / `> NULL`이 항상 거짓이므로 IS NULL / IS NOT NULL로 비교
+            clauses = []
+            for i, (expr, name) in enumerate(self.keys):
+                clause_params: List[Any] = []
+                parts = [
+                    self._equal(prev, value, clause_params)
+                    for (prev, _), value in zip(self.keys[:i], self.cursor_values)
+                ]
+                after = self._after(expr, name, self.cursor_values[i], clause_params)
+                if after is None:
+                    continue
+                clauses.append("(" + " AND ".join(parts + [after]) + ")")
+                params.extend(clause_params)
+            query += " AND (" + (" OR ".join(clauses) if clauses else "1=0") + ")"
+
+        direction = "DESC" if self.descending else "ASC"
+        query += " ORDER BY " + ", ".join(f"{expr} {direction}" for expr, _ in self.keys)
+        if self.paginated:
+            # 다음 페이지 존재 여부 확인용으로 1개 더 조회
+            query += f" LIMIT {self.limit + 1}"
+        return query, params
+
+    def fetch(self, cursor, query: str, params: List[Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """쿼리 실행 후 (현재 페이지 행, next_cursor) 반환"""
+        try:
+            cursor.execute(query, params)
+        except pymysql.err.MySQLError as e:
+            # fields에 존재하지 않는 컬럼을 지정한 경우 (Unknown column)
+            if self.fields and e.args and e.args[0] == 1054:
+                raise HTTPException(status_code=400, detail=f"존재하지 않는 필드입니다: {e.args[1]}")
+            raise
+        rows = cursor.fetchall()
+
+        next_cursor = None
+        if self.paginated and len(rows) > self.limit:
+            rows = rows[:self.limit]
+            last = rows[-1]
+            next_cursor = encode_cursor([last[f"{_CURSOR_PREFIX}{i}"] for i in range(len(self.keys))])
+
+        if self.paginated:
+            for row in rows:
+                for i in range(len(self.keys)):
+                    row.pop(f"{_CURSOR_PREFIX}{i}", None)
+        return list(rows), next_cursor
+
+    def response(self, items: List[Dict[str, Any]], next_cursor: Optional[str] = None):
+        """fields에 맞춰 응답 필드를 정리하고, 페이지네이션 시 메타데이터를 붙여 반환"""
+        if self.fields:
+            items = [{name: item.get(name) for name in self.fields} for item in items]
+        if not self.paginated:
+            return items
+        return {
+            "items": items,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+            "limit": self.limit,
+        }
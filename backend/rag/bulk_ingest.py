@@ -0,0 +1,216 @@
+"""
+여러 문서 일괄 인덱싱
+폴더의 문서 여러 개를 한 번에 인덱싱합니다 (서버 API /api/rag/bulk-ingest, 명령 backend/ingest_documents.py).
+
+- 파일 내용 해시(sha256)로 중복 파일은 한 번만 파싱/임베딩 (나머지는 원본 인덱싱이 끝난 뒤
+  저장된 임베딩을 복사해 자기 청크로 저장, duplicate_of로 보고)
+- 이전에 같은 내용이 인덱싱된 파일은 파싱/임베딩 없이 저장된 임베딩 재사용 (벡터 스토어 매니페스트, linked_from)
+- 파싱/청킹은 워커 프로세스에서 동시에 (DocumentLoader.parse_files, RAG_INGEST_WORKERS)
+- 파싱이 끝난 파일의 청크는 하나의 임베딩 큐에 모아 RAG_STREAM_BATCH개씩 임베딩/저장
+  (작은 파일이 많아도 배치가 가득 차서 임베딩 처리량 유지, 임베딩하는 동안 다음 파일 파싱 계속)
+- 파일별 진행률은 indexing_progress와 같은 형식 {'status', 'progress', 'message'}으로 콜백
+- 파일 단위 교체: 파일의 청크를 모두 저장한 뒤 이전 인덱싱에서 남은 청크 삭제
+"""
+
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .document_loader import RAG_STREAM_BATCH, SUPPORTED_EXTENSIONS, DocumentLoader, file_sha256
+
+# 진행률 콜백: (출처 키, indexing_progress 항목)
+ProgressCallback = Callable[[str, Dict], None]
+
+
+class BulkIngestor:
+    """폴더 단위 일괄 인덱싱 (파싱 프로세스 풀 + 공유 임베딩 큐)"""
+
+    def __init__(self, vector_store_manager, document_loader: DocumentLoader,
+                 workers: Optional[int] = None, batch_size: int = RAG_STREAM_BATCH):
+        """
+        Args:
+            vector_store_manager: VectorStoreManager
+            document_loader: 청크 크기/겹침 설정을 워커에서도 그대로 사용
+            workers: 파싱 워커 프로세스 수 (None이면 RAG_INGEST_WORKERS)
+            batch_size: 임베딩/저장 배치 청크 수
+        """
+        self.vector_store = vector_store_manager
+        self.loader = document_loader
+        self.workers = workers
+        self.batch_size = batch_size
+
+    def ingest(self, files: List[Tuple[str, str, Dict]],
+               progress_callback: Optional[ProgressCallback] = None) -> Dict:
+        """
+        파일 여러 개 인덱싱
+
+        Args:
+            files: (파일 경로, 출처 키(저장된 파일명), 메타데이터) 리스트
+            progress_callback: 파일별 진행률 (출처 키, {'status', 'progress', 'message', ...})
+
+        Returns:
+            {'files', 'indexed', 'duplicates', 'reused', 'failed', 'chunks', 'elapsed_seconds', 'results': {출처: 상태}}
+            (reused: 파싱/임베딩 없이 매니페스트로 처리한 파일 수, indexed에도 포함)
+        """
+        started = time.perf_counter()
+        report = progress_callback or (lambda source, entry: None)
+        results: Dict[str, Dict] = {}
+
+        # 같은 실행 안의 중복 파일은 원본 인덱싱이 끝날 때까지 보류 (원본 출처 → [(파일 경로, 출처, 메타데이터)])
+        pending: Dict[str, List[Tuple[str, str, Dict]]] = {}
+
+        def link_copy(file_path: str, source: str, file_metadata: Dict, origin: str):
+            """원본의 저장된 임베딩을 복사해 중복 파일도 자기 청크를 갖도록 인덱싱"""
+            if results[origin]['status'] != 'completed':
+                finish(source, {"status": "error", "progress": 0, "duplicate_of": origin,
+                                "message": f"오류: 내용이 같은 {origin}의 인덱싱 실패"})
+                return
+            linked = self.vector_store.link_duplicate(source, file_metadata['content_hash'], chunk_params,
+                                                      self.loader.file_metadata(file_path, dict(file_metadata)))
+            if not linked:
+                finish(source, {"status": "error", "progress": 0, "duplicate_of": origin,
+                                "message": f"오류: {origin}의 임베딩 재사용 실패 (서버 로그 확인)"})
+                return
+            chunks = len(linked['document_ids'])
+            finish(source, {"status": "completed", "progress": 100, "chunks": chunks,
+                            "removed": linked['removed'], "duplicate_of": origin,
+                            "linked_from": linked['linked_from'],
+                            "message": f"✅ 중복 파일 ({origin}와 내용 동일, 임베딩 재사용 {chunks}개 청크)"})
+
+        def finish(source: str, entry: Dict):
+            results[source] = entry
+            report(source, entry)
+            for copy in pending.pop(source, []):
+                link_copy(*copy, source)
+
+        # 1. 내용 해시로 중복 제거 (같은 내용이면 먼저 나온 파일만 파싱/임베딩)
+        unique: List[Tuple[str, Dict]] = []
+        sources: Dict[str, str] = {}  # 파일 경로 → 출처 키
+        by_hash: Dict[str, str] = {}
+        hashes: Dict[str, str] = {}  # 출처 키 → 내용 해시
+        chunk_params = self.loader.chunk_params()
+        duplicates = 0
+        reused = 0
+        for file_path, source, metadata in files:
+            try:
+                digest = file_sha256(file_path)
+            except OSError as e:
+                finish(source, {"status": "error", "progress": 0, "message": f"오류: 파일을 읽을 수 없습니다 ({e})"})
+                continue
+            file_metadata = {**metadata, 'filename': source, 'content_hash': digest}
+            if digest in by_hash:
+                duplicates += 1
+                origin = by_hash[digest]
+                if origin in results:
+                    link_copy(file_path, source, file_metadata, origin)
+                else:
+                    pending.setdefault(origin, []).append((file_path, source, file_metadata))
+                    report(source, {"status": "queued", "progress": 0, "duplicate_of": origin,
+                                    "message": f"⏳ {origin}와 내용 동일 - 원본 인덱싱 대기 중..."})
+                continue
+            by_hash[digest] = source
+
+            # 이전에 같은 내용이 인덱싱되어 있으면 저장된 임베딩 재사용
+            linked = self.vector_store.link_duplicate(source, digest, chunk_params,
+                                                      self.loader.file_metadata(file_path, dict(file_metadata)))
+            if linked:
+                reused += 1
+                chunks = len(linked['document_ids'])
+                if linked['linked_from']:
+                    message = f"✅ 같은 내용이 이미 인덱싱됨 ({linked['linked_from']}, 임베딩 재사용 {chunks}개 청크)"
+                else:
+                    message = f"✅ 변경 없음 (이미 인덱싱됨, {chunks}개 청크)"
+                finish(source, {"status": "completed", "progress": 100, "chunks": chunks,
+                                "removed": linked['removed'], "linked_from": linked['linked_from'],
+                                "message": message})
+                continue
+
+            sources[file_path] = source
+            hashes[source] = digest
+            unique.append((file_path, file_metadata))
+            report(source, {"status": "queued", "progress": 0, "message": "⏳ 파싱 대기 중..."})
+
+        if unique or reused:
+            print(f"[INFO] 일괄 인덱싱: 파일 {len(unique)}개 (중복 {duplicates}개, 이미 인덱싱된 내용 {reused}개 제외)")
+
+        # 2. 파싱(프로세스 풀) → 공유 임베딩 큐
+        queue: List[Tuple[str, str, Dict]] = []  # (출처, 청크, 메타데이터)
+        state: Dict[str, Dict] = {}  # 출처 → {'total', 'done', 'ids'}
+
+        def flush(count: int):
+            batch, queue[:] = queue[:count], queue[count:]
+            ids = self.vector_store.add_documents([text for _, text, _ in batch],
+                                                  [metadata for _, _, metadata in batch])
+            failed = len(ids) != len(batch)
+            for position, (source, _, _) in enumerate(batch):
+                file_state = state[source]
+                if file_state.get('error'):
+                    continue
+                if failed:
+                    file_state['error'] = True
+                    finish(source, {"status": "error", "progress": 0, "message": "오류: 임베딩/저장 실패 (서버 로그 확인)"})
+                    continue
+                file_state['ids'].append(ids[position])
+                file_state['done'] += 1
+            for source in dict.fromkeys(source for source, _, _ in batch):
+                file_state = state[source]
+                if file_state.get('error'):
+                    continue
+                if file_state['done'] == file_state['total']:
+                    removed = self.vector_store.retain_source(source, file_state['ids'])
+                    self.vector_store.record_manifest(source, hashes[source], chunk_params, file_state['ids'])
+                    finish(source, {"status": "completed", "progress": 100, "chunks": file_state['total'],
+                                    "removed": removed,
+                                    "message": f"✅ 인덱싱 완료! ({file_state['total']}개 청크)"})
+                else:
+                    progress = 30 + int(file_state['done'] / file_state['total'] * 60)
+                    report(source, {"status": "embedding", "progress": progress,
+                                    "message": f"🧠 임베딩 생성 중... (청크 {file_state['done']}/{file_state['total']})"})
+
+        for file_path, parsed in self.loader.parse_files(unique, self.workers):
+            source = sources[file_path]
+            if isinstance(parsed, Exception):
+                finish(source, {"status": "error", "progress": 0, "message": f"오류: {parsed}"})
+                continue
+            if not parsed:
+                finish(source, {"status": "error", "progress": 0, "message": "텍스트 추출 실패"})
+                continue
+            state[source] = {'total': len(parsed), 'done': 0, 'ids': []}
+            report(source, {"status": "embedding", "progress": 30,
+                            "message": f"🧩 청킹 완료: {len(parsed)}개 조각, 임베딩 대기 중..."})
+            queue.extend((source, doc.page_content, doc.metadata) for doc in parsed)
+            while len(queue) >= self.batch_size:
+                flush(self.batch_size)
+        while queue:
+            flush(self.batch_size)
+
+        summary = {
+            'files': len(files),
+            'indexed': sum(1 for entry in results.values()
+                           if entry['status'] == 'completed' and 'duplicate_of' not in entry),
+            'duplicates': duplicates,
+            'reused': reused,
+            'failed': sum(1 for entry in results.values() if entry['status'] == 'error'),
+            'chunks': sum(entry.get('chunks', 0) for entry in results.values()),
+            'elapsed_seconds': round(time.perf_counter() - started, 2),
+            'results': results
+        }
+        print(f"[OK] 일괄 인덱싱 완료: {summary['indexed']}개 인덱싱 (재사용 {summary['reused']}개), "
+              f"중복 {summary['duplicates']}개, 실패 {summary['failed']}개, 청크 {summary['chunks']}개 "
+              f"({summary['elapsed_seconds']}초)")
+        return summary
+
+
+def collect_files(directory: str, metadata_for: Optional[Callable[[str], Dict]] = None) -> List[Tuple[str, str, Dict]]:
+    """
+    폴더의 지원 형식 문서 목록 - (파일 경로, 출처 키 = 파일명, 메타데이터) 리스트 (파일명 순서)
+
+    Args:
+        metadata_for: 파일 경로 → 메타데이터 (None이면 빈 메타데이터)
+    """
+    files = []
+    for filename in sorted(os.listdir(directory)):
+        file_path = os.path.join(directory, filename)
+        if os.path.isfile(file_path) and os.path.splitext(filename)[1].lower() in SUPPORTED_EXTENSIONS:
+            files.append((file_path, filename, metadata_for(file_path) if metadata_for else {}))
+    return files
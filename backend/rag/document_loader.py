@@ -1,10 +1,19 @@
 """
 문서 로더 모듈
 PDF, DOCX, TXT 파일을 로드하고 텍스트를 추출합니다.
+
+PDF는 페이지 단위로 추출하면서 바로 청킹하므로(iter_documents / iter_batches) 문서 전체 텍스트를
+메모리에 올리지 않습니다. 청크 메타데이터에는 시작/끝 페이지(page, page_end)가 들어갑니다.
+
+여러 파일은 parse_files()로 워커 프로세스(spawn, RAG_INGEST_WORKERS)에서 동시에 파싱/청킹합니다.
 """
 
+import hashlib
 import os
-from typing import List, Dict
+from bisect import bisect_right
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
 import PyPDF2
 import docx
@@ -20,6 +29,55 @@ try:
 except ImportError:
     from langchain.schema import Document
 
+# 스트리밍 인덱싱 시 한 번에 임베딩/저장하는 청크 수 (임베딩 워커 풀 기준 RAG_EMBED_PARALLEL_MIN과 같은 기본값)
+RAG_STREAM_BATCH = int(os.getenv('RAG_STREAM_BATCH', '256'))
+
+SUPPORTED_EXTENSIONS = ['.pdf', '.docx', '.doc', '.txt']
+HEAVY_EXTENSIONS = ('.pdf', '.docx', '.doc')  # 여러 파일 파싱 시 워커 프로세스로 보내는 형식
+
+# 여러 파일 파싱 워커 프로세스 수 (auto = CPU 코어 수 - 1, 최대 8 / 1이면 현재 프로세스에서 순서대로)
+RAG_INGEST_WORKERS = os.getenv('RAG_INGEST_WORKERS', 'auto').lower()
+
+# 페이지 추출/청킹 방식이 바뀌면 올림 (이전 방식으로 만든 청크는 내용 해시 매니페스트에서 재사용하지 않음)
+CHUNKER_VERSION = 1
+
+# (페이지 번호 또는 None, 페이지 텍스트)
+Page = Tuple[Optional[int], str]
+
+
+def file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    """파일 내용 해시 (sha256 hex, 블록 단위로 읽음)"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def resolve_ingest_workers(setting: str = RAG_INGEST_WORKERS) -> int:
+    """파싱 워커 프로세스 수 ('auto' = CPU 코어 수 - 1, 최대 8)"""
+    if setting == 'auto':
+        return max(1, min((os.cpu_count() or 1) - 1, 8))
+    try:
+        return max(1, int(setting))
+    except ValueError:
+        print(f"[WARN] RAG_INGEST_WORKERS 값이 올바르지 않아 1을 사용합니다: {setting}")
+        return 1
+
+
+# ==================== 파싱 워커 프로세스 ====================
+
+_worker_loader = None
+
+
+def _init_parse_worker(chunk_size: int, chunk_overlap: int):
+    global _worker_loader
+    _worker_loader = DocumentLoader(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def _parse_in_worker(file_path: str, metadata: Dict) -> List[Document]:
+    return list(_worker_loader.iter_documents(file_path, metadata))
+
 
 class DocumentLoader:
     """문서 로드 및 청킹 클래스"""
@@ -39,15 +97,22 @@ class DocumentLoader:
             separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
         )
     
+    def iter_pdf_pages(self, file_path: str) -> Iterator[Page]:
+        """PDF 페이지를 하나씩 추출 (페이지 번호는 1부터)"""
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            for page_number, page in enumerate(pdf_reader.pages, 1):
+                yield page_number, page.extract_text() or ""
+    
+    def count_pdf_pages(self, file_path: str) -> int:
+        """PDF 페이지 수 (텍스트 추출 없이)"""
+        with open(file_path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+    
     def load_pdf(self, file_path: str) -> str:
         """PDF 파일에서 텍스트 추출"""
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                return text.strip()
+            return "\n".join(text for _, text in self.iter_pdf_pages(file_path)).strip()
         except Exception as e:
             print(f"[ERROR] PDF 로드 실패: {file_path}, 오류: {e}")
             return ""
@@ -71,84 +136,249 @@ class DocumentLoader:
             print(f"[ERROR] TXT 로드 실패: {file_path}, 오류: {e}")
             return ""
     
-    def load_document(self, file_path: str, metadata: Dict = None) -> List[Document]:
+    def iter_pages(self, file_path: str) -> Iterator[Page]:
         """
-        파일 확장자에 따라 적절한 로더로 문서 로드 후 청킹
+        파일 형식에 맞게 텍스트를 페이지 단위로 추출 (PDF만 페이지 번호, DOCX/TXT는 통째로 1개)
         
-        Args:
-            file_path: 파일 경로
-            metadata: 메타데이터 (예: {"source": "강의록", "date": "2024-01-01"})
-            
-        Returns:
-            청크로 나뉜 Document 리스트
+        지원하지 않는 형식이면 ValueError
         """
         file_ext = Path(file_path).suffix.lower()
-        
-        # 파일 타입에 따라 텍스트 추출
         if file_ext == '.pdf':
-            text = self.load_pdf(file_path)
+            yield from self.iter_pdf_pages(file_path)
         elif file_ext in ['.docx', '.doc']:
-            text = self.load_docx(file_path)
+            yield None, self.load_docx(file_path)
         elif file_ext == '.txt':
-            text = self.load_txt(file_path)
+            yield None, self.load_txt(file_path)
         else:
-            print(f"[WARN] 지원하지 않는 파일 형식: {file_ext}")
-            return []
+            raise ValueError(f"지원하지 않는 파일 형식: {file_ext}")
+    
+    def split_pages(self, pages: Iterator[Page]) -> Iterator[Tuple[str, Optional[int], Optional[int]]]:
+        """
+        페이지를 순서대로 받아 청크로 분할 - (청크, 시작 페이지, 끝 페이지)
         
-        if not text:
-            print(f"[WARN] 빈 문서: {file_path}")
-            return []
+        마지막 청크는 다음 페이지로 이어질 수 있으므로 다음 페이지와 합쳐 다시 분할합니다.
+        버퍼는 (남은 청크 1개 + 현재 페이지)만 유지하므로 메모리는 문서 길이와 무관합니다.
+        """
+        carry = ""
+        breaks: List[Tuple[int, Optional[int]]] = []  # carry 안의 (시작 위치, 페이지 번호)
         
-        # 메타데이터 설정
-        if metadata is None:
-            metadata = {}
+        for page_number, text in pages:
+            text = (text or "").strip()
+            if not text:
+                continue
+            if carry:
+                buffer = carry + "\n" + text
+                buffer_breaks = breaks + [(len(carry) + 1, page_number)]
+            else:
+                buffer = text
+                buffer_breaks = [(0, page_number)]
+            offsets = [offset for offset, _ in buffer_breaks]
+            
+            def page_at(position: int) -> Optional[int]:
+                return buffer_breaks[max(0, bisect_right(offsets, position) - 1)][1]
+            
+            chunks = self.text_splitter.split_text(buffer)
+            cursor = 0
+            located = []
+            for chunk in chunks:
+                start = buffer.find(chunk, cursor)
+                if start < 0:
+                    start = cursor
+                located.append((chunk, start))
+                cursor = start + 1
+            
+            for chunk, start in located[:-1]:
+                yield chunk, page_at(start), page_at(start + len(chunk) - 1)
+            
+            if located:
+                # 마지막 청크는 다음 페이지와 합쳐 다시 분할
+                carry, start = located[-1]
+                breaks = [(max(0, offset - start), page) for offset, page in buffer_breaks
+                          if offset < start + len(carry)]
+                breaks = [(0, page_at(start))] + [b for b in breaks if b[0] > 0]
+            else:
+                carry, breaks = "", []
         
-        metadata.update({
+        if carry:
+            yield carry, breaks[0][1], breaks[-1][1]
+    
+    def chunk_params(self) -> Dict:
+        """청크 결과를 정하는 설정 (내용 해시 매니페스트에 함께 기록 - 다르면 재사용하지 않음)"""
+        return {'chunk_size': self.chunk_size, 'chunk_overlap': self.chunk_overlap, 'version': CHUNKER_VERSION}
+    
+    @staticmethod
+    def file_metadata(file_path: str, metadata: Dict = None) -> Dict:
+        """청크 공통 메타데이터 (metadata + source, file_path, file_type - metadata를 직접 갱신)"""
+        base_metadata = metadata if metadata is not None else {}
+        base_metadata.update({
             'source': os.path.basename(file_path),
             'file_path': file_path,
-            'file_type': file_ext
+            'file_type': Path(file_path).suffix.lower()
         })
+        return base_metadata
+    
+    def iter_documents(self, file_path: str, metadata: Dict = None) -> Iterator[Document]:
+        """
+        문서를 페이지 단위로 추출하면서 청크 Document를 하나씩 생성 (전체 텍스트를 메모리에 두지 않음)
         
-        # 텍스트를 청크로 분할
-        chunks = self.text_splitter.split_text(text)
+        청크 메타데이터: 공통 메타데이터 + chunk_id, page/page_end(PDF), total_pages(PDF)
+        """
+        file_ext = Path(file_path).suffix.lower()
+        base_metadata = self.file_metadata(file_path, metadata)
+        if file_ext == '.pdf':
+            base_metadata['total_pages'] = self.count_pdf_pages(file_path)
         
-        # Document 객체로 변환
-        documents = []
-        for i, chunk in enumerate(chunks):
-            chunk_metadata = metadata.copy()
+        for i, (chunk, page, page_end) in enumerate(self.split_pages(self.iter_pages(file_path))):
+            chunk_metadata = base_metadata.copy()
             chunk_metadata['chunk_id'] = i
-            chunk_metadata['total_chunks'] = len(chunks)
+            if page is not None:
+                chunk_metadata['page'] = page
+                chunk_metadata['page_end'] = page_end
+            yield Document(page_content=chunk, metadata=chunk_metadata)
+    
+    def iter_batches(self, file_path: str, metadata: Dict = None,
+                     batch_size: int = RAG_STREAM_BATCH) -> Iterator[Tuple[List[Document], float]]:
+        """
+        청크를 batch_size개씩 묶어 생성 - (Document 리스트, 처리한 페이지 비율 0~1)
+        
+        임베딩/저장을 배치마다 바로 하면 최대 메모리가 배치 1개 분량으로 유지됩니다.
+        """
+        batch: List[Document] = []
+        total_pages = None
+        for doc in self.iter_documents(file_path, metadata):
+            batch.append(doc)
+            total_pages = doc.metadata.get('total_pages')
+            if len(batch) >= batch_size:
+                fraction = doc.metadata['page_end'] / total_pages if total_pages else 0.0
+                yield batch, min(1.0, fraction)
+                batch = []
+        if batch:
+            yield batch, 1.0
+    
+    def load_document(self, file_path: str, metadata: Dict = None) -> List[Document]:
+        """
+        파일 확장자에 따라 적절한 로더로 문서 로드 후 청킹
+        
+        Args:
+            file_path: 파일 경로
+            metadata: 메타데이터 (예: {"source": "강의록", "date": "2024-01-01"})
             
-            doc = Document(
-                page_content=chunk,
-                metadata=chunk_metadata
-            )
-            documents.append(doc)
+        Returns:
+            청크로 나뉜 Document 리스트 (큰 문서는 iter_batches 사용)
+        """
+        file_ext = Path(file_path).suffix.lower()
+        if file_ext not in SUPPORTED_EXTENSIONS:
+            print(f"[WARN] 지원하지 않는 파일 형식: {file_ext}")
+            return []
+        
+        try:
+            documents = list(self.iter_documents(file_path, metadata))
+        except Exception as e:
+            print(f"[ERROR] 문서 로드 실패: {file_path}, 오류: {e}")
+            return []
+        
+        if not documents:
+            print(f"[WARN] 빈 문서: {file_path}")
+            return []
+        
+        for doc in documents:
+            doc.metadata['total_chunks'] = len(documents)
         
         print(f"[OK] 문서 로드 완료: {os.path.basename(file_path)} ({len(documents)}개 청크)")
         return documents
     
-    def load_directory(self, directory_path: str, metadata: Dict = None) -> List[Document]:
+    def parse_files(self, files: List[Tuple[str, Dict]],
+                    workers: Optional[int] = None) -> Iterator[Tuple[str, object]]:
+        """
+        여러 파일을 워커 프로세스에서 동시에 파싱/청킹 - 끝나는 순서대로 (파일 경로, Document 리스트 또는 예외)
+        
+        PDF/DOCX만 워커로 보내고, 결과를 받아 가는 속도보다 파싱이 빠르면 메모리가 늘지 않도록
+        동시에 처리 중인 파일을 워커 수의 2배로 제한합니다. 워커 풀이 깨지면 남은 파일은 현재 프로세스에서 순서대로 파싱합니다.
+        
+        Args:
+            files: (파일 경로, 메타데이터) 리스트
+            workers: 워커 프로세스 수 (None이면 RAG_INGEST_WORKERS)
+        """
+        # TXT는 파싱 비용이 거의 없으므로 워커에 보내지 않고 풀이 PDF/DOCX를 처리하는 동안 현재 프로세스에서
+        heavy = [entry for entry in files if Path(entry[0]).suffix.lower() in HEAVY_EXTENSIONS]
+        light = [entry for entry in files if Path(entry[0]).suffix.lower() not in HEAVY_EXTENSIONS]
+        workers = min(workers or resolve_ingest_workers(), len(heavy))
+        remaining = list(files)
+        
+        if workers > 1:
+            import multiprocessing
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_parse_worker,
+                                       initargs=(self.chunk_size, self.chunk_overlap))
+            running = {}
+            try:
+                while heavy or light or running:
+                    while heavy and len(running) < workers * 2:
+                        file_path, metadata = heavy[0]
+                        running[pool.submit(_parse_in_worker, file_path, dict(metadata or {}))] = heavy.pop(0)
+                    if light:
+                        file_path, metadata = light.pop(0)
+                        yield file_path, self._parse(file_path, metadata)
+                        done = [future for future in running if future.done()]
+                    else:
+                        done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        error = future.exception()
+                        if isinstance(error, BrokenProcessPool):
+                            raise error
+                        file_path, _ = running.pop(future)
+                        yield file_path, error or future.result()
+                return
+            except BrokenProcessPool as e:
+                # 워커 프로세스 시작 실패/비정상 종료 - 처리 중이던 파일부터 현재 프로세스에서
+                print(f"[WARN] 파싱 워커 풀 사용 불가, 현재 프로세스에서 파싱합니다: {e}")
+                remaining = list(running.values()) + heavy + light
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+        
+        for file_path, metadata in remaining:
+            yield file_path, self._parse(file_path, metadata)
+    
+    def _parse(self, file_path: str, metadata: Optional[Dict]):
+        """파일 1개 청킹 (Document 리스트 또는 예외)"""
+        try:
+            return list(self.iter_documents(file_path, dict(metadata or {})))
+        except Exception as e:
+            return e
+    
+    def load_directory(self, directory_path: str, metadata: Dict = None,
+                       workers: Optional[int] = None) -> List[Document]:
         """
-        디렉토리 내 모든 문서 로드
+        디렉토리 내 모든 문서 로드 (파일별 파싱은 워커 프로세스에서 동시에)
         
         Args:
             directory_path: 디렉토리 경로
             metadata: 공통 메타데이터
+            workers: 파싱 워커 프로세스 수 (None이면 RAG_INGEST_WORKERS)
             
         Returns:
-            모든 문서의 청크 리스트
+            모든 문서의 청크 리스트 (파일명 순서)
         """
-        all_documents = []
-        
-        for filename in os.listdir(directory_path):
+        files = []
+        for filename in sorted(os.listdir(directory_path)):
             file_path = os.path.join(directory_path, filename)
-            
-            if os.path.isfile(file_path):
-                file_ext = Path(file_path).suffix.lower()
-                if file_ext in ['.pdf', '.docx', '.doc', '.txt']:
-                    docs = self.load_document(file_path, metadata)
-                    all_documents.extend(docs)
+            if os.path.isfile(file_path) and Path(file_path).suffix.lower() in SUPPORTED_EXTENSIONS:
+                files.append((file_path, metadata))
+        
+        parsed = {}
+        for file_path, result in self.parse_files(files, workers):
+            if isinstance(result, Exception):
+                print(f"[ERROR] 문서 로드 실패: {file_path}, 오류: {result}")
+                continue
+            print(f"[OK] 문서 로드 완료: {os.path.basename(file_path)} ({len(result)}개 청크)")
+            parsed[file_path] = result
+        
+        all_documents = []
+        for file_path, _ in files:
+            documents = parsed.get(file_path, [])
+            for doc in documents:
+                doc.metadata['total_chunks'] = len(documents)
+            all_documents.extend(documents)
         
         print(f"[DOC] 디렉토리 로드 완료: {len(all_documents)}개 청크")
         return all_documents
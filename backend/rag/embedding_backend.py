@@ -0,0 +1,146 @@
+"""
+임베딩 모델 백엔드
+같은 모델(ko-sroberta-multitask)을 PyTorch 또는 ONNX Runtime으로 실행합니다.
+
+RAG_EMBED_BACKEND
+    torch     : sentence-transformers (PyTorch fp32, 기본값)
+    onnx      : ONNX Runtime fp32
+    onnx-int8 : ONNX Runtime + 동적 int8 양자화 (메모리/속도 최우선, 코사인 0.98 이상 일치)
+
+ONNX 모델은 backend/export_embedding_onnx.py로 미리 변환합니다
+(RAG_ONNX_DIR, 기본 backend/model_cache/onnx/<모델>/model.onnx, model_int8.onnx, tokenizer.json, embedding_config.json).
+onnx 백엔드는 torch/sentence-transformers를 import하지 않으므로 워커당 메모리와 시작 시간이 줄어듭니다.
+변환 파일이 없거나 onnxruntime이 설치되지 않았으면 torch로 대체합니다.
+
+두 백엔드 모두 SentenceTransformer와 같은 encode()/get_sentence_embedding_dimension()을 제공합니다.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+
+RAG_EMBED_BACKEND = os.getenv('RAG_EMBED_BACKEND', 'torch').lower()
+# 서버 실행 위치와 관계없이 같은 경로를 쓰도록 절대 경로
+RAG_ONNX_DIR = os.getenv('RAG_ONNX_DIR', str(Path(__file__).resolve().parent.parent / 'model_cache' / 'onnx'))
+
+BACKENDS = ('torch', 'onnx', 'onnx-int8')
+ONNX_FILES = {'onnx': 'model.onnx', 'onnx-int8': 'model_int8.onnx'}
+CONFIG_FILE = 'embedding_config.json'
+TOKENIZER_FILE = 'tokenizer.json'
+
+
+def onnx_directory(model_name: str, root: str = RAG_ONNX_DIR) -> Path:
+    """변환된 ONNX 모델 디렉토리"""
+    return Path(root) / model_name.replace('/', '__')
+
+
+def pool(token_embeddings: np.ndarray, attention_mask: np.ndarray, mode: str) -> np.ndarray:
+    """토큰 임베딩 → 문장 임베딩 (sentence-transformers Pooling과 같은 계산)"""
+    if mode == 'cls':
+        return token_embeddings[:, 0]
+    mask = attention_mask[..., None].astype(token_embeddings.dtype)
+    if mode == 'max':
+        return np.where(mask > 0, token_embeddings, -1e9).max(axis=1)
+    return (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+class OnnxEmbeddingModel:
+    """ONNX Runtime 임베딩 모델 (토크나이저: tokenizers, 풀링/정규화: numpy)"""
+
+    def __init__(self, directory: Union[str, Path], backend: str = 'onnx', threads: Optional[int] = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        directory = Path(directory)
+        self.backend = backend
+        config = json.loads((directory / CONFIG_FILE).read_text(encoding='utf-8'))
+        self.model_name = config['model_name']
+        self.max_seq_length = config['max_seq_length']
+        self.pooling = config['pooling']
+        self.normalize = config['normalize']
+        self.dimension = config['dimension']
+
+        self.tokenizer = Tokenizer.from_file(str(directory / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(self.max_seq_length)
+        self.tokenizer.enable_padding(pad_id=config['pad_token_id'], pad_token=config['pad_token'])
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(directory / ONNX_FILES[backend]), options,
+                                            providers=['CPUExecutionProvider'])
+        self._inputs = {model_input.name for model_input in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        """문장 임베딩 (float32, 문자열 1개면 1차원)"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        parts = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            input_ids = np.array([encoding.ids for encoding in encodings], dtype='int64')
+            attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype='int64')
+            feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+            if 'token_type_ids' in self._inputs:
+                feeds['token_type_ids'] = np.zeros_like(input_ids)
+            token_embeddings = self.session.run(None, feeds)[0]
+            parts.append(pool(token_embeddings, attention_mask, self.pooling))
+        if parts:
+            embeddings = np.vstack(parts).astype('float32')
+        else:
+            embeddings = np.zeros((0, self.dimension), dtype='float32')
+        if self.normalize:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+
+def load_embedding_model(model_name: str, cache_folder: str, backend: Optional[str] = None,
+                         threads: Optional[int] = None):
+    """
+    RAG_EMBED_BACKEND에 맞는 임베딩 모델 로드 (실제로 사용한 백엔드는 backend_of()로 확인)
+
+    Args:
+        threads: ONNX Runtime 스레드 수 (None이면 기본값 = CPU 코어 수)
+    """
+    backend = (backend or RAG_EMBED_BACKEND).lower()
+    if backend not in BACKENDS:
+        print(f"[WARN] 지원하지 않는 RAG_EMBED_BACKEND '{backend}', torch를 사용합니다 ({', '.join(BACKENDS)})")
+        backend = 'torch'
+
+    if backend != 'torch':
+        directory = onnx_directory(model_name)
+        if not (directory / ONNX_FILES[backend]).exists():
+            print(f"[WARN] 변환된 ONNX 모델이 없어 torch를 사용합니다: {directory / ONNX_FILES[backend]}")
+            print("   python backend/export_embedding_onnx.py 로 변환하세요")
+        else:
+            try:
+                model = OnnxEmbeddingModel(directory, backend, threads)
+                print(f"[OK] ONNX 임베딩 모델 로드 ({backend}): {directory}")
+                return model
+            except ImportError as e:
+                print(f"[WARN] onnxruntime/tokenizers가 없어 torch를 사용합니다: {e}")
+                print("   pip install onnxruntime tokenizers")
+            except Exception as e:
+                print(f"[WARN] ONNX 임베딩 모델 로드 실패, torch를 사용합니다: {e}")
+
+    from sentence_transformers import SentenceTransformer
+    if threads:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+    return SentenceTransformer(model_name, cache_folder=cache_folder)
+
+
+def backend_of(model) -> str:
+    """모델의 실제 백엔드 ('torch' | 'onnx' | 'onnx-int8')"""
+    return getattr(model, 'backend', 'torch') if isinstance(model, OnnxEmbeddingModel) else 'torch'
@@ -0,0 +1,236 @@
+"""
+문서 임베딩 파이프라인
+문서 인덱싱 시 청크 임베딩을 배치 크기 자동 조정 + (선택) 멀티 프로세스로 생성하고 청크 단위로 진행률을 보고합니다.
+
+- 길이순 정렬 후 배치 구성 (패딩 낭비 감소), 결과는 입력 순서로 복원
+- 배치 크기 (RAG_EMBED_BATCH)
+    auto : 처리량(글자/초)이 좋아지는 동안 두 배로 늘리고, 배치 1개가 RAG_EMBED_TARGET_SECONDS를
+           넘으면 절반으로 줄임 (진행률 갱신 간격 유지). 조정 결과는 다음 문서에도 사용
+    숫자 : 고정 배치 크기
+- 프로세스 풀 (RAG_EMBED_WORKERS, 기본 1 = 현재 프로세스에서 인코딩)
+    2 이상 또는 auto(CPU 코어 수 - 1, 최대 4)이면 청크가 RAG_EMBED_PARALLEL_MIN개 이상일 때
+    워커 프로세스(spawn)마다 모델을 로드해 배치를 나눠 인코딩 (워커당 모델 메모리 약 0.5GB)
+    풀 오류 시 현재 프로세스 인코딩으로 대체
+    ※ spawn 방식이므로 서버는 `uvicorn main:app`으로 실행 (main.py 직접 실행 시 워커가 main.py를 다시 import)
+"""
+
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from .embedding_backend import backend_of, load_embedding_model
+
+RAG_EMBED_BATCH = os.getenv('RAG_EMBED_BATCH', 'auto').lower()
+RAG_EMBED_WORKERS = os.getenv('RAG_EMBED_WORKERS', '1').lower()
+RAG_EMBED_PARALLEL_MIN = int(os.getenv('RAG_EMBED_PARALLEL_MIN', '256'))
+RAG_EMBED_TARGET_SECONDS = float(os.getenv('RAG_EMBED_TARGET_SECONDS', '2.0'))
+
+INITIAL_BATCH = 16
+MIN_BATCH = 4
+MAX_BATCH = 256
+GROWTH_THRESHOLD = 1.05  # 처리량이 5% 이상 좋아질 때만 배치를 계속 늘림
+
+# 현재 프로세스 인코딩으로 대체할 풀 오류 (워커 비정상 종료, 프로세스 생성 실패, 직렬화 실패)
+POOL_ERRORS = (BrokenProcessPool, OSError, pickle.PicklingError)
+
+# 진행률 콜백: (완료 청크 수, 전체 청크 수)
+ProgressCallback = Callable[[int, int], None]
+
+
+def resolve_workers(setting: str = RAG_EMBED_WORKERS) -> int:
+    """워커 프로세스 수 ('auto' = CPU 코어 수 - 1, 최대 4)"""
+    if setting == 'auto':
+        return max(1, min((os.cpu_count() or 1) - 1, 4))
+    try:
+        return max(1, int(setting))
+    except ValueError:
+        print(f"[WARN] RAG_EMBED_WORKERS 값이 올바르지 않아 1을 사용합니다: {setting}")
+        return 1
+
+
+def resolve_batch_size(setting: str = RAG_EMBED_BATCH) -> Optional[int]:
+    """고정 배치 크기 (auto면 None)"""
+    if setting == 'auto':
+        return None
+    try:
+        return max(1, int(setting))
+    except ValueError:
+        print(f"[WARN] RAG_EMBED_BATCH 값이 올바르지 않아 auto를 사용합니다: {setting}")
+        return None
+
+
+class AdaptiveBatchSize:
+    """처리량 기준 배치 크기 조정 (고정 크기가 지정되면 그대로 사용)"""
+
+    def __init__(self, fixed: Optional[int] = None, initial: int = INITIAL_BATCH,
+                 target_seconds: float = RAG_EMBED_TARGET_SECONDS):
+        self.fixed = fixed
+        self.size = fixed or initial
+        self.target_seconds = target_seconds
+        self._growing = fixed is None
+        self._best = 0.0  # 지금까지 가장 좋은 처리량 (글자/초)
+
+    def record(self, batch: int, chars: int, seconds: float):
+        """가득 찬 배치 1개의 처리 결과로 다음 배치 크기 결정"""
+        if self.fixed or batch < self.size or seconds <= 0:
+            return
+        throughput = chars / seconds
+        if seconds > self.target_seconds and self.size > MIN_BATCH:
+            # 배치 1개가 너무 오래 걸리면 진행률 갱신이 끊기므로 줄임
+            self.size = max(MIN_BATCH, self.size // 2)
+            self._growing = False
+        elif self._growing:
+            if throughput > self._best * GROWTH_THRESHOLD and self.size < MAX_BATCH:
+                self._best = throughput
+                self.size = min(MAX_BATCH, self.size * 2)
+            else:
+                # 더 늘려도 빨라지지 않음 → 이전 크기로 고정
+                if throughput <= self._best * GROWTH_THRESHOLD:
+                    self.size = max(MIN_BATCH, self.size // 2)
+                self._growing = False
+
+
+# ==================== 워커 프로세스 ====================
+
+_worker_model = None
+
+
+def _init_worker(model_name: str, cache_folder: Optional[str], backend: str, threads: int):
+    """워커 프로세스 초기화 - 부모와 같은 백엔드로 모델 1회 로드, 코어를 워커끼리 나눠 쓰도록 스레드 수 제한"""
+    global _worker_model
+    _worker_model = load_embedding_model(model_name, cache_folder, backend=backend, threads=threads)
+
+
+def _worker_encode(texts: List[str], batch_size: int) -> np.ndarray:
+    return _worker_model.encode(texts, batch_size=batch_size, show_progress_bar=False,
+                                convert_to_numpy=True).astype('float32')
+
+
+class EmbeddingPipeline:
+    """문서 청크 임베딩 (배치 크기 자동 조정 + 선택적 프로세스 풀)"""
+
+    def __init__(self, model, model_name: str, cache_folder: Optional[str] = None,
+                 batch_size: Optional[int] = None, workers: Optional[int] = None,
+                 parallel_min: int = RAG_EMBED_PARALLEL_MIN):
+        """
+        Args:
+            model: 현재 프로세스의 임베딩 모델 (쿼리/작은 문서용, embedding_backend.load_embedding_model)
+            model_name, cache_folder: 워커 프로세스에서 모델을 로드할 때 사용
+            batch_size: 고정 배치 크기 (None이면 RAG_EMBED_BATCH)
+            workers: 워커 프로세스 수 (None이면 RAG_EMBED_WORKERS)
+        """
+        self.model = model
+        self.model_name = model_name
+        self.cache_folder = cache_folder
+        self.workers = workers or resolve_workers()
+        self.parallel_min = parallel_min
+        self.batch = AdaptiveBatchSize(batch_size or resolve_batch_size())
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_failed = False
+        self._pool_lock = threading.Lock()
+
+    def encode(self, texts: List[str], progress_callback: Optional[ProgressCallback] = None) -> np.ndarray:
+        """
+        청크 임베딩 (입력 순서, float32, 정규화 전)
+
+        progress_callback(완료 청크 수, 전체 청크 수)는 배치가 끝날 때마다 호출됩니다.
+        """
+        if not texts:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype='float32')
+        # 길이순 정렬 (비슷한 길이끼리 배치 → 패딩 감소)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        ordered = [texts[i] for i in order]
+
+        embeddings = None
+        if self.workers > 1 and len(texts) >= self.parallel_min and not self._pool_failed:
+            embeddings = self._encode_parallel(ordered, progress_callback)
+        if embeddings is None:
+            embeddings = self._encode_local(ordered, progress_callback)
+
+        result = np.empty_like(embeddings)
+        result[order] = embeddings
+        return result
+
+    def _encode_local(self, texts: List[str], progress_callback: Optional[ProgressCallback]) -> np.ndarray:
+        parts = []
+        done = 0
+        while done < len(texts):
+            size = self.batch.size
+            batch = texts[done:done + size]
+            start = time.perf_counter()
+            parts.append(self.model.encode(batch, batch_size=len(batch), show_progress_bar=False,
+                                           convert_to_numpy=True).astype('float32'))
+            self.batch.record(len(batch), sum(len(text) for text in batch), time.perf_counter() - start)
+            done += len(batch)
+            if progress_callback:
+                progress_callback(done, len(texts))
+        return np.vstack(parts)
+
+    def _encode_parallel(self, texts: List[str],
+                         progress_callback: Optional[ProgressCallback]) -> Optional[np.ndarray]:
+        """워커 프로세스에 배치를 나눠 인코딩 (실패 시 None → 현재 프로세스에서 인코딩)"""
+        # 워커마다 여러 배치를 받도록 나눠 진행률이 자주 갱신되게 함
+        size = max(MIN_BATCH, min(self.batch.size, -(-len(texts) // (self.workers * 4))))
+        try:
+            pool = self._get_pool()
+            futures = {pool.submit(_worker_encode, texts[i:i + size], size): i
+                       for i in range(0, len(texts), size)}
+        except POOL_ERRORS as e:
+            return self._disable_pool(e)
+        parts = {}
+        done = 0
+        try:
+            for future in as_completed(futures):
+                start = futures[future]
+                try:
+                    parts[start] = future.result()
+                except POOL_ERRORS as e:
+                    return self._disable_pool(e)
+                done += len(parts[start])
+                # 콜백 예외(작업 취소 등)는 풀 오류가 아니므로 그대로 전달
+                if progress_callback:
+                    progress_callback(done, len(texts))
+        finally:
+            # 중단된 경우 아직 시작하지 않은 배치 취소 (풀은 계속 사용)
+            for future in futures:
+                future.cancel()
+        return np.vstack([parts[start] for start in sorted(parts)])
+
+    def _disable_pool(self, error: BaseException) -> None:
+        """풀 오류 - 이후에는 현재 프로세스에서 인코딩"""
+        print(f"[WARN] 임베딩 워커 풀 사용 불가, 현재 프로세스에서 인코딩합니다: {error}")
+        self._pool_failed = True
+        self.close()
+        return None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                import multiprocessing
+                threads = max(1, (os.cpu_count() or 1) // self.workers)
+                print(f"[INFO] 임베딩 워커 프로세스 {self.workers}개 시작 (워커당 스레드 {threads}개)")
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.model_name, self.cache_folder, backend_of(self.model), threads)
+                )
+            return self._pool
+
+    def close(self):
+        """워커 프로세스 종료"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def info(self):
+        return {'batch_size': self.batch.size, 'batch_mode': 'fixed' if self.batch.fixed else 'auto',
+                'workers': self.workers, 'parallel_min': self.parallel_min,
+                'pool_running': self._pool is not None, 'pool_failed': self._pool_failed}
@@ -0,0 +1,300 @@
+"""
+FAISS 인덱스 팩토리
+코퍼스 크기에 맞는 인덱스 종류를 고르고, 생성/학습/검색 파라미터 설정을 담당합니다.
+
+인덱스 종류:
+- flat  : IndexFlatL2 - 전수 검색 (정확, 작은 코퍼스에 적합)
+- hnsw  : IndexHNSWFlat - 그래프 기반 근사 검색 (학습 불필요, 점진적 추가 가능)
+- ivfpq : IndexIVFPQ - 역파일 + 곱 양자화 (학습 필요, 벡터를 압축하여 대형 코퍼스에 적합)
+- auto  : 문서 수에 따라 flat → hnsw → ivfpq 자동 선택 (기본값)
+
+청크 ID(ids)를 지정하면 검색 결과가 행 번호 대신 해당 ID로 반환됩니다.
+flat/hnsw는 IndexIDMap2로 감싸고, ivfpq는 자체 ID 지원(add_with_ids)을 사용합니다.
+삭제(remove_ids)는 flat/ivfpq만 지원하며, hnsw는 남은 벡터로 다시 만들어야 합니다.
+
+거리 척도(metric):
+- cosine: 임베딩을 L2 정규화하고 내적(inner product) 인덱스 사용 → 점수 = 코사인 유사도 (-1~1)
+- l2    : 기존 방식, 점수 = 1 / (1 + L2 거리) (이전 버전 컬렉션)
+
+환경 변수:
+    RAG_INDEX_TYPE=auto
+    RAG_METRIC=cosine              # 새 컬렉션의 거리 척도 (기존 l2 컬렉션은 migrate_vector_cosine.py로 변환)
+    RAG_HNSW_THRESHOLD=20000       # auto: 이 문서 수 이상이면 hnsw
+    RAG_IVFPQ_THRESHOLD=500000     # auto: 이 문서 수 이상이면 ivfpq
+    RAG_HNSW_M=32 / RAG_HNSW_EF_CONSTRUCTION=80 / RAG_HNSW_EF_SEARCH=64
+    RAG_IVF_NPROBE=16 / RAG_PQ_M=48
+    RAG_IVFPQ_RERANK=8             # ivfpq: k의 이 배수만큼 후보를 찾아 원본 벡터로 정확한 거리 재정렬
+"""
+
+import math
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ('flat', 'hnsw', 'ivfpq')
+METRICS = ('cosine', 'l2')
+
+RAG_INDEX_TYPE = os.getenv('RAG_INDEX_TYPE', 'auto').lower()
+RAG_METRIC = os.getenv('RAG_METRIC', 'cosine').lower()
+RAG_HNSW_THRESHOLD = int(os.getenv('RAG_HNSW_THRESHOLD', '20000'))
+RAG_IVFPQ_THRESHOLD = int(os.getenv('RAG_IVFPQ_THRESHOLD', '500000'))
+
+HNSW_M = int(os.getenv('RAG_HNSW_M', '32'))
+HNSW_EF_CONSTRUCTION = int(os.getenv('RAG_HNSW_EF_CONSTRUCTION', '80'))
+HNSW_EF_SEARCH = int(os.getenv('RAG_HNSW_EF_SEARCH', '64'))
+IVF_NPROBE = int(os.getenv('RAG_IVF_NPROBE', '16'))
+PQ_M = int(os.getenv('RAG_PQ_M', '48'))
+PQ_NBITS = 8
+IVFPQ_RERANK = int(os.getenv('RAG_IVFPQ_RERANK', '8'))
+
+# PQ 코드북(2^8개 중심) 학습에 필요한 최소 벡터 수 - 이보다 적으면 ivfpq 대신 hnsw 사용
+IVFPQ_MIN_TRAIN = 256 * 39
+
+# ivfpq는 학습 당시보다 문서 수가 이 배수 이상 늘어나면 다시 학습
+RETRAIN_GROWTH = 4.0
+
+
+def choose_index_type(count: int, configured: Optional[str] = None) -> str:
+    """문서 수와 설정(RAG_INDEX_TYPE)으로 사용할 인덱스 종류 결정"""
+    configured = (configured or RAG_INDEX_TYPE).lower()
+    if configured not in INDEX_TYPES:
+        if configured != 'auto':
+            print(f"[WARN] 알 수 없는 RAG_INDEX_TYPE '{configured}', auto로 처리합니다")
+        if count >= RAG_IVFPQ_THRESHOLD:
+            configured = 'ivfpq'
+        elif count >= RAG_HNSW_THRESHOLD:
+            configured = 'hnsw'
+        else:
+            configured = 'flat'
+    if configured == 'ivfpq' and count < IVFPQ_MIN_TRAIN:
+        # 학습 데이터가 부족하면 양자화 품질이 나빠지므로 학습이 필요 없는 인덱스 사용
+        return 'hnsw' if count >= RAG_HNSW_THRESHOLD else 'flat'
+    return configured
+
+
+def _ivf_nlist(count: int) -> int:
+    """IVF 클러스터 수: 약 4·√N, 클러스터당 학습 벡터 39개 이상 유지"""
+    return max(1, min(int(4 * math.sqrt(count)), count // 39, 65536))
+
+
+def _pq_m(dimension: int) -> int:
+    """차원을 나누어 떨어지게 하는 PQ 하위 양자화기 수 (PQ_M 이하 최대값)"""
+    for m in range(min(PQ_M, dimension), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def resolve_metric(metric: Optional[str] = None) -> str:
+    """거리 척도 설정값 검증 (None이면 RAG_METRIC)"""
+    metric = (metric or RAG_METRIC).lower()
+    if metric not in METRICS:
+        print(f"[WARN] 알 수 없는 RAG_METRIC '{metric}', cosine으로 처리합니다")
+        return 'cosine'
+    return metric
+
+
+def _faiss_metric(metric: str) -> int:
+    return faiss.METRIC_INNER_PRODUCT if metric == 'cosine' else faiss.METRIC_L2
+
+
+def _flat_index(dimension: int, metric: str) -> faiss.Index:
+    return faiss.IndexFlatIP(dimension) if metric == 'cosine' else faiss.IndexFlatL2(dimension)
+
+
+def metric_of(index: faiss.Index) -> str:
+    """인덱스 객체의 거리 척도 ('cosine' | 'l2')"""
+    return 'cosine' if index.metric_type == faiss.METRIC_INNER_PRODUCT else 'l2'
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2 정규화한 float32 복사본 (cosine 인덱스에 넣거나 검색할 벡터)"""
+    vectors = np.array(vectors, dtype='float32', order='C', copy=True)
+    if len(vectors):
+        faiss.normalize_L2(vectors)
+    return vectors
+
+
+def to_similarity(distance: float, metric: str) -> float:
+    """검색 결과 거리 → 유사도 점수"""
+    if metric == 'cosine':
+        return float(min(1.0, max(-1.0, distance)))  # 내적 = 코사인 유사도
+    return float(1 / (1 + distance))
+
+
+def create_empty_index(dimension: int, metric: str = 'l2', with_ids: bool = False) -> faiss.Index:
+    """빈 인덱스 (문서가 없을 때는 항상 flat)"""
+    index = _flat_index(dimension, metric)
+    return faiss.IndexIDMap2(index) if with_ids else index
+
+
+def build_index(index_type: str, dimension: int, vectors: np.ndarray,
+                metric: str = 'l2', ids: Optional[np.ndarray] = None) -> faiss.Index:
+    """
+    index_type 인덱스를 만들어 vectors로 학습(필요 시)하고 추가
+    
+    cosine이면 vectors는 이미 정규화되어 있어야 합니다.
+    ids를 지정하면 벡터를 해당 ID로 추가합니다 (vectors와 같은 길이의 int64).
+    """
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    count = len(vectors)
+
+    if index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dimension, HNSW_M, _faiss_metric(metric))
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif index_type == 'ivfpq':
+        nlist = _ivf_nlist(count)
+        quantizer = _flat_index(dimension, metric)
+        index = faiss.IndexIVFPQ(quantizer, dimension, nlist, _pq_m(dimension), PQ_NBITS,
+                                 _faiss_metric(metric))
+        print(f"[INFO] IVF-PQ 학습 중 (벡터 {count}개, 클러스터 {nlist}개)...")
+        index.train(vectors)
+    else:
+        index = _flat_index(dimension, metric)
+
+    if ids is not None:
+        if index_type != 'ivfpq':
+            index = faiss.IndexIDMap2(index)
+        if count:
+            index.add_with_ids(vectors, np.ascontiguousarray(ids, dtype='int64'))
+    elif count:
+        index.add(vectors)
+    configure_index(index)
+    return index
+
+
+def base_index(index: faiss.Index) -> faiss.Index:
+    """IndexIDMap 래퍼를 벗긴 실제 인덱스"""
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def supports_remove(index: faiss.Index) -> bool:
+    """remove_ids 지원 여부 (hnsw는 그래프에서 삭제할 수 없음)"""
+    return index_type_of(index) != 'hnsw'
+
+
+def reconstruct_all(index: faiss.Index, ids: Optional[List[int]] = None) -> np.ndarray:
+    """인덱스에서 원본 벡터 복원 (ids 지정 시 그 순서대로, flat/hnsw만 가능)"""
+    if ids is None:
+        return index.reconstruct_n(0, index.ntotal)
+    if not len(ids):
+        return np.zeros((0, index.d), dtype='float32')
+    return np.vstack([index.reconstruct(int(i)) for i in ids])
+
+
+def configure_index(index: faiss.Index):
+    """검색 파라미터 적용 (로드 후에도 호출 - 환경 변수 변경 반영)"""
+    index_type = index_type_of(index)
+    if index_type == 'hnsw':
+        base_index(index).hnsw.efSearch = HNSW_EF_SEARCH
+    elif index_type == 'ivfpq':
+        faiss.extract_index_ivf(index).nprobe = IVF_NPROBE
+
+
+def search_params(index: faiss.Index, ids: np.ndarray) -> faiss.SearchParameters:
+    """
+    ids에 속한 벡터만 검색하는 파라미터 (메타데이터 필터)
+    
+    인덱스 종류별 검색 파라미터(efSearch, nprobe)는 현재 설정을 유지합니다.
+    반환값이 selector를 참조하므로 검색이 끝날 때까지 ids 배열을 유지해야 합니다.
+    """
+    ids = np.ascontiguousarray(ids, dtype='int64')
+    selector = faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids))
+    index_type = index_type_of(index)
+    if index_type == 'hnsw':
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=base_index(index).hnsw.efSearch)
+    elif index_type == 'ivfpq':
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=faiss.extract_index_ivf(index).nprobe)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    params.ids = ids  # selector가 가리키는 배열 유지
+    return params
+
+
+def exact_search(vectors: np.ndarray, query: np.ndarray, k: int, metric: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    원본 벡터 전수 비교 (쿼리 1개)
+    
+    Returns:
+        (정확한 거리 - cosine은 내적, l2는 제곱 거리, vectors의 행 번호) 가까운 순 상위 k개
+    """
+    if metric == 'cosine':
+        exact = vectors @ query
+        order = np.argsort(-exact)[:k]
+    else:
+        exact = ((vectors - query) ** 2).sum(axis=1)
+        order = np.argsort(exact)[:k]
+    return exact[order], order
+
+
+def search(index: faiss.Index, query: np.ndarray, k: int,
+           fetch_vectors: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+           params: Optional[faiss.SearchParameters] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    k-NN 검색 (index.search와 같은 (distances, indices) 반환)
+    
+    ivfpq는 압축 거리 오차로 recall이 낮으므로, 원본 벡터 조회 함수(fetch_vectors: ID 배열 → 벡터)가 있으면
+    k * IVFPQ_RERANK개 후보를 찾은 뒤 정확한 거리(L2 또는 내적)로 재정렬합니다.
+    params는 search_params()로 만든 필터입니다.
+    """
+    if IVFPQ_RERANK <= 1 or fetch_vectors is None or index_type_of(index) != 'ivfpq':
+        return index.search(query, k, params=params)
+    
+    _, candidates = index.search(query, k * IVFPQ_RERANK, params=params)
+    metric = metric_of(index)
+    distances = np.full((len(query), k), -np.inf if metric == 'cosine' else np.inf, dtype='float32')
+    indices = np.full((len(query), k), -1, dtype='int64')
+    for row, (q, found) in enumerate(zip(query, candidates)):
+        found = found[found >= 0]
+        if not len(found):
+            continue
+        exact, order = exact_search(np.asarray(fetch_vectors(found), dtype='float32'), q, k, metric)
+        distances[row, :len(order)] = exact
+        indices[row, :len(order)] = found[order]
+    return distances, indices
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """인덱스 객체의 종류 ('flat' | 'hnsw' | 'ivfpq')"""
+    index = base_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return 'hnsw'
+    if isinstance(index, faiss.IndexIVF):
+        return 'ivfpq'
+    return 'flat'
+
+
+def can_reconstruct(index: faiss.Index) -> bool:
+    """원본 벡터를 인덱스에서 복원할 수 있는지 (ivfpq는 손실 압축)"""
+    return index_type_of(index) != 'ivfpq'
+
+
+def needs_rebuild(index: faiss.Index, count: int, trained_size: int,
+                  configured: Optional[str] = None) -> Optional[str]:
+    """문서 수 변화로 인덱스를 다시 만들어야 하면 새 종류, 아니면 None"""
+    current = index_type_of(index)
+    target = choose_index_type(count, configured)
+    if target != current:
+        return target
+    if current == 'ivfpq' and trained_size and count >= trained_size * RETRAIN_GROWTH:
+        return target
+    return None
+
+
+def describe(index: faiss.Index) -> Dict[str, Any]:
+    """인덱스 상태 요약 (상태 API용)"""
+    index_type = index_type_of(index)
+    info: Dict[str, Any] = {'type': index_type, 'metric': metric_of(index),
+                            'ntotal': int(index.ntotal), 'dimension': int(index.d)}
+    if index_type == 'hnsw':
+        hnsw = base_index(index).hnsw
+        info.update(ef_search=int(hnsw.efSearch), ef_construction=int(hnsw.efConstruction))
+    elif index_type == 'ivfpq':
+        ivf = faiss.extract_index_ivf(index)
+        info.update(nlist=int(ivf.nlist), nprobe=int(ivf.nprobe), rerank=IVFPQ_RERANK)
+    return info
@@ -0,0 +1,54 @@
+"""
+어휘(희소) 검색용 토크나이저 + 순위 결합
+
+ko-sroberta 임베딩은 약품명, 유전자 기호, 법령 조항 번호처럼 정확히 일치해야 하는 용어를 놓치기 쉬우므로
+BM25 어휘 검색(SQLite FTS5, segment_store.py)을 함께 사용합니다.
+
+토큰화 (형태소 분석기 없이 동작):
+- 한글: 글자 bigram ('아세트아미노펜' → 아세, 세트, 트아, ...), 한 글자 단어는 그대로
+  → 조사가 붙어도('아세트아미노펜은') 대부분의 bigram이 일치
+- 영문/숫자: 소문자 단어 그대로 (brca1, il-6, covid-19, 3.5)
+
+결합: Reciprocal Rank Fusion - score = Σ 1 / (RRF_K + 순위)
+"""
+
+import os
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Sequence
+
+RRF_K = int(os.getenv('RAG_RRF_K', '60'))
+
+# 토크나이저를 바꾸면 올려서 저장된 어휘 인덱스를 다시 만들게 함
+TOKENIZER_VERSION = 1
+
+_TOKEN_RE = re.compile(r'[가-힣]+|[a-z0-9]+(?:[-.][a-z0-9]+)*')
+
+
+def tokenize(text: str) -> List[str]:
+    """검색용 토큰 목록 (문서/쿼리 공통)"""
+    tokens = []
+    for match in _TOKEN_RE.finditer(unicodedata.normalize('NFC', text or '').lower()):
+        word = match.group()
+        if '가' <= word[0] <= '힣':
+            if len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def to_document(text: str) -> str:
+    """FTS5 테이블에 저장할 토큰 문자열"""
+    return ' '.join(tokenize(text))
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Iterable[int]], k: int = RRF_K) -> Dict[int, float]:
+    """순위 목록(가까운 순 ID)들을 RRF 점수로 결합 - {ID: 점수}"""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return scores
@@ -0,0 +1,158 @@
+"""
+쿼리 임베딩 캐시
+같은 질문을 반복해서 임베딩하지 않도록 정규화한 쿼리 텍스트 → 임베딩 벡터를 LRU로 보관합니다.
+CPU 서버에서는 SentenceTransformer 쿼리 인코딩이 검색 요청에서 가장 비싼 단계입니다.
+
+- 키: (네임스페이스, 정규화한 쿼리) - 네임스페이스는 거리 척도 등 같은 텍스트라도 벡터가 달라지는 조건
+  정규화는 NFC + 공백 정리만 하므로(토크나이저 결과가 같음) 캐시된 벡터는 직접 인코딩한 값과 동일
+- 최대 항목 수 초과 시 가장 오래 사용하지 않은 항목부터 삭제 (RAG_QUERY_CACHE_SIZE, 0이면 사용 안 함)
+- 선택적 영속화 (RAG_QUERY_CACHE_PERSIST=1): .npz 파일에 저장하여 재시작 후에도 재사용
+  (임베딩 모델/차원이 다르면 파일을 무시)
+"""
+
+import json
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+RAG_QUERY_CACHE_SIZE = int(os.getenv('RAG_QUERY_CACHE_SIZE', '2048'))
+RAG_QUERY_CACHE_PERSIST = os.getenv('RAG_QUERY_CACHE_PERSIST', '0').lower() in ('1', 'true', 'yes')
+
+# 새 항목이 이만큼 쌓일 때마다 파일에 저장 (종료 시에도 저장)
+SAVE_EVERY = 100
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키용 쿼리 정규화 (NFC + 앞뒤/연속 공백 정리)"""
+    return ' '.join(unicodedata.normalize('NFC', text or '').split())
+
+
+class QueryEmbeddingCache:
+    """쿼리 임베딩 LRU 캐시 (스레드 안전)"""
+
+    def __init__(self, max_entries: int = RAG_QUERY_CACHE_SIZE, path: Optional[str] = None,
+                 model: str = ''):
+        """
+        Args:
+            max_entries: 최대 항목 수 (0이면 캐시 사용 안 함)
+            path: 영속화 파일 경로 (.npz, None이면 메모리만 사용)
+            model: 임베딩 모델 이름 (파일에 기록, 다르면 불러오지 않음)
+        """
+        self.max_entries = max(0, max_entries)
+        self.path = path
+        self.model = model
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._unsaved = 0
+
+        # 통계
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._loaded = 0
+
+        if self.path and self.max_entries:
+            self._load()
+
+    def get_or_compute(self, query: str, encode: Callable[[str], np.ndarray], namespace: str = '') -> np.ndarray:
+        """캐시된 임베딩 반환, 없으면 encode(쿼리) 결과를 저장 후 반환 (읽기 전용 배열)"""
+        if not self.max_entries:
+            return encode(query)
+        key = (namespace, normalize_query(query))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return vector
+            self._misses += 1
+
+        vector = np.array(encode(query), dtype='float32')
+        vector.setflags(write=False)  # 여러 요청이 공유하므로 수정 금지
+
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+            self._unsaved += 1
+            save = self.path is not None and self._unsaved >= SAVE_EVERY
+        if save:
+            self.save()
+        return vector
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._unsaved = 0
+        if self.path:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"[WARN] 쿼리 임베딩 캐시 파일 삭제 실패: {e}")
+
+    def save(self) -> bool:
+        """캐시를 파일에 저장 (임시 파일 후 교체)"""
+        if not self.path:
+            return False
+        with self._lock:
+            if not self._entries:
+                return False
+            keys = list(self._entries)
+            vectors = np.stack([vector.reshape(-1) for vector in self._entries.values()])
+            self._unsaved = 0
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, vectors=vectors,
+                         keys=np.array(json.dumps(keys, ensure_ascii=False)),
+                         model=np.array(self.model))
+            os.replace(tmp_path, self.path)
+            return True
+        except OSError as e:
+            print(f"[WARN] 쿼리 임베딩 캐시 저장 실패: {e}")
+            return False
+
+    def _load(self):
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data['model']) != self.model:
+                    print(f"[INFO] 쿼리 임베딩 캐시: 모델이 달라 저장된 캐시를 사용하지 않습니다 ({data['model']})")
+                    return
+                keys = json.loads(str(data['keys']))
+                vectors = data['vectors'].astype('float32')
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[WARN] 쿼리 임베딩 캐시 파일을 읽을 수 없습니다: {e}")
+            return
+        # 가장 최근에 사용한 항목이 남도록 뒤쪽부터 max_entries개
+        for (namespace, query), vector in list(zip(keys, vectors))[-self.max_entries:]:
+            vector = vector.reshape(1, -1)
+            vector.setflags(write=False)
+            self._entries[(namespace, query)] = vector
+        self._loaded = len(self._entries)
+        print(f"[OK] 쿼리 임베딩 캐시 {self._loaded}개 로드")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'enabled': bool(self.max_entries),
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'persist_path': self.path,
+                'loaded_from_disk': self._loaded,
+                'unsaved': self._unsaved,
+            }
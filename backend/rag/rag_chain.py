@@ -3,7 +3,8 @@ RAG 체인 모듈
 검색된 문서를 기반으로 AI 응답 생성
 """
 
-from typing import List, Dict, Optional
+import asyncio
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple
 import httpx
 
 # LangChain imports - 버전 호환성 처리
@@ -12,20 +13,49 @@ try:
 except ImportError:
     from langchain.schema import Document
 
+# LLM 응답에 답변이 없을 때 반환하는 문구 (응답 캐시에 저장하지 않음)
+NO_ANSWER_MESSAGE = "응답을 생성할 수 없습니다."
+
+
+def page_label(metadata: Dict) -> str:
+    """청크의 페이지 표시 (PDF 청크: 'p.12' 또는 'p.12-13', 페이지 정보가 없으면 '')"""
+    page = metadata.get('page')
+    if page is None:
+        return ""
+    page_end = metadata.get('page_end', page)
+    return f"p.{page}" if page_end == page else f"p.{page}-{page_end}"
+
 
 class RAGChain:
     """RAG 체인 클래스"""
     
-    def __init__(self, vector_store_manager, api_key: str, api_type: str = "groq"):
+    def __init__(self, vector_store_manager, api_key: str, api_type: str = "groq", http_clients=None,
+                 response_cache=None, use_cache: bool = True, search_mode: Optional[str] = None):
         """
         Args:
             vector_store_manager: VectorStoreManager 인스턴스
             api_key: AI API 키 (GROQ, Gemini 등)
             api_type: API 타입 ('groq', 'gemini', 'gemma')
+            http_clients: 공유 HTTP 클라이언트 레지스트리 (llm_client.llm_clients)
+                          None이면 호출마다 임시 AsyncClient 사용 (단독 실행/테스트용)
+            response_cache: LLM 응답 캐시 (llm_cache.llm_cache), None이면 캐시 사용 안 함
+            use_cache: False면 캐시를 조회하지 않고 새로 생성 (생성된 응답은 저장)
+            search_mode: 'dense' | 'sparse' | 'hybrid' (None이면 RAG_SEARCH_MODE)
         """
         self.vector_store = vector_store_manager
         self.api_key = api_key
         self.api_type = api_type.lower()
+        self.http_clients = http_clients
+        self.response_cache = response_cache
+        self.use_cache = use_cache
+        self.search_mode = search_mode
+    
+    async def _post(self, provider: str, base_url: str, path: str, **kwargs) -> httpx.Response:
+        """공유 클라이언트가 있으면 재사용 (keep-alive/재시도/동시성 제한), 없으면 임시 클라이언트"""
+        if self.http_clients is not None:
+            return await self.http_clients.get(provider).post(path, **kwargs)
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            return await client.post(path, **kwargs)
     
     def _format_context(self, documents: List[Document]) -> str:
         """
@@ -43,6 +73,9 @@ class RAGChain:
         context_parts = []
         for i, doc in enumerate(documents, 1):
             source = doc.metadata.get('source', '알 수 없음')
+            pages = page_label(doc.metadata)
+            if pages:
+                source += f" {pages}"
             content = doc.page_content.strip()
             
             context_parts.append(f"[문서 {i}] 출처: {source}\n{content}")
@@ -156,15 +189,8 @@ class RAGChain:
         
         return prompt
     
-    async def _call_groq_api(self, prompt: str) -> str:
-        """GROQ API 호출"""
-        url = "https://api.groq.com/openai/v1/chat/completions"
-        
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
+    def _groq_request(self, prompt: str, stream: bool = False) -> Dict:
+        """GROQ chat/completions 요청 구성"""
         payload = {
             "model": "llama-3.3-70b-versatile",
             "messages": [
@@ -174,52 +200,257 @@ class RAGChain:
             "max_tokens": 1000,
             "top_p": 0.9
         }
+        if stream:
+            payload["stream"] = True
+        return {
+            "path": "/openai/v1/chat/completions",
+            "headers": {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            },
+            "json": payload,
+            "timeout": 30.0
+        }
+    
+    def _gemini_request(self, prompt: str, stream: bool = False) -> Dict:
+        """Gemini generateContent 요청 구성 (스트리밍은 streamGenerateContent + SSE)"""
+        action = "streamGenerateContent" if stream else "generateContent"
+        params = {"key": self.api_key}
+        if stream:
+            params["alt"] = "sse"
+        return {
+            "path": f"/v1beta/models/gemini-2.0-flash-exp:{action}",
+            "params": params,
+            "headers": {
+                "Content-Type": "application/json"
+            },
+            "json": {
+                "contents": [{
+                    "parts": [{"text": prompt}]
+                }],
+                "generationConfig": {
+                    "temperature": 0.3,
+                    "maxOutputTokens": 1000,
+                    "topP": 0.9
+                }
+            },
+            "timeout": 30.0
+        }
+    
+    async def _call_groq_api(self, prompt: str) -> str:
+        """GROQ API 호출"""
+        response = await self._post('groq', "https://api.groq.com", **self._groq_request(prompt))
+        response.raise_for_status()
+        data = response.json()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers, json=payload, timeout=30.0)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get('choices'):
-                return data['choices'][0]['message']['content']
-            else:
-                return "응답을 생성할 수 없습니다."
+        if data.get('choices'):
+            return data['choices'][0]['message']['content']
+        else:
+            return NO_ANSWER_MESSAGE
     
     async def _call_gemini_api(self, prompt: str) -> str:
         """Gemini API 호출"""
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-exp:generateContent?key={self.api_key}"
+        response = await self._post('gemini', "https://generativelanguage.googleapis.com", **self._gemini_request(prompt))
+        response.raise_for_status()
+        data = response.json()
         
-        headers = {
-            "Content-Type": "application/json"
-        }
+        if data.get('candidates'):
+            return data['candidates'][0]['content']['parts'][0]['text']
+        else:
+            return NO_ANSWER_MESSAGE
+    
+    def _cache_key(self, prompt: str) -> Optional[str]:
+        """응답 캐시 키 - (provider, model, temperature, 요청 본문 해시)"""
+        if self.response_cache is None:
+            return None
+        if self.api_type == 'gemini':
+            request = self._gemini_request(prompt)
+            model = request["path"].rsplit("/", 1)[-1].split(":")[0]
+            temperature = request["json"]["generationConfig"]["temperature"]
+            return self.response_cache.make_key('gemini', model, temperature, request["json"])
+        request = self._groq_request(prompt)
+        payload = request["json"]
+        return self.response_cache.make_key('groq', payload["model"], payload["temperature"], payload)
+    
+    async def _cached_answer(self, cache_key: Optional[str]) -> Optional[str]:
+        if cache_key is None:
+            return None
+        answer = await self.response_cache.aget(cache_key, bypass=not self.use_cache)
+        if answer is not None:
+            print(f"[CACHE] LLM 응답 캐시 사용 ({self.api_type.upper()} API 호출 생략)")
+        return answer
+    
+    async def _store_answer(self, cache_key: Optional[str], answer: str):
+        if cache_key is not None and answer and answer != NO_ANSWER_MESSAGE:
+            provider = 'gemini' if self.api_type == 'gemini' else 'groq'
+            await self.response_cache.aset(cache_key, answer, provider=provider)
+    
+    async def _generate(self, prompt: str) -> str:
+        """api_type에 맞는 LLM으로 답변 생성 (응답 캐시 우선)"""
+        if self.api_type not in ('groq', 'gemma', 'gemini'):
+            return "지원하지 않는 API 타입입니다."
         
-        payload = {
-            "contents": [{
-                "parts": [{"text": prompt}]
-            }],
-            "generationConfig": {
-                "temperature": 0.3,
-                "maxOutputTokens": 1000,
-                "topP": 0.9
+        cache_key = self._cache_key(prompt)
+        answer = await self._cached_answer(cache_key)
+        if answer is not None:
+            return answer
+        
+        print(f"[AI] {self.api_type.upper()} API 호출 중...")
+        if self.api_type == 'gemini':
+            answer = await self._call_gemini_api(prompt)
+        else:
+            answer = await self._call_groq_api(prompt)
+        await self._store_answer(cache_key, answer)
+        return answer
+    
+    async def _generate_stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        답변을 생성되는 대로 텍스트 조각 단위로 전달
+        
+        공유 클라이언트(http_clients)가 없으면 전체 답변을 한 번에 전달합니다.
+        """
+        if self.http_clients is None or self.api_type not in ('groq', 'gemma', 'gemini'):
+            yield await self._generate(prompt)
+            return
+        
+        # 캐시된 응답은 한 번에 전달
+        cache_key = self._cache_key(prompt)
+        answer = await self._cached_answer(cache_key)
+        if answer is not None:
+            yield answer
+            return
+        
+        print(f"[AI] {self.api_type.upper()} API 스트리밍 호출 중...")
+        if self.api_type == 'gemini':
+            provider, request = 'gemini', self._gemini_request(prompt, stream=True)
+        else:
+            provider, request = 'groq', self._groq_request(prompt, stream=True)
+        parts = []
+        async for token in self.http_clients.stream_tokens(provider, request.pop("path"), **request):
+            parts.append(token)
+            yield token
+        # 끝까지 받은 응답만 저장 (중간에 끊기면 예외가 발생하여 여기까지 오지 않음)
+        await self._store_answer(cache_key, ''.join(parts))
+    
+    async def _retrieve(self,
+                        question: str,
+                        k: int,
+                        min_similarity: float,
+                        document_context: Optional[List[str]],
+                        filters: Optional[Dict] = None,
+                        fallback_to_all: bool = False) -> Dict:
+        """
+        관련 문서 검색 + 컨텍스트/출처 구성
+        
+        document_context(파일명 목록)와 filters(과목/강사/업로드 날짜 등)는 검색 단계에서 적용되어
+        조건에 맞는 청크 안에서 k개를 찾습니다.
+        fallback_to_all이면 조건에 맞는 청크가 없을 때 전체 검색 결과를 사용합니다.
+        
+        Returns:
+            {'context', 'sources'} - 답변할 문서가 없으면 안내 문구를 담은 'answer' 포함
+        """
+        # 1. 관련 문서 검색 (메타데이터 필터는 벡터 검색 안에서 적용)
+        print(f"[DEBUG] 질문: {question}")
+        filters = {key: value for key, value in (filters or {}).items() if value}
+        if document_context:
+            filters['filename'] = document_context
+        if filters:
+            print(f"[FILTER] 검색 필터: {filters}")
+        print(f"[DOC] {k}개 문서 검색 중...")
+        
+        # 임베딩 + FAISS 검색은 CPU 작업이므로 이벤트 루프 밖에서 실행
+        documents = await asyncio.to_thread(self.vector_store.search_with_score, question, k=k,
+                                            filters=filters or None, mode=self.search_mode)
+        if filters and not documents and fallback_to_all:
+            print(f"⚠️ 필터 {filters}에 맞는 문서가 없어 전체 검색 결과를 사용합니다")
+            documents = await asyncio.to_thread(self.vector_store.search_with_score, question, k=k,
+                                                mode=self.search_mode)
+        
+        if not documents:
+            return {
+                'answer': "죄송합니다. 관련 문서를 찾을 수 없습니다. 문서를 업로드하거나 다른 질문을 시도해보세요.",
+                'sources': [],
+                'context': ""
+            }
+        
+        # 2. 유사도 체크 - 모든 문서의 유사도가 너무 낮으면 경고
+        # 어휘(BM25) 검색으로 찾은 청크는 용어가 정확히 일치하므로 유사도 임계값과 관계없이 사용
+        max_similarity = max([doc_dict.get('score', 0) for doc_dict in documents])
+        lexical_hits = sum(1 for doc_dict in documents if doc_dict.get('sparse_rank'))
+        print(f"[INFO] 최대 유사도: {max_similarity:.2%}" + (f" (어휘 일치 {lexical_hits}개)" if lexical_hits else ""))
+        
+        if (max_similarity >= min_similarity or lexical_hits) and getattr(self.vector_store, 'metric', 'l2') == 'cosine':
+            # 코사인 유사도는 절대 기준으로 비교할 수 있으므로 임계값 미만 청크는 프롬프트에서 제외
+            relevant = [doc_dict for doc_dict in documents
+                        if doc_dict.get('score', 0) >= min_similarity or doc_dict.get('sparse_rank')]
+            if len(relevant) < len(documents):
+                print(f"[FILTER] 유사도 {min_similarity:.0%} 미만 청크 {len(documents) - len(relevant)}개 제외")
+            documents = relevant
+        
+        if max_similarity < min_similarity and not lexical_hits:
+            return {
+                'answer': f"죄송합니다. 질문과 관련된 정보를 문서에서 찾을 수 없습니다.\n\n💡 팁: 다른 키워드로 질문하거나, 더 구체적으로 질문해주세요.\n(검색된 문서의 최대 유사도: {max_similarity:.1%})",
+                'sources': [],
+                'context': ""
             }
-        }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers, json=payload, timeout=30.0)
-            response.raise_for_status()
-            data = response.json()
+        # 3. 컨텍스트 포맷팅 (SimpleVectorStore 형식)
+        context_parts = []
+        for i, doc_dict in enumerate(documents, 1):
+            metadata = doc_dict.get('metadata', {})
+            source = metadata.get('original_filename') or metadata.get('filename', '알 수 없음')
+            subject = metadata.get('subject', '')
+            content = doc_dict.get('content', '').strip()
+            similarity = doc_dict.get('score', 0)
+            
+            source_info = f"{source}"
+            if subject:
+                source_info += f" ({subject})"
+            pages = page_label(metadata)
+            if pages:
+                source_info += f" {pages}"
+            
+            context_parts.append(f"[문서 {i}] 출처: {source_info} (유사도: {similarity:.1%})\n{content}")
+        
+        context = "\n\n".join(context_parts)
+        
+        print(f"[OK] {len(documents)}개 문서 검색 완료")
+        
+        # 4. 출처 정보 추출 (SimpleVectorStore 형식)
+        sources = []
+        for doc_dict in documents:
+            metadata = doc_dict.get('metadata', {})
+            source_name = metadata.get('original_filename') or metadata.get('filename', '알 수 없음')
+            subject = metadata.get('subject', '')
+            
+            source_display = source_name
+            if subject:
+                source_display = f"{source_name} - {subject}"
+            pages = page_label(metadata)
+            if pages:
+                source_display += f" ({pages})"
             
-            if data.get('candidates'):
-                return data['candidates'][0]['content']['parts'][0]['text']
-            else:
-                return "응답을 생성할 수 없습니다."
+            sources.append({
+                'source': source_display,
+                'page': metadata.get('page'),
+                'content': doc_dict.get('content', '')[:200] + '...',
+                'similarity': float(doc_dict.get('score', 0)),  # 0~1 범위로 반환
+                'metadata': metadata
+            })
+        
+        return {
+            'sources': sources,
+            'context': context
+        }
     
     async def query(self, 
                     question: str, 
                     k: int = 5,  # 3에서 5로 증가
                     system_message: Optional[str] = None,
                     min_similarity: float = 0.3,  # 최소 유사도 임계값 추가
-                    document_context: Optional[List[str]] = None) -> Dict:  # 특정 문서 필터링
+                    document_context: Optional[List[str]] = None,  # 특정 문서 필터링
+                    filters: Optional[Dict] = None,
+                    fallback_to_all: bool = False) -> Dict:
         """
         RAG 질문 처리 (개선된 버전)
         
@@ -229,6 +460,8 @@ class RAGChain:
             system_message: 커스텀 시스템 메시지
             min_similarity: 최소 유사도 임계값 (0.0~1.0, 기본값 0.3)
             document_context: 특정 문서만 검색 (파일명 리스트)
+            filters: 메타데이터 필터 (subject, instructor, uploaded_from, uploaded_to - VectorStoreManager.search 참고)
+            fallback_to_all: 필터에 맞는 문서가 없으면 전체 문서에서 검색
             
         Returns:
             {
@@ -238,103 +471,19 @@ class RAGChain:
             }
         """
         try:
-            # 1. 관련 문서 검색
-            print(f"[DEBUG] 질문: {question}")
-            if document_context:
-                print(f"[INFO] 문서 컨텍스트 필터: {document_context}")
-            print(f"[DOC] {k}개 문서 검색 중...")
-            
-            documents = self.vector_store.search_with_score(question, k=k)
-            
-            # 2. document_context가 있으면 해당 문서만 필터링
-            if document_context and documents:
-                print(f"[FILTER] 선택된 {len(document_context)}개 문서로 필터링 중...")
-                filtered_docs = []
-                for doc_dict in documents:
-                    metadata = doc_dict.get('metadata', {})
-                    filename = metadata.get('original_filename') or metadata.get('filename', '')
-                    
-                    # 파일명이 document_context에 있는지 확인
-                    if any(context_file in filename or filename in context_file for context_file in document_context):
-                        filtered_docs.append(doc_dict)
-                
-                documents = filtered_docs
-                print(f"[OK] 필터링 후 {len(documents)}개 문서 사용")
-            
-            if not documents:
-                return {
-                    'answer': "죄송합니다. 관련 문서를 찾을 수 없습니다. 문서를 업로드하거나 다른 질문을 시도해보세요.",
-                    'sources': [],
-                    'context': ""
-                }
-            
-            # 2. 유사도 체크 - 모든 문서의 유사도가 너무 낮으면 경고
-            max_similarity = max([doc_dict.get('score', 0) for doc_dict in documents])
-            print(f"[INFO] 최대 유사도: {max_similarity:.2%}")
-            
-            if max_similarity < min_similarity:
-                return {
-                    'answer': f"죄송합니다. 질문과 관련된 정보를 문서에서 찾을 수 없습니다.\n\n💡 팁: 다른 키워드로 질문하거나, 더 구체적으로 질문해주세요.\n(검색된 문서의 최대 유사도: {max_similarity:.1%})",
-                    'sources': [],
-                    'context': ""
-                }
-            
-            # 3. 컨텍스트 포맷팅 (SimpleVectorStore 형식)
-            context_parts = []
-            for i, doc_dict in enumerate(documents, 1):
-                metadata = doc_dict.get('metadata', {})
-                source = metadata.get('original_filename') or metadata.get('filename', '알 수 없음')
-                subject = metadata.get('subject', '')
-                content = doc_dict.get('content', '').strip()
-                similarity = doc_dict.get('score', 0)
-                
-                source_info = f"{source}"
-                if subject:
-                    source_info += f" ({subject})"
-                
-                context_parts.append(f"[문서 {i}] 출처: {source_info} (유사도: {similarity:.1%})\n{content}")
-            
-            context = "\n\n".join(context_parts)
-            
-            print(f"[OK] {len(documents)}개 문서 검색 완료")
-            
-            # 4. 프롬프트 생성
-            prompt = self._build_prompt(question, context, system_message)
-            
-            # 5. AI API 호출
-            print(f"[AI] {self.api_type.upper()} API 호출 중...")
-            
-            if self.api_type == 'groq' or self.api_type == 'gemma':
-                answer = await self._call_groq_api(prompt)
-            elif self.api_type == 'gemini':
-                answer = await self._call_gemini_api(prompt)
-            else:
-                answer = "지원하지 않는 API 타입입니다."
+            retrieved = await self._retrieve(question, k, min_similarity, document_context, filters, fallback_to_all)
+            if 'answer' in retrieved:
+                return retrieved
             
+            # 프롬프트 생성 후 AI API 호출
+            prompt = self._build_prompt(question, retrieved['context'], system_message)
+            answer = await self._generate(prompt)
             print(f"[OK] 응답 생성 완료")
             
-            # 6. 출처 정보 추출 (SimpleVectorStore 형식)
-            sources = []
-            for doc_dict in documents:
-                metadata = doc_dict.get('metadata', {})
-                source_name = metadata.get('original_filename') or metadata.get('filename', '알 수 없음')
-                subject = metadata.get('subject', '')
-                
-                source_display = source_name
-                if subject:
-                    source_display = f"{source_name} - {subject}"
-                
-                sources.append({
-                    'source': source_display,
-                    'content': doc_dict.get('content', '')[:200] + '...',
-                    'similarity': float(doc_dict.get('score', 0)),  # 0~1 범위로 반환
-                    'metadata': metadata
-                })
-            
             return {
                 'answer': answer,
-                'sources': sources,
-                'context': context
+                'sources': retrieved['sources'],
+                'context': retrieved['context']
             }
             
         except Exception as e:
@@ -345,6 +494,41 @@ class RAGChain:
                 'context': ""
             }
     
+    async def query_stream(self,
+                           question: str,
+                           k: int = 5,
+                           system_message: Optional[str] = None,
+                           min_similarity: float = 0.3,
+                           document_context: Optional[List[str]] = None,
+                           filters: Optional[Dict] = None,
+                           fallback_to_all: bool = False) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        RAG 질문 스트리밍 처리
+        
+        검색이 끝나면 출처를 먼저 보내고, 이후 답변을 생성되는 대로 전달합니다.
+        
+        Yields:
+            ('sources', 참고 문서 리스트)
+            ('token', 답변 텍스트 조각) ...
+            ('done', {'answer': 전체 답변, 'context': 검색된 컨텍스트})
+        """
+        retrieved = await self._retrieve(question, k, min_similarity, document_context, filters, fallback_to_all)
+        yield 'sources', retrieved['sources']
+        
+        if 'answer' in retrieved:
+            yield 'token', retrieved['answer']
+            yield 'done', {'answer': retrieved['answer'], 'context': ""}
+            return
+        
+        prompt = self._build_prompt(question, retrieved['context'], system_message)
+        answer_parts = []
+        async for token in self._generate_stream(prompt):
+            answer_parts.append(token)
+            yield 'token', token
+        print(f"[OK] 스트리밍 응답 생성 완료")
+        
+        yield 'done', {'answer': ''.join(answer_parts), 'context': retrieved['context']}
+    
     async def query_simple(self, question: str, k: int = 3) -> str:
         """
         간단한 RAG 질문 (답변만 반환)
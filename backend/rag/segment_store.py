@@ -0,0 +1,659 @@
+"""
+벡터 스토어 세그먼트 저장소 (추가 전용 영속화)
+
+디스크 구조 ({persist_directory}/):
+    {collection}.sqlite                          청크(내용/메타데이터/벡터 위치) + 작업 로그 + 상태 (WAL)
+                                                 + 매니페스트 (파일 내용 해시 → 청크 ID, 임베딩 모델, 청킹 설정)
+    {collection}.segments/seg_000001.npy         불변 임베딩 세그먼트 (추가 1회 = 세그먼트 1개)
+    {collection}.segments/seg_000001.ids.npy     세그먼트 행별 청크 ID
+    {collection}.segments/index_00000042.faiss   작업 로그 seq 42 시점의 FAISS 인덱스 체크포인트
+
+쓰기:
+- 추가: 새 세그먼트 파일 기록(fsync) → SQLite 트랜잭션(chunks INSERT + ops 'add') 커밋
+- 삭제: SQLite 트랜잭션(chunks DELETE + ops 'remove') 커밋
+  → 추가/삭제한 청크 수에 비례하는 데이터만 기록 (전체 컬렉션 재저장 없음)
+- 압축(compact): 살아 있는 벡터를 세그먼트 하나로 합치고 인덱스 체크포인트 기록 →
+  SQLite 트랜잭션(청크 위치 갱신, 체크포인트 갱신, 이전 작업 로그 삭제) 커밋 → cleanup()으로 참조되지 않는 파일 삭제
+
+어휘 검색 (tokenizer 지정 시):
+- chunks_fts (SQLite FTS5): 청크별 토큰 문자열 (lexical.py) - 청크 추가/삭제와 같은 트랜잭션으로 갱신
+- BM25(FTS5 bm25())로 순위 계산, 문서 빈도가 너무 높은 쿼리 토큰은 제외
+- 토크나이저 버전(PRAGMA user_version)이 바뀌거나 청크 수가 맞지 않으면 로드 시 다시 생성
+
+복구:
+- SQLite 커밋이 유일한 반영 시점입니다. 로드 시 체크포인트 인덱스를 읽고 그 이후 작업 로그를 재적용합니다.
+- 커밋 전에 중단된 작업이 남긴 세그먼트/인덱스 파일은 어디에서도 참조되지 않으므로 로드 시 삭제됩니다.
+
+여러 프로세스 (uvicorn --workers N):
+- 추가/삭제/압축/정리는 {collection}.lock 파일 잠금(fcntl) 안에서만 수행 (write_lock)
+  → 다른 프로세스가 쓰는 중인(아직 커밋 안 된) 세그먼트를 정리하지 않음
+- 세그먼트 번호는 SQLite 트랜잭션에서 할당 (segment_numbers AUTOINCREMENT, clear 후에도 재사용 안 함)
+- 각 프로세스는 sync_point()(마지막 작업 로그 seq, 체크포인트 seq, clear 세대)로 다른 프로세스의 변경을 확인해 반영
+- fcntl이 없는 Windows에서는 프로세스 내부 잠금만 사용하므로 워커 1개로 실행해야 합니다.
+"""
+
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows - 프로세스 간 잠금 없음 (워커 1개로 실행)
+    fcntl = None
+
+SEGMENT_PATTERN = re.compile(r'^seg_(\d+)\.npy$')
+INDEX_PATTERN = re.compile(r'^index_(\d+)\.faiss$')
+IN_BATCH = 500  # IN (...) 조회 1회당 ID 수
+
+# FTS5 unicode61 토크나이저가 영문/숫자 토큰의 '-', '.'에서 나누지 않도록 지정
+FTS_TOKENIZE = "unicode61 tokenchars '-.'"
+# 어휘 검색: 전체 청크 중 이 비율보다 많이 나오는 쿼리 토큰은 제외 (조사/어미 bigram 등)
+LEXICAL_MAX_DF_RATIO = float(os.getenv('RAG_LEXICAL_MAX_DF', '0.3'))
+
+# 메타데이터 필터 (filter_ids)
+FILTER_FIELDS = ('filename', 'subject', 'instructor', 'uploaded_from', 'uploaded_to')
+_ORIGINAL_FILENAME_SQL = "COALESCE(json_extract(metadata, '$.original_filename'), '')"
+_UPLOAD_DATE_SQL = ("substr(COALESCE(json_extract(metadata, '$.upload_date'), json_extract(metadata, '$.uploaded_at'), "
+                    "json_extract(metadata, '$.date'), ''), 1, 10)")
+
+# (청크 ID, 내용, 메타데이터, 세그먼트 번호, 세그먼트 내 행)
+ChunkRow = Tuple[int, str, Dict[str, Any], int, int]
+# (seq, 'add' | 'remove', 세그먼트 번호, 삭제한 청크 ID)
+Op = Tuple[int, str, Optional[int], Optional[np.ndarray]]
+# (마지막 작업 로그 seq, 체크포인트 seq, clear 세대) - 다른 프로세스의 변경 확인용
+SyncPoint = Tuple[int, int, Optional[int]]
+
+
+def _fsync_write(path: str, writer):
+    """임시 파일에 쓰고 fsync 후 교체 (중단되면 임시 파일만 남음)"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        writer(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SegmentStore:
+    """컬렉션 하나의 세그먼트 파일 + SQLite 메타데이터 로그"""
+
+    def __init__(self, directory: str, collection: str,
+                 tokenizer: Optional[Callable[[str], str]] = None, tokenizer_version: int = 0):
+        """
+        Args:
+            tokenizer: 청크 내용 → FTS5 토큰 문자열 (lexical.to_document), None이면 어휘 인덱스 없음
+            tokenizer_version: 토크나이저가 바뀌면 올려서 어휘 인덱스를 다시 생성
+        """
+        self.db_path = os.path.join(directory, f"{collection}.sqlite")
+        self.segment_dir = os.path.join(directory, f"{collection}.segments")
+        os.makedirs(self.segment_dir, exist_ok=True)
+
+        self._db_lock = threading.Lock()
+        self._segments: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}  # 세그먼트 memmap 캐시
+
+        # 쓰기 잠금: 프로세스 내부(RLock, 재진입 허용) + 프로세스 간(잠금 파일 flock)
+        self._write_mutex = threading.RLock()
+        self._write_depth = 0
+        self._lock_file = open(os.path.join(directory, f"{collection}.lock"), 'a+')
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL DEFAULT '',
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                segment INTEGER NOT NULL,
+                row INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks(source);
+            CREATE INDEX IF NOT EXISTS idx_chunks_location ON chunks(segment, row);
+            CREATE INDEX IF NOT EXISTS idx_chunks_subject ON chunks(json_extract(metadata, '$.subject'));
+            CREATE INDEX IF NOT EXISTS idx_chunks_instructor ON chunks(json_extract(metadata, '$.instructor'));
+            CREATE TABLE IF NOT EXISTS ops (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                op TEXT NOT NULL,
+                segment INTEGER,
+                ids BLOB,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS manifest (
+                source TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                chunk_params TEXT NOT NULL,
+                ids BLOB NOT NULL,
+                indexed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_manifest_hash ON manifest(content_hash);
+            CREATE TABLE IF NOT EXISTS segment_numbers (
+                number INTEGER PRIMARY KEY AUTOINCREMENT
+            );
+        """)
+        # 이전 버전(폴더 목록 기준 번호)으로 만든 세그먼트보다 큰 번호부터 할당
+        on_disk = self._max_segment_on_disk()
+        if on_disk:
+            self._conn.execute("INSERT OR IGNORE INTO segment_numbers (number) VALUES (?)", (on_disk,))
+
+        self._tokenizer = tokenizer
+        self.lexical = tokenizer is not None and self._init_lexical(tokenizer_version)
+
+    # ---------- 상태 ----------
+
+    def get_state(self) -> Dict[str, Any]:
+        with self._db_lock:
+            rows = self._conn.execute("SELECT key, value FROM state").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def set_state(self, **values):
+        with self._db_lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in values.items()]
+            )
+
+    def is_empty(self) -> bool:
+        """아무것도 기록되지 않은 새 컬렉션인지"""
+        with self._db_lock:
+            return not any(self._conn.execute(
+                "SELECT 1 FROM chunks UNION ALL SELECT 1 FROM ops UNION ALL SELECT 1 FROM state LIMIT 1"
+            ).fetchall())
+
+    def last_seq(self) -> int:
+        with self._db_lock:
+            row = self._conn.execute("SELECT MAX(seq) FROM ops").fetchone()
+        return max(row[0] or 0, self.get_state().get('checkpoint_seq', 0))
+
+    def sync_point(self) -> SyncPoint:
+        """(마지막 seq, 체크포인트 seq, clear 세대) - 쿼리 1회 (검색마다 호출)"""
+        with self._db_lock:
+            last, checkpoint, epoch = self._conn.execute(
+                "SELECT (SELECT MAX(seq) FROM ops), "
+                "(SELECT value FROM state WHERE key = 'checkpoint_seq'), "
+                "(SELECT value FROM state WHERE key = 'epoch')"
+            ).fetchone()
+        checkpoint = json.loads(checkpoint) if checkpoint else 0
+        return max(last or 0, checkpoint), checkpoint, json.loads(epoch) if epoch else None
+
+    # ---------- 프로세스 간 잠금 ----------
+
+    @contextmanager
+    def write_lock(self, blocking: bool = True) -> Iterator[bool]:
+        """
+        추가/삭제/압축/정리 잠금 (같은 스레드에서 재진입 가능)
+
+        blocking=False면 다른 스레드/프로세스가 쓰는 중일 때 기다리지 않고 False를 넘김
+        """
+        if not self._write_mutex.acquire(blocking=blocking):
+            yield False
+            return
+        try:
+            if self._write_depth == 0 and fcntl is not None:
+                try:
+                    fcntl.flock(self._lock_file.fileno(),
+                                fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield False
+                    return
+            self._write_depth += 1
+            try:
+                yield True
+            finally:
+                self._write_depth -= 1
+                if self._write_depth == 0 and fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._write_mutex.release()
+
+    # ---------- 읽기 ----------
+
+    def count(self) -> int:
+        with self._db_lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def count_source(self, name: str) -> int:
+        """출처(저장 파일명) 또는 원본 파일명이 name인 청크 수"""
+        with self._db_lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM chunks WHERE source = ? OR json_extract(metadata, '$.original_filename') = ?",
+                (name, name)
+            ).fetchone()[0]
+
+    def _select_in(self, sql: str, ids: Sequence[int]) -> List[tuple]:
+        """WHERE id IN (...) 조회 (SQLite 변수 개수 제한 때문에 나눠서 실행)"""
+        ids = [int(i) for i in ids]
+        rows = []
+        with self._db_lock:
+            for i in range(0, len(ids), IN_BATCH):
+                batch = ids[i:i + IN_BATCH]
+                rows += self._conn.execute(sql.format(','.join('?' * len(batch))), batch).fetchall()
+        return rows
+
+    def existing_ids(self, ids: Sequence[int]) -> set:
+        """ids 중 저장되어 있는 청크 ID"""
+        return {row[0] for row in self._select_in("SELECT id FROM chunks WHERE id IN ({})", ids)}
+
+    def ids_of_source(self, source: str) -> List[int]:
+        with self._db_lock:
+            return [row[0] for row in self._conn.execute("SELECT id FROM chunks WHERE source = ?", (source,))]
+
+    def get_chunks(self, ids: Sequence[int]) -> Dict[int, Tuple[str, Dict[str, Any]]]:
+        """청크 ID → (내용, 메타데이터) - 검색 결과 top-k만 조회"""
+        rows = self._select_in("SELECT id, content, metadata FROM chunks WHERE id IN ({})", ids)
+        return {faiss_id: (content, json.loads(metadata)) for faiss_id, content, metadata in rows}
+
+    def locations(self, ids: Optional[Sequence[int]] = None) -> List[Tuple[int, int, int]]:
+        """(청크 ID, 세그먼트, 행) - ids가 없으면 전체 (저장 순서)"""
+        if ids is not None:
+            return self._select_in("SELECT id, segment, row FROM chunks WHERE id IN ({})", ids)
+        with self._db_lock:
+            return self._conn.execute("SELECT id, segment, row FROM chunks ORDER BY segment, row").fetchall()
+
+    def chunks(self, limit: Optional[int] = None, offset: int = 0) -> List[ChunkRow]:
+        """청크 목록 (저장 순서, limit/offset 페이지 단위)"""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT id, content, metadata, segment, row FROM chunks ORDER BY segment, row LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset)
+            ).fetchall()
+        return [(faiss_id, content, json.loads(metadata), segment, row)
+                for faiss_id, content, metadata, segment, row in rows]
+
+    def sources(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """출처(파일)별 청크 수 + 대표 메타데이터 (가장 먼저 기록된 청크, 출처 이름순)"""
+        with self._db_lock:
+            # MIN()과 함께 쓴 metadata는 최소값을 가진 행의 값 (SQLite 집계 규칙)
+            rows = self._conn.execute(
+                "SELECT source, COUNT(*), MIN(segment), metadata FROM chunks "
+                "GROUP BY source ORDER BY source LIMIT ?",
+                (-1 if limit is None else limit,)
+            ).fetchall()
+        return [{'source': source, 'chunks': count, 'metadata': json.loads(metadata)}
+                for source, count, _, metadata in rows]
+
+    def filter_ids(self, filters: Dict[str, Any]) -> Optional[np.ndarray]:
+        """
+        메타데이터 필터에 맞는 청크 ID (정렬된 int64 배열, 조건이 비어 있으면 None)
+
+        filters:
+            filename: 파일명 또는 목록 - 저장 파일명/원본 파일명과 부분 일치 (한쪽이 다른 쪽을 포함)
+            subject, instructor: 값 또는 목록 - 일치 (표현식 인덱스 사용)
+            uploaded_from, uploaded_to: 'YYYY-MM-DD' - 업로드 날짜 범위 (양 끝 포함)
+        """
+        clause = self._filter_clause(filters)
+        if clause is None:
+            return None
+        with self._db_lock:
+            rows = self._conn.execute(f"SELECT id FROM chunks WHERE {clause[0]} ORDER BY id", clause[1]).fetchall()
+        return np.array([row[0] for row in rows], dtype='int64')
+
+    @staticmethod
+    def _filter_clause(filters: Dict[str, Any]) -> Optional[Tuple[str, List[Any]]]:
+        """메타데이터 필터 → (chunks WHERE 조건, 파라미터), 조건이 비어 있으면 None"""
+        unknown = set(filters) - set(FILTER_FIELDS)
+        if unknown:
+            raise ValueError(f"지원하지 않는 필터: {', '.join(sorted(unknown))}")
+
+        def values(key):
+            value = filters.get(key)
+            if value is None or value == '':
+                return []
+            return [str(v) for v in (value if isinstance(value, (list, tuple, set)) else [value]) if v]
+
+        clauses, params = [], []
+        names = values('filename')
+        if names:
+            clauses.append("(" + " OR ".join(
+                f"instr(source, ?) > 0 OR (source != '' AND instr(?, source) > 0) OR "
+                f"instr({_ORIGINAL_FILENAME_SQL}, ?) > 0 OR "
+                f"({_ORIGINAL_FILENAME_SQL} != '' AND instr(?, {_ORIGINAL_FILENAME_SQL}) > 0)"
+                for _ in names
+            ) + ")")
+            for name in names:
+                params += [name] * 4
+        for key in ('subject', 'instructor'):
+            matches = values(key)
+            if matches:
+                clauses.append(f"json_extract(metadata, '$.{key}') IN ({','.join('?' * len(matches))})")
+                params += matches
+        for key, operator in (('uploaded_from', '>='), ('uploaded_to', '<=')):
+            bound = values(key)
+            if bound:
+                clauses.append(f"{_UPLOAD_DATE_SQL} {operator} ?")
+                params.append(bound[0][:10])
+        if not clauses:
+            return None
+        return ' AND '.join(clauses), params
+
+    # ---------- 어휘 검색 ----------
+
+    def _init_lexical(self, version: int) -> bool:
+        """FTS5 테이블 준비 (없거나 버전/청크 수가 다르면 다시 생성) - FTS5 미지원이면 False"""
+        try:
+            self._conn.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(tokens, tokenize = \"{FTS_TOKENIZE}\")"
+            )
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts_vocab USING fts5vocab(chunks_fts, 'row')"
+            )
+        except sqlite3.OperationalError as e:
+            print(f"[WARN] SQLite FTS5를 사용할 수 없어 어휘 검색을 사용하지 않습니다: {e}")
+            return False
+
+        stored_version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        indexed = self._conn.execute("SELECT COUNT(*) FROM chunks_fts").fetchone()[0]
+        if stored_version != version or indexed != self.count():
+            self._rebuild_lexical(version)
+        return True
+
+    def _rebuild_lexical(self, version: int, batch: int = 1000):
+        """모든 청크의 토큰 다시 생성"""
+        total = self.count()
+        print(f"[INFO] 어휘 인덱스 생성 중 (청크 {total}개)...")
+        with self._db_lock:
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.execute("DELETE FROM chunks_fts")
+                last_id = None
+                while True:
+                    rows = self._conn.execute(
+                        "SELECT id, content FROM chunks WHERE ? IS NULL OR id > ? ORDER BY id LIMIT ?",
+                        (last_id, last_id, batch)
+                    ).fetchall()
+                    if not rows:
+                        break
+                    self._conn.executemany(
+                        "INSERT INTO chunks_fts (rowid, tokens) VALUES (?, ?)",
+                        [(faiss_id, self._tokenizer(content)) for faiss_id, content in rows]
+                    )
+                    last_id = rows[-1][0]
+            self._conn.execute(f"PRAGMA user_version = {int(version)}")
+        print(f"[OK] 어휘 인덱스 생성 완료 (청크 {total}개)")
+
+    def lexical_search(self, tokens: Sequence[str], k: int,
+                       filters: Optional[Dict[str, Any]] = None) -> List[Tuple[int, float]]:
+        """
+        BM25 검색 - [(청크 ID, BM25 점수)] 높은 순 상위 k개
+
+        tokens: 쿼리 토큰 (lexical.tokenize), filters: filter_ids와 같은 메타데이터 필터
+        """
+        if not self.lexical or not tokens:
+            return []
+        tokens = list(dict.fromkeys(tokens))
+        with self._db_lock:
+            # 너무 흔한 토큰은 점수에 거의 기여하지 않고 후보만 늘리므로 제외 (모두 흔하면 그대로 사용)
+            total = self._conn.execute("SELECT COUNT(*) FROM chunks_fts").fetchone()[0]
+            frequency = dict(self._conn.execute(
+                f"SELECT term, doc FROM chunks_fts_vocab WHERE term IN ({','.join('?' * len(tokens))})", tokens
+            ).fetchall())
+            present = [token for token in tokens if frequency.get(token)]
+            selective = [token for token in present if frequency[token] <= LEXICAL_MAX_DF_RATIO * total]
+            terms = selective or present
+            if not terms:
+                return []
+
+            sql = ("SELECT rowid, bm25(chunks_fts) FROM chunks_fts WHERE chunks_fts MATCH ?")
+            params: List[Any] = [' OR '.join(f'"{term}"' for term in terms)]
+            clause = self._filter_clause(filters) if filters else None
+            if clause:
+                sql += f" AND rowid IN (SELECT id FROM chunks WHERE {clause[0]})"
+                params += clause[1]
+            rows = self._conn.execute(sql + " ORDER BY bm25(chunks_fts) LIMIT ?", params + [k]).fetchall()
+        # FTS5 bm25()는 관련도가 높을수록 작은(음수) 값
+        return [(faiss_id, -score) for faiss_id, score in rows]
+
+    def ops_since(self, seq: int) -> List[Op]:
+        """seq 이후 작업 로그 (재적용용)"""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT seq, op, segment, ids FROM ops WHERE seq > ? ORDER BY seq", (seq,)
+            ).fetchall()
+        return [(op_seq, op, segment, np.frombuffer(ids, dtype='int64') if ids is not None else None)
+                for op_seq, op, segment, ids in rows]
+
+    def segment(self, number: int) -> Tuple[np.ndarray, np.ndarray]:
+        """세그먼트 (벡터 memmap, 청크 ID)"""
+        cached = self._segments.get(number)
+        if cached is None:
+            base = os.path.join(self.segment_dir, f"seg_{number:06d}")
+            cached = (np.load(base + ".npy", mmap_mode='r'), np.load(base + ".ids.npy"))
+            self._segments[number] = cached
+        return cached
+
+    def forget_segments(self):
+        """세그먼트 memmap 캐시 비우기 (다른 프로세스가 압축으로 정리한 파일의 디스크 공간 반환)"""
+        self._segments.clear()
+
+    def fetch_vectors(self, locations: Sequence[Tuple[int, int]]) -> np.ndarray:
+        """(세그먼트, 행) 위치의 벡터를 주어진 순서대로 조회"""
+        if not len(locations):
+            return np.zeros((0, 0), dtype='float32')
+        locations = np.asarray(locations, dtype='int64')
+        result = None
+        for number in np.unique(locations[:, 0]):
+            vectors, _ = self.segment(int(number))
+            positions = np.nonzero(locations[:, 0] == number)[0]
+            rows = locations[positions, 1]
+            order = np.argsort(rows)  # memmap 순차 접근
+            if result is None:
+                result = np.empty((len(locations), vectors.shape[1]), dtype='float32')
+            result[positions[order]] = vectors[rows[order]]
+        return result
+
+    def read_checkpoint(self) -> Optional[faiss.Index]:
+        """마지막 체크포인트 인덱스 (없으면 None)"""
+        index_file = self.get_state().get('index_file')
+        if not index_file:
+            return None
+        return faiss.read_index(os.path.join(self.segment_dir, index_file))
+
+    # ---------- 매니페스트 ----------
+
+    def manifest_find(self, content_hash: str, model: str, chunk_params: str) -> List[Tuple[str, np.ndarray]]:
+        """같은 파일 내용 + 같은 임베딩 모델/청킹 설정으로 인덱싱된 (출처, 청크 ID) 목록 (최근 순)"""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT source, ids FROM manifest WHERE content_hash = ? AND model = ? AND chunk_params = ? "
+                "ORDER BY indexed_at DESC", (content_hash, model, chunk_params)
+            ).fetchall()
+        return [(source, np.frombuffer(ids, dtype='int64')) for source, ids in rows]
+
+    def set_manifest(self, source: str, content_hash: str, model: str, chunk_params: str, ids: Sequence[int]):
+        """출처(파일)의 내용 해시와 청크 ID 기록 (파일 청크 순서)"""
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO manifest (source, content_hash, model, chunk_params, ids, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (source, content_hash, model, chunk_params, np.asarray(ids, dtype='int64').tobytes(), time.time())
+            )
+
+    def remove_manifest(self, source: str):
+        with self._db_lock:
+            self._conn.execute("DELETE FROM manifest WHERE source = ?", (source,))
+
+    def manifest_count(self) -> int:
+        with self._db_lock:
+            return self._conn.execute("SELECT COUNT(*) FROM manifest").fetchone()[0]
+
+    # ---------- 쓰기 ----------
+
+    def _max_segment_on_disk(self) -> int:
+        numbers = [int(m.group(1)) for m in map(SEGMENT_PATTERN.match, os.listdir(self.segment_dir)) if m]
+        return max(numbers, default=0)
+
+    def _next_segment(self) -> int:
+        """새 세그먼트 번호 (SQLite 트랜잭션으로 할당 - 프로세스 간 중복 없음, 재사용 없음)"""
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            return self._conn.execute("INSERT INTO segment_numbers DEFAULT VALUES").lastrowid
+
+    def _write_segment(self, vectors: np.ndarray, ids: Sequence[int]) -> int:
+        number = self._next_segment()
+        base = os.path.join(self.segment_dir, f"seg_{number:06d}")
+        _fsync_write(base + ".ids.npy", lambda f: np.save(f, np.asarray(ids, dtype='int64')))
+        _fsync_write(base + ".npy", lambda f: np.save(f, np.ascontiguousarray(vectors, dtype='float32')))
+        return number
+
+    def append(self, vectors: np.ndarray, ids: Sequence[int], texts: Sequence[str],
+               metadatas: Sequence[Dict[str, Any]], sources: Sequence[str]) -> int:
+        """새 청크 추가 (write_lock 안에서 호출) - 작업 로그 seq 반환 (청크 i의 위치 = (세그먼트, i))"""
+        tokens = [self._tokenizer(text) for text in texts] if self.lexical else None
+        with self.write_lock(), self._db_lock:
+            number = self._write_segment(vectors, ids)
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO chunks (id, source, content, metadata, segment, row) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(int(faiss_id), source, text, json.dumps(metadata, ensure_ascii=False, default=str),
+                      number, row)
+                     for row, (faiss_id, text, metadata, source) in enumerate(zip(ids, texts, metadatas, sources))]
+                )
+                if tokens is not None:
+                    self._conn.executemany("DELETE FROM chunks_fts WHERE rowid = ?", [(int(i),) for i in ids])
+                    self._conn.executemany(
+                        "INSERT INTO chunks_fts (rowid, tokens) VALUES (?, ?)",
+                        [(int(faiss_id), token_text) for faiss_id, token_text in zip(ids, tokens)]
+                    )
+                seq = self._conn.execute(
+                    "INSERT INTO ops (op, segment, created_at) VALUES ('add', ?, ?)", (number, time.time())
+                ).lastrowid
+        return seq
+
+    def remove(self, ids: Sequence[int]) -> int:
+        """청크 삭제 기록 (write_lock 안에서 호출) - 작업 로그 seq 반환"""
+        ids = np.asarray(sorted(int(i) for i in ids), dtype='int64')
+        with self.write_lock(), self._db_lock:
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(int(i),) for i in ids])
+                if self.lexical:
+                    self._conn.executemany("DELETE FROM chunks_fts WHERE rowid = ?", [(int(i),) for i in ids])
+                seq = self._conn.execute(
+                    "INSERT INTO ops (op, ids, created_at) VALUES ('remove', ?, ?)", (ids.tobytes(), time.time())
+                ).lastrowid
+        return seq
+
+    def compact(self, index_bytes: np.ndarray, vectors: np.ndarray, ids: Sequence[int],
+                upto_seq: int, max_segment: int, **state) -> int:
+        """
+        체크포인트 + 세그먼트 병합
+
+        Args:
+            index_bytes: upto_seq 시점 인덱스 (faiss.serialize_index 결과)
+            vectors, ids: upto_seq 시점의 살아 있는 청크 벡터/ID (행 순서)
+            upto_seq: 체크포인트가 반영한 마지막 작업 로그 seq
+            max_segment: upto_seq 시점의 마지막 세그먼트 번호 (이후 세그먼트의 청크 위치는 유지)
+            state: 함께 기록할 상태 (index_type, metric, trained_size 등)
+
+        Returns:
+            병합된 세그먼트 번호
+
+        이전 세그먼트 파일은 호출 측이 메모리의 청크 위치를 갱신한 뒤 cleanup()으로 삭제합니다.
+        호출 측은 upto_seq 시점을 읽을 때부터 write_lock을 잡고 있어야 합니다.
+        """
+        with self.write_lock(), self._db_lock:
+            number = self._write_segment(vectors, ids)
+        index_file = f"index_{upto_seq:08d}.faiss"
+        _fsync_write(os.path.join(self.segment_dir, index_file), lambda f: f.write(index_bytes.tobytes()))
+
+        with self.write_lock(), self._db_lock:
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.executemany(
+                    "UPDATE chunks SET segment = ?, row = ? WHERE id = ? AND segment <= ?",
+                    [(number, row, int(faiss_id), max_segment) for row, faiss_id in enumerate(ids)]
+                )
+                self._conn.execute("DELETE FROM ops WHERE seq <= ?", (upto_seq,))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+                    [(key, json.dumps(value)) for key, value in
+                     dict(state, checkpoint_seq=upto_seq, index_file=index_file).items()]
+                )
+        return number
+
+    def cleanup(self) -> int:
+        """커밋되지 않았거나 더 이상 참조되지 않는 파일 삭제 - 삭제한 파일 수 반환"""
+        # 쓰기 잠금 안에서는 다른 프로세스가 커밋 전 세그먼트를 쓰고 있을 수 없음
+        with self.write_lock(), self._db_lock:
+            referenced = {row[0] for row in self._conn.execute(
+                "SELECT DISTINCT segment FROM chunks UNION SELECT segment FROM ops WHERE segment IS NOT NULL"
+            )}
+            row = self._conn.execute("SELECT value FROM state WHERE key = 'index_file'").fetchone()
+            index_file = json.loads(row[0]) if row else None
+
+            removed = 0
+            for name in os.listdir(self.segment_dir):
+                segment_match = SEGMENT_PATTERN.match(name) or re.match(r'^seg_(\d+)\.ids\.npy$', name)
+                if segment_match:
+                    number = int(segment_match.group(1))
+                    if number in referenced:
+                        continue
+                    self._segments.pop(number, None)
+                elif INDEX_PATTERN.match(name):
+                    if name == index_file:
+                        continue
+                elif not name.endswith('.tmp'):
+                    continue
+                try:
+                    os.remove(os.path.join(self.segment_dir, name))
+                    removed += 1
+                except OSError as e:
+                    print(f"[WARN] 세그먼트 파일 삭제 실패: {name} ({e})")
+        return removed
+
+    def clear(self):
+        """컬렉션 전체 삭제 (clear 세대를 바꿔 다른 프로세스가 인덱스를 다시 로드하게 함)"""
+        with self.write_lock():
+            with self._db_lock:
+                with self._conn:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    self._conn.execute("DELETE FROM chunks")
+                    if self.lexical:
+                        self._conn.execute("DELETE FROM chunks_fts")
+                    self._conn.execute("DELETE FROM ops")
+                    self._conn.execute("DELETE FROM state")
+                    self._conn.execute("DELETE FROM manifest")
+                    self._conn.execute("INSERT INTO state (key, value) VALUES ('epoch', ?)",
+                                       (json.dumps(time.time_ns()),))
+            self.cleanup()
+
+    def backup(self, db_target: str, segment_target: str):
+        """SQLite(온라인 백업)와 세그먼트 폴더 복사"""
+        with self.write_lock(), self._db_lock:
+            target = sqlite3.connect(db_target)
+            try:
+                self._conn.backup(target)
+            finally:
+                target.close()
+            shutil.copytree(self.segment_dir, segment_target)
+
+    def disk_usage(self) -> int:
+        """세그먼트/인덱스/SQLite 파일 크기 합계 (bytes)"""
+        total = 0
+        for name in os.listdir(self.segment_dir):
+            total += os.path.getsize(os.path.join(self.segment_dir, name))
+        for suffix in ('', '-wal'):
+            if os.path.exists(self.db_path + suffix):
+                total += os.path.getsize(self.db_path + suffix)
+        return total
+
+    def close(self):
+        with self._db_lock:
+            self._conn.close()
+        self._lock_file.close()
+        self._segments.clear()
@@ -1,14 +1,94 @@
 """
 간소화된 RAG 벡터 스토어 (FAISS 기반, ChromaDB 없이)
 Python 3.14 호환
+
+인덱스 종류는 문서 수에 따라 flat → hnsw → ivfpq로 자동 전환됩니다 (index_factory.py).
+
+거리 척도는 새 컬렉션의 경우 RAG_METRIC(기본 cosine)을 따르며, 이때 임베딩을 L2 정규화하여
+내적 인덱스에 넣으므로 검색 점수가 실제 코사인 유사도가 됩니다.
+이전 버전의 l2 컬렉션은 그대로 로드되며, migrate_vector_cosine.py로 변환할 수 있습니다.
+
+청크 ID는 출처(파일명)와 청크 내용의 해시로 정해지는 고정값이며 FAISS 인덱스에도 이 ID로 들어갑니다.
+- 같은 청크를 다시 추가하면 건너뜀 (중복 없음)
+- upsert_source(): 파일 재인덱싱 시 바뀐 청크만 삭제/추가 (변경 없으면 아무 작업 안 함)
+- upsert_source_stream(): 같은 동작을 청크 배치 단위로 (큰 문서를 전부 메모리에 올리지 않음)
+- remove_source(): 파일 삭제 시 해당 파일의 벡터 삭제
+- 매니페스트(파일 내용 sha256 → 청크 ID, 임베딩 모델, 청킹 설정): 같은 내용의 파일을 다른 파일명으로 다시
+  인덱싱하면 link_duplicate()가 저장된 임베딩을 복사하여 파싱/임베딩 없이 새 출처의 청크로 저장
+
+저장은 segment_store.py의 추가 전용 구조를 사용합니다 (추가/삭제한 청크만 기록).
+작업 로그가 RAG_COMPACT_OPS개 쌓이거나 hnsw의 삭제 항목 비율이 RAG_COMPACT_DEAD_RATIO를 넘으면
+백그라운드에서 세그먼트를 병합하고 인덱스 체크포인트를 기록합니다.
+이전 버전 파일({collection}.index/.pkl/.vectors.npy)은 첫 로드 때 가져온 뒤 .migrated로 이름을 바꿉니다.
+
+검색 방식(mode)은 dense / sparse(BM25, lexical.py + SQLite FTS5) / hybrid(RRF 결합)입니다.
+hybrid 결과의 score는 dense와 같은 임베딩 유사도이며, RRF 점수와 각 검색의 순위를 함께 반환합니다.
+
+청크 내용/메타데이터는 메모리에 올리지 않고 SQLite에서 검색 결과(top-k)만 조회하며,
+임베딩은 세그먼트 memmap에서 필요한 행만 읽습니다. 메모리에 상주하는 것은 FAISS 인덱스뿐이므로
+문서가 늘어도 작업자(worker)당 메모리가 거의 늘지 않고 시작 시 전체 로드가 없습니다.
+
+여러 uvicorn 워커가 같은 컬렉션을 공유합니다. 쓰기는 세그먼트 저장소의 프로세스 간 잠금 안에서
+다른 워커의 작업 로그를 먼저 재적용한 뒤 수행하고, 검색 전에도 새 작업 로그가 있으면 재적용합니다.
 """
+import hashlib
+import json
 import os
 import pickle
-from typing import List, Dict, Any, Optional
-from sentence_transformers import SentenceTransformer
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 import faiss
 import numpy as np
 
+from .index_factory import (
+    RAG_INDEX_TYPE, build_index, can_reconstruct, choose_index_type, configure_index,
+    create_empty_index, describe, exact_search, index_type_of, metric_of, needs_rebuild, normalize,
+    reconstruct_all, resolve_metric, search as index_search, search_params, supports_remove, to_similarity
+)
+from .embedding_backend import backend_of, load_embedding_model
+from .embedding_pipeline import EmbeddingPipeline
+from .lexical import TOKENIZER_VERSION, reciprocal_rank_fusion, to_document, tokenize
+from .segment_store import Op, SegmentStore
+
+# 압축(세그먼트 병합 + 인덱스 체크포인트) 조건
+COMPACT_OPS = int(os.getenv('RAG_COMPACT_OPS', '32'))
+COMPACT_DEAD_RATIO = float(os.getenv('RAG_COMPACT_DEAD_RATIO', '0.2'))
+
+# 검색 방식: dense(임베딩) | sparse(BM25 어휘) | hybrid(두 순위를 RRF로 결합)
+SEARCH_MODES = ('dense', 'sparse', 'hybrid')
+RAG_SEARCH_MODE = os.getenv('RAG_SEARCH_MODE', 'dense').lower()
+HYBRID_DEPTH = int(os.getenv('RAG_HYBRID_DEPTH', '4'))  # hybrid: 각 검색에서 k의 이 배수만큼 후보 (최소 20)
+
+# 필터 검색: 조건에 맞는 청크가 이 수 이하면 후보 벡터 전수 비교 (hnsw/ivfpq)
+FILTER_EXACT_MAX = int(os.getenv('RAG_FILTER_EXACT_MAX', '5000'))
+FILTER_CACHE_SIZE = 64  # 필터별 청크 ID 캐시 (추가/삭제 시 비움)
+
+
+# 같은 내용의 파일 사이에서 재사용하는 청크 메타데이터 (나머지는 새 파일의 메타데이터)
+CONTENT_METADATA_KEYS = ('chunk_id', 'page', 'page_end', 'total_pages', 'total_chunks')
+
+
+def source_of(metadata: Dict[str, Any]) -> str:
+    """청크의 출처 키 (저장된 파일명 - 삭제/재인덱싱 단위)"""
+    return metadata.get('filename') or metadata.get('source') or metadata.get('original_filename') or ''
+
+
+def chunk_id(source: str, text: str) -> int:
+    """출처 + 청크 내용 해시로 만든 고정 ID (FAISS int64 ID로 사용, 양수)"""
+    digest = hashlib.sha256(f"{source}\0{text}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') & 0x7FFF_FFFF_FFFF_FFFF
+
+
+def document_id(faiss_id: int) -> str:
+    """메타데이터/API용 청크 ID 문자열"""
+    return f"chunk_{faiss_id:016x}"
+
+
+def faiss_id_of(doc_id: str) -> int:
+    """document_id()의 역변환"""
+    return int(doc_id[len('chunk_'):], 16)
+
 
 class SimpleVectorStore:
     """FAISS 기반 간단한 벡터 스토어"""
@@ -17,9 +97,18 @@ class SimpleVectorStore:
         self,
         collection_name: str = "documents",
         persist_directory: str = "./simple_vector_db",
-        embedding_model: str = "jhgan/ko-sroberta-multitask"
+        embedding_model: str = "jhgan/ko-sroberta-multitask",
+        index_type: Optional[str] = None,
+        metric: Optional[str] = None
     ):
+        """
+        Args:
+            index_type: 'flat' | 'hnsw' | 'ivfpq' | 'auto' (None이면 RAG_INDEX_TYPE 환경 변수)
+            metric: 새 컬렉션의 거리 척도 'cosine' | 'l2' (None이면 RAG_METRIC 환경 변수)
+        """
         self.collection_name = collection_name
+        self.index_type_setting = (index_type or RAG_INDEX_TYPE).lower()
+        self.metric_setting = resolve_metric(metric)
         
         # Windows 한글 경로 문제 해결: ASCII 경로로 강제 변환
         import sys
@@ -44,26 +133,45 @@ class SimpleVectorStore:
         model_cache_dir = "./backend/model_cache"
         os.makedirs(model_cache_dir, exist_ok=True)
         
-        # 임베딩 모델 로드 (로컬 캐시 사용)
+        # 임베딩 모델 로드 (로컬 캐시 사용, RAG_EMBED_BACKEND: torch / onnx / onnx-int8)
         print(f"[INFO] 임베딩 모델 로드 중: {embedding_model}")
         print(f"📁 모델 캐시 경로: {model_cache_dir}")
-        self.embedding_model = SentenceTransformer(
-            embedding_model,
-            cache_folder=model_cache_dir
-        )
+        self.embedding_model = load_embedding_model(embedding_model, model_cache_dir)
         self.embedding_dimension = self.embedding_model.get_sentence_embedding_dimension()
+        # 문서 임베딩: 배치 크기 자동 조정 + 선택적 프로세스 풀 (RAG_EMBED_BATCH, RAG_EMBED_WORKERS)
+        self._pipeline = EmbeddingPipeline(self.embedding_model, embedding_model, model_cache_dir)
         
-        # FAISS 인덱스 초기화
-        self.index = faiss.IndexFlatL2(self.embedding_dimension)
+        # FAISS 인덱스 초기화 (저장된 컬렉션이 있으면 그 거리 척도를 따름)
+        self.index = create_empty_index(self.embedding_dimension, self.metric_setting, with_ids=True)
+        self.trained_size = 0  # ivfpq 학습에 사용한 벡터 수
+        self._count = 0        # 청크 수 (내용/메타데이터/위치는 SQLite에만 저장)
+        self._filter_cache: Dict[str, Optional[np.ndarray]] = {}  # 필터 → 청크 ID
         
-        # 문서 메타데이터 저장
-        self.documents = []
-        self.metadatas = []
+        # 인덱스/저장소 변경과 검색 결과 조회 보호 (임베딩 생성은 잠금 밖에서 수행)
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._ops_since_checkpoint = 0
+        self._checkpoint_due = False   # 인덱스를 새로 만들어 체크포인트가 필요한 상태
+        self._index_generation = 0     # _rebuild마다 증가 (압축 중 인덱스 교체 감지)
+        self._applied_seq = 0          # 인덱스에 반영한 마지막 작업 로그 seq (다른 프로세스 변경 감지)
+        self._epoch = None             # 반영한 clear 세대
         
-        # 저장된 인덱스 로드 시도
+        # 세그먼트 저장소 로드 (이전 버전 파일이면 가져오기)
+        self._store = SegmentStore(self.persist_directory, collection_name,
+                                   tokenizer=to_document, tokenizer_version=TOKENIZER_VERSION)
         self._load_index()
         
-        print(f"[OK] 벡터 스토어 초기화 완료 (문서 수: {len(self.documents)})")
+        print(f"[OK] 벡터 스토어 초기화 완료 (문서 수: {self._count})")
+    
+    @property
+    def metric(self) -> str:
+        """현재 컬렉션의 거리 척도 ('cosine' | 'l2')"""
+        return metric_of(self.index)
+    
+    def _encode(self, texts: List[str], progress_callback=None) -> np.ndarray:
+        """임베딩 생성 (cosine 컬렉션이면 L2 정규화), progress_callback(완료 청크 수, 전체 청크 수)"""
+        embeddings = self._pipeline.encode(texts, progress_callback)
+        return normalize(embeddings) if self.metric == 'cosine' else embeddings
     
     def add_documents(
         self,
@@ -71,141 +179,797 @@ class SimpleVectorStore:
         metadatas: Optional[List[Dict[str, Any]]] = None,
         progress_callback = None
     ) -> List[str]:
-        """문서 추가 (진행률 콜백 지원)"""
+        """
+        문서 추가 (진행률 콜백 지원)
+        
+        이미 저장된 청크(같은 출처 + 같은 내용)는 임베딩하지 않고 건너뜁니다.
+        
+        Returns:
+            입력 청크 순서대로의 청크 ID (건너뛴 청크 포함)
+        """
         if metadatas is None:
             metadatas = [{}] * len(texts)
         
+        all_ids = [chunk_id(source_of(metadata), text) for text, metadata in zip(texts, metadatas)]
+        
+        # 새 청크만 선택 (저장된 청크, 입력 내 중복 제외)
+        new_rows = []
+        seen = self._store.existing_ids(all_ids)
+        for i, faiss_id in enumerate(all_ids):
+            if faiss_id not in seen:
+                seen.add(faiss_id)
+                new_rows.append(i)
+        
+        skipped = len(texts) - len(new_rows)
+        if skipped:
+            print(f"[INFO] 이미 저장된(중복) 청크 {skipped}개 건너뜀")
+        if not new_rows:
+            return [document_id(faiss_id) for faiss_id in all_ids]
+        
+        new_texts = [texts[i] for i in new_rows]
+        new_ids = [all_ids[i] for i in new_rows]
+        
         # 임베딩 생성
-        print(f"[INFO] {len(texts)}개 문서 임베딩 생성 중...")
-        
-        # 배치 단위로 처리하여 진행률 업데이트
-        batch_size = 8
-        total_batches = (len(texts) + batch_size - 1) // batch_size
-        all_embeddings = []
-        
-        for i in range(0, len(texts), batch_size):
-            batch_texts = texts[i:i+batch_size]
-            batch_embeddings = self.embedding_model.encode(
-                batch_texts,
-                show_progress_bar=False,
-                convert_to_numpy=True
-            )
-            all_embeddings.append(batch_embeddings)
-            
-            # 진행률 콜백 호출
-            if progress_callback:
-                batch_num = (i // batch_size) + 1
-                progress = 50 + int((batch_num / total_batches) * 40)  # 50%~90%
-                progress_callback(batch_num, total_batches, progress)
+        print(f"[INFO] {len(new_texts)}개 문서 임베딩 생성 중...")
         
-        embeddings = np.vstack(all_embeddings)
+        # 배치가 끝날 때마다 진행률 콜백 호출 (완료 청크 수, 전체 청크 수, 50%~90%)
+        def report(done: int, total: int):
+            progress_callback(done, total, 50 + int(done / total * 40))
         
-        # FAISS 인덱스에 추가
-        self.index.add(embeddings.astype('float32'))
+        embeddings = self._encode(new_texts, report if progress_callback else None)
         
-        # 문서와 메타데이터 저장
+        with self._writing():
+            # 임베딩하는 동안 다른 요청(다른 프로세스 포함)이 같은 청크를 추가했으면 제외
+            existing = self._store.existing_ids(new_ids)
+            if existing:
+                fresh = [j for j, faiss_id in enumerate(new_ids) if faiss_id not in existing]
+                embeddings = embeddings[fresh]
+                new_rows = [new_rows[j] for j in fresh]
+                new_ids = [new_ids[j] for j in fresh]
+            if new_ids:
+                self._add_rows(embeddings, [texts[i] for i in new_rows],
+                               [metadatas[i] for i in new_rows], new_ids)
+        
+        print(f"[OK] {len(new_ids)}개 문서 추가 완료")
+        return [document_id(faiss_id) for faiss_id in all_ids]
+    
+    def _add_rows(self, embeddings: np.ndarray, texts: List[str],
+                  metadatas: List[Dict[str, Any]], ids: List[int]):
+        """임베딩된 새 청크를 세그먼트로 기록하고 인덱스에 추가 (잠금 안에서 호출)"""
+        metadatas = [{**metadata, "document_id": document_id(faiss_id)}
+                     for metadata, faiss_id in zip(metadatas, ids)]
+        
+        # 디스크: 새 청크만 세그먼트 1개 + SQLite 행으로 기록
+        self._applied_seq = self._store.append(embeddings, ids, texts, metadatas,
+                                               [source_of(metadata) for metadata in metadatas])
+        self._ops_since_checkpoint += 1
+        self._count += len(ids)
+        self._filter_cache.clear()
+        
+        # FAISS 인덱스에 추가 (문서 수가 임계값을 넘으면 인덱스 종류 전환/재학습)
+        rebuild_type = needs_rebuild(self.index, self._count, self.trained_size, self.index_type_setting)
+        if rebuild_type:
+            self._rebuild(rebuild_type)
+        else:
+            self.index.add_with_ids(embeddings, np.array(ids, dtype='int64'))
+        
+        self._maybe_compact()
+    
+    def upsert_source(
+        self,
+        source: str,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        progress_callback = None
+    ) -> Dict[str, Any]:
+        """
+        출처(파일) 단위 upsert - 해당 파일의 청크를 texts로 교체
+        
+        내용이 바뀌지 않은 청크는 그대로 두고, 사라진 청크만 삭제하고 새 청크만 임베딩합니다.
+        metadatas의 출처 키는 source로 맞춥니다.
+        
+        Returns:
+            {'source', 'document_ids', 'added', 'removed', 'unchanged'}
+        """
+        if metadatas is None:
+            metadatas = [{} for _ in texts]
+        metadatas = [{**metadata, 'filename': source} for metadata in metadatas]
+        
+        new_ids = {chunk_id(source, text) for text in texts}
+        with self._writing():
+            old_ids = set(self._store.ids_of_source(source))
+            stale = old_ids - new_ids
+            if stale:
+                self._remove_ids(stale)
+        unchanged = len(old_ids & new_ids)
+        added = len(new_ids - old_ids)
+        
+        if added:
+            # 저장된 청크는 add_documents에서 건너뛰므로 새 청크만 임베딩됨
+            document_ids = self.add_documents(texts, metadatas, progress_callback=progress_callback)
+        else:
+            document_ids = [document_id(chunk_id(source, text)) for text in texts]
+        
+        if not stale and not added:
+            print(f"[INFO] {source}: 변경 없음 (청크 {unchanged}개 유지)")
+        else:
+            print(f"[OK] {source}: 청크 {added}개 추가, {len(stale)}개 삭제, {unchanged}개 유지")
+        return {
+            'source': source,
+            'document_ids': document_ids,
+            'added': added,
+            'removed': len(stale),
+            'unchanged': unchanged
+        }
+    
+    def upsert_source_stream(
+        self,
+        source: str,
+        batches: Iterable[Tuple[List[str], List[Dict[str, Any]], float]],
+        progress_callback = None
+    ) -> Dict[str, Any]:
+        """
+        출처(파일) 단위 스트리밍 upsert - upsert_source()와 같은 결과를 배치마다 임베딩/저장하며 처리
+        
+        Args:
+            batches: (청크 텍스트, 메타데이터, 처리한 비율 0~1) 배치 (DocumentLoader.iter_batches)
+            progress_callback: (완료 청크 수, 지금까지 받은 청크 수, 진행률 10%~90%)
+        
+        사라진 청크는 모든 배치를 처리한 뒤 삭제하므로 처리 중에도 이전 내용이 검색됩니다.
+        청크가 하나도 없으면(텍스트 추출 실패) 기존 청크를 지우지 않고 빈 document_ids를 반환합니다.
+        
+        Returns:
+            {'source', 'document_ids', 'added', 'removed', 'unchanged'}
+        """
+        with self._lock:
+            old_ids = set(self._store.ids_of_source(source))
+        seen_ids = set()
         document_ids = []
-        for i, (text, metadata) in enumerate(zip(texts, metadatas)):
-            doc_id = f"doc_{len(self.documents) + i}"
-            document_ids.append(doc_id)
+        added = 0
+        done = 0
+        previous_fraction = 0.0
+        
+        for texts, metadatas, fraction in batches:
+            metadatas = [{**metadata, 'filename': source} for metadata in metadatas]
+            batch_ids = [chunk_id(source, text) for text in texts]
+            new_in_batch = {faiss_id for faiss_id in batch_ids if faiss_id not in old_ids and faiss_id not in seen_ids}
+            seen_ids.update(batch_ids)
+            added += len(new_in_batch)
+            
+            # 배치 안의 임베딩 진행률을 이전 배치 ~ 이번 배치 비율 사이로 보간
+            def report(batch_done: int, batch_total: int, _progress: int, start=previous_fraction, end=fraction):
+                position = start + (end - start) * batch_done / batch_total
+                progress_callback(done + batch_done, len(seen_ids), 10 + int(position * 80))
             
-            self.documents.append(text)
-            self.metadatas.append({
-                **metadata,
-                "document_id": doc_id
-            })
+            if new_in_batch:
+                document_ids.extend(self.add_documents(texts, metadatas,
+                                                       progress_callback=report if progress_callback else None))
+            else:
+                document_ids.extend(document_id(faiss_id) for faiss_id in batch_ids)
+            done += len(texts)
+            previous_fraction = fraction
+            if progress_callback:
+                progress_callback(done, len(seen_ids), 10 + int(fraction * 80))
+        
+        if not seen_ids:
+            # 텍스트를 추출하지 못한 경우 기존 청크는 유지
+            print(f"[WARN] {source}: 추출된 청크가 없어 기존 청크 {len(old_ids)}개를 유지합니다")
+            return {'source': source, 'document_ids': [], 'added': 0, 'removed': 0, 'unchanged': 0}
+        removed = self._prune_source(source, seen_ids)
+        unchanged = len(old_ids & seen_ids)
+        
+        if not removed and not added:
+            print(f"[INFO] {source}: 변경 없음 (청크 {unchanged}개 유지)")
+        else:
+            print(f"[OK] {source}: 청크 {added}개 추가, {removed}개 삭제, {unchanged}개 유지")
+        return {
+            'source': source,
+            'document_ids': document_ids,
+            'added': added,
+            'removed': removed,
+            'unchanged': unchanged
+        }
+    
+    def retain_source(self, source: str, document_ids: List[str]) -> int:
+        """출처(파일)의 청크 중 document_ids에 없는 청크 삭제 - 삭제된 청크 수 반환 (여러 파일을 함께 add_documents한 뒤 정리용)"""
+        return self._prune_source(source, {faiss_id_of(doc_id) for doc_id in document_ids})
+    
+    def _prune_source(self, source: str, keep_ids: set) -> int:
+        with self._writing():
+            stale = set(self._store.ids_of_source(source)) - keep_ids
+            if stale:
+                self._remove_ids(stale)
+        return len(stale)
+    
+    def remove_source(self, source: str) -> int:
+        """출처(파일)의 모든 청크 삭제 - 삭제된 청크 수 반환"""
+        with self._writing():
+            self._store.remove_manifest(source)
+            ids = self._store.ids_of_source(source)
+            if not ids:
+                return 0
+            self._remove_ids(ids)
+        print(f"[OK] {source}: 청크 {len(ids)}개 삭제")
+        return len(ids)
+    
+    def record_manifest(self, source: str, content_hash: str, chunk_params: Dict[str, Any],
+                        document_ids: List[str]):
+        """인덱싱을 마친 파일의 내용 해시 기록 (document_ids: 파일 청크 순서의 청크 ID)"""
+        ids = list(dict.fromkeys(faiss_id_of(doc_id) for doc_id in document_ids))
+        self._store.set_manifest(source, content_hash, self.embedding_model_name,
+                                 json.dumps(chunk_params, sort_keys=True), ids)
+    
+    def link_duplicate(self, source: str, content_hash: str, chunk_params: Dict[str, Any],
+                       metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        같은 내용(sha256)이 같은 임베딩 모델/청킹 설정으로 이미 인덱싱되어 있으면 파싱/임베딩 없이 인덱싱
         
-        # 인덱스 저장
-        self._save_index()
+        - source 자신이 같은 내용으로 인덱싱되어 있으면 변경 없음
+        - 다른 파일이면 그 청크의 저장된 임베딩을 복사해 source의 청크로 저장
+          (청크 메타데이터는 페이지 등 CONTENT_METADATA_KEYS만 가져오고 나머지는 metadata)
+        매니페스트의 청크가 하나라도 없어졌으면(삭제/재인덱싱) 그 기록은 사용하지 않습니다.
         
-        print(f"[OK] {len(texts)}개 문서 추가 완료")
-        return document_ids
+        Returns:
+            upsert_source()와 같은 결과 + 'linked_from' (없으면 None - 평소처럼 인덱싱)
+        """
+        params = json.dumps(chunk_params, sort_keys=True)
+        with self._writing():
+            entries = self._store.manifest_find(content_hash, self.embedding_model_name, params)
+            entries.sort(key=lambda entry: entry[0] != source)
+            for origin, ids in entries:
+                ids = [int(faiss_id) for faiss_id in ids]
+                if ids and len(self._store.existing_ids(ids)) == len(ids):
+                    break
+            else:
+                return None
+            
+            old_ids = set(self._store.ids_of_source(source))
+            if origin == source:
+                stale = old_ids - set(ids)
+                if stale:
+                    self._remove_ids(stale)
+                print(f"[INFO] {source}: 내용 변경 없음 (매니페스트, 청크 {len(ids)}개 유지)")
+                return {'source': source, 'document_ids': [document_id(faiss_id) for faiss_id in ids],
+                        'added': 0, 'removed': len(stale), 'unchanged': len(ids), 'linked_from': None}
+            
+            chunks = self._store.get_chunks(ids)
+            texts = [chunks[faiss_id][0] for faiss_id in ids]
+            metadatas = [{**{key: chunks[faiss_id][1][key] for key in CONTENT_METADATA_KEYS
+                             if key in chunks[faiss_id][1]},
+                          **metadata, 'filename': source} for faiss_id in ids]
+            new_ids = [chunk_id(source, text) for text in texts]
+            fresh = [i for i, faiss_id in enumerate(new_ids) if faiss_id not in old_ids]
+            if fresh:
+                vectors = self._fetch_vectors([ids[i] for i in fresh])
+                self._add_rows(vectors, [texts[i] for i in fresh], [metadatas[i] for i in fresh],
+                               [new_ids[i] for i in fresh])
+            stale = old_ids - set(new_ids)
+            if stale:
+                self._remove_ids(stale)
+            self._store.set_manifest(source, content_hash, self.embedding_model_name, params, new_ids)
+        
+        print(f"[OK] {source}: {origin}와 내용 동일 - 임베딩 {len(fresh)}개 재사용 (삭제 {len(stale)}개)")
+        return {'source': source, 'document_ids': [document_id(faiss_id) for faiss_id in new_ids],
+                'added': len(fresh), 'removed': len(stale), 'unchanged': len(new_ids) - len(fresh),
+                'linked_from': origin}
     
     def similarity_search(
         self,
         query: str,
-        k: int = 3
+        k: int = 3,
+        filters: Optional[Dict[str, Any]] = None,
+        mode: Optional[str] = None,
+        query_embedding: Optional[np.ndarray] = None
     ) -> List[Dict[str, Any]]:
-        """유사도 검색"""
-        if len(self.documents) == 0:
+        """
+        유사도 검색
+        
+        filters(filename/subject/instructor/uploaded_from/uploaded_to, segment_store.FILTER_FIELDS)를
+        지정하면 조건에 맞는 청크 안에서만 검색하므로 결과가 k개보다 적어지지 않습니다.
+        
+        mode: 'dense' | 'sparse' | 'hybrid' (None이면 RAG_SEARCH_MODE)
+            - dense : score = 임베딩 유사도 (cosine: 코사인 유사도, l2: 1/(1+거리))
+            - sparse: score = BM25 점수, sparse_rank 포함
+            - hybrid: score = 임베딩 유사도, fusion_score(RRF)/dense_rank/sparse_rank 포함
+        
+        query_embedding: encode_query(query) 결과를 미리 구한 경우 (쿼리 임베딩 캐시)
+        """
+        mode = self.resolve_search_mode(mode)
+        self._sync()
+        if self._count == 0:
             return []
         
-        # 쿼리 임베딩 생성
-        query_embedding = self.embedding_model.encode(
-            [query],
-            convert_to_numpy=True
-        ).astype('float32')
+        # 쿼리 임베딩 생성 (sparse는 임베딩 불필요)
+        if mode != 'sparse' and query_embedding is None:
+            query_embedding = self.encode_query(query)
         
-        # FAISS 검색
-        distances, indices = self.index.search(query_embedding, min(k, len(self.documents)))
+        with self._lock:
+            if self._count == 0:
+                return []
+            allowed = self._filter_ids(filters) if filters else None
+            if allowed is not None and not len(allowed):
+                return []
+            k = min(k, self._count if allowed is None else len(allowed))
+            depth = k if mode == 'dense' else max(k * HYBRID_DEPTH, 20)
+            metric = self.metric
+            
+            dense = self._dense_hits(query_embedding, depth, allowed) if mode != 'sparse' else []
+            sparse = self._store.lexical_search(tokenize(query), depth, filters) if mode != 'dense' else []
+            
+            if mode == 'dense':
+                ranked = [(faiss_id, {"score": to_similarity(distance, metric)}) for distance, faiss_id in dense]
+            elif mode == 'sparse':
+                ranked = [(faiss_id, {"score": float(score), "sparse_rank": rank})
+                          for rank, (faiss_id, score) in enumerate(sparse, 1)]
+            else:
+                dense_rank = {faiss_id: rank for rank, (_, faiss_id) in enumerate(dense, 1)}
+                sparse_rank = {faiss_id: rank for rank, (faiss_id, _) in enumerate(sparse, 1)}
+                fused = reciprocal_rank_fusion([list(dense_rank), list(sparse_rank)])
+                top = sorted(fused, key=fused.get, reverse=True)[:k]
+                
+                # 어휘 검색에서만 찾은 청크도 임베딩 유사도로 점수 표시 (RAG 유사도 임계값과 같은 척도)
+                similarity = {faiss_id: to_similarity(distance, metric) for distance, faiss_id in dense}
+                missing = [faiss_id for faiss_id in top if faiss_id not in similarity]
+                if missing:
+                    similarity.update(self._similarities(query_embedding[0], missing))
+                ranked = [(faiss_id, {"score": similarity[faiss_id], "fusion_score": fused[faiss_id],
+                                      "dense_rank": dense_rank.get(faiss_id),
+                                      "sparse_rank": sparse_rank.get(faiss_id)})
+                          for faiss_id in top]
+            
+            ranked = ranked[:k]
+            chunks = self._store.get_chunks([faiss_id for faiss_id, _ in ranked])
         
         # 결과 포맷팅
-        results = []
-        for distance, idx in zip(distances[0], indices[0]):
-            if idx < len(self.documents):
-                results.append({
-                    "content": self.documents[idx],
-                    "metadata": self.metadatas[idx],
-                    "score": float(1 / (1 + distance))  # 거리를 유사도로 변환
-                })
-        
-        return results
-    
-    def get_all_documents(self) -> List[Dict[str, Any]]:
-        """모든 문서 조회"""
         return [
             {
-                "content": doc,
-                "metadata": meta
+                "content": chunks[faiss_id][0],
+                "metadata": chunks[faiss_id][1],
+                **scores
+            }
+            for faiss_id, scores in ranked if faiss_id in chunks
+        ]
+    
+    def encode_query(self, query: str) -> np.ndarray:
+        """쿼리 임베딩 (1, 차원)"""
+        return self._encode([query])
+    
+    def resolve_search_mode(self, mode: Optional[str]) -> str:
+        """검색 방식 확인 (어휘 인덱스를 쓸 수 없으면 dense)"""
+        mode = (mode or RAG_SEARCH_MODE).lower()
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"지원하지 않는 검색 방식: {mode} (dense, sparse, hybrid)")
+        if mode != 'dense' and not self._store.lexical:
+            return 'dense'
+        return mode
+    
+    def _dense_hits(self, query_embedding: np.ndarray, k: int,
+                    allowed: Optional[np.ndarray]) -> List[Tuple[float, int]]:
+        """임베딩 검색 - 상위 k개 (거리, 청크 ID) (잠금 안에서 호출)"""
+        if allowed is not None:
+            return self._filtered_search(query_embedding, min(k, len(allowed)), allowed)
+        return self._search(query_embedding, min(k, self._count))
+    
+    def _similarities(self, query_vector: np.ndarray, ids: List[int]) -> Dict[int, float]:
+        """청크 ID별 임베딩 유사도 (원본 벡터로 정확히 계산)"""
+        vectors = self._fetch_vectors(ids)
+        metric = self.metric
+        if metric == 'cosine':
+            distances = vectors @ query_vector
+        else:
+            distances = ((vectors - query_vector) ** 2).sum(axis=1)
+        return {faiss_id: to_similarity(distance, metric) for faiss_id, distance in zip(ids, distances)}
+    
+    def _search(self, query_embedding: np.ndarray, k: int) -> List[Tuple[float, int]]:
+        """전체 검색 - 살아 있는 상위 k개 (거리, 청크 ID) (잠금 안에서 호출)"""
+        # FAISS 검색 (결과는 청크 ID) - hnsw에 남아 있는 삭제 항목만큼 더 찾아서 제외
+        dead = max(0, self.index.ntotal - self._count)
+        distances, indices = index_search(self.index, query_embedding, min(k + dead, self.index.ntotal),
+                                          self._fetch_vectors)
+        
+        # 근사 인덱스는 결과가 k개보다 적으면 -1을 반환
+        candidates = [(distance, int(faiss_id)) for distance, faiss_id in zip(distances[0], indices[0])
+                      if faiss_id >= 0]
+        live = self._store.existing_ids([faiss_id for _, faiss_id in candidates]) if dead else None
+        hits, returned = [], set()
+        for distance, faiss_id in candidates:
+            if faiss_id in returned or (live is not None and faiss_id not in live):
+                continue
+            returned.add(faiss_id)
+            hits.append((distance, faiss_id))
+            if len(hits) == k:
+                break
+        return hits
+    
+    def _filtered_search(self, query_embedding: np.ndarray, k: int, allowed: np.ndarray) -> List[Tuple[float, int]]:
+        """
+        필터 검색 - allowed(청크 ID) 안에서 상위 k개 (잠금 안에서 호출)
+        
+        - flat, 또는 후보가 많은 경우: FAISS ID selector로 인덱스 안에서 필터링
+        - 후보가 적은 경우(RAG_FILTER_EXACT_MAX 이하): 후보 벡터만 읽어 정확한 거리로 전수 비교
+          (hnsw/ivfpq는 후보 비율이 낮으면 그래프/클러스터 탐색 중 k개를 못 채울 수 있음)
+        """
+        if index_type_of(self.index) == 'flat' or len(allowed) > FILTER_EXACT_MAX:
+            distances, indices = index_search(self.index, query_embedding, k, self._fetch_vectors,
+                                              params=search_params(self.index, allowed))
+            hits, returned = [], set()
+            for distance, faiss_id in zip(distances[0], indices[0]):
+                if faiss_id >= 0 and int(faiss_id) not in returned:  # hnsw는 삭제 후 다시 추가된 ID가 중복될 수 있음
+                    returned.add(int(faiss_id))
+                    hits.append((distance, int(faiss_id)))
+            if len(hits) == k or len(allowed) > FILTER_EXACT_MAX * 4:
+                return hits
+        
+        distances, order = exact_search(self._fetch_vectors(allowed), query_embedding[0], k, self.metric)
+        return [(distance, int(allowed[row])) for distance, row in zip(distances, order)]
+    
+    def _filter_ids(self, filters: Dict[str, Any]) -> Optional[np.ndarray]:
+        """필터에 맞는 청크 ID (쓰기가 없는 동안 같은 필터는 캐시 사용, 잠금 안에서 호출)"""
+        key = json.dumps(filters, sort_keys=True, ensure_ascii=False, default=str)
+        if key not in self._filter_cache:
+            if len(self._filter_cache) >= FILTER_CACHE_SIZE:
+                self._filter_cache.pop(next(iter(self._filter_cache)))
+            self._filter_cache[key] = self._store.filter_ids(filters)
+        return self._filter_cache[key]
+    
+    def get_all_documents(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """문서 조회 (저장 순서, limit/offset으로 페이지 단위 조회)"""
+        return [
+            {
+                "content": content,
+                "metadata": metadata
             }
-            for doc, meta in zip(self.documents, self.metadatas)
+            for _, content, metadata, _, _ in self._store.chunks(limit, offset)
         ]
     
+    def list_sources(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """출처(파일)별 청크 수와 대표 메타데이터 - 청크 전체를 읽지 않음"""
+        return self._store.sources(limit)
+    
+    def count_matching(self, filters: Dict[str, Any]) -> int:
+        """메타데이터 필터에 맞는 청크 수 (조건이 비어 있으면 전체)"""
+        self._sync()
+        with self._lock:
+            allowed = self._filter_ids(filters)
+            return self._count if allowed is None else len(allowed)
+    
+    def count_source(self, name: str) -> int:
+        """파일명(저장 파일명 또는 원본 파일명)의 청크 수"""
+        return self._store.count_source(name)
+    
+    def close(self):
+        """임베딩 워커 프로세스 종료"""
+        self._pipeline.close()
+    
     def clear(self):
         """모든 데이터 삭제"""
-        self.index = faiss.IndexFlatL2(self.embedding_dimension)
-        self.documents = []
-        self.metadatas = []
-        self._save_index()
+        # 비운 컬렉션은 새 컬렉션으로 보고 현재 설정(RAG_METRIC)의 거리 척도 사용
+        with self._compact_lock, self._store.write_lock(), self._lock:
+            self._store.clear()
+            self.index = create_empty_index(self.embedding_dimension, self.metric_setting, with_ids=True)
+            self.trained_size = 0
+            self._count = 0
+            self._filter_cache.clear()
+            self._ops_since_checkpoint = 0
+            self._checkpoint_due = False
+            self._index_generation += 1
+            self._init_state()
+            self._applied_seq, _, self._epoch = self._store.sync_point()
         print("[OK] 벡터 스토어 초기화 완료")
     
     def count(self) -> int:
         """문서 개수"""
-        return len(self.documents)
+        self._sync()
+        return self._count
+    
+    def index_info(self) -> Dict[str, Any]:
+        """인덱스 종류/파라미터 + 저장 상태"""
+        self._sync()
+        return {**describe(self.index), 'setting': self.index_type_setting,
+                'metric_setting': self.metric_setting, 'trained_size': self.trained_size,
+                'deleted_pending': max(0, self.index.ntotal - self._count),
+                'ops_since_checkpoint': self._ops_since_checkpoint,
+                'compacting': self._compact_lock.locked(),
+                'search_mode': RAG_SEARCH_MODE, 'lexical': self._store.lexical,
+                'manifest_files': self._store.manifest_count(),
+                'embedding': {**self._pipeline.info(), 'backend': backend_of(self.embedding_model)}}
     
-    def _save_index(self):
-        """인덱스 저장"""
-        index_path = os.path.join(self.persist_directory, f"{self.collection_name}.index")
-        metadata_path = os.path.join(self.persist_directory, f"{self.collection_name}.pkl")
+    def rebuild_index(self, index_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        인덱스 강제 재구성 (index_type 지정 시 해당 종류로, 없으면 설정에 따라 선택)
         
-        # FAISS 인덱스 저장
-        faiss.write_index(self.index, index_path)
+        ivfpq는 현재 문서 전체로 다시 학습하며, 재구성 후 체크포인트를 기록합니다.
+        """
+        with self._writing():
+            target = choose_index_type(self._count, index_type or self.index_type_setting)
+            self._rebuild(target)
+        self.compact()
+        return self.index_info()
+    
+    def compact(self):
+        """
+        세그먼트 병합 + 인덱스 체크포인트 기록
         
-        # 메타데이터 저장
-        with open(metadata_path, 'wb') as f:
-            pickle.dump({
-                'documents': self.documents,
-                'metadatas': self.metadatas,
-                'embedding_model': self.embedding_model_name
-            }, f)
+        디스크 쓰기와 (hnsw 삭제 항목 정리를 위한) 인덱스 재구성은 인덱스 잠금 밖에서 수행하므로 검색은 계속됩니다.
+        프로세스 간 쓰기 잠금은 끝까지 잡고 있으므로 그동안 추가/삭제는 (모든 프로세스에서) 대기합니다.
+        """
+        self._compact(force=True)
+    
+    def _compact(self, force: bool):
+        with self._compact_lock, self._store.write_lock():
+            with self._lock:
+                self._sync_locked()
+                # 잠금을 기다리는 동안 다른 프로세스가 압축했으면 건너뜀
+                if not force and not self._compaction_due():
+                    return
+                upto_seq = self._applied_seq
+                chunks = self._store.locations()
+                max_segment = max((segment for _, segment, _ in chunks), default=0)
+                purge = not supports_remove(self.index) and self.index.ntotal > len(chunks)
+                index_bytes = None if purge else faiss.serialize_index(self.index)
+                index_type, metric, trained_size = index_type_of(self.index), self.metric, self.trained_size
+                generation = self._index_generation
+                ops_at_snapshot = self._ops_since_checkpoint
+            
+            ids = [faiss_id for faiss_id, _, _ in chunks]
+            vectors = (self._store.fetch_vectors([(segment, row) for _, segment, row in chunks]) if chunks
+                       else np.zeros((0, self.embedding_dimension), dtype='float32'))
+            new_index = None
+            if purge:
+                # hnsw는 삭제 항목을 그래프에서 뺄 수 없으므로 살아 있는 벡터로 재구성
+                new_index = build_index(index_type, self.embedding_dimension, vectors, metric,
+                                        ids=np.array(ids, dtype='int64'))
+                index_bytes = faiss.serialize_index(new_index)
+            
+            segment = self._store.compact(
+                index_bytes, vectors, ids, upto_seq, max_segment,
+                index_type=index_type, metric=metric, trained_size=trained_size,
+                dimension=self.embedding_dimension, embedding_model=self.embedding_model_name
+            )
+            
+            with self._lock:
+                if generation == self._index_generation:
+                    if new_index is not None:
+                        # 압축 중에 들어온 추가/삭제를 반영한 뒤 교체
+                        self._apply_ops(new_index, self._store.ops_since(upto_seq))
+                        self.index = new_index
+                    self._checkpoint_due = False
+                self._ops_since_checkpoint -= ops_at_snapshot
+                
+                # 청크 위치가 새 세그먼트로 커밋된 뒤, 진행 중인 검색이 없을 때 이전 세그먼트 삭제
+                self._store.cleanup()
+        
+        print(f"[OK] 벡터 스토어 압축 완료 (청크 {len(ids)}개 → 세그먼트 {segment}, 체크포인트 seq {upto_seq})")
+    
+    def _compaction_due(self) -> bool:
+        dead = self.index.ntotal - self._count
+        return (self._checkpoint_due or self._ops_since_checkpoint >= COMPACT_OPS
+                or (dead > 0 and dead >= COMPACT_DEAD_RATIO * self.index.ntotal))
+    
+    def _maybe_compact(self):
+        """압축 조건을 만족하면 백그라운드 압축 시작 (잠금 안에서 호출)"""
+        if not self._compaction_due():
+            return
+        if self._compact_lock.locked():
+            return
+        threading.Thread(target=self._compact_in_background, daemon=True,
+                         name=f"vector-compact-{self.collection_name}").start()
+    
+    def _compact_in_background(self):
+        try:
+            self._compact(force=False)
+        except Exception as e:
+            print(f"[WARN] 벡터 스토어 압축 실패: {e}")
+    
+    def _remove_ids(self, ids):
+        """청크 ID 삭제 (삭제 기록 + 인덱스 정리, 잠금 안에서 호출)"""
+        ids = self._store.existing_ids(list(ids))
+        if not ids:
+            return
+        self._applied_seq = self._store.remove(ids)
+        self._ops_since_checkpoint += 1
+        self._count -= len(ids)
+        self._filter_cache.clear()
+        
+        # 문서 수가 줄어 인덱스 종류가 바뀌면 재구성, hnsw는 삭제 항목을 검색 시 제외하고 압축 때 정리
+        rebuild_type = needs_rebuild(self.index, self._count, self.trained_size, self.index_type_setting)
+        if rebuild_type:
+            self._rebuild(rebuild_type)
+        elif supports_remove(self.index):
+            self.index.remove_ids(np.array(sorted(ids), dtype='int64'))
+        
+        self._maybe_compact()
+    
+    def _fetch_vectors(self, ids) -> np.ndarray:
+        """청크 ID의 원본 임베딩 (ID 순서대로, 세그먼트에서 조회)"""
+        for attempt in range(2):
+            locations = {faiss_id: (segment, row) for faiss_id, segment, row in self._store.locations(ids)}
+            try:
+                return self._store.fetch_vectors([locations[int(faiss_id)] for faiss_id in ids])
+            except FileNotFoundError:
+                # 위치를 읽은 뒤 다른 프로세스의 압축이 이전 세그먼트를 정리한 경우 → 새 위치로 다시 조회
+                if attempt:
+                    raise
+    
+    def _rebuild(self, index_type: str):
+        """모든 청크로 index_type 인덱스를 새로 생성 (ivfpq는 학습 포함, 잠금 안에서 호출)"""
+        chunks = self._store.locations()
+        previous = index_type_of(self.index)
+        print(f"[INFO] FAISS 인덱스 재구성: {previous} → {index_type} (벡터 {len(chunks)}개)")
+        vectors = (self._store.fetch_vectors([(segment, row) for _, segment, row in chunks]) if chunks
+                   else np.zeros((0, self.embedding_dimension), dtype='float32'))
+        self.index = build_index(index_type, self.embedding_dimension, vectors, self.metric,
+                                 ids=np.array([faiss_id for faiss_id, _, _ in chunks], dtype='int64'))
+        self.trained_size = len(chunks) if index_type == 'ivfpq' else 0
+        self._index_generation += 1
+        self._checkpoint_due = True
+    
+    def _apply_ops(self, index: faiss.Index, ops: List[Op]):
+        """체크포인트 이후 작업 로그를 인덱스에 재적용"""
+        for _, op, segment, ids in ops:
+            if op == 'add':
+                vectors, segment_ids = self._store.segment(segment)
+                index.add_with_ids(np.ascontiguousarray(vectors, dtype='float32'), segment_ids)
+            elif op == 'remove' and supports_remove(index):
+                index.remove_ids(ids)
     
     def _load_index(self):
-        """저장된 인덱스 로드"""
-        index_path = os.path.join(self.persist_directory, f"{self.collection_name}.index")
-        metadata_path = os.path.join(self.persist_directory, f"{self.collection_name}.pkl")
+        """저장된 컬렉션 로드 (체크포인트 인덱스 + 작업 로그 재적용, 청크 내용은 읽지 않음)"""
+        legacy_index = os.path.join(self.persist_directory, f"{self.collection_name}.index")
+        legacy_metadata = os.path.join(self.persist_directory, f"{self.collection_name}.pkl")
         
-        if os.path.exists(index_path) and os.path.exists(metadata_path):
+        # 다른 워커 프로세스가 쓰는 중에 정리/가져오기를 하지 않도록 쓰기 잠금 안에서 로드
+        with self._store.write_lock():
             try:
-                # FAISS 인덱스 로드
-                self.index = faiss.read_index(index_path)
+                if self._store.is_empty():
+                    if os.path.exists(legacy_index) and os.path.exists(legacy_metadata):
+                        self._import_legacy(legacy_index, legacy_metadata)
+                    else:
+                        self._init_state()
+                    self._applied_seq, _, self._epoch = self._store.sync_point()
+                    return
+                
+                # 커밋되지 않은 작업이 남긴 파일 정리 (중단 복구)
+                removed = self._store.cleanup()
+                if removed:
+                    print(f"[INFO] 미완료 작업 파일 {removed}개 정리")
                 
-                # 메타데이터 로드
-                with open(metadata_path, 'rb') as f:
-                    data = pickle.load(f)
-                    self.documents = data['documents']
-                    self.metadatas = data['metadatas']
+                replayed = self._reload_index()
+                print(f"[OK] 저장된 인덱스 로드 완료 (문서 수: {self._count}, "
+                      f"인덱스: {index_type_of(self.index)}, 거리: {self.metric}, 재적용 작업: {replayed}개)")
+                if self.metric != self.metric_setting:
+                    if self._count:
+                        print(f"[WARN] 컬렉션 거리 척도({self.metric})가 RAG_METRIC({self.metric_setting})과 다릅니다. "
+                              f"변환: python backend/migrate_vector_cosine.py")
+                    else:
+                        # 빈 컬렉션은 설정된 거리 척도로 새로 시작
+                        self.index = create_empty_index(self.embedding_dimension, self.metric_setting, with_ids=True)
+                        self._init_state()
                 
-                print(f"[OK] 저장된 인덱스 로드 완료 (문서 수: {len(self.documents)})")
+                self._rebuild_if_needed()
+                self._maybe_compact()
             except Exception as e:
                 print(f"[WARN]  인덱스 로드 실패: {e}")
                 print("새 인덱스를 생성합니다.")
+                self.index = create_empty_index(self.embedding_dimension, self.metric_setting, with_ids=True)
+                self._count = 0
+    
+    def _reload_index(self) -> int:
+        """체크포인트 인덱스 + 이후 작업 로그로 인덱스를 다시 구성 (쓰기 잠금 안에서 호출, 재적용 작업 수 반환)"""
+        state = self._store.get_state()
+        index = self._store.read_checkpoint()
+        if index is None:
+            index = create_empty_index(self.embedding_dimension, state.get('metric', self.metric_setting),
+                                       with_ids=True)
+        self.index = index
+        self.trained_size = state.get('trained_size', 0)
+        self._count = self._store.count()
+        
+        checkpoint_seq = state.get('checkpoint_seq', 0)
+        ops = self._store.ops_since(checkpoint_seq)
+        self._apply_ops(self.index, ops)
+        self._ops_since_checkpoint = len(ops)
+        self._applied_seq = ops[-1][0] if ops else checkpoint_seq
+        self._epoch = state.get('epoch')
+        
+        configure_index(self.index)
+        self._store.forget_segments()
+        self._filter_cache.clear()
+        self._index_generation += 1
+        self._checkpoint_due = False
+        return len(ops)
+    
+    def _rebuild_if_needed(self):
+        """설정(RAG_INDEX_TYPE)이나 문서 수에 맞지 않는 인덱스, 또는 인덱스에 없는 청크가 있으면 재구성"""
+        rebuild_type = needs_rebuild(self.index, self._count, self.trained_size, self.index_type_setting)
+        if rebuild_type or self.index.ntotal < self._count:
+            self._rebuild(rebuild_type or index_type_of(self.index))
+    
+    @contextmanager
+    def _writing(self):
+        """쓰기 구간 (프로세스 간 쓰기 잠금 + 인덱스 잠금, 다른 프로세스의 변경을 먼저 반영)"""
+        with self._store.write_lock(), self._lock:
+            self._sync_locked()
+            yield
+    
+    def _sync(self):
+        """검색/조회 전 다른 프로세스의 변경 반영 (쓰는 중인 프로세스가 있으면 기다리지 않고 현재 인덱스 사용)"""
+        last_seq, _, epoch = self._store.sync_point()
+        if epoch == self._epoch and last_seq <= self._applied_seq:
+            return
+        with self._store.write_lock(blocking=False) as acquired:
+            if acquired:
+                with self._lock:
+                    self._sync_locked()
+    
+    def _sync_locked(self):
+        """다른 프로세스의 추가/삭제/압축/초기화를 인덱스에 반영 (쓰기 잠금 + 인덱스 잠금 안에서 호출)"""
+        last_seq, checkpoint_seq, epoch = self._store.sync_point()
+        if epoch == self._epoch and last_seq <= self._applied_seq:
+            return
+        if epoch != self._epoch or checkpoint_seq > self._applied_seq:
+            # 다른 프로세스가 초기화했거나 반영하지 않은 작업까지 압축함 → 체크포인트부터 다시 로드
+            self._reload_index()
+        else:
+            ops = self._store.ops_since(self._applied_seq)
+            self._apply_ops(self.index, ops)
+            if ops:
+                self._applied_seq = ops[-1][0]
+            self._ops_since_checkpoint += len(ops)
+            self._count = self._store.count()
+            self._filter_cache.clear()
+        self._rebuild_if_needed()
+        self._maybe_compact()
+    
+    def _init_state(self):
+        """새 컬렉션의 거리 척도/모델 기록 (첫 체크포인트 전에 재시작해도 같은 척도로 로드)"""
+        self._store.set_state(metric=self.metric, dimension=self.embedding_dimension,
+                              embedding_model=self.embedding_model_name)
+    
+    def _import_legacy(self, index_path: str, metadata_path: str):
+        """이전 버전 파일(.index/.pkl/.vectors.npy)을 세그먼트 저장소로 가져오기 (중복 청크 제거)"""
+        legacy = faiss.read_index(index_path)
+        with open(metadata_path, 'rb') as f:
+            data = pickle.load(f)
+        documents, metadatas = data['documents'], data['metadatas']
+        legacy_ids = list(data.get('ids', []))
+        print(f"[INFO] 이전 버전 컬렉션 가져오는 중 (문서 {len(documents)}개)...")
+        
+        # 거리 척도는 기존 컬렉션 그대로 유지
+        self.index = create_empty_index(self.embedding_dimension, metric_of(legacy), with_ids=True)
+        
+        # 원본 임베딩: vectors.npy → flat/hnsw 인덱스 복원 → 재임베딩
+        vectors_path = os.path.join(self.persist_directory, f"{self.collection_name}.vectors.npy")
+        vectors = None
+        if os.path.exists(vectors_path):
+            vectors = np.load(vectors_path)
+            if len(vectors) != legacy.ntotal:
+                vectors = None
+        if vectors is None and can_reconstruct(legacy):
+            vectors = reconstruct_all(legacy, legacy_ids if len(legacy_ids) == legacy.ntotal else None)
+        if vectors is None and documents:
+            print("[INFO] 원본 임베딩이 없어 문서를 다시 임베딩합니다...")
+            vectors = self._encode(documents)
+        
+        keep, ids, seen = [], [], set()
+        for row, (text, metadata) in enumerate(zip(documents, metadatas)):
+            faiss_id = chunk_id(source_of(metadata), text)
+            if faiss_id not in seen:
+                seen.add(faiss_id)
+                keep.append(row)
+                ids.append(faiss_id)
+        
+        if ids:
+            with self._lock:
+                self._add_rows(np.asarray(vectors[keep], dtype='float32'),
+                               [documents[row] for row in keep], [metadatas[row] for row in keep], ids)
+                # 체크포인트는 로드가 끝난 뒤 백그라운드 압축으로 기록 (쓰기 잠금 안에서 compact()를 기다리지 않음)
+                self._checkpoint_due = True
+                self._maybe_compact()
+        else:
+            self._init_state()
+        
+        for path in (index_path, metadata_path, vectors_path):
+            if os.path.exists(path):
+                os.replace(path, path + ".migrated")
+        print(f"[OK] 이전 버전 컬렉션 가져오기 완료 (청크 {len(ids)}개, 중복 {len(documents) - len(ids)}개 제거)")
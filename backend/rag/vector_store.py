@@ -5,6 +5,8 @@ FAISS를 사용하여 문서 임베딩 저장 및 검색 (Python 3.14 호환)
 
 import os
 from typing import List, Dict, Optional
+from .embedding_backend import backend_of
+from .query_cache import RAG_QUERY_CACHE_PERSIST, QueryEmbeddingCache
 from .simple_vector_store import SimpleVectorStore
 
 
@@ -14,12 +16,16 @@ class VectorStoreManager:
     def __init__(self, 
                  persist_directory: str = "./simple_vector_db",
                  collection_name: str = "biohealth_docs",
-                 embedding_model: str = "jhgan/ko-sroberta-multitask"):
+                 embedding_model: str = "jhgan/ko-sroberta-multitask",
+                 index_type: Optional[str] = None,
+                 metric: Optional[str] = None):
         """
         Args:
             persist_directory: 벡터 DB 저장 디렉토리
             collection_name: 컬렉션 이름
             embedding_model: 임베딩 모델 (한국어 지원)
+            index_type: FAISS 인덱스 종류 ('flat', 'hnsw', 'ivfpq', 'auto' - None이면 RAG_INDEX_TYPE)
+            metric: 새 컬렉션의 거리 척도 ('cosine', 'l2' - None이면 RAG_METRIC)
         """
         self.persist_directory = persist_directory
         self.collection_name = collection_name
@@ -29,9 +35,17 @@ class VectorStoreManager:
         self.vectorstore = SimpleVectorStore(
             collection_name=collection_name,
             persist_directory=persist_directory,
-            embedding_model=embedding_model
+            embedding_model=embedding_model,
+            index_type=index_type,
+            metric=metric
         )
         
+        # 쿼리 임베딩 캐시 (RAG_QUERY_CACHE_SIZE, RAG_QUERY_CACHE_PERSIST=1이면 재시작 후에도 유지)
+        cache_path = (os.path.join(self.vectorstore.persist_directory, f"{collection_name}.query_cache.npz")
+                      if RAG_QUERY_CACHE_PERSIST else None)
+        self.query_cache = QueryEmbeddingCache(
+            path=cache_path, model=f"{embedding_model}:{backend_of(self.vectorstore.embedding_model)}")
+        
         print(f"[OK] 벡터 스토어 초기화 완료 (문서 수: {self.vectorstore.count()})")
     
     def add_documents(self, texts: List[str], metadatas: List[Dict] = None, progress_callback=None) -> List[str]:
@@ -61,59 +75,195 @@ class VectorStoreManager:
             print(f"[ERROR] 문서 추가 실패: {e}")
             return []
     
+    def upsert_documents(self, source: str, texts: List[str], metadatas: List[Dict] = None,
+                         progress_callback=None) -> Dict:
+        """
+        파일 단위 문서 교체 (재인덱싱)
+        
+        Args:
+            source: 출처 키 (저장된 파일명)
+            texts: 파일의 전체 청크 텍스트
+            metadatas: 메타데이터 리스트
+            progress_callback: 진행률 콜백 함수 (선택)
+            
+        Returns:
+            {'source', 'document_ids', 'added', 'removed', 'unchanged'} - 내용이 같으면 added/removed 0
+        """
+        return self.vectorstore.upsert_source(source, texts, metadatas, progress_callback=progress_callback)
+    
+    def upsert_document_stream(self, source: str, batches, progress_callback=None) -> Dict:
+        """
+        파일 단위 문서 교체 - 청크 배치를 받는 대로 임베딩/저장 (큰 문서용)
+        
+        Args:
+            source: 출처 키 (저장된 파일명)
+            batches: (텍스트 리스트, 메타데이터 리스트, 처리한 비율 0~1) 이터러블
+            progress_callback: 진행률 콜백 함수 (완료 청크 수, 받은 청크 수, 진행률)
+            
+        Returns:
+            {'source', 'document_ids', 'added', 'removed', 'unchanged'}
+        """
+        return self.vectorstore.upsert_source_stream(source, batches, progress_callback=progress_callback)
+    
+    def retain_source(self, source: str, document_ids: List[str]) -> int:
+        """
+        파일의 청크 중 document_ids에 없는 청크 삭제 (일괄 인덱싱 후 파일별 정리)
+        
+        Args:
+            source: 출처 키 (저장된 파일명)
+            document_ids: 유지할 청크 ID (add_documents 반환값)
+            
+        Returns:
+            삭제된 청크 수
+        """
+        return self.vectorstore.retain_source(source, document_ids)
+    
+    def link_duplicate(self, source: str, content_hash: str, chunk_params: Dict, metadata: Dict) -> Optional[Dict]:
+        """
+        같은 내용의 파일이 이미 인덱싱되어 있으면 그 임베딩을 재사용하여 인덱싱 (파싱/임베딩 없음)
+        
+        Args:
+            source: 출처 키 (저장된 파일명)
+            content_hash: 파일 내용 sha256 (document_loader.file_sha256)
+            chunk_params: 청킹 설정 (DocumentLoader.chunk_params())
+            metadata: 새 파일의 메타데이터 (DocumentLoader.file_metadata())
+            
+        Returns:
+            {'source', 'document_ids', 'added', 'removed', 'unchanged', 'linked_from'} - 같은 내용이 없으면 None
+        """
+        try:
+            return self.vectorstore.link_duplicate(source, content_hash, chunk_params, metadata)
+        except Exception as e:
+            print(f"[WARN] 매니페스트 재사용 실패 (새로 인덱싱): {e}")
+            return None
+    
+    def record_manifest(self, source: str, content_hash: str, chunk_params: Dict, document_ids: List[str]):
+        """
+        인덱싱을 마친 파일의 내용 해시 기록 (다음에 같은 내용이면 link_duplicate로 재사용)
+        
+        Args:
+            source: 출처 키 (저장된 파일명)
+            content_hash: 파일 내용 sha256
+            chunk_params: 청킹 설정 (DocumentLoader.chunk_params())
+            document_ids: 파일의 청크 ID
+        """
+        try:
+            self.vectorstore.record_manifest(source, content_hash, chunk_params, document_ids)
+        except Exception as e:
+            print(f"[WARN] 매니페스트 기록 실패: {e}")
+    
+    def delete_source(self, source: str) -> int:
+        """
+        파일의 모든 청크 삭제
+        
+        Args:
+            source: 출처 키 (저장된 파일명)
+            
+        Returns:
+            삭제된 청크 수
+        """
+        try:
+            return self.vectorstore.remove_source(source)
+        except Exception as e:
+            print(f"[ERROR] 문서 삭제 실패: {e}")
+            return 0
+    
     def search(self, 
                query: str, 
-               k: int = 3) -> List[Dict]:
+               k: int = 3,
+               filters: Optional[Dict] = None,
+               mode: Optional[str] = None) -> List[Dict]:
         """
         유사도 검색
         
         Args:
             query: 검색 쿼리
             k: 반환할 문서 수
+            filters: 메타데이터 필터 (선택) - 조건에 맞는 청크 안에서만 검색
+                filename: 파일명 또는 목록 (저장/원본 파일명 부분 일치)
+                subject, instructor: 값 또는 목록
+                uploaded_from, uploaded_to: 'YYYY-MM-DD' 업로드 날짜 범위
+            mode: 'dense' | 'sparse'(BM25) | 'hybrid'(RRF 결합) - None이면 RAG_SEARCH_MODE
             
         Returns:
             유사한 문서 리스트
         """
         try:
-            results = self.vectorstore.similarity_search(query, k=k)
+            # 쿼리 임베딩은 캐시 사용 (sparse는 임베딩 불필요, 거리 척도별로 벡터가 다름)
+            mode = self.vectorstore.resolve_search_mode(mode)
+            query_embedding = None if mode == 'sparse' else self.query_cache.get_or_compute(
+                query, self.vectorstore.encode_query, namespace=self.vectorstore.metric)
+            results = self.vectorstore.similarity_search(query, k=k, filters=filters, mode=mode,
+                                                         query_embedding=query_embedding)
             print(f"[DEBUG] 검색 완료: {len(results)}개 문서")
             return results
             
+        except ValueError:
+            raise  # 잘못된 필터
         except Exception as e:
             print(f"[ERROR] 검색 실패: {e}")
             return []
     
     def search_with_score(self, 
                           query: str, 
-                          k: int = 3) -> List[Dict]:
+                          k: int = 3,
+                          filters: Optional[Dict] = None,
+                          mode: Optional[str] = None) -> List[Dict]:
         """
         유사도 점수와 함께 검색
         
         Args:
             query: 검색 쿼리
             k: 반환할 문서 수
+            filters: 메타데이터 필터 (search 참고)
+            mode: 검색 방식 (search 참고)
             
         Returns:
             문서와 점수 리스트
         """
-        return self.search(query, k)
+        return self.search(query, k, filters, mode)
+    
+    def count_matching(self, filters: Dict) -> int:
+        """메타데이터 필터에 맞는 청크 수 (조건이 비어 있으면 전체)"""
+        return self.vectorstore.count_matching(filters)
     
-    def get_all_documents(self) -> List[Dict]:
+    def get_all_documents(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
         """
-        모든 문서 조회
+        문서(청크) 조회
         
+        Args:
+            limit: 최대 청크 수 (None이면 전체 - 대형 컬렉션에서는 페이지 단위로 조회)
+            offset: 건너뛸 청크 수
+            
         Returns:
-            모든 문서 리스트
+            문서 리스트
         """
         try:
-            documents = self.vectorstore.get_all_documents()
-            print(f"[DOC] 총 {len(documents)}개 문서")
+            documents = self.vectorstore.get_all_documents(limit, offset)
+            print(f"[DOC] {len(documents)}개 문서 조회")
             return documents
             
         except Exception as e:
             print(f"[ERROR] 문서 조회 실패: {e}")
             return []
     
+    def list_sources(self, limit: Optional[int] = None) -> List[Dict]:
+        """
+        파일(출처)별 청크 수 조회 (청크 내용은 읽지 않음)
+        
+        Returns:
+            [{'source', 'chunks', 'metadata'}] - metadata는 파일의 대표 청크 메타데이터
+        """
+        try:
+            return self.vectorstore.list_sources(limit)
+        except Exception as e:
+            print(f"[ERROR] 파일 목록 조회 실패: {e}")
+            return []
+    
+    def count_source(self, filename: str) -> int:
+        """파일명(저장 파일명 또는 원본 파일명)의 청크 수"""
+        return self.vectorstore.count_source(filename)
+    
     def count_documents(self) -> int:
         """
         문서 개수 조회
@@ -123,6 +273,29 @@ class VectorStoreManager:
         """
         return self.vectorstore.count()
     
+    @property
+    def metric(self) -> str:
+        """컬렉션 거리 척도 ('cosine': 점수 = 코사인 유사도, 'l2': 점수 = 1/(1+거리))"""
+        return self.vectorstore.metric
+    
+    def index_info(self) -> Dict:
+        """FAISS 인덱스 종류/파라미터"""
+        return self.vectorstore.index_info()
+    
+    def rebuild_index(self, index_type: Optional[str] = None) -> Dict:
+        """
+        FAISS 인덱스 재구성
+        
+        Args:
+            index_type: 'flat', 'hnsw', 'ivfpq', 'auto' (None이면 현재 설정)
+            
+        Returns:
+            재구성된 인덱스 정보
+        """
+        info = self.vectorstore.rebuild_index(index_type)
+        print(f"[OK] 인덱스 재구성 완료: {info['type']} (벡터 {info['ntotal']}개)")
+        return info
+    
     def clear(self):
         """벡터 스토어 초기화 (모든 데이터 삭제)"""
         try:
@@ -131,6 +304,15 @@ class VectorStoreManager:
         except Exception as e:
             print(f"[ERROR] 벡터 스토어 초기화 실패: {e}")
     
+    def query_cache_stats(self) -> Dict:
+        """쿼리 임베딩 캐시 통계 (적중률/항목 수)"""
+        return self.query_cache.stats()
+    
+    def close(self):
+        """종료 시 쿼리 임베딩 캐시 저장 + 임베딩 워커 프로세스 종료"""
+        self.query_cache.save()
+        self.vectorstore.close()
+    
     def delete_collection(self):
         """컬렉션 삭제"""
         self.clear()
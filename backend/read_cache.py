@@ -0,0 +1,354 @@
+"""
+참조 테이블 읽기 캐시 모듈
+courses, subjects, instructors, instructor_codes, holidays, system_settings처럼
+거의 모든 요청에서 읽지만 드물게 바뀌는 테이블의 조회 결과를 프로세스 메모리에 캐시합니다.
+
+- 키: (SQL, 파라미터), 항목마다 의존 테이블 태그
+- TTL 만료 + LRU 최대 항목 수 제한
+- 쓰기 후 무효화: 커넥션 풀이 커밋된 INSERT/UPDATE/DELETE 대상 테이블을 알려주면
+  해당 테이블 태그를 가진 항목을 제거 (핸들러에서 별도 호출 불필요)
+- 워커 간 무효화 전파 백엔드 (READ_CACHE_BACKEND)
+    local  : 단일 프로세스 (기본값)
+    file   : 공유 디렉토리의 테이블별 버전 파일을 주기적으로 확인
+    socket : UNIX 도메인 소켓 datagram 브로드캐스트
+"""
+
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+READ_CACHE_TTL = float(os.getenv('READ_CACHE_TTL', '60'))
+READ_CACHE_MAX_ENTRIES = int(os.getenv('READ_CACHE_MAX_ENTRIES', '512'))
+READ_CACHE_BACKEND = os.getenv('READ_CACHE_BACKEND', 'local').lower()
+READ_CACHE_DIR = os.getenv('READ_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'bh2025_read_cache'))
+
+
+# ==================== 무효화 전파 백엔드 ====================
+
+class LocalInvalidationBackend:
+    """단일 프로세스용 (다른 워커로 전파하지 않음)"""
+
+    name = 'local'
+
+    def start(self, on_invalidate: Callable[[Iterable[str]], None]):
+        pass
+
+    def publish(self, tables: Sequence[str]):
+        pass
+
+    def poll(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FileInvalidationBackend:
+    """
+    공유 디렉토리 기반 무효화 전파
+
+    테이블마다 `{table}.ver` 파일을 두고, 쓰기가 커밋되면 파일을 새로 교체합니다.
+    각 워커는 캐시 조회 시(poll_interval 간격으로) 파일의 inode/mtime 변화를 확인합니다.
+    """
+
+    name = 'file'
+
+    def __init__(self, directory: str, poll_interval: float = 0.5):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.poll_interval = poll_interval
+        self._on_invalidate: Optional[Callable[[Iterable[str]], None]] = None
+        self._seen: Dict[str, Tuple[int, int]] = {}
+        self._last_poll = 0.0
+        self._lock = threading.Lock()
+
+    def start(self, on_invalidate: Callable[[Iterable[str]], None]):
+        self._on_invalidate = on_invalidate
+        with self._lock:
+            self._seen = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        versions = {}
+        for path in self.directory.glob('*.ver'):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            versions[path.stem] = (st.st_ino, st.st_mtime_ns)
+        return versions
+
+    def publish(self, tables: Sequence[str]):
+        for table in tables:
+            path = self.directory / f"{table}.ver"
+            tmp = self.directory / f".{table}.{os.getpid()}.{uuid.uuid4().hex}"
+            try:
+                tmp.write_text(uuid.uuid4().hex)
+                os.replace(tmp, path)  # 새 inode로 교체되므로 mtime 해상도와 무관하게 감지됨
+                st = path.stat()
+                with self._lock:
+                    self._seen[table] = (st.st_ino, st.st_mtime_ns)
+            except OSError as e:
+                print(f"[WARN] 읽기 캐시 무효화 파일 기록 실패 ({table}): {e}")
+
+    def poll(self):
+        now = time.monotonic()
+        if now - self._last_poll < self.poll_interval:
+            return
+        with self._lock:
+            self._last_poll = now
+            current = self._scan()
+            changed = [t for t, v in current.items() if self._seen.get(t) != v]
+            self._seen = current
+        if changed and self._on_invalidate:
+            self._on_invalidate(changed)
+
+    def close(self):
+        pass
+
+
+class UnixSocketBroadcastBackend:
+    """
+    UNIX 도메인 소켓 브로드캐스트 기반 무효화 전파
+
+    워커마다 `{directory}/cache-{pid}.sock` datagram 소켓을 열고,
+    쓰기가 커밋되면 디렉토리의 다른 모든 소켓으로 테이블 목록을 전송합니다.
+    """
+
+    name = 'socket'
+
+    def __init__(self, directory: str):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise OSError("이 플랫폼은 UNIX 도메인 소켓을 지원하지 않습니다")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f"cache-{os.getpid()}.sock"
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._on_invalidate: Optional[Callable[[Iterable[str]], None]] = None
+
+    def start(self, on_invalidate: Callable[[Iterable[str]], None]):
+        self._on_invalidate = on_invalidate
+        if self.path.exists():
+            self.path.unlink()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(str(self.path))
+        self._thread = threading.Thread(target=self._listen, name='read-cache-listener', daemon=True)
+        self._thread.start()
+
+    def _listen(self):
+        while self._sock is not None:
+            try:
+                data = self._sock.recv(65536)
+                tables = json.loads(data.decode('utf-8'))
+            except OSError:
+                break
+            except Exception:
+                continue
+            if self._on_invalidate and tables:
+                self._on_invalidate(tables)
+
+    def publish(self, tables: Sequence[str]):
+        if not tables:
+            return
+        payload = json.dumps(list(tables)).encode('utf-8')
+        sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            for peer in self.directory.glob('cache-*.sock'):
+                if peer == self.path:
+                    continue
+                try:
+                    sender.sendto(payload, str(peer))
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # 종료된 워커의 소켓 파일 정리
+                    try:
+                        peer.unlink()
+                    except OSError:
+                        pass
+                except OSError as e:
+                    print(f"[WARN] 읽기 캐시 무효화 전송 실패 ({peer.name}): {e}")
+        finally:
+            sender.close()
+
+    def poll(self):
+        pass
+
+    def close(self):
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            sock.close()
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+
+
+def create_backend(name: str = READ_CACHE_BACKEND, directory: str = READ_CACHE_DIR):
+    """READ_CACHE_BACKEND 설정에 맞는 백엔드 생성 (실패 시 local로 대체)"""
+    try:
+        if name == 'file':
+            return FileInvalidationBackend(directory)
+        if name == 'socket':
+            return UnixSocketBroadcastBackend(directory)
+    except OSError as e:
+        print(f"[WARN] 읽기 캐시 백엔드 '{name}' 사용 불가, local로 대체: {e}")
+    return LocalInvalidationBackend()
+
+
+# ==================== 캐시 ====================
+
+class ReadCache:
+    """TTL + LRU 읽기 캐시 (스레드 안전)"""
+
+    def __init__(self, max_entries: int = READ_CACHE_MAX_ENTRIES, default_ttl: float = READ_CACHE_TTL,
+                 backend=None):
+        self.max_entries = max(1, max_entries)
+        self.default_ttl = default_ttl
+        self.backend = backend or LocalInvalidationBackend()
+
+        # key -> (value, expires_at, tables)
+        self._entries: "OrderedDict[Any, Tuple[Any, float, Tuple[str, ...]]]" = OrderedDict()
+        # 테이블별 무효화 세대 (조회 중 무효화된 결과를 저장하지 않기 위해 사용)
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._started = False
+        self._listeners: List[Callable[[set], None]] = []
+
+        # 통계
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+        self._remote_invalidations = 0
+
+    def start(self):
+        """백엔드 리스너 시작 (startup 이벤트에서 호출)"""
+        if self._started:
+            return
+        self._started = True
+        self.backend.start(self._on_remote_invalidate)
+
+    def close(self):
+        self.backend.close()
+        self._started = False
+
+    def get_or_load(self, key: Any, tables: Sequence[str], loader: Callable[[], Any],
+                    ttl: Optional[float] = None) -> Any:
+        """캐시 조회, 없으면 loader() 결과를 저장 후 반환"""
+        self.backend.poll()
+        now = time.monotonic()
+        tables = tuple(tables)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+            generations = tuple(self._generations.get(t, 0) for t in tables)
+
+        value = loader()
+
+        with self._lock:
+            # 조회하는 동안 의존 테이블이 변경되었으면 저장하지 않음
+            if generations == tuple(self._generations.get(t, 0) for t in tables):
+                ttl = self.default_ttl if ttl is None else ttl
+                self._entries[key] = (value, time.monotonic() + ttl, tables)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        return value
+
+    def add_invalidation_listener(self, listener: Callable[[set], None]):
+        """테이블 무효화(로컬 커밋 + 다른 워커 전파) 시 테이블 이름 집합으로 호출됨
+
+        캐시 밖에서 별도로 보관하는 파생 데이터(설정값 등)를 함께 갱신할 때 사용합니다.
+        """
+        self._listeners.append(listener)
+
+    def _invalidate_local(self, tables: Iterable[str]) -> int:
+        tables = set(tables)
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            stale = [k for k, (_, _, deps) in self._entries.items() if tables.intersection(deps)]
+            for key in stale:
+                del self._entries[key]
+            self._invalidations += len(stale)
+        for listener in self._listeners:
+            try:
+                listener(tables)
+            except Exception as e:
+                print(f"[WARN] 읽기 캐시 무효화 리스너 오류: {e}")
+        return len(stale)
+
+    def invalidate(self, tables: Iterable[str]) -> int:
+        """테이블 변경 시 호출 - 해당 테이블에 의존하는 항목 제거 후 다른 워커에 전파"""
+        tables = sorted(set(tables))
+        if not tables:
+            return 0
+        removed = self._invalidate_local(tables)
+        self.backend.publish(tables)
+        return removed
+
+    def _on_remote_invalidate(self, tables: Iterable[str]):
+        with self._lock:
+            self._remote_invalidations += 1
+        self._invalidate_local(tables)
+
+    def clear(self):
+        with self._lock:
+            for table in {t for _, _, deps in self._entries.values() for t in deps}:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'backend': self.backend.name,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'default_ttl': self.default_ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'invalidations': self._invalidations,
+                'remote_invalidations': self._remote_invalidations,
+            }
+
+
+read_cache = ReadCache(backend=create_backend())
+
+
+def cached_fetchall(cursor, sql: str, params: Optional[Sequence[Any]] = None,
+                    tables: Sequence[str] = (), ttl: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    cursor.execute(sql, params) + fetchall() 결과를 캐시
+
+    반환되는 행은 복사본이므로 호출한 쪽에서 수정해도 캐시에 영향이 없습니다.
+    (DictCursor 결과 전용 - 같은 SQL을 다른 커서 타입으로 캐시하지 마세요)
+    """
+    key = (sql, tuple(params) if params else ())
+
+    def load():
+        cursor.execute(sql, params)
+        return tuple(dict(row) for row in cursor.fetchall())
+
+    rows = read_cache.get_or_load(key, tables, load, ttl)
+    return [dict(row) for row in rows]
@@ -0,0 +1,458 @@
+"""
+스키마 마이그레이션 모듈
+요청마다 실행되던 ensure_* 함수(SHOW COLUMNS / ALTER / CREATE TABLE IF NOT EXISTS)를
+버전 단위 마이그레이션으로 모아 서버 시작 시(또는 CLI로) 한 번만 적용합니다.
+적용된 버전은 schema_migrations 테이블에 기록됩니다.
+
+기존 운영 DB에는 이미 일부 컬럼/테이블이 존재하므로 각 마이그레이션은 멱등적으로 작성합니다.
+
+Usage:
+    python backend/schema_migrations.py            # 미적용 마이그레이션 실행
+    python backend/schema_migrations.py --status   # 적용 현황 조회
+"""
+
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional
+
+import pymysql
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable
+
+
+# ==================== 헬퍼 ====================
+
+def column_exists(cursor, table_name: str, column_name: str) -> bool:
+    cursor.execute(f"SHOW COLUMNS FROM {table_name} LIKE %s", (column_name,))
+    return cursor.fetchone() is not None
+
+
+def add_column_if_missing(cursor, table_name: str, column_name: str, definition: str) -> bool:
+    """컬럼이 없으면 추가 (추가했으면 True)"""
+    if column_exists(cursor, table_name, column_name):
+        return False
+    cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}")
+    print(f"[OK] {table_name} 테이블에 {column_name} 컬럼 추가")
+    return True
+
+
+def _try_execute(cursor, sql: str):
+    """이미 적용된 경우 실패하는 DDL (MODIFY 등) 실행 - 실패는 무시"""
+    try:
+        cursor.execute(sql)
+    except Exception:
+        pass
+
+
+# ==================== 마이그레이션 정의 ====================
+
+def _m001_students_columns(cursor):
+    """students: 신규가입 승인 시 필요한 컬럼 + career_path, profile_photo, attachments, password"""
+    for column_name, definition in [
+        ('code', "VARCHAR(50)"),
+        ('name', "VARCHAR(100)"),
+        ('birth_date', "VARCHAR(20)"),
+        ('gender', "VARCHAR(10)"),
+        ('phone', "VARCHAR(50)"),
+        ('email', "VARCHAR(100)"),
+        ('address', "TEXT"),
+        ('interests', "TEXT"),
+        ('education', "VARCHAR(255)"),
+        ('introduction', "TEXT"),
+        ('course_code', "VARCHAR(50)"),
+    ]:
+        add_column_if_missing(cursor, 'students', column_name, definition)
+    if add_column_if_missing(cursor, 'students', 'career_path', "VARCHAR(50) DEFAULT '4. 미정'"):
+        # 기존 데이터의 NULL 값을 '4. 미정'으로 업데이트
+        cursor.execute("UPDATE students SET career_path = '4. 미정' WHERE career_path IS NULL")
+    add_column_if_missing(cursor, 'students', 'profile_photo', "VARCHAR(500) DEFAULT NULL")
+    add_column_if_missing(cursor, 'students', 'attachments', "TEXT DEFAULT NULL")
+    add_column_if_missing(cursor, 'students', 'password', "VARCHAR(100) DEFAULT 'kdt2025'")
+
+
+def _m002_instructors_columns(cursor):
+    """instructors: profile_photo, attachments, password"""
+    add_column_if_missing(cursor, 'instructors', 'profile_photo', "VARCHAR(500) DEFAULT NULL")
+    add_column_if_missing(cursor, 'instructors', 'attachments', "TEXT DEFAULT NULL")
+    add_column_if_missing(cursor, 'instructors', 'password', "VARCHAR(100) DEFAULT 'kdt2025'")
+
+
+def _m003_instructor_codes_columns(cursor):
+    """instructor_codes: menu_permissions, permissions, default_screen"""
+    add_column_if_missing(cursor, 'instructor_codes', 'menu_permissions', "TEXT DEFAULT NULL")
+    add_column_if_missing(cursor, 'instructor_codes', 'permissions', "TEXT DEFAULT NULL")
+    add_column_if_missing(cursor, 'instructor_codes', 'default_screen', "VARCHAR(50) DEFAULT NULL")
+
+
+def _m004_consultations_columns(cursor):
+    """consultations: photo_urls, career_decision"""
+    add_column_if_missing(cursor, 'consultations', 'photo_urls', "TEXT")
+    add_column_if_missing(cursor, 'consultations', 'career_decision', "VARCHAR(50) DEFAULT NULL")
+
+
+def _m005_projects_columns(cursor):
+    """projects: 팀원 코드, 그룹/강사/멘토, 공유 계정 5세트, 설명, 사진"""
+    for i in range(1, 6):
+        add_column_if_missing(cursor, 'projects', f'member{i}_code', "VARCHAR(50)")
+    add_column_if_missing(cursor, 'projects', 'group_type', "VARCHAR(50)")
+    add_column_if_missing(cursor, 'projects', 'instructor_code', "VARCHAR(50)")
+    add_column_if_missing(cursor, 'projects', 'mentor_code', "VARCHAR(50)")
+    for i in range(1, 6):
+        add_column_if_missing(cursor, 'projects', f'account{i}_name', "VARCHAR(100)")
+        add_column_if_missing(cursor, 'projects', f'account{i}_id', "VARCHAR(100)")
+        add_column_if_missing(cursor, 'projects', f'account{i}_pw', "VARCHAR(100)")
+    add_column_if_missing(cursor, 'projects', 'description', "TEXT")
+    add_column_if_missing(cursor, 'projects', 'photo_urls', "TEXT")
+
+
+def _m006_training_logs(cursor):
+    """training_logs 테이블 + photo_urls"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS training_logs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            timetable_id INT NOT NULL,
+            course_code VARCHAR(50),
+            instructor_code VARCHAR(50),
+            class_date DATE,
+            content TEXT,
+            homework TEXT,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (timetable_id) REFERENCES timetables(id) ON DELETE CASCADE
+        )
+    """)
+    add_column_if_missing(cursor, 'training_logs', 'photo_urls', "TEXT")
+
+
+def _m007_courses_columns(cursor):
+    """courses: morning_hours, afternoon_hours"""
+    add_column_if_missing(cursor, 'courses', 'morning_hours', "INT DEFAULT 4")
+    add_column_if_missing(cursor, 'courses', 'afternoon_hours', "INT DEFAULT 4")
+
+
+def _m008_student_registrations(cursor):
+    """student_registrations 테이블 (profile_photo TEXT → VARCHAR(500))"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS student_registrations (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            birth_date VARCHAR(20),
+            gender VARCHAR(10),
+            phone VARCHAR(50),
+            email VARCHAR(100),
+            address TEXT,
+            interests TEXT,
+            education TEXT,
+            introduction TEXT,
+            course_code VARCHAR(50),
+            profile_photo VARCHAR(500),
+            status ENUM('pending', 'approved', 'rejected') DEFAULT 'pending',
+            processed_at DATETIME,
+            processed_by VARCHAR(50),
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_status (status),
+            INDEX idx_created_at (created_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """)
+    cursor.execute("SHOW COLUMNS FROM student_registrations LIKE 'profile_photo'")
+    col = cursor.fetchone()
+    if col and 'text' in col['Type'].lower():
+        cursor.execute("ALTER TABLE student_registrations MODIFY COLUMN profile_photo VARCHAR(500)")
+
+
+def _m009_system_settings(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS system_settings (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            setting_key VARCHAR(50) UNIQUE NOT NULL,
+            setting_value TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _m010_class_notes(cursor):
+    """class_notes 테이블 (instructor_code, photo_urls, student_id NULL, note_date DATETIME)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS class_notes (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            student_id INT,
+            instructor_code VARCHAR(50),
+            note_date DATE NOT NULL,
+            content TEXT,
+            photo_urls TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_student_date (student_id, note_date),
+            INDEX idx_instructor_code (instructor_code, note_date)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """)
+    add_column_if_missing(cursor, 'class_notes', 'instructor_code', "VARCHAR(50) AFTER student_id")
+    add_column_if_missing(cursor, 'class_notes', 'photo_urls', "TEXT AFTER content")
+    _try_execute(cursor, "ALTER TABLE class_notes MODIFY COLUMN student_id INT NULL")
+    _try_execute(cursor, "ALTER TABLE class_notes MODIFY COLUMN note_date DATETIME NOT NULL")
+
+
+def _m011_instructor_notes(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS instructor_notes (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            instructor_id INT NOT NULL,
+            note_date DATE NOT NULL,
+            content TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (instructor_id) REFERENCES instructors(id) ON DELETE CASCADE,
+            INDEX idx_instructor_date (instructor_id, note_date)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """)
+
+
+def _m012_notices(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS notices (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            title VARCHAR(500) NOT NULL,
+            content TEXT NOT NULL,
+            start_date DATE NOT NULL,
+            end_date DATE NOT NULL,
+            target_type VARCHAR(20) DEFAULT 'all' COMMENT '대상: all(전체), courses(특정반)',
+            target_courses TEXT COMMENT '대상 반 목록 (JSON)',
+            created_by VARCHAR(50),
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_dates (start_date, end_date)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """)
+    add_column_if_missing(cursor, 'notices', 'target_type', "VARCHAR(20) DEFAULT 'all' COMMENT '대상: all(전체), courses(특정반)'")
+    add_column_if_missing(cursor, 'notices', 'target_courses', "TEXT COMMENT '대상 반 목록 (JSON)'")
+
+
+def _m013_db_management_logs(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS db_management_logs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            action_type VARCHAR(50) NOT NULL COMMENT '작업 유형 (reset/restore/backup)',
+            operator_name VARCHAR(100) NOT NULL COMMENT '작업자 이름',
+            action_result VARCHAR(20) NOT NULL COMMENT '결과 (success/fail)',
+            backup_file VARCHAR(255) COMMENT '백업 파일명',
+            details TEXT COMMENT '상세 내용',
+            ip_address VARCHAR(45) COMMENT 'IP 주소',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '작업 시간',
+            INDEX idx_action_type (action_type),
+            INDEX idx_created_at (created_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='DB 관리 로그'
+    """)
+
+
+def _m014_exam_bank(cursor):
+    """exam_bank / exam_questions 테이블"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS exam_bank (
+            exam_id INT AUTO_INCREMENT PRIMARY KEY,
+            exam_name VARCHAR(255) NOT NULL,
+            subject VARCHAR(255),
+            exam_date DATE,
+            total_questions INT DEFAULT 0,
+            question_type VARCHAR(50) DEFAULT 'multiple_choice',
+            difficulty VARCHAR(50) DEFAULT 'medium',
+            instructor_code VARCHAR(50),
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_exam_date (exam_date),
+            INDEX idx_instructor (instructor_code)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS exam_questions (
+            question_id INT AUTO_INCREMENT PRIMARY KEY,
+            exam_id INT NOT NULL,
+            question_number INT NOT NULL,
+            question_text TEXT NOT NULL,
+            question_type VARCHAR(50) DEFAULT 'multiple_choice',
+            options JSON,
+            correct_answer TEXT,
+            explanation TEXT,
+            reference_page VARCHAR(100),
+            reference_document VARCHAR(255),
+            difficulty VARCHAR(50) DEFAULT 'medium',
+            points INT DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (exam_id) REFERENCES exam_bank(exam_id) ON DELETE CASCADE,
+            INDEX idx_exam (exam_id),
+            INDEX idx_question_number (question_number)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "students 컬럼 (신규가입 승인 필드, career_path, profile_photo, attachments, password)", _m001_students_columns),
+    Migration(2, "instructors 컬럼 (profile_photo, attachments, password)", _m002_instructors_columns),
+    Migration(3, "instructor_codes 컬럼 (menu_permissions, permissions, default_screen)", _m003_instructor_codes_columns),
+    Migration(4, "consultations 컬럼 (photo_urls, career_decision)", _m004_consultations_columns),
+    Migration(5, "projects 컬럼 (팀원/공유계정/설명/사진)", _m005_projects_columns),
+    Migration(6, "training_logs 테이블", _m006_training_logs),
+    Migration(7, "courses 컬럼 (morning_hours, afternoon_hours)", _m007_courses_columns),
+    Migration(8, "student_registrations 테이블", _m008_student_registrations),
+    Migration(9, "system_settings 테이블", _m009_system_settings),
+    Migration(10, "class_notes 테이블", _m010_class_notes),
+    Migration(11, "instructor_notes 테이블", _m011_instructor_notes),
+    Migration(12, "notices 테이블", _m012_notices),
+    Migration(13, "db_management_logs 테이블", _m013_db_management_logs),
+    Migration(14, "exam_bank / exam_questions 테이블", _m014_exam_bank),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# ==================== 실행기 ====================
+
+def _ensure_version_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255),
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """)
+
+
+def get_applied_versions(conn) -> set:
+    cursor = conn.cursor()
+    try:
+        _ensure_version_table(cursor)
+        cursor.execute("SELECT version FROM schema_migrations")
+        return {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def run_migrations(conn) -> List[int]:
+    """
+    미적용 마이그레이션을 버전 순서대로 실행
+
+    Returns:
+        이번에 적용한 버전 리스트
+
+    Raises:
+        실패한 마이그레이션의 예외 (이후 버전은 실행하지 않음)
+    """
+    applied = get_applied_versions(conn)
+    newly_applied = []
+
+    for migration in MIGRATIONS:
+        if migration.version in applied:
+            continue
+
+        print(f"[INFO] 스키마 마이그레이션 {migration.version:03d} 적용 중: {migration.description}")
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        try:
+            migration.apply(cursor)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (migration.version, migration.description)
+            )
+            conn.commit()
+            newly_applied.append(migration.version)
+        except Exception as e:
+            conn.rollback()
+            print(f"[ERROR] 스키마 마이그레이션 {migration.version:03d} 실패: {e}")
+            raise
+        finally:
+            cursor.close()
+
+    if newly_applied:
+        print(f"[OK] 스키마 마이그레이션 {len(newly_applied)}개 적용 완료 (현재 버전: {LATEST_VERSION})")
+    return newly_applied
+
+
+class MigrationRunner:
+    """
+    프로세스 단위로 마이그레이션을 한 번만 실행하는 관리자
+
+    서버 시작 시 DB에 연결할 수 없으면 retry_interval 간격으로
+    다음 DB 연결 시 다시 시도합니다. 적용이 끝난 뒤에는 추가 쿼리가 없습니다.
+    """
+
+    def __init__(self, retry_interval: float = 60.0):
+        self.retry_interval = retry_interval
+        self.current = False
+        self.last_error: Optional[str] = None
+        self._last_attempt = 0.0
+        self._lock = threading.Lock()
+
+    def run(self, conn) -> bool:
+        """마이그레이션 실행 (성공 시 True, 예외를 밖으로 던지지 않음)"""
+        with self._lock:
+            if self.current:
+                return True
+            self._last_attempt = time.monotonic()
+            try:
+                run_migrations(conn)
+                self.current = True
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"[WARN] 스키마 마이그레이션 미완료 ({self.retry_interval:.0f}초 후 재시도): {e}")
+            return self.current
+
+    def run_if_due(self, conn):
+        """아직 적용되지 않았고 재시도 간격이 지났으면 실행"""
+        if self.current or time.monotonic() - self._last_attempt < self.retry_interval:
+            return
+        self.run(conn)
+
+    def status(self, conn) -> dict:
+        applied = get_applied_versions(conn)
+        return {
+            "current": self.current,
+            "latest_version": LATEST_VERSION,
+            "applied_versions": sorted(applied),
+            "pending": [
+                {"version": m.version, "description": m.description}
+                for m in MIGRATIONS if m.version not in applied
+            ],
+            "last_error": self.last_error,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    from pathlib import Path
+    from dotenv import load_dotenv
+
+    load_dotenv(dotenv_path=Path(__file__).parent.parent / '.env')
+
+    parser = argparse.ArgumentParser(description="스키마 마이그레이션 실행")
+    parser.add_argument("--status", action="store_true", help="적용 현황만 조회")
+    args = parser.parse_args()
+
+    conn = pymysql.connect(
+        host=os.getenv('DB_HOST'),
+        port=int(os.getenv('DB_PORT', '3306')),
+        user=os.getenv('DB_USER'),
+        passwd=os.getenv('DB_PASSWORD'),
+        db=os.getenv('DB_NAME'),
+        charset='utf8'
+    )
+    try:
+        if args.status:
+            applied = get_applied_versions(conn)
+            conn.commit()
+            for m in MIGRATIONS:
+                mark = "✅" if m.version in applied else "⏳"
+                print(f"{mark} {m.version:03d} {m.description}")
+        else:
+            applied_now = run_migrations(conn)
+            if not applied_now:
+                print(f"[INFO] 이미 최신 스키마입니다 (버전 {LATEST_VERSION})")
+    finally:
+        conn.close()
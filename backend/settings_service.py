@@ -0,0 +1,123 @@
+"""
+시스템 설정 서비스 모듈
+system_settings 테이블을 한 번 읽어 메모리에 보관하고, AI 엔드포인트(챗봇/TTS/RAG/문제 생성)가
+API 키를 조회할 때마다 DB에 연결하지 않도록 합니다.
+
+- 갱신 시점: TTL 만료, 또는 system_settings 쓰기 커밋(다른 워커 포함) 후 무효화
+- 조회 실패 시 이전 값을 유지하고 retry_interval 후 다시 시도
+- API 키 우선순위: 요청 헤더 > DB(system_settings) > 환경 변수
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+SYSTEM_SETTINGS_TTL = float(os.getenv('SYSTEM_SETTINGS_TTL', '300'))
+
+# provider → (system_settings 키, 환경 변수 이름)
+API_KEY_SOURCES = {
+    'groq': ('groq_api_key', 'GROQ_API_KEY'),
+    'gemini': ('gemini_api_key', 'GOOGLE_CLOUD_TTS_API_KEY'),
+}
+
+
+class SystemSettingsService:
+    """system_settings 캐시 + API 키 리졸버 (스레드 안전)"""
+
+    def __init__(self, loader: Callable[[], Dict[str, str]], ttl: float = SYSTEM_SETTINGS_TTL,
+                 retry_interval: float = 10.0):
+        """
+        Args:
+            loader: {setting_key: setting_value}를 반환하는 DB 조회 함수 (블로킹)
+            ttl: 이 시간이 지나면 다음 조회 시 다시 읽음 (초)
+            retry_interval: 조회 실패 후 재시도까지 대기 시간 (초)
+        """
+        self._loader = loader
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+
+        self._settings: Dict[str, str] = {}
+        self._loaded = False
+        self._expires_at = 0.0
+        self._generation = 0  # invalidate() 호출 횟수 (조회 중 무효화 감지용)
+        self._lock = threading.Lock()
+
+        # 통계
+        self._loads = 0
+        self._load_failures = 0
+        self._invalidations = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def loaded(self) -> bool:
+        """한 번이라도 DB에서 읽은 적이 있는지"""
+        return self._loaded
+
+    def needs_refresh(self) -> bool:
+        return time.monotonic() >= self._expires_at
+
+    def refresh(self, force: bool = False) -> Dict[str, str]:
+        """만료되었으면 DB에서 다시 읽기 (동시에 여러 요청이 와도 한 번만 조회)"""
+        with self._lock:
+            if not force and not self.needs_refresh():
+                return self._settings
+            generation = self._generation
+            try:
+                settings = dict(self._loader())
+            except Exception as e:
+                self._load_failures += 1
+                self.last_error = str(e)
+                self._expires_at = time.monotonic() + self.retry_interval
+                print(f"[WARN] 시스템 설정 조회 실패 ({self.retry_interval:.0f}초 후 재시도, 이전 값 사용): {e}")
+                return self._settings
+            # dict를 통째로 교체하므로 읽는 쪽은 락 없이 snapshot()을 사용할 수 있음
+            self._settings = settings
+            self._loaded = True
+            self._loads += 1
+            self.last_error = None
+            # 조회하는 동안 무효화되었으면 만료 상태를 유지하여 다음 조회 때 다시 읽음
+            if generation == self._generation:
+                self._expires_at = time.monotonic() + self.ttl
+            return self._settings
+
+    def get_all(self) -> Dict[str, str]:
+        """전체 설정 (필요하면 DB 조회 - 블로킹)"""
+        if self.needs_refresh():
+            return dict(self.refresh())
+        return dict(self._settings)
+
+    def snapshot(self) -> Dict[str, str]:
+        """현재 보관 중인 설정 (DB 조회 없음)"""
+        return self._settings
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self.get_all().get(key, default)
+
+    def invalidate(self):
+        """다음 조회 시 DB에서 다시 읽도록 만료 처리"""
+        self._generation += 1
+        self._expires_at = 0.0
+        self._invalidations += 1
+
+    def on_tables_invalidated(self, tables: Iterable[str]):
+        """읽기 캐시 무효화 리스너 - system_settings가 바뀌었을 때만 만료"""
+        if 'system_settings' in tables:
+            self.invalidate()
+
+    def resolve_api_key(self, provider: str, header_value: Optional[str] = None) -> str:
+        """API 키 조회: 요청 헤더 > DB(system_settings) > 환경 변수 (DB 조회 없음)"""
+        setting_key, env_name = API_KEY_SOURCES[provider]
+        return header_value or self.snapshot().get(setting_key) or os.getenv(env_name, '')
+
+    def stats(self) -> dict:
+        return {
+            'loaded': self._loaded,
+            'keys': len(self._settings),
+            'ttl': self.ttl,
+            'expires_in': max(0.0, round(self._expires_at - time.monotonic(), 1)),
+            'loads': self._loads,
+            'load_failures': self._load_failures,
+            'invalidations': self._invalidations,
+            'last_error': self.last_error,
+        }
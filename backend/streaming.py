@@ -0,0 +1,74 @@
+"""
+채팅 스트리밍 응답 모듈
+LLM 응답 전체를 기다리지 않고 생성되는 토큰을 바로 내려보내는 선택형(opt-in) 스트리밍 응답을 만듭니다.
+
+요청 방법 (둘 중 하나):
+- 요청 본문에 "stream": true (형식은 "stream_format": "sse" | "ndjson", 기본 sse)
+- Accept: text/event-stream 또는 Accept: application/x-ndjson 헤더
+
+이벤트 (event, data):
+- sources: RAG 검색 결과 출처 리스트 (RAG만, 첫 이벤트)
+- token:   {"text": 생성된 텍스트 조각}
+- done:    기존 JSON 응답과 같은 형태의 최종 결과
+- error:   {"detail": 오류 메시지}
+
+SSE:    "event: token\ndata: {...}\n\n"
+NDJSON: {"event": "token", "data": {...}}\n
+"""
+
+import json
+from typing import Any, AsyncIterator, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+STREAM_MEDIA_TYPES = {
+    'sse': 'text/event-stream',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def stream_format(data: dict, request: Request) -> Optional[str]:
+    """스트리밍 요청이면 형식('sse' | 'ndjson'), 아니면 None (기존 JSON 응답)"""
+    accept = request.headers.get('accept', '')
+    requested = str(data.get('stream_format', '')).lower()
+    if requested not in STREAM_MEDIA_TYPES:
+        requested = ''
+
+    if data.get('stream'):
+        if requested:
+            return requested
+        return 'ndjson' if STREAM_MEDIA_TYPES['ndjson'] in accept else 'sse'
+    for fmt, media_type in STREAM_MEDIA_TYPES.items():
+        if media_type in accept:
+            return fmt
+    return None
+
+
+def encode_event(fmt: str, event: str, data: Any) -> str:
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    if fmt == 'ndjson':
+        return f'{{"event": "{event}", "data": {payload}}}\n'
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def event_stream_response(events: AsyncIterator[Tuple[str, Any]], fmt: str) -> StreamingResponse:
+    """(event, data) 비동기 이터레이터를 SSE/NDJSON 스트리밍 응답으로 변환"""
+    async def body():
+        async for event, data in events:
+            yield encode_event(fmt, event, data)
+
+    return StreamingResponse(
+        body(),
+        media_type=STREAM_MEDIA_TYPES[fmt],
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',  # nginx 프록시 버퍼링 끄기 (토큰 즉시 전달)
+        },
+    )
+
+
+async def iter_events(*events: Tuple[str, Any]) -> AsyncIterator[Tuple[str, Any]]:
+    """미리 정해진 이벤트 목록 (오류/즉시 응답용)"""
+    for event in events:
+        yield event
@@ -0,0 +1,91 @@
+"""
+백그라운드 워밍업 모듈
+임베딩 모델 로드처럼 오래 걸리는 초기화를 서버 시작 경로에서 분리하여 백그라운드 스레드에서 1회 실행합니다.
+초기화가 끝나기 전에도 다른 라우트는 바로 응답하고, 해당 기능의 라우트는 상태(warming)를 보고합니다.
+
+상태: idle(시작 전) → warming → ready | failed
+- failed 후 retry_after초가 지나면 다음 start()에서 다시 시도
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+IDLE, WARMING, READY, FAILED = 'idle', 'warming', 'ready', 'failed'
+
+
+class BackgroundWarmup:
+    """초기화 함수(성공 시 True 반환)를 백그라운드 스레드에서 실행하고 준비 상태를 제공 (스레드 안전)"""
+
+    def __init__(self, name: str, init_fn: Callable[[], bool], retry_after: float = 60):
+        self.name = name
+        self.init_fn = init_fn
+        self.retry_after = retry_after
+        self._state = IDLE
+        self._error: Optional[str] = None
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._attempts = 0
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def ready(self) -> bool:
+        return self._state == READY
+
+    def start(self) -> str:
+        """워밍업 시작 (이미 진행 중/완료면 그대로) - 현재 상태 반환"""
+        with self._lock:
+            if self._state in (WARMING, READY):
+                return self._state
+            if self._state == FAILED and time.monotonic() - self._finished_at < self.retry_after:
+                return self._state
+            self._state = WARMING
+            self._error = None
+            self._attempts += 1
+            self._started_at = time.monotonic()
+            self._finished_at = None
+            self._done.clear()
+        threading.Thread(target=self._run, name=f"{self.name}-warmup", daemon=True).start()
+        print(f"[INFO] {self.name} 백그라운드 워밍업 시작")
+        return WARMING
+
+    def _run(self):
+        try:
+            ok = bool(self.init_fn())
+            error = None if ok else '초기화 함수가 실패를 반환했습니다 (서버 로그 확인)'
+        except Exception as e:
+            ok, error = False, str(e)
+        with self._lock:
+            self._finished_at = time.monotonic()
+            self._state = READY if ok else FAILED
+            self._error = error
+            elapsed = self._finished_at - self._started_at
+        self._done.set()
+        if ok:
+            print(f"[OK] {self.name} 워밍업 완료 ({elapsed:.1f}초)")
+        else:
+            print(f"[ERROR] {self.name} 워밍업 실패 ({elapsed:.1f}초): {error}")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """워밍업이 끝날 때까지 대기 - 준비되었으면 True"""
+        if self._state == IDLE:
+            return False
+        self._done.wait(timeout)
+        return self.ready
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            info: Dict[str, Any] = {'state': self._state, 'attempts': self._attempts}
+            if self._started_at is not None:
+                info['elapsed_seconds'] = round((self._finished_at or now) - self._started_at, 2)
+            if self._error:
+                info['error'] = self._error
+            if self._state == FAILED:
+                info['retry_in_seconds'] = max(0, round(self.retry_after - (now - self._finished_at)))
+            return info
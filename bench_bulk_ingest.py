@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+문서 일괄 인덱싱 벤치마크 (파일 N개 전체 소요 시간)
+
+- sequential: 이전 방식 - 파일 1개씩 파싱 → 임베딩 (load_default_documents)
+- bulk: backend/rag/bulk_ingest.py - 워커 프로세스 파싱 + 내용 해시 중복 제거 + 공유 임베딩 큐
+을 같은 문서 폴더, 각각 새 벡터 DB에서 비교합니다.
+
+--folder를 주지 않으면 문서 --files개(일부는 내용이 같은 사본)를 임시 폴더에 만듭니다.
+--pdf-ratio 비율만큼은 PDF(reportlab, 파싱 비용이 큰 형식 - 영문 텍스트), 나머지는 한국어 TXT입니다.
+
+Usage:
+    python bench_bulk_ingest.py [--files 100] [--duplicates 10] [--pdf-ratio 0.5] [--workers 4]
+    python bench_bulk_ingest.py --folder backend/documents
+"""
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+from rag.bulk_ingest import BulkIngestor, collect_files  # noqa: E402
+from rag.document_loader import DocumentLoader  # noqa: E402
+from rag.vector_store import VectorStoreManager  # noqa: E402
+
+WORDS = ("바이오헬스 세포 배양 단백질 발현 유전자 편집 임상 시험 의약품 허가 품질 관리 "
+         "GMP 밸리데이션 분석법 HPLC 항체 정제 공정 규제 식약처 가이드라인 안전성 유효성").split()
+# PDF 기본 폰트(Helvetica)는 한글을 추출할 수 없으므로 PDF는 영문
+WORDS_EN = ("biohealth cell culture protein expression gene editing clinical trial drug approval quality "
+            "control GMP validation assay HPLC antibody purification process regulation guideline safety").split()
+
+
+def write_pdf(path, lines, lines_per_page=50):
+    from reportlab.pdfgen import canvas
+    pdf = canvas.Canvas(str(path))
+    for start in range(0, len(lines), lines_per_page):
+        text = pdf.beginText(40, 800)
+        text.setFont('Helvetica', 9)
+        for line in lines[start:start + lines_per_page]:
+            text.textLine(line)
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+
+
+def make_corpus(directory, files, duplicates, pdf_ratio, seed):
+    """문서 files개 생성 (그중 duplicates개는 다른 파일의 사본)"""
+    rng = random.Random(seed)
+    originals = []
+    for i in range(files - duplicates):
+        if rng.random() < pdf_ratio:
+            lines = [' '.join(rng.choice(WORDS_EN) for _ in range(12)) for _ in range(rng.randint(250, 2000))]
+            path = Path(directory) / f"{i:03d}_과목{i % 7}_강사{i % 5}.pdf"
+            write_pdf(path, lines)
+        else:
+            paragraphs = []
+            for _ in range(rng.randint(20, 120)):
+                paragraphs.append(' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 80))) + '.')
+            path = Path(directory) / f"{i:03d}_과목{i % 7}_강사{i % 5}.txt"
+            path.write_text('\n\n'.join(paragraphs), encoding='utf-8')
+        originals.append(path)
+    for i in range(duplicates):
+        original = rng.choice(originals)
+        shutil.copy(original, Path(directory) / f"{files - duplicates + i:03d}_사본{original.suffix}")
+
+
+def run(mode, folder, args):
+    """새 벡터 DB에 폴더 전체 인덱싱 - (초, 저장된 청크 수)"""
+    with tempfile.TemporaryDirectory() as db:
+        loader = DocumentLoader(chunk_size=1000, chunk_overlap=200)
+        manager = VectorStoreManager(persist_directory=db, collection_name="bench")
+        files = collect_files(folder)
+        try:
+            manager.add_documents([files[0][1]], [{'filename': '__warmup__'}])  # 모델 워밍업
+            manager.delete_source('__warmup__')
+            start = time.perf_counter()
+            if mode == 'sequential':
+                for file_path, source, metadata in files:
+                    for documents, _ in loader.iter_batches(file_path, {**metadata, 'filename': source}):
+                        manager.add_documents([doc.page_content for doc in documents],
+                                              [doc.metadata for doc in documents])
+            else:
+                BulkIngestor(manager, loader, workers=args.workers).ingest(files)
+            return time.perf_counter() - start, manager.count_documents()
+        finally:
+            manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="문서 일괄 인덱싱 벤치마크")
+    parser.add_argument("--folder", help="문서 폴더 (없으면 합성 문서 생성)")
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--duplicates", type=int, default=10)
+    parser.add_argument("--pdf-ratio", type=float, default=0.5, help="합성 문서 중 PDF 비율")
+    parser.add_argument("--workers", type=int, help="파싱 워커 프로세스 수 (기본 RAG_INGEST_WORKERS)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = None if args.folder else tempfile.mkdtemp(prefix="bench_ingest_")
+    folder = args.folder or corpus
+    try:
+        if corpus:
+            make_corpus(corpus, args.files, args.duplicates, args.pdf_ratio, args.seed)
+        file_count = len(collect_files(folder))
+        results = {mode: run(mode, folder, args) for mode in ('sequential', 'bulk')}
+    finally:
+        if corpus:
+            shutil.rmtree(corpus, ignore_errors=True)
+
+    print("=" * 60)
+    print("  문서 일괄 인덱싱 벤치마크")
+    print("=" * 60)
+    print(f"폴더 {folder}: 파일 {file_count}개")
+    print(f"\n{'mode':<12} {'초':>8} {'청크':>8}")
+    for mode, (elapsed, chunks) in results.items():
+        print(f"{mode:<12} {elapsed:>8.2f} {chunks:>8}")
+    sequential, bulk = results['sequential'][0], results['bulk'][0]
+    print(f"\nbulk / sequential = {bulk / sequential:.2f} (x{sequential / bulk:.1f} 빠름)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+채팅 스트리밍 TTFB(Time-To-First-Byte) 벤치마크
+/api/aesong-chat, /api/rag/chat을 기존 JSON 응답과 스트리밍("stream": true) 응답으로 호출하여
+첫 바이트까지의 시간과 전체 응답 시간을 비교합니다.
+
+실제 API 키 없이 측정하려면 백엔드를 모의 LLM 서버에 연결합니다.
+    python mock_llm_server.py --latency 0.3 --token-delay 0.05
+    GROQ_API_BASE=http://127.0.0.1:9100 GROQ_API_KEY=mock python backend/main.py
+
+Usage:
+    python bench_chat_ttfb.py [--repeat 10] [--endpoints aesong,rag] [--base-url http://localhost:8000]
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import requests
+
+# API 기본 URL
+BASE_URL = "http://localhost:8000"
+
+ENDPOINTS = {
+    'aesong': ("/api/aesong-chat", {"message": "오늘 수업 일정 알려줘", "model": "groq"}),
+    'rag': ("/api/rag/chat", {"message": "mRNA 백신이 무엇인가요?", "model": "groq"}),
+}
+
+
+def measure(session, url, payload, stream):
+    """(TTFB ms, 전체 ms, 첫 줄) 반환"""
+    body = dict(payload, stream=True) if stream else payload
+    start = time.perf_counter()
+    with session.post(url, json=body, stream=True, timeout=120) as response:
+        response.raise_for_status()
+        ttfb = None
+        first_line = b''
+        for chunk in response.iter_content(chunk_size=None):
+            if chunk and ttfb is None:
+                ttfb = (time.perf_counter() - start) * 1000
+                first_line = chunk.split(b'\n', 1)[0]
+        total = (time.perf_counter() - start) * 1000
+    return ttfb or total, total, first_line.decode('utf-8', errors='replace')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="채팅 스트리밍 TTFB 벤치마크")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--endpoints", default="aesong,rag", help="측정할 엔드포인트 (aesong, rag)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  채팅 스트리밍 TTFB 벤치마크")
+    print("=" * 60)
+
+    session = requests.Session()
+    failed = False
+    for name in [n.strip() for n in args.endpoints.split(",") if n.strip()]:
+        path, payload = ENDPOINTS[name]
+        url = f"{args.base_url}{path}"
+        results = {}
+        for stream in (False, True):
+            ttfbs, totals, first_line = [], [], ''
+            for _ in range(args.repeat):
+                ttfb, total, first_line = measure(session, url, payload, stream)
+                ttfbs.append(ttfb)
+                totals.append(total)
+            results[stream] = (statistics.median(ttfbs), statistics.median(totals))
+            label = "스트리밍" if stream else "JSON"
+            print(f"\n[{path} - {label}]")
+            print(f"   TTFB p50: {results[stream][0]:.1f} ms / 전체 p50: {results[stream][1]:.1f} ms")
+            print(f"   첫 줄: {first_line[:80]}")
+
+        if results[True][0] >= results[False][0]:
+            print(f"\n[FAIL] {path}: 스트리밍 TTFB가 JSON 응답보다 빠르지 않음")
+            failed = True
+        else:
+            print(f"\n[OK] {path}: TTFB {results[False][0]:.0f} ms → {results[True][0]:.0f} ms")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+GET /api/courses 쿼리 수 회귀 벤치마크
+과정을 N개씩 추가하면서 /api/courses의 DB 쿼리 수(X-DB-Query-Count 헤더)와
+응답 시간을 측정합니다. 과정 수가 늘어도 쿼리 수가 일정해야 합니다 (N+1 방지).
+
+시드 데이터는 BENCH- 접두사 과정 코드로 생성하고 종료 시 삭제합니다.
+시드는 서버를 거치지 않고 DB에 직접 기록하므로, 매 요청 전에 서버의 읽기 캐시를 비워
+캐시 미스(실제 DB 조회) 경로의 쿼리 수를 측정합니다.
+DB에 행을 쓰므로 대상 호스트는 --db-host로 명시해야 하며, 서버도 같은 DB를 사용해야 합니다.
+
+Usage:
+    python bench_courses_query_count.py --db-host <테스트 DB> [--sizes 10,50,200] [--max-queries 2] [--base-url http://localhost:8000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import pymysql
+import requests
+from dotenv import load_dotenv
+
+# API 기본 URL
+BASE_URL = "http://localhost:8000"
+CODE_PREFIX = "BENCH-"
+
+load_dotenv(dotenv_path=Path(__file__).parent / '.env')
+
+
+def db_config(host):
+    """시드용 DB 설정 - 호스트는 --db-host로만 받고 계정은 DB_USER/DB_PASSWORD 환경 변수 필수"""
+    missing = [name for name in ('DB_USER', 'DB_PASSWORD') if not os.getenv(name)]
+    if missing:
+        sys.exit(f"[ERROR] 환경 변수 {', '.join(missing)}가 필요합니다 (.env 또는 export)")
+    return {
+        'host': host,
+        'user': os.getenv('DB_USER'),
+        'passwd': os.getenv('DB_PASSWORD'),
+        'db': os.getenv('DB_NAME', 'bh2025'),
+        'charset': 'utf8',
+        'port': int(os.getenv('DB_PORT', '3306'))
+    }
+
+
+def seed_courses(conn, start, count, subject_codes):
+    """BENCH- 과정 count개와 과정별 교과목 연결 생성"""
+    cursor = conn.cursor()
+    for i in range(start, start + count):
+        code = f"{CODE_PREFIX}{i:04d}"
+        cursor.execute("""
+            INSERT INTO courses (code, name, lecture_hours, project_hours, internship_hours, capacity)
+            VALUES (%s, %s, 0, 0, 0, 0)
+        """, (code, f"벤치마크 과정 {i}"))
+        for order, subject_code in enumerate(subject_codes, start=1):
+            cursor.execute("""
+                INSERT INTO course_subjects (course_code, subject_code, display_order)
+                VALUES (%s, %s, %s)
+            """, (code, subject_code, order))
+    conn.commit()
+    cursor.close()
+
+
+def cleanup(conn):
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM course_subjects WHERE course_code LIKE %s", (f"{CODE_PREFIX}%",))
+    cursor.execute("DELETE FROM courses WHERE code LIKE %s", (f"{CODE_PREFIX}%",))
+    conn.commit()
+    cursor.close()
+
+
+def measure(base_url, repeat):
+    """(쿼리 수, 과정 수, 응답 시간 ms 리스트) 반환"""
+    session = requests.Session()
+    query_counts = set()
+    latencies = []
+    course_count = 0
+    for _ in range(repeat):
+        # 읽기 캐시 비우기 (없는 서버 버전이면 무시)
+        session.post(f"{base_url}/api/admin/read-cache/clear", timeout=10)
+        start = time.perf_counter()
+        response = session.get(f"{base_url}/api/courses", timeout=60)
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+        course_count = len(response.json())
+        header = response.headers.get("X-DB-Query-Count")
+        if header is None:
+            raise RuntimeError("X-DB-Query-Count 헤더가 없습니다 (서버 버전 확인)")
+        query_counts.add(int(header))
+    if len(query_counts) != 1:
+        raise RuntimeError(f"동일 조건에서 쿼리 수가 달라짐: {sorted(query_counts)}")
+    return query_counts.pop(), course_count, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GET /api/courses 쿼리 수 회귀 벤치마크")
+    parser.add_argument("--db-host", required=True,
+                        help="시드 데이터를 기록할 테스트 DB 호스트 (운영 DB 사용 금지, 환경 변수로 대체되지 않음)")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--sizes", default="10,50,200", help="누적 시드 과정 수 (쉼표 구분)")
+    parser.add_argument("--subjects", type=int, default=5, help="과정당 연결할 교과목 수")
+    parser.add_argument("--repeat", type=int, default=10, help="크기별 측정 횟수")
+    parser.add_argument("--max-queries", type=int, default=2, help="허용 쿼리 수 상한")
+    args = parser.parse_args()
+
+    sizes = sorted(int(x) for x in args.sizes.split(",") if x.strip())
+
+    print("=" * 60)
+    print("  GET /api/courses 쿼리 수 벤치마크")
+    print("=" * 60)
+
+    conn = pymysql.connect(**db_config(args.db_host))
+    failed = False
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT code FROM subjects ORDER BY code LIMIT %s", (args.subjects,))
+        subject_codes = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        cleanup(conn)
+
+        results = []
+        seeded = 0
+        for size in [0] + sizes:
+            if size > seeded:
+                seed_courses(conn, seeded, size - seeded, subject_codes)
+                seeded = size
+            queries, course_count, latencies = measure(args.base_url, args.repeat)
+            results.append((size, queries, course_count, latencies))
+            print(f"\n[시드 {size}개 / 전체 과정 {course_count}개]")
+            print(f"   쿼리 수: {queries}")
+            print(f"   응답 시간 p50: {statistics.median(latencies):.1f} ms / 최대: {max(latencies):.1f} ms")
+
+        query_counts = {queries for _, queries, _, _ in results}
+        print()
+        if len(query_counts) != 1:
+            print(f"[FAIL] 과정 수에 따라 쿼리 수가 증가함: {[(s, q) for s, q, _, _ in results]}")
+            failed = True
+        elif max(query_counts) > args.max_queries:
+            print(f"[FAIL] 쿼리 수 {max(query_counts)}회 > 허용 {args.max_queries}회")
+            failed = True
+        else:
+            print(f"[OK] 과정 수와 무관하게 쿼리 {query_counts.pop()}회")
+    finally:
+        cleanup(conn)
+        conn.close()
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
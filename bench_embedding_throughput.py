@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+문서 임베딩 처리량 벤치마크 (청크/초)
+
+backend/rag/embedding_pipeline.py를 그대로 사용하여 배치 크기(고정/auto)와
+워커 프로세스 수 조합별 임베딩 처리량을 측정합니다. 서버의 RAG_EMBED_BATCH / RAG_EMBED_WORKERS 선택용.
+워커 프로세스 시작/모델 로드 시간은 워밍업으로 제외합니다.
+
+기본은 길이가 제각각인 합성 한국어 청크를 사용하고, --db로 저장된 컬렉션의 실제 청크를 사용할 수 있습니다.
+
+Usage:
+    python bench_embedding_throughput.py [--chunks 1000] [--batch-sizes 8,16,32,64,auto] [--workers 1,2,4]
+    python bench_embedding_throughput.py --db backend/vector_db --collection biohealth_docs
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+from rag.embedding_backend import RAG_EMBED_BACKEND, backend_of, load_embedding_model  # noqa: E402
+from rag.embedding_pipeline import AdaptiveBatchSize, EmbeddingPipeline  # noqa: E402
+
+WORDS = ("바이오헬스 세포 배양 단백질 발현 유전자 편집 임상 시험 의약품 허가 품질 관리 "
+         "GMP 밸리데이션 분석법 HPLC 항체 정제 공정 규제 식약처 가이드라인 안전성 유효성").split()
+
+
+def synthetic_chunks(count, seed):
+    """100~1000자 사이 청크 (문서 로더 chunk_size=1000 기준)"""
+    rng = random.Random(seed)
+    chunks = []
+    for _ in range(count):
+        target = rng.randint(100, 1000)
+        words = []
+        while sum(len(word) + 1 for word in words) < target:
+            words.append(rng.choice(WORDS))
+        chunks.append(' '.join(words))
+    return chunks
+
+
+def stored_chunks(db, collection, count):
+    from rag.segment_store import SegmentStore
+    store = SegmentStore(db, collection)
+    try:
+        return [content for _, content, _, _, _ in store.chunks(count, 0)]
+    finally:
+        store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="문서 임베딩 처리량 벤치마크 (청크/초)")
+    parser.add_argument("--model", default="jhgan/ko-sroberta-multitask")
+    parser.add_argument("--cache-folder", default=str(Path(__file__).parent / 'backend' / 'model_cache'))
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--batch-sizes", default="8,16,32,64,auto")
+    parser.add_argument("--workers", default="1,2,4", help="워커 프로세스 수 목록 (CPU 코어 수를 넘으면 제외)")
+    parser.add_argument("--db", help="실제 청크를 읽을 벡터 DB 디렉토리")
+    parser.add_argument("--collection", default="biohealth_docs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backend", default=RAG_EMBED_BACKEND, help="torch / onnx / onnx-int8 (RAG_EMBED_BACKEND)")
+    args = parser.parse_args()
+
+    model = load_embedding_model(args.model, args.cache_folder, backend=args.backend)
+    texts = stored_chunks(args.db, args.collection, args.chunks) if args.db else synthetic_chunks(args.chunks, args.seed)
+    if not texts:
+        print("[ERROR] 측정할 청크가 없습니다")
+        sys.exit(1)
+
+    cpus = os.cpu_count() or 1
+    worker_counts = [w for w in (int(w) for w in args.workers.split(",") if w.strip()) if w == 1 or w <= cpus]
+    batch_sizes = [b.strip() for b in args.batch_sizes.split(",") if b.strip()]
+
+    print("=" * 60)
+    print("  문서 임베딩 처리량 벤치마크")
+    print("=" * 60)
+    print(f"모델 {args.model} ({backend_of(model)}), 청크 {len(texts)}개 (평균 {sum(map(len, texts)) // len(texts)}자), CPU {cpus}개")
+    print(f"\n{'workers':>7} {'batch':>8} {'chunks/s':>10} {'초':>8}")
+
+    baseline = None
+    for workers in worker_counts:
+        for batch in batch_sizes:
+            pipeline = EmbeddingPipeline(model, args.model, args.cache_folder,
+                                         batch_size=None if batch == 'auto' else int(batch),
+                                         workers=workers, parallel_min=0)
+            if batch == 'auto':
+                pipeline.batch = AdaptiveBatchSize()
+            try:
+                pipeline.encode(texts[:max(workers * 8, 16)])  # 워밍업 (워커 시작 + 모델 로드)
+                start = time.perf_counter()
+                pipeline.encode(texts)
+                elapsed = time.perf_counter() - start
+            finally:
+                pipeline.close()
+            if pipeline.info()['pool_failed']:
+                print(f"[WARN] workers={workers}: 워커 풀을 사용할 수 없어 현재 프로세스에서 측정됨")
+            rate = len(texts) / elapsed
+            baseline = baseline or rate
+            label = f"auto→{pipeline.batch.size}" if batch == 'auto' else batch
+            print(f"{workers:>7} {label:>8} {rate:>10.1f} {elapsed:>8.2f}  (x{rate / baseline:.2f})")
+
+
+if __name__ == "__main__":
+    main()
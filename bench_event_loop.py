@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+이벤트 루프 블로킹 부하 벤치마크
+/api/aesong-chat 호출(LLM 대기)이 진행 중일 때 /api/students 응답 지연(p50/p99)을 측정합니다.
+
+Usage:
+    python bench_event_loop.py [--requests 200] [--chat-workers 4] [--base-url http://localhost:8000]
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# API 기본 URL
+BASE_URL = "http://localhost:8000"
+
+
+def percentile(values, pct):
+    """정렬된 값에서 백분위수 계산 (nearest-rank)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def measure_students(base_url, count, concurrency):
+    """/api/students 응답 시간 측정 (ms 리스트 반환)"""
+    session = requests.Session()
+    latencies = []
+    lock = threading.Lock()
+
+    def one_request(_):
+        start = time.perf_counter()
+        try:
+            session.get(f"{base_url}/api/students", timeout=60)
+        except Exception as e:
+            print(f"   [WARN] /api/students 실패: {e}")
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_request, range(count)))
+    return latencies
+
+
+def chat_load(base_url, stop_event, counter):
+    """stop_event가 설정될 때까지 /api/aesong-chat 반복 호출"""
+    session = requests.Session()
+    while not stop_event.is_set():
+        try:
+            session.post(
+                f"{base_url}/api/aesong-chat",
+                json={"message": "오늘 수업 일정 알려줘", "model": "groq"},
+                timeout=60
+            )
+        except Exception:
+            pass
+        counter.append(1)
+
+
+def print_stats(title, latencies):
+    print(f"\n[{title}]")
+    if not latencies:
+        print("   측정값 없음")
+        return
+    print(f"   요청 수: {len(latencies)}")
+    print(f"   p50: {percentile(latencies, 50):.1f} ms")
+    print(f"   p99: {percentile(latencies, 99):.1f} ms")
+    print(f"   평균: {statistics.mean(latencies):.1f} ms / 최대: {max(latencies):.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="이벤트 루프 블로킹 부하 벤치마크")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--requests", type=int, default=200, help="/api/students 요청 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="/api/students 동시 요청 수")
+    parser.add_argument("--chat-workers", type=int, default=4, help="동시에 진행할 챗봇 호출 수")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  이벤트 루프 블로킹 벤치마크")
+    print("=" * 60)
+
+    # 1. 기준선: 챗봇 부하 없음
+    baseline = measure_students(args.base_url, args.requests, args.concurrency)
+    print_stats("챗봇 부하 없음", baseline)
+
+    # 2. 챗봇 호출이 진행 중인 상태
+    stop_event = threading.Event()
+    chat_counter = []
+    chat_threads = [
+        threading.Thread(target=chat_load, args=(args.base_url, stop_event, chat_counter), daemon=True)
+        for _ in range(args.chat_workers)
+    ]
+    for t in chat_threads:
+        t.start()
+    time.sleep(1.0)  # 챗봇 호출이 LLM 대기 상태에 들어가도록 잠시 대기
+
+    loaded = measure_students(args.base_url, args.requests, args.concurrency)
+    stop_event.set()
+    print_stats(f"챗봇 호출 {args.chat_workers}개 진행 중", loaded)
+    print(f"   (측정 중 완료된 챗봇 호출: {len(chat_counter)}회)")
+
+    if baseline and loaded:
+        ratio = percentile(loaded, 99) / max(percentile(baseline, 99), 0.001)
+        print(f"\n[STAT] p99 증가 배율: {ratio:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+LLM 응답 캐시 벤치마크
+같은 질문으로 /api/rag/chat을 반복 호출하여 캐시 미스(no_cache) / 캐시 적중 응답 시간과
+/api/admin/llm-cache 적중 수 변화를 측정합니다.
+
+Usage:
+    python bench_llm_cache.py [--repeat 10] [--model groq] [--base-url http://localhost:8000]
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import requests
+
+# API 기본 URL
+BASE_URL = "http://localhost:8000"
+QUESTIONS = [
+    "mRNA 백신이 무엇인가요?",
+    "바이오헬스 산업의 주요 분야는?",
+]
+
+
+def ask(session, base_url, question, model, no_cache):
+    start = time.perf_counter()
+    response = session.post(
+        f"{base_url}/api/rag/chat",
+        json={"message": question, "model": model, "no_cache": no_cache},
+        timeout=120
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    response.raise_for_status()
+    return elapsed, response.json().get('answer', '')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 응답 캐시 벤치마크")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--repeat", type=int, default=10, help="질문별 캐시 적중 측정 횟수")
+    parser.add_argument("--model", default="groq")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  LLM 응답 캐시 벤치마크")
+    print("=" * 60)
+
+    session = requests.Session()
+    before = session.get(f"{args.base_url}/api/admin/llm-cache", timeout=10).json()
+
+    miss_times, hit_times = [], []
+    mismatches = 0
+    for question in QUESTIONS:
+        # no_cache: 캐시를 건너뛰고 LLM 호출 (새 응답은 저장됨)
+        elapsed, answer = ask(session, args.base_url, question, args.model, no_cache=True)
+        miss_times.append(elapsed)
+        for _ in range(args.repeat):
+            elapsed, cached_answer = ask(session, args.base_url, question, args.model, no_cache=False)
+            hit_times.append(elapsed)
+            if cached_answer != answer:
+                mismatches += 1
+
+    after = session.get(f"{args.base_url}/api/admin/llm-cache", timeout=10).json()
+    hits = after['hits'] - before['hits']
+
+    print(f"\n[캐시 미스 (no_cache)] p50: {statistics.median(miss_times):.1f} ms")
+    print(f"[캐시 적중]           p50: {statistics.median(hit_times):.1f} ms / 최대: {max(hit_times):.1f} ms")
+    print(f"[캐시 통계] 적중 +{hits}회, 항목 {after['entries']}개 ({after['backend']})")
+
+    print()
+    expected_hits = len(QUESTIONS) * args.repeat
+    if hits < expected_hits or mismatches:
+        print(f"[FAIL] 적중 {hits}/{expected_hits}회, 응답 불일치 {mismatches}회")
+        sys.exit(1)
+    print(f"[OK] 반복 질문 {expected_hits}회 모두 캐시 응답 (LLM 호출 없음)")
+
+
+if __name__ == "__main__":
+    main()
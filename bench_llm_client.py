@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+공유 LLM HTTP 클라이언트 벤치마크 (모의 서버 대상)
+요청마다 새 AsyncClient를 만드는 기존 방식과 공유 ProviderClient를 비교합니다.
+모의 서버 통계로 사용된 TCP 연결 수(= 핸드셰이크 수), 최대 동시 요청 수, 재시도 결과를 확인합니다.
+
+먼저 모의 서버 실행:
+    python mock_llm_server.py --latency 0.2 --fail-rate 0.1
+
+Usage:
+    python bench_llm_client.py [--requests 100] [--concurrency 20] [--mock-url http://127.0.0.1:9100]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+from llm_client import ProviderClient  # noqa: E402
+
+MOCK_URL = "http://127.0.0.1:9100"
+CHAT_PATH = "/openai/v1/chat/completions"
+PAYLOAD = {
+    "model": "llama-3.3-70b-versatile",
+    "messages": [{"role": "user", "content": "mRNA 백신이 무엇인가요?"}],
+}
+
+
+async def reset_mock(mock_url):
+    async with httpx.AsyncClient() as client:
+        await client.post(f"{mock_url}/_mock/reset")
+
+
+async def mock_stats(mock_url):
+    async with httpx.AsyncClient() as client:
+        return (await client.get(f"{mock_url}/_mock/stats")).json()
+
+
+async def run_per_request_client(mock_url, count, concurrency):
+    """기존 방식: 요청마다 새 AsyncClient (재시도/동시성 제한 없음)"""
+    gate = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        async with gate:
+            start = time.perf_counter()
+            async with httpx.AsyncClient() as client:
+                response = await client.post(f"{mock_url}{CHAT_PATH}", json=PAYLOAD, timeout=30)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    await asyncio.gather(*(one() for _ in range(count)))
+    return latencies, errors
+
+
+async def run_shared_client(mock_url, count, concurrency, max_concurrency):
+    """공유 ProviderClient (keep-alive + 재시도 + 제공자별 동시성 제한)"""
+    client = ProviderClient('mock', mock_url, max_concurrency=max_concurrency, backoff_base=0.05)
+    gate = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        async with gate:
+            start = time.perf_counter()
+            response = await client.post(CHAT_PATH, json=PAYLOAD)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    try:
+        await asyncio.gather(*(one() for _ in range(count)))
+        return latencies, errors, client.stats()
+    finally:
+        await client.aclose()
+
+
+def report(title, latencies, errors, server):
+    print(f"\n[{title}]")
+    print(f"   p50: {statistics.median(latencies):.1f} ms / 최대: {max(latencies):.1f} ms")
+    print(f"   실패 응답: {errors}개")
+    print(f"   서버 측: 요청 {server['requests']}회, TCP 연결 {server['connections']}개, "
+          f"최대 동시 요청 {server['max_in_flight']}개, 주입된 실패 {server['failures']}회")
+
+
+async def main_async(args):
+    print("=" * 60)
+    print("  공유 LLM HTTP 클라이언트 벤치마크")
+    print("=" * 60)
+
+    await reset_mock(args.mock_url)
+    latencies, errors = await run_per_request_client(args.mock_url, args.requests, args.concurrency)
+    report("요청마다 새 클라이언트", latencies, errors, await mock_stats(args.mock_url))
+
+    await reset_mock(args.mock_url)
+    latencies, shared_errors, client_stats = await run_shared_client(
+        args.mock_url, args.requests, args.concurrency, args.max_concurrency
+    )
+    server = await mock_stats(args.mock_url)
+    report("공유 클라이언트", latencies, shared_errors, server)
+    print(f"   클라이언트 측: 재시도 {client_stats['retries']}회, 최종 실패 {client_stats['failures']}회")
+
+    print()
+    failed = False
+    if server['connections'] > args.max_concurrency:
+        print(f"[FAIL] 연결 수 {server['connections']}개 > 동시성 제한 {args.max_concurrency}개 (keep-alive 미사용)")
+        failed = True
+    if server['max_in_flight'] > args.max_concurrency:
+        print(f"[FAIL] 최대 동시 요청 {server['max_in_flight']}개 > 제한 {args.max_concurrency}개")
+        failed = True
+    if not failed:
+        print(f"[OK] TCP 연결 {server['connections']}개로 {args.requests}개 요청 처리")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="공유 LLM HTTP 클라이언트 벤치마크")
+    parser.add_argument("--mock-url", default=MOCK_URL)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20, help="동시에 보내는 요청 수")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="공유 클라이언트의 제공자별 동시성 제한")
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(main_async(args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
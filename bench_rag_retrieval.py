@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+RAG 검색 방식별 오프라인 평가 (dense / sparse / hybrid)
+
+저장된 컬렉션(backend/vector_db/biohealth_docs)에 대해 검색 방식별
+hit@k, MRR@k, 쿼리 지연(p50/p95)을 비교합니다. LLM 호출은 하지 않습니다.
+
+평가 쿼리:
+- --queries 지정 시: JSONL, 한 줄에 {"question": ..., "expected_source": 파일명} 또는
+  {"question": ..., "expected_text": 정답 청크에 포함된 문구} (둘 다 있으면 둘 중 하나만 맞아도 적중)
+- 미지정 시: 컬렉션에서 청크를 무작위로 골라 연속된 단어 --window개를 쿼리로 사용
+  (정답 = 그 문구가 포함된 청크). 약품명/조항 번호처럼 정확히 일치하는 용어 검색에 가까운 조건
+
+Usage:
+    python bench_rag_retrieval.py [--db backend/vector_db] [--collection biohealth_docs] [--k 5]
+    python bench_rag_retrieval.py --queries eval_queries.jsonl --modes dense,hybrid
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+from rag.simple_vector_store import SEARCH_MODES, SimpleVectorStore  # noqa: E402
+
+
+def percentile(values, pct):
+    """정렬된 값에서 백분위수 계산 (nearest-rank)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def load_queries(path):
+    queries = []
+    with open(path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if not item.get('question') or not (item.get('expected_source') or item.get('expected_text')):
+                print(f"[WARN] {path}:{line_no} question과 expected_source/expected_text가 필요합니다 - 건너뜀")
+                continue
+            queries.append(item)
+    return queries
+
+
+def sample_queries(store, count, window, seed):
+    """청크에서 연속된 단어 window개를 잘라 쿼리로 사용"""
+    rng = random.Random(seed)
+    total = store.count()
+    queries = []
+    for offset in rng.sample(range(total), min(total, count * 3)):
+        words = store.get_all_documents(limit=1, offset=offset)[0]['content'].split()
+        if len(words) < window:
+            continue
+        start = rng.randrange(len(words) - window + 1)
+        phrase = ' '.join(words[start:start + window])
+        queries.append({'question': phrase, 'expected_text': phrase})
+        if len(queries) == count:
+            break
+    return queries
+
+
+def is_hit(result, query):
+    metadata = result.get('metadata', {})
+    source = query.get('expected_source')
+    if source and source in (metadata.get('original_filename'), metadata.get('filename'), metadata.get('source')):
+        return True
+    text = query.get('expected_text')
+    return bool(text) and text in result.get('content', '')
+
+
+def evaluate(store, queries, mode, k):
+    """(hit@k, MRR@k, 지연 ms 리스트)"""
+    hits, reciprocal_ranks, latencies = 0, [], []
+    for query in queries:
+        start = time.perf_counter()
+        results = store.similarity_search(query['question'], k=k, mode=mode)
+        latencies.append((time.perf_counter() - start) * 1000)
+        rank = next((i for i, result in enumerate(results, 1) if is_hit(result, query)), None)
+        hits += rank is not None
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+    return hits / len(queries), statistics.mean(reciprocal_ranks), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG 검색 방식별 hit@k / MRR / 지연 평가")
+    parser.add_argument("--db", default=str(Path(__file__).parent / 'backend' / 'vector_db'), help="벡터 DB 디렉토리")
+    parser.add_argument("--collection", default="biohealth_docs")
+    parser.add_argument("--queries", help="평가 쿼리 JSONL (미지정 시 청크에서 자동 생성)")
+    parser.add_argument("--count", type=int, default=200, help="자동 생성 쿼리 수")
+    parser.add_argument("--window", type=int, default=6, help="자동 생성 쿼리 단어 수")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--modes", default=",".join(SEARCH_MODES))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    store = SimpleVectorStore(collection_name=args.collection, persist_directory=args.db)
+    if store.count() == 0:
+        print(f"[ERROR] 컬렉션이 비어 있습니다: {args.db}/{args.collection}")
+        sys.exit(1)
+    queries = load_queries(args.queries) if args.queries else sample_queries(store, args.count, args.window, args.seed)
+    if not queries:
+        print("[ERROR] 평가할 쿼리가 없습니다")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("  RAG 검색 방식별 평가")
+    print("=" * 60)
+    info = store.index_info()
+    print(f"청크 {store.count()}개, 인덱스 {info.get('type')}, 어휘 인덱스 {'사용' if info.get('lexical') else '없음'}")
+    print(f"쿼리 {len(queries)}개 ({'파일' if args.queries else f'자동 생성, {args.window}단어'}), k={args.k}")
+    if not info.get('lexical'):
+        print("[WARN] SQLite FTS5를 쓸 수 없어 sparse/hybrid는 dense로 동작합니다")
+
+    store.similarity_search(queries[0]['question'], k=args.k, mode='dense')  # 모델/캐시 워밍업
+
+    print(f"\n{'mode':<8} {'hit@' + str(args.k):>8} {'MRR':>8} {'p50 ms':>9} {'p95 ms':>9}")
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        hit_rate, mrr, latencies = evaluate(store, queries, mode, args.k)
+        print(f"{mode:<8} {hit_rate:>8.3f} {mrr:>8.3f} {statistics.median(latencies):>9.2f} {percentile(latencies, 95):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
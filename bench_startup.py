@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+서버 시작 시간 벤치마크 (프로세스 시작 → 첫 응답 / RAG 준비)
+
+backend에서 `uvicorn main:app`을 RAG_WARMUP 방식별로 새로 띄우고
+- 첫 응답: 프로세스 시작부터 --probe 경로(기본 /docs, DB 미사용)가 처음 200을 반환할 때까지
+- RAG 준비: /api/rag/status가 initialized=true를 반환할 때까지
+를 측정합니다. background/lazy는 첫 응답이 모델 로드를 기다리지 않아야 합니다.
+
+Usage:
+    python bench_startup.py [--modes blocking,background,lazy] [--repeat 3] [--probe /docs]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+BACKEND_DIR = Path(__file__).parent / 'backend'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until(check, deadline):
+    """check()가 True가 될 때까지 폴링 (시간 초과면 False)"""
+    while time.perf_counter() < deadline:
+        try:
+            if check():
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    return False
+
+
+def measure(mode, probe, timeout, log):
+    """서버 1회 시작 - (첫 응답 초, RAG 준비 초 또는 None)"""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {**os.environ, 'RAG_WARMUP': mode}
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    deadline = start + timeout
+    try:
+        if not wait_until(lambda: requests.get(base_url + probe, timeout=2).status_code == 200, deadline):
+            return None, None
+        first_response = time.perf_counter() - start
+
+        if mode == 'lazy':
+            # lazy는 첫 RAG 요청이 워밍업을 시작시킴
+            requests.get(f"{base_url}/api/rag/documents", timeout=5)
+        ready = wait_until(lambda: requests.get(f"{base_url}/api/rag/status", timeout=5).json().get('initialized'),
+                           deadline)
+        return first_response, (time.perf_counter() - start) if ready else None
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def summary(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return f"{'-':>10}"
+    return f"{statistics.median(values):>10.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="서버 시작 → 첫 응답 / RAG 준비 시간 벤치마크")
+    parser.add_argument("--modes", default="blocking,background,lazy", help="RAG_WARMUP 방식 목록")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--probe", default="/docs", help="첫 응답 측정 경로")
+    parser.add_argument("--timeout", type=float, default=180, help="1회 측정 제한 시간(초)")
+    parser.add_argument("--log", default=os.devnull, help="서버 출력 저장 파일")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  서버 시작 시간 벤치마크 (uvicorn main:app)")
+    print("=" * 60)
+    print(f"첫 응답 경로 {args.probe}, {args.repeat}회 중앙값 (초)")
+    print(f"\n{'RAG_WARMUP':<12} {'첫 응답':>10} {'RAG 준비':>10}")
+
+    with open(args.log, 'a', encoding='utf-8') as log:
+        for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+            first, ready = [], []
+            for _ in range(args.repeat):
+                first_response, rag_ready = measure(mode, args.probe, args.timeout, log)
+                if first_response is None:
+                    print(f"[WARN] {mode}: {args.timeout:.0f}초 안에 서버가 응답하지 않았습니다 (--log로 출력 확인)")
+                first.append(first_response)
+                ready.append(rag_ready)
+            print(f"{mode:<12} {summary(first)} {summary(ready)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+FAISS 인덱스 종류별 recall@k / 검색 지연 벤치마크
+Flat(전수 검색)을 정답으로 두고 HNSW, IVF-PQ의 recall@k와 단일 쿼리 지연(p50/p99)을 비교합니다.
+인덱스 생성은 backend/rag/index_factory.py를 그대로 사용하므로 서버와 같은 파라미터가 적용됩니다
+(RAG_HNSW_EF_SEARCH, RAG_IVF_NPROBE, RAG_IVFPQ_RERANK 등 환경 변수로 조정).
+
+기본은 군집 구조를 가진 합성 벡터를 사용하고, --vectors로 실제 컬렉션의 임베딩
+(압축 후 backend/vector_db/biohealth_docs.segments/seg_NNNNNN.npy)을 지정할 수 있습니다.
+
+Usage:
+    python bench_vector_index.py [--n 50000] [--dim 768] [--queries 200] [--k 5] [--types flat,hnsw,ivfpq]
+    python bench_vector_index.py --vectors backend/vector_db/biohealth_docs.segments/seg_000042.npy
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / 'backend' / 'rag'))
+import index_factory  # noqa: E402
+
+
+def percentile(values, pct):
+    """정렬된 값에서 백분위수 계산 (nearest-rank)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def synthetic_vectors(n, dim, queries, clusters, seed):
+    """군집 중심 주변에 분포한 벡터 (문서 임베딩처럼 주제별로 모여 있는 분포)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype('float32')
+    data = centers[rng.integers(0, clusters, n)] + 0.35 * rng.standard_normal((n, dim)).astype('float32')
+    query = centers[rng.integers(0, clusters, queries)] + 0.35 * rng.standard_normal((queries, dim)).astype('float32')
+    return data.astype('float32'), query.astype('float32')
+
+
+def sample_queries(data, queries, seed):
+    """실제 임베딩에서 쿼리 샘플링 (약간의 잡음 추가)"""
+    rng = np.random.default_rng(seed)
+    picked = data[rng.choice(len(data), size=min(queries, len(data)), replace=False)]
+    noise = 0.05 * rng.standard_normal(picked.shape).astype('float32') * np.abs(picked).mean()
+    return (picked + noise).astype('float32')
+
+
+def run(index, query, k, vectors=None):
+    """(결과 id 배열, 쿼리별 지연 ms 리스트) - 서버처럼 한 번에 1개 쿼리"""
+    ids = np.empty((len(query), k), dtype='int64')
+    latencies = []
+    fetch = (lambda found: vectors[found]) if vectors is not None else None  # ivfpq 재정렬용 원본 벡터
+    for i in range(len(query)):
+        start = time.perf_counter()
+        _, found = index_factory.search(index, query[i:i + 1], k, fetch)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids[i] = found[0]
+    return ids, latencies
+
+
+def recall_at_k(found, truth):
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS 인덱스 recall@k / 지연 벤치마크")
+    parser.add_argument("--n", type=int, default=50000, help="합성 벡터 수")
+    parser.add_argument("--dim", type=int, default=768, help="합성 벡터 차원 (ko-sroberta: 768)")
+    parser.add_argument("--clusters", type=int, default=200, help="합성 데이터 군집 수")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--types", default="flat,hnsw,ivfpq")
+    parser.add_argument("--vectors", help="실제 임베딩 .npy 파일 (지정 시 합성 데이터 대신 사용)")
+    parser.add_argument("--min-recall", type=float, default=0.9, help="hnsw 최소 recall@k")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.vectors:
+        data = np.ascontiguousarray(np.load(args.vectors), dtype='float32')
+        query = sample_queries(data, args.queries, args.seed)
+    else:
+        data, query = synthetic_vectors(args.n, args.dim, args.queries, args.clusters, args.seed)
+    dim = data.shape[1]
+
+    print("=" * 60)
+    print("  FAISS 인덱스 recall@k / 지연 벤치마크")
+    print("=" * 60)
+    print(f"벡터 {len(data)}개 x {dim}차원, 쿼리 {len(query)}개, k={args.k}")
+
+    # 정답: Flat 전수 검색
+    flat = index_factory.build_index('flat', dim, data)
+    truth, _ = run(flat, query, args.k)
+
+    results = []
+    for index_type in [t.strip() for t in args.types.split(",") if t.strip()]:
+        if index_type == 'ivfpq' and len(data) < index_factory.IVFPQ_MIN_TRAIN:
+            print(f"\n[SKIP] ivfpq: 학습에 최소 {index_factory.IVFPQ_MIN_TRAIN}개 벡터 필요")
+            continue
+        start = time.perf_counter()
+        index = index_factory.build_index(index_type, dim, data)
+        build_s = time.perf_counter() - start
+        found, latencies = run(index, query, args.k, data)
+        recall = recall_at_k(found, truth)
+        results.append((index_type, recall, latencies))
+        print(f"\n[{index_type}] {index_factory.describe(index)}")
+        print(f"   생성: {build_s:.1f}초")
+        print(f"   recall@{args.k}: {recall:.3f}")
+        print(f"   지연 p50: {statistics.median(latencies):.3f} ms / p99: {percentile(latencies, 99):.3f} ms")
+
+    print()
+    failed = False
+    flat_p50 = next((statistics.median(l) for t, _, l in results if t == 'flat'), None)
+    for index_type, recall, latencies in results:
+        if index_type == 'flat' or flat_p50 is None:
+            continue
+        speedup = flat_p50 / max(statistics.median(latencies), 1e-6)
+        print(f"[INFO] {index_type}: flat 대비 {speedup:.1f}배 빠름, recall@{args.k} {recall:.3f}")
+        if index_type == 'hnsw' and recall < args.min_recall:
+            print(f"[FAIL] hnsw recall@{args.k} {recall:.3f} < {args.min_recall} (RAG_HNSW_EF_SEARCH 증가 필요)")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+벡터 스토어 저장 비용 벤치마크 (추가 1회당 디스크 쓰기량/시간)
+
+문서 업로드 1건(청크 --batch개)을 추가할 때, 컬렉션 크기별로
+- legacy: 이전 방식 - 인덱스(.index) + 전체 벡터(.npy) + 전체 메타데이터(.pkl) 재저장
+- segment: backend/rag/segment_store.py - 새 청크만 세그먼트 + SQLite 행으로 기록
+의 쓰기량과 시간을 비교합니다. segment 방식은 컬렉션 크기와 관계없이 일정해야 합니다.
+
+Usage:
+    python bench_vector_persistence.py [--sizes 1000,10000,50000] [--dim 768] [--batch 20] [--repeat 5]
+"""
+import argparse
+import os
+import pickle
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / 'backend' / 'rag'))
+from segment_store import SegmentStore  # noqa: E402
+
+
+def chunk_texts(start, count):
+    return [f"청크 {i}: 바이오헬스 교육 과정 문서 내용 " * 8 for i in range(start, start + count)]
+
+
+def legacy_append(directory, index, vectors, documents, metadatas):
+    """이전 방식: 추가할 때마다 컬렉션 전체를 다시 저장 - (bytes, 초)"""
+    start = time.perf_counter()
+    paths = [os.path.join(directory, name) for name in ('c.index', 'c.vectors.npy', 'c.pkl')]
+    faiss.write_index(index, paths[0])
+    with open(paths[1], 'wb') as f:
+        np.save(f, vectors)
+    with open(paths[2], 'wb') as f:
+        pickle.dump({'documents': documents, 'metadatas': metadatas}, f)
+    elapsed = time.perf_counter() - start
+    return sum(os.path.getsize(p) for p in paths), elapsed
+
+
+def segment_append(store, vectors, ids, texts, metadatas):
+    """세그먼트 방식: 새 청크만 기록 - (bytes, 초)"""
+    before = store.disk_usage()
+    start = time.perf_counter()
+    store.append(vectors, ids, texts, metadatas, [m['filename'] for m in metadatas])
+    elapsed = time.perf_counter() - start
+    return store.disk_usage() - before, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 스토어 추가 1회당 저장 비용 벤치마크")
+    parser.add_argument("--sizes", default="1000,10000,50000", help="기존 컬렉션 크기 (쉼표 구분)")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--batch", type=int, default=20, help="추가 1회당 청크 수 (문서 1건)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print("=" * 70)
+    print("  벡터 스토어 저장 비용 벤치마크 (추가 1회 = 청크 %d개)" % args.batch)
+    print("=" * 70)
+    print(f"{'컬렉션':>8} | {'legacy 쓰기':>12} {'시간':>9} | {'segment 쓰기':>12} {'시간':>9}")
+
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        directory = tempfile.mkdtemp(prefix="bench_vector_")
+        try:
+            vectors = rng.standard_normal((size, args.dim)).astype('float32')
+            documents = chunk_texts(0, size)
+            metadatas = [{'filename': f"doc_{i // args.batch}.pdf"} for i in range(size)]
+            index = faiss.IndexFlatIP(args.dim)
+            index.add(vectors)
+
+            store = SegmentStore(directory, "c")
+            store.append(vectors, list(range(size)), documents, metadatas, [m['filename'] for m in metadatas])
+
+            legacy, segment = [], []
+            next_id = size
+            for _ in range(args.repeat):
+                new_vectors = rng.standard_normal((args.batch, args.dim)).astype('float32')
+                new_texts = chunk_texts(next_id, args.batch)
+                new_metadatas = [{'filename': f"new_{next_id}.pdf"}] * args.batch
+                new_ids = list(range(next_id, next_id + args.batch))
+                next_id += args.batch
+
+                index.add(new_vectors)
+                vectors = np.vstack([vectors, new_vectors])
+                documents += new_texts
+                metadatas += new_metadatas
+                legacy.append(legacy_append(directory, index, vectors, documents, metadatas))
+                segment.append(segment_append(store, new_vectors, new_ids, new_texts, new_metadatas))
+            store.close()
+
+            legacy_bytes = statistics.median(b for b, _ in legacy)
+            legacy_ms = statistics.median(t for _, t in legacy) * 1000
+            segment_bytes = statistics.median(b for b, _ in segment)
+            segment_ms = statistics.median(t for _, t in segment) * 1000
+            print(f"{size:>8} | {legacy_bytes / 1e6:>9.2f} MB {legacy_ms:>7.1f}ms | "
+                  f"{segment_bytes / 1e3:>9.1f} KB {segment_ms:>7.1f}ms")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
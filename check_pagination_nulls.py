@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+키셋 페이지네이션 NULL 정렬 키 검증 스크립트
+NULL이 섞인 정렬 키로 모든 페이지를 끝까지 넘기면서 행이 누락/중복되지 않는지 확인합니다.
+
+SQLite 메모리 DB를 사용합니다. SQLite도 MySQL과 같이 NULL을 가장 작은 값으로
+정렬하므로 (ASC: 맨 앞, DESC: 맨 뒤) Paginator가 만든 쿼리를 그대로 검증할 수 있습니다.
+
+Usage:
+    python check_pagination_nulls.py [--rows 200] [--limits 1,2,3,7,50]
+"""
+import argparse
+import random
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+
+from pagination import Paginator  # noqa: E402
+
+
+class DictCursor:
+    """pymysql DictCursor처럼 %s 파라미터를 받고 dict 행을 반환하는 sqlite3 래퍼"""
+
+    def __init__(self, conn):
+        self._cursor = conn.cursor()
+
+    def execute(self, query, params):
+        self._cursor.execute(query.replace('%s', '?'), params)
+
+    def fetchall(self):
+        names = [col[0] for col in self._cursor.description]
+        return [dict(zip(names, row)) for row in self._cursor.fetchall()]
+
+
+def build_db(rows, seed):
+    """training_logs LEFT JOIN timetables와 같이 정렬 키에 NULL이 섞인 테이블 생성"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE timetables (id INTEGER PRIMARY KEY, class_date TEXT, start_time TEXT)")
+    conn.execute("CREATE TABLE training_logs (id INTEGER PRIMARY KEY, timetable_id INTEGER)")
+    dates = [None, '2025-01-02', '2025-01-03', '2025-01-04']
+    times = [None, '09:00:00', '13:00:00']
+    for i in range(1, rows + 1):
+        conn.execute("INSERT INTO timetables VALUES (?, ?, ?)", (i, rng.choice(dates), rng.choice(times)))
+        # 일부 훈련일지는 시간표가 없어 LEFT JOIN 결과가 모두 NULL
+        timetable_id = i if rng.random() < 0.8 else None
+        conn.execute("INSERT INTO training_logs VALUES (?, ?)", (i, timetable_id))
+    return conn
+
+
+def walk(conn, limit, descending):
+    """모든 페이지를 순회하며 반환된 id 목록 반환"""
+    ids = []
+    next_cursor = None
+    for _ in range(10000):
+        page = Paginator(
+            [('t.class_date', 'class_date'), ('t.start_time', 'start_time'), ('tl.id', 'id')],
+            descending=descending, limit=limit, cursor=next_cursor, table_alias='tl',
+            nullable=['class_date', 'start_time'],
+        )
+        query = f"""
+            SELECT {page.select('tl.id')}
+            FROM training_logs tl
+            LEFT JOIN timetables t ON tl.timetable_id = t.id
+            WHERE 1=1
+        """
+        query, params = page.apply(query, [])
+        rows, next_cursor = page.fetch(DictCursor(conn), query, params)
+        ids.extend(row['id'] for row in rows)
+        if next_cursor is None:
+            return ids
+    raise RuntimeError("페이지 순회가 끝나지 않음")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="키셋 페이지네이션 NULL 정렬 키 검증")
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--limits", default="1,2,3,7,50")
+    parser.add_argument("--seed", type=int, default=2025)
+    args = parser.parse_args()
+
+    conn = build_db(args.rows, args.seed)
+    failed = False
+    for descending in (False, True):
+        direction = "DESC" if descending else "ASC"
+        expected = [row[0] for row in conn.execute(f"""
+            SELECT tl.id FROM training_logs tl
+            LEFT JOIN timetables t ON tl.timetable_id = t.id
+            ORDER BY t.class_date {direction}, t.start_time {direction}, tl.id {direction}
+        """)]
+        for limit in (int(x) for x in args.limits.split(",") if x.strip()):
+            ids = walk(conn, limit, descending)
+            if ids == expected:
+                print(f"[OK] {direction} limit={limit}: {len(ids)}행")
+            else:
+                missing = len(set(expected) - set(ids))
+                print(f"[FAIL] {direction} limit={limit}: {len(ids)}/{len(expected)}행, 누락 {missing}개")
+                failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+로컬 모의 LLM 서버
+GROQ(chat/completions) / Gemini(generateContent) / Google Cloud TTS(text:synthesize) 응답 형식을 흉내 내어
+실제 API 키나 외부 네트워크 없이 공유 HTTP 클라이언트(backend/llm_client.py)를 테스트합니다.
+
+- --latency: 응답 지연 (초, 스트리밍은 첫 토큰까지의 지연)
+- --token-delay: 스트리밍 요청("stream": true / streamGenerateContent)의 토큰 간 지연 (초)
+- --fail-rate: 이 비율만큼 503 또는 429(Retry-After) 응답 → 재시도 동작 확인
+- GET /_mock/stats: 요청 수, 사용된 TCP 연결 수(클라이언트 포트 기준), 최대 동시 요청 수
+
+백엔드를 모의 서버로 연결:
+    GROQ_API_BASE=http://127.0.0.1:9100 GEMINI_API_BASE=http://127.0.0.1:9100 \\
+    GOOGLE_TTS_API_BASE=http://127.0.0.1:9100 python backend/main.py
+
+Usage:
+    python mock_llm_server.py [--port 9100] [--latency 0.2] [--token-delay 0.05] [--fail-rate 0.1]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import random
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Mock LLM Server")
+
+config = {'latency': 0.2, 'fail_rate': 0.0, 'token_delay': 0.05}
+stats = {'requests': 0, 'failures': 0, 'in_flight': 0, 'max_in_flight': 0}
+connections = set()
+
+
+async def simulate(request: Request):
+    """지연/실패 시뮬레이션 (실패 시 오류 응답 반환)"""
+    stats['requests'] += 1
+    if request.client:
+        connections.add((request.client.host, request.client.port))
+    stats['in_flight'] += 1
+    stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+    try:
+        await asyncio.sleep(config['latency'])
+    finally:
+        stats['in_flight'] -= 1
+
+    if random.random() < config['fail_rate']:
+        stats['failures'] += 1
+        if random.random() < 0.5:
+            return JSONResponse({"error": "rate limited"}, status_code=429, headers={"Retry-After": "0"})
+        return JSONResponse({"error": "service unavailable"}, status_code=503)
+    return None
+
+
+def mock_answer(text: str) -> list:
+    """스트리밍용 토큰 목록 (단어 단위)"""
+    words = f"[mock] {text[:50]} 에 대한 모의 응답입니다.".split(' ')
+    return [word + ' ' for word in words]
+
+
+def sse_stream(chunks, done_marker: bool):
+    """chunk dict 목록을 SSE로 전송 (토큰 간 지연 적용)"""
+    async def body():
+        for chunk in chunks:
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            await asyncio.sleep(config['token_delay'])
+        if done_marker:
+            yield "data: [DONE]\n\n"
+    return StreamingResponse(body(), media_type="text/event-stream")
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    error = await simulate(request)
+    if error:
+        return error
+    body = await request.json()
+    last_message = body.get('messages', [{}])[-1].get('content', '')
+    tokens = mock_answer(last_message)
+    if body.get('stream'):
+        return sse_stream([
+            {"id": "mock-chat", "choices": [{"index": 0, "delta": {"content": token}}]}
+            for token in tokens
+        ], done_marker=True)
+    # 비스트리밍 응답은 전체 생성 시간만큼 기다린 뒤 한 번에 반환
+    await asyncio.sleep(config['token_delay'] * len(tokens))
+    return {
+        "id": "mock-chat",
+        "model": body.get('model'),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": ''.join(tokens).strip()},
+            "finish_reason": "stop"
+        }]
+    }
+
+
+@app.post("/v1beta/models/{model_action}")
+async def generate_content(model_action: str, request: Request):
+    error = await simulate(request)
+    if error:
+        return error
+    body = await request.json()
+    text = body.get('contents', [{}])[0].get('parts', [{}])[0].get('text', '')
+    tokens = mock_answer(text)
+    if model_action.endswith(':streamGenerateContent'):
+        return sse_stream([
+            {"candidates": [{"content": {"parts": [{"text": token}], "role": "model"}}]}
+            for token in tokens
+        ], done_marker=False)
+    await asyncio.sleep(config['token_delay'] * len(tokens))
+    return {
+        "candidates": [{
+            "content": {"parts": [{"text": ''.join(tokens).strip()}], "role": "model"}
+        }]
+    }
+
+
+@app.post("/v1/text:synthesize")
+async def synthesize(request: Request):
+    error = await simulate(request)
+    if error:
+        return error
+    body = await request.json()
+    text = body.get('input', {}).get('text', '')
+    return {"audioContent": base64.b64encode(text.encode('utf-8')).decode('ascii')}
+
+
+@app.get("/_mock/stats")
+async def get_stats():
+    return {**stats, 'connections': len(connections)}
+
+
+@app.post("/_mock/reset")
+async def reset_stats():
+    stats.update(requests=0, failures=0, in_flight=0, max_in_flight=0)
+    connections.clear()
+    return {**stats, 'connections': 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 모의 LLM 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.2, help="응답 지연 (초)")
+    parser.add_argument("--token-delay", type=float, default=0.05, help="스트리밍 토큰 간 지연 (초)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="429/503 응답 비율 (0~1)")
+    args = parser.parse_args()
+
+    config['latency'] = args.latency
+    config['fail_rate'] = args.fail_rate
+    config['token_delay'] = args.token_delay
+    print(f"[INFO] 모의 LLM 서버: http://{args.host}:{args.port} (지연 {args.latency}초, 실패율 {args.fail_rate:.0%})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()